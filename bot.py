@@ -1,3 +1,4 @@
+import hmac
 import logging
 import traceback
 
@@ -11,19 +12,40 @@ from aiogram.enums import ParseMode
 from fastapi import FastAPI, Request, status, HTTPException
 from db import create_db_and_tables
 import uvicorn
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from processing.processing import processing_router
 from services.notification import NotificationService
-from jobs.payment_timeout_job import PaymentTimeoutJob
+from jobs.payment_event_worker import PaymentEventWorker
+from jobs.registry import create_scheduler
+from middleware.bot_api_metrics import BotApiMetricsMiddleware
+from services.metrics import MetricsService
+from utils.loop_monitor import LoopMonitor
+from utils.order_lock import OrderLock
+from utils.reference_code import ReferenceCode
+from crypto_api.http_client import HttpClient
+from services.shipping import ShippingService
+from services.statistics_chart import StatisticsChartService
 
 redis = Redis(host=config.REDIS_HOST, password=config.REDIS_PASSWORD)
 bot = Bot(config.TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+bot.session.middleware(BotApiMetricsMiddleware())
 dp = Dispatcher(storage=RedisStorage(redis))
+# Payment webhook / timeout job order locks span processes via Redis
+OrderLock.configure(redis)
 app = FastAPI()
 app.include_router(processing_router)
 
-# Initialize payment timeout job
-payment_timeout_job = PaymentTimeoutJob(check_interval_seconds=60)
+# Initialize job scheduler (payment timeouts, reconciliation, item archive, prices, wallet snapshots,
+# data retention); with several instances only the Redis leader runs the jobs
+scheduler = create_scheduler(redis)
+
+# Initialize payment event worker (processes queued KryptoExpress webhook events)
+payment_event_worker = PaymentEventWorker(
+    concurrency=config.PAYMENT_EVENT_WORKER_CONCURRENCY,
+    max_attempts=config.PAYMENT_EVENT_MAX_ATTEMPTS,
+    retry_base_seconds=config.PAYMENT_EVENT_RETRY_BASE_SECONDS,
+    retry_max_seconds=config.PAYMENT_EVENT_RETRY_MAX_SECONDS
+)
 
 
 @app.post(config.WEBHOOK_PATH)
@@ -41,16 +63,41 @@ async def webhook(request: Request):
         return {"status": "error"}, status.HTTP_500_INTERNAL_SERVER_ERROR
 
 
+@app.get("/metrics")
+async def metrics(request: Request):
+    # Disabled without METRICS_TOKEN - the app listens on the public webhook port
+    authorization = request.headers.get("Authorization", "")
+    if not config.METRICS_TOKEN or not hmac.compare_digest(authorization, f"Bearer {config.METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return PlainTextResponse(await MetricsService.render(scheduler, payment_event_worker),
+                             media_type="text/plain; version=0.0.4")
+
+
 @app.on_event("startup")
 async def on_startup():
+    # Invoice numbers / top-up references can't be issued without their key
+    ReferenceCode.require_secret()
+
+    # Opt-in: report code blocking the event loop (/stalls admin command, /metrics)
+    if config.LOOP_MONITOR_ENABLED:
+        await LoopMonitor.start(config.LOOP_MONITOR_INTERVAL_SECONDS, config.LOOP_STALL_THRESHOLD_SECONDS)
+
     await create_db_and_tables()
     await bot.set_webhook(
         url=config.WEBHOOK_URL,
         secret_token=config.WEBHOOK_SECRET_TOKEN
     )
 
-    # Start payment timeout job
-    await payment_timeout_job.start()
+    # Derive the shipping address master key before the first request needs it
+    await ShippingService.warm_up()
+    # Start the chart worker processes while the bot process is still small
+    await StatisticsChartService.warm_up()
+
+    # Start payment event worker (also picks up events queued before a restart)
+    await payment_event_worker.start()
+
+    # Start job scheduler
+    await scheduler.start()
 
     for admin in config.ADMIN_ID_LIST:
         try:
@@ -63,8 +110,20 @@ async def on_startup():
 async def on_shutdown():
     logging.warning('Shutting down..')
 
-    # Stop payment timeout job
-    await payment_timeout_job.stop()
+    # Stop job scheduler (cancels runs in progress, releases the leader lock)
+    await scheduler.stop()
+
+    # Stop payment event worker (waits for events in flight)
+    await payment_event_worker.stop()
+
+    # Close pooled crypto API connections
+    await HttpClient.close()
+
+    # Stop the event loop monitor
+    await LoopMonitor.stop()
+
+    # Stop the chart worker processes
+    StatisticsChartService.shutdown()
 
     await bot.delete_webhook()
     await dp.storage.close()
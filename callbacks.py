@@ -152,15 +152,24 @@ class StatisticsTimeDelta(IntEnum):
     MONTH = 30
 
 
+class StatisticsChart(IntEnum):
+    REVENUE = 1
+    SUBCATEGORY_ITEMS = 2
+    DEPOSITS = 3
+    NEW_USERS = 4
+
+
 class StatisticsCallback(BaseCallback, prefix="statistics"):
     statistics_entity: StatisticsEntity | None
     timedelta: StatisticsTimeDelta | None
     page: int
+    chart: StatisticsChart | None
 
     @staticmethod
     def create(level: int, statistics_entity: StatisticsEntity | None = None,
-               timedelta: StatisticsTimeDelta | None = None, page: int = 0):
-        return StatisticsCallback(level=level, statistics_entity=statistics_entity, timedelta=timedelta, page=page)
+               timedelta: StatisticsTimeDelta | None = None, page: int = 0, chart: StatisticsChart | None = None):
+        return StatisticsCallback(level=level, statistics_entity=statistics_entity, timedelta=timedelta, page=page,
+                                  chart=chart)
 
 
 class WalletCallback(BaseCallback, prefix="wallet"):
@@ -191,3 +200,11 @@ class ShippingManagementCallback(BaseCallback, prefix="shipping_management"):
     @staticmethod
     def create(level: int, order_id: int = -1, confirmation: bool = False, page: int = 0):
         return ShippingManagementCallback(level=level, order_id=order_id, confirmation=confirmation, page=page)
+
+
+class PaymentEventsCallback(BaseCallback, prefix="payment_events"):
+    dead_letter_id: int  # -1 = all (replay)
+
+    @staticmethod
+    def create(level: int, dead_letter_id: int = -1):
+        return PaymentEventsCallback(level=level, dead_letter_id=dead_letter_id)
@@ -43,12 +43,15 @@ KRYPTO_EXPRESS_API_KEY = os.environ.get("KRYPTO_EXPRESS_API_KEY")
 KRYPTO_EXPRESS_API_URL = os.environ.get("KRYPTO_EXPRESS_API_URL")
 KRYPTO_EXPRESS_API_SECRET = os.environ.get("KRYPTO_EXPRESS_API_SECRET")
 WEBHOOK_SECRET_TOKEN = os.environ.get("WEBHOOK_SECRET_TOKEN")
+# Bearer token of the /metrics endpoint (empty: endpoint disabled)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
 REDIS_HOST = os.environ.get("REDIS_HOST")
 REDIS_PASSWORD = os.environ.get("REDIS_PASSWORD")
 
 # Invoice/Order System Configuration
 ORDER_TIMEOUT_MINUTES = int(os.environ.get("ORDER_TIMEOUT_MINUTES", "30"))  # Default: 30 minutes
 ORDER_CANCEL_GRACE_PERIOD_MINUTES = int(os.environ.get("ORDER_CANCEL_GRACE_PERIOD_MINUTES", "5"))  # Grace period for free cancellation
+PAYMENT_CHECK_INTERVAL_SECONDS = int(os.environ.get("PAYMENT_CHECK_INTERVAL_SECONDS", "60"))  # Expired order check
 
 # Payment Validation Configuration
 PAYMENT_TOLERANCE_OVERPAYMENT_PERCENT = float(os.environ.get("PAYMENT_TOLERANCE_OVERPAYMENT_PERCENT", "0.1"))
@@ -56,10 +59,89 @@ PAYMENT_UNDERPAYMENT_RETRY_ENABLED = os.environ.get("PAYMENT_UNDERPAYMENT_RETRY_
 PAYMENT_UNDERPAYMENT_RETRY_TIMEOUT_MINUTES = int(os.environ.get("PAYMENT_UNDERPAYMENT_RETRY_TIMEOUT_MINUTES", "30"))
 PAYMENT_UNDERPAYMENT_PENALTY_PERCENT = float(os.environ.get("PAYMENT_UNDERPAYMENT_PENALTY_PERCENT", "5"))
 PAYMENT_LATE_PENALTY_PERCENT = float(os.environ.get("PAYMENT_LATE_PENALTY_PERCENT", "5"))
+ORDER_LOCK_TIMEOUT_SECONDS = int(os.environ.get("ORDER_LOCK_TIMEOUT_SECONDS", "60"))  # Webhook / timeout job order lock
+
+# Payment Event Worker Configuration (queued webhook events, see jobs/payment_event_worker.py)
+PAYMENT_EVENT_WORKER_CONCURRENCY = int(os.environ.get("PAYMENT_EVENT_WORKER_CONCURRENCY", "4"))
+PAYMENT_EVENT_MAX_ATTEMPTS = int(os.environ.get("PAYMENT_EVENT_MAX_ATTEMPTS", "8"))
+PAYMENT_EVENT_RETRY_BASE_SECONDS = float(os.environ.get("PAYMENT_EVENT_RETRY_BASE_SECONDS", "5"))
+PAYMENT_EVENT_RETRY_MAX_SECONDS = float(os.environ.get("PAYMENT_EVENT_RETRY_MAX_SECONDS", "600"))
+
+# Payment Reconciliation (KryptoExpress listing vs. open invoices, see services/payment_reconciliation.py)
+PAYMENT_RECONCILIATION_INTERVAL_SECONDS = int(os.environ.get("PAYMENT_RECONCILIATION_INTERVAL_SECONDS", "300"))
+PAYMENT_RECONCILIATION_PAGE_SIZE = int(os.environ.get("PAYMENT_RECONCILIATION_PAGE_SIZE", "100"))
+PAYMENT_RECONCILIATION_MAX_PAGES = int(os.environ.get("PAYMENT_RECONCILIATION_MAX_PAGES", "10"))
+PAYMENT_RECONCILIATION_WINDOW_HOURS = int(os.environ.get("PAYMENT_RECONCILIATION_WINDOW_HOURS", "24"))
+
+# Crypto API HTTP Client Configuration (shared connection pool, see crypto_api/http_client.py)
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", "10"))
+HTTP_DNS_CACHE_TTL_SECONDS = int(os.environ.get("HTTP_DNS_CACHE_TTL_SECONDS", "300"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_READ_TIMEOUT_SECONDS = float(os.environ.get("HTTP_READ_TIMEOUT_SECONDS", "15"))
+HTTP_TOTAL_TIMEOUT_SECONDS = float(os.environ.get("HTTP_TOTAL_TIMEOUT_SECONDS", "30"))
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "3"))
+HTTP_RETRY_BASE_SECONDS = float(os.environ.get("HTTP_RETRY_BASE_SECONDS", "0.5"))
+HTTP_RETRY_MAX_SECONDS = float(os.environ.get("HTTP_RETRY_MAX_SECONDS", "5"))
+
+# Price Oracle Configuration (cached exchange rates, see services/price_oracle.py)
+PRICE_ORACLE_SOURCE = os.environ.get("PRICE_ORACLE_SOURCE", "coingecko")
+PRICE_ORACLE_FALLBACK_SOURCE = os.environ.get("PRICE_ORACLE_FALLBACK_SOURCE", "kraken")
+PRICE_ORACLE_TTL_SECONDS = int(os.environ.get("PRICE_ORACLE_TTL_SECONDS", "60"))
+PRICE_ORACLE_MAX_STALENESS_SECONDS = int(os.environ.get("PRICE_ORACLE_MAX_STALENESS_SECONDS", "900"))
+PRICE_ORACLE_REFRESH_INTERVAL_SECONDS = int(os.environ.get("PRICE_ORACLE_REFRESH_INTERVAL_SECONDS", "45"))
+
+# Query Budget (see middleware/database.py): updates executing more statements, or one statement
+# this many times (a query per row - N+1), are logged and counted in /metrics
+QUERY_BUDGET_PER_UPDATE = int(os.environ.get("QUERY_BUDGET_PER_UPDATE", "25"))
+QUERY_REPEAT_THRESHOLD = int(os.environ.get("QUERY_REPEAT_THRESHOLD", "5"))
+
+# Event Loop Monitor (see utils/loop_monitor.py): code blocking the loop longer than the threshold
+# is captured with its stack, reported by the /stalls admin command and in /metrics
+LOOP_MONITOR_ENABLED = os.environ.get("LOOP_MONITOR_ENABLED", "false") == "true"
+LOOP_MONITOR_INTERVAL_SECONDS = float(os.environ.get("LOOP_MONITOR_INTERVAL_SECONDS", "0.1"))
+LOOP_STALL_THRESHOLD_SECONDS = float(os.environ.get("LOOP_STALL_THRESHOLD_SECONDS", "0.25"))
+
+# Sampling Profiler (see utils/sampling_profiler.py): longest run of the /profile admin command
+PROFILER_MAX_SECONDS = int(os.environ.get("PROFILER_MAX_SECONDS", "60"))
+
+# Background Job Scheduler (see jobs/scheduler.py and jobs/registry.py)
+# With Redis, only the instance holding the leader lock runs the jobs; the lock expires after this TTL
+SCHEDULER_LEADER_TTL_SECONDS = int(os.environ.get("SCHEDULER_LEADER_TTL_SECONDS", "30"))
+
+# Statistics Charts (PNG rendering in worker processes, see services/statistics_chart.py)
+STATISTICS_CHART_WORKERS = int(os.environ.get("STATISTICS_CHART_WORKERS", "1"))
+
+# Deposit Scanner Configuration (blockchain explorers, see CryptoApiManager.scan_deposits)
+DEPOSIT_SCAN_CONCURRENCY = int(os.environ.get("DEPOSIT_SCAN_CONCURRENCY", "8"))
+DEPOSIT_SCAN_WINDOW_HOURS = int(os.environ.get("DEPOSIT_SCAN_WINDOW_HOURS", "24"))
+
+# Invoice / Top-up Reference Codes (see utils/reference_code.py)
+# Key of the code permutation - required, must not change once references were issued
+REFERENCE_CODE_SECRET = os.environ.get("REFERENCE_CODE_SECRET", "")
+
+# Wallet Ledger Configuration (see jobs/wallet_snapshot_job.py)
+WALLET_SNAPSHOT_INTERVAL_SECONDS = int(os.environ.get("WALLET_SNAPSHOT_INTERVAL_SECONDS", "86400"))
 
 # Data Retention Configuration
 DATA_RETENTION_DAYS = int(os.environ.get("DATA_RETENTION_DAYS", "30"))
 REFERRAL_DATA_RETENTION_DAYS = int(os.environ.get("REFERRAL_DATA_RETENTION_DAYS", "365"))
+# Rows deleted per transaction, and the pause between two chunks (see jobs/data_retention_cleanup_job.py)
+DATA_RETENTION_CHUNK_SIZE = int(os.environ.get("DATA_RETENTION_CHUNK_SIZE", "500"))
+DATA_RETENTION_CHUNK_PAUSE_SECONDS = float(os.environ.get("DATA_RETENTION_CHUNK_PAUSE_SECONDS", "0.1"))
+# Directory for gzip-compressed NDJSON archives of the deleted rows (empty: no archive)
+DATA_RETENTION_ARCHIVE_DIR = os.environ.get("DATA_RETENTION_ARCHIVE_DIR", "")
+# Free pages returned to the file system per incremental_vacuum step
+DATA_RETENTION_VACUUM_PAGES = int(os.environ.get("DATA_RETENTION_VACUUM_PAGES", "1000"))
+# When the cleanup runs (cron expression, local time)
+DATA_RETENTION_CRON = os.environ.get("DATA_RETENTION_CRON", "30 3 * * *")
+
+# Item Archive Configuration (sold items are moved from items to items_archive)
+ITEM_ARCHIVE_AFTER_DAYS = int(os.environ.get("ITEM_ARCHIVE_AFTER_DAYS", "7"))
+ITEM_ARCHIVE_BATCH_SIZE = int(os.environ.get("ITEM_ARCHIVE_BATCH_SIZE", "500"))
+
+# Item payloads (private_data) are stored in item_payloads, zlib-compressed when it saves space
+ITEM_PAYLOAD_COMPRESSION = os.environ.get("ITEM_PAYLOAD_COMPRESSION", "true") == "true"
 
 # Shipping Management Configuration
 SHIPPING_ADDRESS_SECRET = os.environ.get("ENCRYPTION_SECRET", "")
@@ -1,196 +1,158 @@
+import asyncio
+import logging
 from datetime import datetime, timedelta
-import aiohttp
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 import config
+from crypto_api.http_client import HttpClient
 from enums.cryptocurrency import Cryptocurrency
-from models.deposit import DepositDTO
-from models.user import UserDTO
-from services.deposit import DepositService
+from models.deposit import DepositDTO, DepositScanTarget
+from repositories.deposit import DepositRepository
+from services.price_oracle import PriceOracle
+
+ERC20_CONTRACTS = {
+    Cryptocurrency.USDT_ERC20: "0xdAC17F958D2ee523a2206206994597C13D831ec7",
+    Cryptocurrency.USDC_ERC20: "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48",
+}
 
 
 class CryptoApiManager:
-    min_timestamp = int((datetime.now() - timedelta(hours=24)).timestamp()) * 1000
+    """
+    Blockchain explorer lookups for incoming deposits.
+
+    The get_*_deposits methods only fetch and parse the transfers to one address;
+    scan_deposits polls many (address, network) targets concurrently, drops known
+    transactions and stores the new ones in one bulk insert.
+    """
 
     @staticmethod
     async def fetch_api_request(url: str, params: dict | None = None) -> dict:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data
+        return await HttpClient.request_json("GET", url, params=params)
 
     @staticmethod
-    async def get_new_btc_deposits(user_dto: UserDTO, deposits: list[DepositDTO], session: AsyncSession | Session) -> float:
-        url = f'https://mempool.space/api/address/{user_dto.btc_address}/utxo'
+    def scan_window_start() -> int:
+        """Start of the scanned time window (ms timestamp), computed for every scan."""
+        return int((datetime.now() - timedelta(hours=config.DEPOSIT_SCAN_WINDOW_HOURS)).timestamp()) * 1000
+
+    @staticmethod
+    async def get_btc_deposits(target: DepositScanTarget, min_timestamp: int) -> list[DepositDTO]:
+        url = f'https://mempool.space/api/address/{target.address}/utxo'
         data = await CryptoApiManager.fetch_api_request(url)
-        deposits = [deposit.tx_id for deposit in deposits if deposit.network == "BTC"]
-        deposit_sum = 0.0
-        for deposit in data:
-            if deposit["txid"] not in deposits and deposit['status']['confirmed']:
-                deposit_dto = DepositDTO(
-                    tx_id=deposit['txid'],
-                    user_id=user_dto.id,
-                    network="BTC",
-                    amount=deposit['value'],
-                    vout=deposit['vout']
-                )
-                await DepositService.create(deposit_dto, session)
-                deposit_sum += float(deposit["value"]) / 100_000_000
-        return deposit_sum
+        return [DepositDTO(tx_id=deposit['txid'], user_id=target.user_id, network=Cryptocurrency.BTC,
+                           amount=deposit['value'], vout=deposit['vout'])
+                for deposit in data if deposit['status']['confirmed']]
 
     @staticmethod
-    async def get_new_ltc_deposits(user_dto: UserDTO, deposits: list[DepositDTO], session: AsyncSession | Session) -> float:
-        url = f"https://api.blockcypher.com/v1/ltc/main/addrs/{user_dto.ltc_address}"
+    async def get_ltc_deposits(target: DepositScanTarget, min_timestamp: int) -> list[DepositDTO]:
+        url = f"https://api.blockcypher.com/v1/ltc/main/addrs/{target.address}"
         params = {"unspentOnly": "true"}
         data = await CryptoApiManager.fetch_api_request(url, params=params)
-        deposits = [deposit.tx_id for deposit in deposits if deposit.network == "LTC"]
-        deposits_sum = 0.0
-        if data['n_tx'] > 0:
-            for deposit in data['txrefs']:
-                if deposit["confirmations"] > 0 and deposit['tx_hash'] not in deposits:
-                    deposit_dto = DepositDTO(
-                        tx_id=deposit['tx_hash'],
-                        user_id=user_dto.id,
-                        network='LTC',
-                        amount=deposit['value'],
-                        vout=deposit['tx_output_n']
-                    )
-                    await DepositService.create(deposit_dto, session)
-                    deposits_sum += float(deposit['value']) / 100_000_000
-        return deposits_sum
+        if data['n_tx'] == 0:
+            return []
+        return [DepositDTO(tx_id=deposit['tx_hash'], user_id=target.user_id, network=Cryptocurrency.LTC,
+                           amount=deposit['value'], vout=deposit['tx_output_n'])
+                for deposit in data['txrefs'] if deposit["confirmations"] > 0]
 
     @staticmethod
-    async def get_sol_balance(user_dto: UserDTO, deposits: list[DepositDTO], session: AsyncSession | Session) -> float:
-        url = f"https://api.solana.fm/v0/accounts/{user_dto.sol_address}/transfers"
+    async def get_sol_deposits(target: DepositScanTarget, min_timestamp: int) -> list[DepositDTO]:
+        url = f"https://api.solana.fm/v0/accounts/{target.address}/transfers"
         data = await CryptoApiManager.fetch_api_request(url)
-        deposits = [deposit.tx_id for deposit in deposits if deposit.network == "SOL"]
-        deposits_sum = 0.0
-        if len(data['results']) > 0:
-            for deposit in data['results']:
-                if deposit['transactionHash'] not in deposits:
-                    for transfer in deposit['data']:
-                        if transfer['action'] == 'transfer' and transfer['destination'] == user_dto.sol_address and \
-                                transfer[
-                                    'status'] == 'Successful' and transfer['token'] == '':
-                            deposit_dto = DepositDTO(
-                                tx_id=deposit['transactionHash'],
-                                user_id=user_dto.id,
-                                network='SOL',
-                                amount=transfer['amount'],
-                                vout=transfer['instructionIndex']
-                            )
-                            await DepositService.create(deposit_dto, session)
-                            deposits_sum += float(transfer['amount'] / 1_000_000_000)
-        return deposits_sum
+        return [DepositDTO(tx_id=deposit['transactionHash'], user_id=target.user_id, network=Cryptocurrency.SOL,
+                           amount=transfer['amount'], vout=transfer['instructionIndex'])
+                for deposit in data['results']
+                for transfer in deposit['data']
+                if transfer['action'] == 'transfer' and transfer['destination'] == target.address
+                and transfer['status'] == 'Successful' and transfer['token'] == '']
 
     @staticmethod
-    async def get_usdt_trc20_balance(user_dto: UserDTO, deposits: list[DepositDTO], session: AsyncSession | Session) -> float:
-        url = f"https://api.trongrid.io/v1/accounts/{user_dto.trx_address}/transactions/trc20"
+    async def get_usdt_trc20_deposits(target: DepositScanTarget, min_timestamp: int) -> list[DepositDTO]:
+        url = f"https://api.trongrid.io/v1/accounts/{target.address}/transactions/trc20"
         params = {"only_confirmed": "true",
-                  "min_timestamp": CryptoApiManager.min_timestamp,
+                  "min_timestamp": min_timestamp,
                   "contract_address": "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t",
                   "only_to": "true"}
         data = await CryptoApiManager.fetch_api_request(url, params=params)
-        deposits = [deposit.tx_id for deposit in deposits if
-                    deposit.network == "TRX" and deposit.token_name == "USDT_TRC20"]
-        deposits_sum = 0.0
-        for deposit in data['data']:
-            if deposit['transaction_id'] not in deposits:
-                deposit_dto = DepositDTO(
-                    tx_id=deposit['transaction_id'],
-                    user_id=user_dto.id,
-                    network='TRX',
-                    token_name='USDT_TRC20',
-                    amount=deposit['value'],
-                )
-                await DepositService.create(deposit_dto, session)
-                deposits_sum += float(deposit['value']) / pow(10, deposit['token_info']['decimals'])
-        return deposits_sum
-
-    @staticmethod
-    async def get_usdt_erc20_balance(user_dto: UserDTO, deposits: list[DepositDTO], session: AsyncSession | Session) -> float:
-        # TODO(Combine the function to obtain erc20 tokens.)
-        url = f'https://api.ethplorer.io/getAddressHistory/{user_dto.eth_address}'
-        params = {
-            "type": "transfer",
-            "token": "0xdAC17F958D2ee523a2206206994597C13D831ec7",
-            "apiKey": config.ETHPLORER_API_KEY,
-            "limit": 1000
-        }
-        data = await CryptoApiManager.fetch_api_request(url, params)
-        deposits = [deposit.tx_id for deposit in deposits if
-                    deposit.network == "ETH" and deposit.token_name == "USDT_ERC20"]
-        deposits_sum = 0.0
-        for deposit in data['operations']:
-            if deposit['transactionHash'] not in deposits and deposit['to'] == user_dto.eth_address.lower():
-                deposit_dto = DepositDTO(
-                    tx_id=deposit['transactionHash'],
-                    user_id=user_dto.id,
-                    network='ETH',
-                    token_name='USDT_ERC20',
-                    amount=deposit['value']
-                )
-                await DepositService.create(deposit_dto, session)
-                deposits_sum += float(deposit['value']) / pow(10, 6)
-        return deposits_sum
+        return [DepositDTO(tx_id=deposit['transaction_id'], user_id=target.user_id,
+                           network=Cryptocurrency.USDT_TRC20, amount=deposit['value'])
+                for deposit in data['data']]
 
     @staticmethod
-    async def get_usdc_erc20_balance(user_dto: UserDTO, deposits: list[DepositDTO], session: AsyncSession | Session):
-        # TODO(Combine the function to obtain erc20 tokens.)
-        url = f'https://api.ethplorer.io/getAddressHistory/{user_dto.eth_address}'
+    async def get_erc20_deposits(target: DepositScanTarget, min_timestamp: int) -> list[DepositDTO]:
+        url = f'https://api.ethplorer.io/getAddressHistory/{target.address}'
         params = {
             "type": "transfer",
-            "token": "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48",
+            "token": ERC20_CONTRACTS[target.cryptocurrency],
             "apiKey": config.ETHPLORER_API_KEY,
             "limit": 1000
         }
         data = await CryptoApiManager.fetch_api_request(url, params)
-        deposits = [deposit.tx_id for deposit in deposits if
-                    deposit.network == "ETH" and deposit.token_name == "USDC_ERC20"]
-        deposits_sum = 0.0
-        for deposit in data['operations']:
-            if deposit['transactionHash'] not in deposits and deposit['to'] == user_dto.eth_address.lower():
-                deposit_dto = DepositDTO(
-                    tx_id=deposit['transactionHash'],
-                    user_id=user_dto.id,
-                    network='ETH',
-                    token_name='USDC_ERC20',
-                    amount=deposit['value']
-                )
-                await DepositService.create(deposit_dto, session)
-                deposits_sum += float(deposit['value']) / pow(10, 6)
-        return deposits_sum
+        return [DepositDTO(tx_id=deposit['transactionHash'], user_id=target.user_id,
+                           network=target.cryptocurrency, amount=deposit['value'])
+                for deposit in data['operations'] if deposit['to'] == target.address.lower()]
 
     @staticmethod
     async def get_crypto_prices(cryptocurrency: Cryptocurrency) -> float:
-        match cryptocurrency:
-            case cryptocurrency.USDT_TRC20 | cryptocurrency.USDT_ERC20:
-                url = f'https://api.kraken.com/0/public/Ticker?pair=USDT{config.CURRENCY.value}'
-                response_json = await CryptoApiManager.fetch_api_request(url)
-            case cryptocurrency.USDC_ERC20:
-                url = f"https://api.kraken.com/0/public/Ticker?pair=USDC{config.CURRENCY.value}"
-                response_json = await CryptoApiManager.fetch_api_request(url)
-            case _:
-                url = f"https://api.kraken.com/0/public/Ticker?pair={cryptocurrency.value}{config.CURRENCY.value}"
-                response_json = await CryptoApiManager.fetch_api_request(url)
-        return float(next(iter(response_json['result'].values()))['c'][0])
+        return await PriceOracle.get_price(cryptocurrency)
 
     @staticmethod
-    async def get_new_deposits_amount(user_dto: UserDTO, cryptocurrency: Cryptocurrency,
-                                      session: AsyncSession | Session):
-        deposits = await DepositService.get_by_user_dto(user_dto, session)
-        match cryptocurrency:
+    async def fetch_deposits(target: DepositScanTarget, min_timestamp: int) -> list[DepositDTO]:
+        match target.cryptocurrency:
             case Cryptocurrency.BTC:
-                return await CryptoApiManager.get_new_btc_deposits(user_dto, deposits, session)
+                return await CryptoApiManager.get_btc_deposits(target, min_timestamp)
             case Cryptocurrency.LTC:
-                return await CryptoApiManager.get_new_ltc_deposits(user_dto, deposits, session)
+                return await CryptoApiManager.get_ltc_deposits(target, min_timestamp)
             case Cryptocurrency.SOL:
-                return await CryptoApiManager.get_sol_balance(user_dto, deposits, session)
+                return await CryptoApiManager.get_sol_deposits(target, min_timestamp)
             case Cryptocurrency.USDT_TRC20:
-                return await CryptoApiManager.get_usdt_trc20_balance(user_dto, deposits, session)
-            case Cryptocurrency.USDT_ERC20:
-                return await CryptoApiManager.get_usdt_erc20_balance(user_dto, deposits, session)
-            case Cryptocurrency.USDC_ERC20:
-                return await CryptoApiManager.get_usdc_erc20_balance(user_dto, deposits, session)
+                return await CryptoApiManager.get_usdt_trc20_deposits(target, min_timestamp)
+            case Cryptocurrency.USDT_ERC20 | Cryptocurrency.USDC_ERC20:
+                return await CryptoApiManager.get_erc20_deposits(target, min_timestamp)
+            case _:
+                raise ValueError(f"Deposit scanning is not supported for {target.cryptocurrency.value}")
+
+    @staticmethod
+    async def scan_deposits(targets: list[DepositScanTarget], session: AsyncSession | Session,
+                            concurrency: int | None = None) -> dict[DepositScanTarget, float]:
+        """
+        Polls all targets concurrently (at most `concurrency` explorer requests at a time)
+        and stores every deposit whose (network, tx_id, vout) isn't known yet.
+
+        A target whose explorer request fails is logged and reported as 0 (the next scan picks it up).
+        Returns the newly deposited crypto amount per target.
+        """
+        semaphore = asyncio.Semaphore(concurrency or config.DEPOSIT_SCAN_CONCURRENCY)
+        min_timestamp = CryptoApiManager.scan_window_start()
+
+        async def fetch(target: DepositScanTarget) -> list[DepositDTO]:
+            async with semaphore:
+                try:
+                    return await CryptoApiManager.fetch_deposits(target, min_timestamp)
+                except Exception as e:
+                    logging.warning(f"Deposit scan of {target.cryptocurrency.value} address {target.address} "
+                                    f"failed: {type(e).__name__}: {e}")
+                    return []
+
+        # Known transactions are loaded once, instead of one lookup per scanned transfer
+        known = await DepositRepository.get_known_transactions({target.user_id for target in targets}, session)
+        results = await asyncio.gather(*(fetch(target) for target in targets))
+
+        new_deposits = []
+        amounts = {}
+        for target, deposits in zip(targets, results):
+            amounts[target] = 0.0
+            for deposit in deposits:
+                key = (deposit.network, deposit.tx_id, deposit.vout)
+                if key in known:
+                    continue
+                known.add(key)
+                new_deposits.append(deposit)
+                amounts[target] += deposit.amount / pow(10, deposit.network.get_divider())
+
+        await DepositRepository.create_many(new_deposits, session)
+        return amounts
+
+    @staticmethod
+    async def get_new_deposits_amount(target: DepositScanTarget, session: AsyncSession | Session) -> float:
+        return (await CryptoApiManager.scan_deposits([target], session))[target]
@@ -1,7 +1,8 @@
-import aiohttp
 import config
+from crypto_api.http_client import HttpClient
 from enums.cryptocurrency import Cryptocurrency
 from enums.withdraw_type import WithdrawType
+from models.payment import ProcessingPaymentDTO
 from models.withdrawal import WithdrawalDTO
 
 
@@ -15,11 +16,7 @@ class CryptoApiWrapper:
     @staticmethod
     async def fetch_api_request(url: str, params: dict | None = None, method: str = "GET", data: str | None = None,
                                 headers: dict | None = None) -> dict:
-        async with aiohttp.ClientSession() as session:
-            async with session.request(method, url, params=params, data=data, headers=headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data
+        return await HttpClient.request_json(method, url, params=params, data=data, headers=headers)
 
     @staticmethod
     async def get_crypto_prices() -> dict:
@@ -30,6 +27,33 @@ class CryptoApiWrapper:
         }
         return await CryptoApiWrapper.fetch_api_request(url, params)
 
+    @staticmethod
+    async def get_kraken_price(cryptocurrency: Cryptocurrency) -> float:
+        match cryptocurrency:
+            case Cryptocurrency.USDT_TRC20 | Cryptocurrency.USDT_ERC20:
+                pair = f"USDT{config.CURRENCY.value}"
+            case Cryptocurrency.USDC_ERC20:
+                pair = f"USDC{config.CURRENCY.value}"
+            case _:
+                pair = f"{cryptocurrency.value}{config.CURRENCY.value}"
+        response_json = await CryptoApiWrapper.fetch_api_request("https://api.kraken.com/0/public/Ticker",
+                                                                 {"pair": pair})
+        return float(next(iter(response_json['result'].values()))['c'][0])
+
+    @staticmethod
+    async def get_payments(page: int, size: int) -> list[ProcessingPaymentDTO]:
+        """One page of the KryptoExpress payment listing (newest first)."""
+        url = f"{config.KRYPTO_EXPRESS_API_URL}/payment"
+        headers = {
+            "X-Api-Key": config.KRYPTO_EXPRESS_API_KEY
+        }
+        response = await CryptoApiWrapper.fetch_api_request(
+            url,
+            params={"page": page, "size": size},
+            headers=headers
+        )
+        return [ProcessingPaymentDTO.model_validate(payment) for payment in response]
+
     @staticmethod
     async def get_wallet_balance() -> dict:
         url = f"{config.KRYPTO_EXPRESS_API_URL}/wallet"
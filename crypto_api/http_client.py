@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+import config
+from utils.metrics import CRYPTO_API_DURATION
+
+
+class EndpointMetrics:
+    """Request counters and latency of one endpoint (host + path template)."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.status_counts: dict[int, int] = {}
+
+    @property
+    def avg_seconds(self) -> float:
+        return self.total_seconds / self.requests if self.requests else 0.0
+
+    def observe(self, seconds: float, status: int | None):
+        self.requests += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if status is None or status >= 400:
+            self.errors += 1
+        if status is not None:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+
+class HttpClient:
+    """
+    Shared HTTP client for the crypto APIs (KryptoExpress, price and blockchain explorers).
+
+    - One aiohttp.ClientSession per process: keep-alive connections are pooled per host and
+      DNS lookups are cached, so calls don't pay a TCP+TLS handshake each time
+    - Connect/read/total timeouts, so a hanging API can't block a handler forever
+    - Idempotent calls (GET, ...) are retried with exponential backoff and jitter on
+      connection errors, timeouts, 429 and 5xx; POST (e.g. payment creation) is never retried
+    - Latency/error metrics per endpoint (see get_metrics)
+
+    The session is created lazily on first use and closed on shutdown via HttpClient.close().
+    """
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    # Path segments that are IDs/addresses, replaced by {id} so metrics are grouped per endpoint
+    _ID_SEGMENT = re.compile(r"\d+|[A-Za-z0-9]{20,}")
+
+    _session: aiohttp.ClientSession | None = None
+    _session_loop: asyncio.AbstractEventLoop | None = None
+    _metrics: dict[str, EndpointMetrics] = {}
+
+    @staticmethod
+    def _get_session() -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = HttpClient._session
+        if session is None or session.closed or HttpClient._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=config.HTTP_POOL_LIMIT,
+                limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=config.HTTP_DNS_CACHE_TTL_SECONDS
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=config.HTTP_TOTAL_TIMEOUT_SECONDS,
+                sock_connect=config.HTTP_CONNECT_TIMEOUT_SECONDS,
+                sock_read=config.HTTP_READ_TIMEOUT_SECONDS
+            )
+            HttpClient._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            HttpClient._session_loop = loop
+        return HttpClient._session
+
+    @staticmethod
+    async def close():
+        """Closes the shared session (pooled connections). Called on bot shutdown."""
+        if HttpClient._session is not None and not HttpClient._session.closed:
+            await HttpClient._session.close()
+        HttpClient._session = None
+        HttpClient._session_loop = None
+
+    @staticmethod
+    def endpoint_name(method: str, url: str) -> str:
+        parts = urlsplit(url)
+        path = "/".join("{id}" if HttpClient._ID_SEGMENT.fullmatch(segment) else segment
+                        for segment in parts.path.split("/"))
+        return f"{method} {parts.netloc}{path}"
+
+    @staticmethod
+    def get_metrics() -> dict[str, EndpointMetrics]:
+        return HttpClient._metrics
+
+    @staticmethod
+    def reset_metrics():
+        HttpClient._metrics = {}
+
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        delay = min(config.HTTP_RETRY_BASE_SECONDS * 2 ** (attempt - 1), config.HTTP_RETRY_MAX_SECONDS)
+        return random.uniform(delay / 2, delay)
+
+    @staticmethod
+    async def request_json(method: str, url: str, params: dict | None = None, data: str | None = None,
+                           headers: dict | None = None) -> dict:
+        """
+        Sends the request and returns the decoded JSON body.
+
+        Raises aiohttp.ClientResponseError for non-2xx responses, aiohttp.ClientError /
+        asyncio.TimeoutError if the API couldn't be reached (after retries, for idempotent calls).
+        """
+        method = method.upper()
+        endpoint = HttpClient.endpoint_name(method, url)
+        metrics = HttpClient._metrics.setdefault(endpoint, EndpointMetrics())
+        max_attempts = config.HTTP_MAX_RETRIES + 1 if method in HttpClient.IDEMPOTENT_METHODS else 1
+        session = HttpClient._get_session()
+
+        attempt = 1
+        while True:
+            start = time.perf_counter()
+            status = None
+            try:
+                async with session.request(method, url, params=params, data=data, headers=headers) as response:
+                    status = response.status
+                    if status in HttpClient.RETRY_STATUSES and attempt < max_attempts:
+                        raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                          status=status, message=response.reason)
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                retryable = status is None or status in HttpClient.RETRY_STATUSES
+                if not retryable or attempt >= max_attempts:
+                    logging.error(f"{endpoint} failed after {attempt} attempt(s): {type(e).__name__}: {e}")
+                    raise
+                delay = HttpClient._retry_delay(attempt)
+                logging.warning(f"{endpoint} failed (attempt {attempt}/{max_attempts}), "
+                                f"retry in {delay:.1f}s: {type(e).__name__}: {e}")
+                metrics.retries += 1
+            finally:
+                elapsed = time.perf_counter() - start
+                metrics.observe(elapsed, status)
+                CRYPTO_API_DURATION.observe(elapsed, endpoint)
+            await asyncio.sleep(delay)
+            attempt += 1
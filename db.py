@@ -19,6 +19,8 @@ Imports of these models are needed to correctly create tables in the database.
 For more information see https://stackoverflow.com/questions/7478403/sqlalchemy-classes-across-files
 """
 from models.item import Item
+from models.item_archive import ItemArchive
+from models.item_payload import ItemPayload
 from models.cart import Cart
 from models.cartItem import CartItem
 from models.user import User
@@ -30,6 +32,11 @@ from models.deposit import Deposit
 from models.order import Order
 from models.invoice import Invoice
 from models.payment_transaction import PaymentTransaction
+from models.processed_payment_event import ProcessedPaymentEvent
+from models.payment_event import PaymentEvent, DeadLetterPaymentEvent
+from models.reference_sequence import ReferenceSequence
+from models.wallet import WalletLedgerEntry, WalletSnapshot
+from models.statistics import DailyStatistics, DailyDepositStatistics
 from models.user_strike import UserStrike
 from models.referral_usage import ReferralUsage
 from models.referral_discount import ReferralDiscount
@@ -97,6 +104,9 @@ async def session_commit(session: AsyncSession | Session) -> None:
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
+    # Only takes effect for a new database (before its first table); existing ones are converted by
+    # migrations/enable_incremental_vacuum.sql. Lets the retention cleanup shrink the file.
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
     if config.DB_ENCRYPTION:
         cursor.execute("PRAGMA journal_mode=WAL")
     cursor.close()
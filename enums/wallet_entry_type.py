@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class WalletEntryType(Enum):
+    OPENING_BALANCE = "OPENING_BALANCE"  # Balance before the ledger existed (migration)
+    TOP_UP = "TOP_UP"  # Deposit via KryptoExpress
+    OVERPAYMENT = "OVERPAYMENT"  # Excess of an order payment
+    DOUBLE_PAYMENT = "DOUBLE_PAYMENT"  # Payment for an order that was already paid
+    UNDERPAYMENT_CREDIT = "UNDERPAYMENT_CREDIT"  # Second underpayment, credited after penalty
+    LATE_PAYMENT_CREDIT = "LATE_PAYMENT_CREDIT"  # Payment after timeout, credited after penalty
+    ORDER_PAYMENT = "ORDER_PAYMENT"  # Wallet used for an order / cart purchase
+    ORDER_REFUND = "ORDER_REFUND"  # Wallet refund of a cancelled order
+    RESERVATION_FEE = "RESERVATION_FEE"  # Penalty for a cancelled / timed out order
+    PURCHASE_REFUND = "PURCHASE_REFUND"  # Admin refund of a purchase
+    ADMIN_ADJUSTMENT = "ADMIN_ADJUSTMENT"  # Manual balance change by an admin
@@ -4,10 +4,12 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from callbacks import AdminMenuCallback, AdminAnnouncementCallback, AdminInventoryManagementCallback, \
-    UserManagementCallback, StatisticsCallback, WalletCallback, ShippingManagementCallback
+    UserManagementCallback, StatisticsCallback, WalletCallback, ShippingManagementCallback, PaymentEventsCallback
 from enums.bot_entity import BotEntity
 from handlers.admin.announcement import announcement_router
+from handlers.admin.diagnostics import diagnostics
 from handlers.admin.inventory_management import inventory_management
+from handlers.admin.payment_events import payment_events
 from handlers.admin.statistics import statistics
 from handlers.admin.user_management import user_management
 from handlers.admin.wallet import wallet
@@ -20,6 +22,8 @@ admin_router.include_router(inventory_management)
 admin_router.include_router(user_management)
 admin_router.include_router(statistics)
 admin_router.include_router(wallet)
+admin_router.include_router(payment_events)
+admin_router.include_router(diagnostics)
 
 
 @admin_router.message(F.text == Localizator.get_text(BotEntity.ADMIN, "menu"), AdminIdFilter())
@@ -44,6 +48,8 @@ async def admin(**kwargs):
                               callback_data=ShippingManagementCallback.create(level=0))
     admin_menu_builder.button(text=Localizator.get_text(BotEntity.ADMIN, "crypto_withdraw"),
                               callback_data=WalletCallback.create(level=0))
+    admin_menu_builder.button(text=Localizator.get_text(BotEntity.ADMIN, "payment_events"),
+                              callback_data=PaymentEventsCallback.create(level=0))
     admin_menu_builder.adjust(2)
     if isinstance(message, Message):
         await message.answer(Localizator.get_text(BotEntity.ADMIN, "menu"),
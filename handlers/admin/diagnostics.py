@@ -0,0 +1,87 @@
+import asyncio
+import html
+import logging
+from datetime import datetime
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message, BufferedInputFile
+
+import config
+from enums.bot_entity import BotEntity
+from utils.custom_filters import AdminIdFilter
+from utils.localizator import Localizator
+from utils.loop_monitor import LoopMonitor
+from utils.sampling_profiler import SamplingProfiler, ProfilerBusy
+
+diagnostics = Router()
+
+STALLS_SHOWN = 10
+DEFAULT_PROFILE_SECONDS = 10
+# Profiles in progress (strong references until they are sent)
+_profile_tasks: set[asyncio.Task] = set()
+
+
+@diagnostics.message(AdminIdFilter(), Command("stalls"))
+async def loop_stalls(message: Message):
+    """/stalls: Code locations that blocked the event loop, by total blocked time"""
+    if not LoopMonitor.is_running():
+        await message.answer(Localizator.get_text(BotEntity.ADMIN, "loop_monitor_disabled"))
+        return
+
+    offenders = LoopMonitor.get_top_offenders(STALLS_SHOWN)
+    if not offenders:
+        await message.answer(Localizator.get_text(BotEntity.ADMIN, "loop_stalls_empty"))
+        return
+
+    message_text = Localizator.get_text(BotEntity.ADMIN, "loop_stalls_header").format(
+        threshold=round(config.LOOP_STALL_THRESHOLD_SECONDS * 1000))
+    stacks = []
+    for report in offenders:
+        message_text += Localizator.get_text(BotEntity.ADMIN, "loop_stall_item").format(
+            location=html.escape(report.location),
+            count=report.count,
+            total_ms=round(report.total_seconds * 1000),
+            max_ms=round(report.max_seconds * 1000)
+        )
+        stacks.append(f"{report.location} ({report.count}x)\n{report.stack}")
+    await message.answer(message_text)
+    await message.answer_document(BufferedInputFile("\n\n".join(stacks).encode("utf-8"), "loop_stalls.txt"))
+
+
+@diagnostics.message(AdminIdFilter(), Command("profile"))
+async def profile(message: Message, command: CommandObject):
+    """/profile [seconds]: Samples the running bot and sends the collapsed stacks"""
+    seconds = DEFAULT_PROFILE_SECONDS
+    if command.args:
+        seconds = int(command.args) if command.args.strip().isdigit() else 0
+    if not 1 <= seconds <= config.PROFILER_MAX_SECONDS:
+        await message.answer(Localizator.get_text(BotEntity.ADMIN, "profile_usage").format(
+            max_seconds=config.PROFILER_MAX_SECONDS))
+        return
+
+    await message.answer(Localizator.get_text(BotEntity.ADMIN, "profile_started").format(seconds=seconds))
+    # Profiled in the background: the update (and the webhook request feeding it) doesn't wait for it
+    task = asyncio.create_task(send_profile(message, seconds))
+    _profile_tasks.add(task)
+    task.add_done_callback(_on_profile_done)
+
+
+async def send_profile(message: Message, seconds: int):
+    try:
+        result = await SamplingProfiler.profile(seconds)
+    except ProfilerBusy:
+        await message.answer(Localizator.get_text(BotEntity.ADMIN, "profile_busy"))
+        return
+    filename = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed.txt"
+    await message.answer_document(
+        BufferedInputFile(result.collapsed.encode("utf-8"), filename),
+        caption=Localizator.get_text(BotEntity.ADMIN, "profile_caption").format(
+            samples=result.samples, seconds=round(result.seconds, 1))
+    )
+
+
+def _on_profile_done(task: asyncio.Task):
+    _profile_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Profile failed: {type(task.exception()).__name__}: {task.exception()}")
@@ -0,0 +1,99 @@
+import html
+
+from aiogram import Router
+from aiogram.types import CallbackQuery
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from callbacks import PaymentEventsCallback, AdminMenuCallback
+from db import session_commit
+from enums.bot_entity import BotEntity
+from jobs.payment_event_worker import PaymentEventWorker
+from repositories.payment_event import PaymentEventRepository
+from utils.custom_filters import AdminIdFilter
+from utils.localizator import Localizator
+
+payment_events = Router()
+
+DEAD_LETTERS_SHOWN = 10
+
+
+async def show_dead_letters(**kwargs):
+    """Level 0: Payment events that failed permanently (dead letter)"""
+    callback = kwargs.get("callback")
+    session = kwargs.get("session")
+
+    count = await PaymentEventRepository.get_dead_letter_count(session)
+    kb_builder = InlineKeyboardBuilder()
+
+    if count == 0:
+        message_text = Localizator.get_text(BotEntity.ADMIN, "payment_events_empty")
+    else:
+        message_text = Localizator.get_text(BotEntity.ADMIN, "payment_events_header").format(count=count)
+        for event in await PaymentEventRepository.get_dead_letters(DEAD_LETTERS_SHOWN, session):
+            message_text += Localizator.get_text(BotEntity.ADMIN, "payment_event_item").format(
+                id=event.id,
+                payment_id=event.payment_processing_id,
+                failed_at=event.failed_at.strftime("%d.%m %H:%M"),
+                attempts=event.attempts,
+                error=html.escape((event.last_error or "")[:200])
+            )
+            kb_builder.button(
+                text=Localizator.get_text(BotEntity.ADMIN, "payment_event_replay").format(id=event.id),
+                callback_data=PaymentEventsCallback.create(level=1, dead_letter_id=event.id)
+            )
+        kb_builder.button(
+            text=Localizator.get_text(BotEntity.ADMIN, "payment_events_replay_all").format(count=count),
+            callback_data=PaymentEventsCallback.create(level=1)
+        )
+
+    kb_builder.button(
+        text=Localizator.get_text(BotEntity.ADMIN, "back_to_menu"),
+        callback_data=AdminMenuCallback.create(level=0)
+    )
+    kb_builder.adjust(1)
+    await callback.message.edit_text(message_text, reply_markup=kb_builder.as_markup())
+
+
+async def replay_dead_letters(**kwargs):
+    """Level 1: Moves one (or all) dead-lettered events back to the queue"""
+    callback = kwargs.get("callback")
+    session = kwargs.get("session")
+    callback_data = kwargs.get("callback_data")
+
+    dead_letter_id = None if callback_data.dead_letter_id == -1 else callback_data.dead_letter_id
+    replayed = await PaymentEventRepository.replay_dead_letters(dead_letter_id, session)
+    await session_commit(session)
+    PaymentEventWorker.notify()
+
+    kb_builder = InlineKeyboardBuilder()
+    kb_builder.button(
+        text=Localizator.get_text(BotEntity.COMMON, "back_button"),
+        callback_data=PaymentEventsCallback.create(level=0)
+    )
+    await callback.message.edit_text(
+        Localizator.get_text(BotEntity.ADMIN, "payment_events_replayed").format(count=replayed),
+        reply_markup=kb_builder.as_markup()
+    )
+
+
+@payment_events.callback_query(AdminIdFilter(), PaymentEventsCallback.filter())
+async def payment_events_navigation(callback: CallbackQuery, callback_data: PaymentEventsCallback,
+                                    session: AsyncSession | Session):
+    current_level = callback_data.level
+
+    levels = {
+        0: show_dead_letters,
+        1: replay_dead_letters,
+    }
+
+    current_level_function = levels[current_level]
+
+    kwargs = {
+        "callback": callback,
+        "session": session,
+        "callback_data": callback_data,
+    }
+
+    await current_level_function(**kwargs)
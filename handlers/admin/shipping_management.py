@@ -1,4 +1,7 @@
-from aiogram import Router
+from datetime import datetime
+
+from aiogram import Router, types
+from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,6 +11,8 @@ from callbacks import ShippingManagementCallback, AdminMenuCallback
 from db import session_commit
 from enums.bot_entity import BotEntity
 from enums.order_status import OrderStatus
+from handlers.common.common import add_pagination_buttons
+from models.order import ShippingQueueEntryDTO
 from repositories.invoice import InvoiceRepository
 from repositories.order import OrderRepository
 from repositories.user import UserRepository
@@ -19,60 +24,57 @@ from utils.localizator import Localizator
 shipping_management_router = Router()
 
 
+def _invoice_display(entry: ShippingQueueEntryDTO) -> str:
+    # Handle orders without invoice (e.g., PENDING_SELECTION status after stock adjustment)
+    return entry.invoice_number or f"ORDER-{datetime.now().year}-{entry.order_id:06d}"
+
+
 async def show_awaiting_shipment_orders(**kwargs):
-    """Level 0: Shows list of orders awaiting shipment"""
+    """Level 0: Shows one page of orders awaiting shipment"""
     callback = kwargs.get("callback")
     session = kwargs.get("session")
+    callback_data = kwargs.get("callback_data")
 
-    # Get all orders with PAID_AWAITING_SHIPMENT status
-    orders = await OrderRepository.get_orders_awaiting_shipment(session)
+    # Order, first invoice number and buyer of the whole page in one query
+    entries = await OrderRepository.get_shipping_queue(callback_data.page, session)
+    back_button = types.InlineKeyboardButton(
+        text=Localizator.get_text(BotEntity.ADMIN, "back_to_menu"),
+        callback_data=AdminMenuCallback.create(level=0).pack()
+    )
 
-    if not orders:
+    kb_builder = InlineKeyboardBuilder()
+    if not entries:
         # No orders awaiting shipment
         message_text = Localizator.get_text(BotEntity.ADMIN, "no_orders_awaiting_shipment")
-        kb_builder = InlineKeyboardBuilder()
-        kb_builder.button(
-            text=Localizator.get_text(BotEntity.ADMIN, "back_to_menu"),
-            callback_data=AdminMenuCallback.create(level=0).pack()
-        )
+        kb_builder.row(back_button)
     else:
         # Show list of orders
         message_text = Localizator.get_text(BotEntity.ADMIN, "awaiting_shipment_orders") + "\n\n"
 
-        kb_builder = InlineKeyboardBuilder()
-
-        for order in orders:
-            # Get invoice number for display
-            invoice = await InvoiceRepository.get_by_order_id(order.id, session)
-            user = await UserRepository.get_by_id(order.user_id, session)
-
+        for entry in entries:
             # Always show both username and ID
-            if user.telegram_username:
-                user_display = f"@{user.telegram_username} (ID:{user.telegram_id})"
+            if entry.telegram_username:
+                user_display = f"@{entry.telegram_username} (ID:{entry.telegram_id})"
             else:
-                user_display = f"ID:{user.telegram_id}"
-
-            # Handle orders without invoice (e.g., PENDING_SELECTION status after stock adjustment)
-            if invoice:
-                invoice_display = invoice.invoice_number
-            else:
-                from datetime import datetime
-                invoice_display = f"ORDER-{datetime.now().year}-{order.id:06d}"
+                user_display = f"ID:{entry.telegram_id}"
 
             # Format creation timestamp
-            created_time = order.created_at.strftime("%d.%m %H:%M") if order.created_at else "N/A"
+            created_time = entry.created_at.strftime("%d.%m %H:%M") if entry.created_at else "N/A"
 
-            button_text = f"📦 {created_time} | {invoice_display} | {user_display} | {order.total_price:.2f}{Localizator.get_currency_symbol()}"
+            button_text = f"📦 {created_time} | {_invoice_display(entry)} | {user_display} | {entry.total_price:.2f}{Localizator.get_currency_symbol()}"
             kb_builder.button(
                 text=button_text,
-                callback_data=ShippingManagementCallback.create(level=1, order_id=order.id).pack()
+                callback_data=ShippingManagementCallback.create(level=1, order_id=entry.order_id).pack()
             )
 
         kb_builder.adjust(1)  # One button per row
-        kb_builder.button(
-            text=Localizator.get_text(BotEntity.ADMIN, "back_to_menu"),
-            callback_data=AdminMenuCallback.create(level=0).pack()
-        )
+        kb_builder.row(types.InlineKeyboardButton(
+            text=Localizator.get_text(BotEntity.ADMIN, "mark_page_shipped"),
+            callback_data=ShippingManagementCallback.create(level=6, page=callback_data.page).pack()
+        ))
+        kb_builder = await add_pagination_buttons(kb_builder, callback_data,
+                                                  OrderRepository.get_max_page_shipping_queue(session),
+                                                  back_button)
 
     if isinstance(callback, CallbackQuery):
         await callback.message.edit_text(message_text, reply_markup=kb_builder.as_markup())
@@ -308,8 +310,69 @@ async def cancel_order_admin_execute(**kwargs):
     await callback.message.edit_text(message_text, reply_markup=kb_builder.as_markup())
 
 
+async def mark_page_shipped_confirm(**kwargs):
+    """Level 6: Confirmation before marking every order of a queue page as shipped"""
+    callback = kwargs.get("callback")
+    session = kwargs.get("session")
+    callback_data = kwargs.get("callback_data")
+    state = kwargs.get("state")
+
+    entries = await OrderRepository.get_shipping_queue(callback_data.page, session)
+    # The confirmed orders are exactly the listed ones, even if the queue changes until the confirmation
+    await state.update_data(shipping_bulk_order_ids=[entry.order_id for entry in entries])
+
+    message_text = Localizator.get_text(BotEntity.ADMIN, "confirm_mark_page_shipped").format(
+        count=len(entries),
+        invoice_numbers="\n".join(f"📦 {_invoice_display(entry)}" for entry in entries)
+    )
+
+    kb_builder = InlineKeyboardBuilder()
+    kb_builder.button(
+        text=Localizator.get_text(BotEntity.COMMON, "confirm"),
+        callback_data=ShippingManagementCallback.create(level=7, confirmation=True, page=callback_data.page).pack()
+    )
+    kb_builder.button(
+        text=Localizator.get_text(BotEntity.COMMON, "cancel"),
+        callback_data=ShippingManagementCallback.create(level=0, page=callback_data.page).pack()
+    )
+
+    await callback.message.edit_text(message_text, reply_markup=kb_builder.as_markup())
+
+
+async def mark_page_shipped_execute(**kwargs):
+    """Level 7: Mark the confirmed orders as shipped (one UPDATE) and notify the buyers"""
+    callback = kwargs.get("callback")
+    session = kwargs.get("session")
+    state = kwargs.get("state")
+
+    data = await state.get_data()
+    order_ids = data.get("shipping_bulk_order_ids", [])
+    await state.update_data(shipping_bulk_order_ids=[])
+
+    # Orders shipped or cancelled since the confirmation are skipped
+    shipped_ids = await OrderRepository.mark_shipped(order_ids, session)
+    await session_commit(session)
+
+    entries = await OrderRepository.get_shipping_queue_entries(shipped_ids, session)
+    notified = await NotificationService.orders_shipped(entries)
+
+    message_text = Localizator.get_text(BotEntity.ADMIN, "orders_marked_shipped").format(
+        count=len(shipped_ids),
+        notified=notified
+    )
+
+    kb_builder = InlineKeyboardBuilder()
+    kb_builder.button(
+        text=Localizator.get_text(BotEntity.ADMIN, "back_to_menu"),
+        callback_data=ShippingManagementCallback.create(level=0).pack()
+    )
+
+    await callback.message.edit_text(message_text, reply_markup=kb_builder.as_markup())
+
+
 @shipping_management_router.callback_query(AdminIdFilter(), ShippingManagementCallback.filter())
-async def shipping_management_navigation(callback: CallbackQuery, callback_data: ShippingManagementCallback, session: AsyncSession | Session):
+async def shipping_management_navigation(callback: CallbackQuery, callback_data: ShippingManagementCallback, session: AsyncSession | Session,
+                                         state: FSMContext):
     current_level = callback_data.level
 
     levels = {
@@ -319,6 +382,8 @@ async def shipping_management_navigation(callback: CallbackQuery, callback_data:
         3: mark_as_shipped_execute,
         4: cancel_order_admin_confirm,
         5: cancel_order_admin_execute,
+        6: mark_page_shipped_confirm,
+        7: mark_page_shipped_execute,
     }
 
     current_level_function = levels[current_level]
@@ -327,6 +392,7 @@ async def shipping_management_navigation(callback: CallbackQuery, callback_data:
         "callback": callback,
         "session": session,
         "callback_data": callback_data,
+        "state": state,
     }
 
     await current_level_function(**kwargs)
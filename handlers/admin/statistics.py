@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 import config
 from callbacks import StatisticsCallback
 from services.admin import AdminService
+from services.statistics_chart import StatisticsChartService
 from utils.custom_filters import AdminIdFilter
 
 statistics = Router()
@@ -43,6 +44,14 @@ async def get_db_file(**kwargs):
                                                  types.BufferedInputFile(file=f.read(), filename="database.db"))
 
 
+async def statistics_chart(**kwargs):
+    callback = kwargs.get("callback")
+    unpacked_cb = StatisticsCallback.unpack(callback.data)
+    await callback.answer()
+    chart = await StatisticsChartService.get_chart(unpacked_cb.chart, unpacked_cb.timedelta)
+    await callback.message.answer_photo(types.BufferedInputFile(file=chart, filename="chart.png"))
+
+
 @statistics.callback_query(AdminIdFilter(), StatisticsCallback.filter())
 async def statistics_navigation(callback: CallbackQuery, state: FSMContext, callback_data: StatisticsCallback,
                                 session: AsyncSession | Session):
@@ -52,7 +61,8 @@ async def statistics_navigation(callback: CallbackQuery, state: FSMContext, call
         0: statistics_menu,
         1: timedelta_picker,
         2: entity_statistics,
-        3: get_db_file
+        3: get_db_file,
+        4: statistics_chart
     }
     current_level_function = levels[current_level]
 
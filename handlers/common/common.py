@@ -34,3 +34,34 @@ async def add_pagination_buttons(keyboard_builder: InlineKeyboardBuilder, unpack
     if back_button:
         keyboard_builder.row(back_button)
     return keyboard_builder
+
+
+def add_keyset_pagination_buttons(keyboard_builder: InlineKeyboardBuilder, unpacked_cb,
+                                  newer_page: int | None, older_page: int | None,
+                                  back_button) -> InlineKeyboardBuilder:
+    """
+    Pagination for keyset-paged lists, where `page` carries a cursor instead of a page number.
+    There is no "last page" button (that would need a count); None hides a button.
+    """
+    buttons = []
+    if newer_page is not None:
+        first_page_callback = unpacked_cb.__copy__()
+        first_page_callback.page = 0
+        back_page_callback = unpacked_cb.__copy__()
+        back_page_callback.page = newer_page
+        buttons.append(
+            types.InlineKeyboardButton(text=Localizator.get_text(BotEntity.COMMON, "pagination_first"),
+                                       callback_data=first_page_callback.pack()))
+        buttons.append(
+            types.InlineKeyboardButton(text=Localizator.get_text(BotEntity.COMMON, "pagination_previous"),
+                                       callback_data=back_page_callback.pack()))
+    if older_page is not None:
+        next_page_callback = unpacked_cb.__copy__()
+        next_page_callback.page = older_page
+        buttons.append(
+            types.InlineKeyboardButton(text=Localizator.get_text(BotEntity.COMMON, "pagination_next"),
+                                       callback_data=next_page_callback.pack()))
+    keyboard_builder.row(*buttons)
+    if back_button:
+        keyboard_builder.row(back_button)
+    return keyboard_builder
@@ -6,12 +6,24 @@ Automatically deletes old data according to retention policies:
 - ReferralUsage: 365 days
 - ReferralDiscount: After 90-day expiry
 
-Runs daily to ensure GDPR compliance and minimize data storage.
+Runs daily (DATA_RETENTION_CRON, see jobs/registry.py) to ensure GDPR compliance and
+minimize data storage.
+
+Expired rows are counted with COUNT and deleted in primary-key chunks of
+DATA_RETENTION_CHUNK_SIZE, one short transaction per chunk with a pause in between,
+so webhooks and handlers get the SQLite write lock while a large backlog is purged.
+With DATA_RETENTION_ARCHIVE_DIR set, every chunk is appended to a gzip-compressed
+NDJSON file before it is deleted. Afterwards the freed pages are returned to the file
+system with incremental_vacuum (needs auto_vacuum=INCREMENTAL, see migrations/README.md).
 """
 
 import asyncio
+import gzip
+import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
+from enum import Enum
+from pathlib import Path
 
 import config
 from db import get_db_session, session_commit
@@ -20,132 +32,192 @@ from models.invoice import Invoice
 from models.payment_transaction import PaymentTransaction
 from models.referral_usage import ReferralUsage
 from models.referral_discount import ReferralDiscount
-from sqlalchemy import select, delete
+from repositories.data_retention import DataRetentionRepository
+from sqlalchemy import select
 
+AUTO_VACUUM_INCREMENTAL = 2
 
-async def cleanup_old_orders():
+
+def _json_default(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class RetentionArchive:
     """
-    Deletes orders older than DATA_RETENTION_DAYS.
-    Cascade deletes: Invoice, PaymentTransaction (via relationships).
+    Rows deleted by one cleanup run, as gzip-compressed NDJSON ({"table": ..., "row": {...}} per line).
+
+    Every chunk is appended as its own gzip member (the file stays readable with zcat / gzip.open
+    even if the run is interrupted); compression and file I/O run in a worker thread.
     """
-    async with get_db_session() as session:
-        cutoff_date = datetime.now() - timedelta(days=config.DATA_RETENTION_DAYS)
 
-        # Get count for logging
-        count_stmt = select(Order).where(Order.created_at < cutoff_date)
-        result = await session.execute(count_stmt)
-        orders_to_delete = result.scalars().all()
-        count = len(orders_to_delete)
+    def __init__(self, directory: str):
+        self.path = Path(directory) / f"retention-{datetime.now():%Y%m%d-%H%M%S}.ndjson.gz"
+        self.rows = 0
 
-        if count == 0:
-            logging.info(f"[Data Retention] No orders older than {config.DATA_RETENTION_DAYS} days")
+    async def write(self, table: str, rows: list[dict]):
+        if not rows:
             return
+        data = "".join(json.dumps({"table": table, "row": row}, default=_json_default) + "\n" for row in rows)
+        await asyncio.to_thread(self._append, data.encode())
+        self.rows += len(rows)
 
-        # Delete orders (cascade will handle invoices and payment_transactions)
-        delete_stmt = delete(Order).where(Order.created_at < cutoff_date)
-        await session.execute(delete_stmt)
-        await session_commit(session)
-
-        logging.info(f"[Data Retention] ✅ Deleted {count} orders older than {config.DATA_RETENTION_DAYS} days")
+    def _append(self, data: bytes):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self.path, "ab") as f:
+            f.write(data)
 
 
-async def cleanup_old_invoices_orphaned():
+async def _purge(label: str, model, condition, delete_chunk, archive: RetentionArchive | None,
+                 archived_tables: list | None = None) -> int:
     """
-    Safety cleanup: Delete orphaned invoices without orders.
-    Should not happen due to cascade, but provides extra safety.
+    Counts the rows of `model` matching `condition`, then deletes them chunk by chunk.
+
+    Args:
+        label: Name of the rows for the log
+        delete_chunk: async (ids, session) -> deleted rows
+        archive: Archive the rows are written to before they are deleted (None: no archive)
+        archived_tables: (model, column) pairs archived per chunk - rows whose column is one of
+            the chunk's ids (default: the rows of `model` itself)
+
+    Returns:
+        Number of deleted rows
     """
     async with get_db_session() as session:
-        cutoff_date = datetime.now() - timedelta(days=config.DATA_RETENTION_DAYS)
-
-        # Find invoices without orders
-        stmt = select(Invoice).where(
-            Invoice.id.notin_(select(Order.id))
-        ).where(Invoice.id < cutoff_date)  # Assuming id correlates with creation time
+        count = await DataRetentionRepository.count(model, condition, session)
+    if count == 0:
+        logging.info(f"[Data Retention] No {label}")
+        return 0
+
+    chunk_size = config.DATA_RETENTION_CHUNK_SIZE
+    archived_tables = archived_tables or [(model, model.id)]
+    deleted = 0
+    after_id = 0
+    while True:
+        async with get_db_session() as session:
+            ids = await DataRetentionRepository.get_ids(model, condition, after_id, chunk_size, session)
+            if not ids:
+                break
+            if archive is not None:
+                for archived_model, column in archived_tables:
+                    rows = await DataRetentionRepository.get_rows(archived_model, column, ids, session)
+                    await archive.write(archived_model.__tablename__, rows)
+            deleted += await delete_chunk(ids, session)
+            await session_commit(session)
 
-        result = await session.execute(stmt)
-        orphaned = result.scalars().all()
+        after_id = ids[-1]
+        if len(ids) < chunk_size:
+            break
+        # Let webhooks and handlers get the write lock between chunks
+        await asyncio.sleep(config.DATA_RETENTION_CHUNK_PAUSE_SECONDS)
 
-        if len(orphaned) > 0:
-            logging.warning(f"[Data Retention] Found {len(orphaned)} orphaned invoices - cleaning up")
-            delete_stmt = delete(Invoice).where(Invoice.id.in_([i.id for i in orphaned]))
-            await session.execute(delete_stmt)
-            await session_commit(session)
+    logging.info(f"[Data Retention] ✅ Deleted {deleted} of {count} {label}")
+    return deleted
 
 
-async def cleanup_old_payment_transactions():
+async def cleanup_old_orders(archive: RetentionArchive | None = None) -> int:
     """
-    Deletes payment transactions older than DATA_RETENTION_DAYS.
-    Should be handled by Order cascade, but provides explicit cleanup.
+    Deletes orders older than DATA_RETENTION_DAYS with their invoices, payment transactions
+    and shipping address. Orders still referenced by a referral usage are kept until it expires.
+    Shipping addresses are not archived - removing them is what the retention period is for.
     """
-    async with get_db_session() as session:
-        cutoff_date = datetime.now() - timedelta(days=config.DATA_RETENTION_DAYS)
+    cutoff_date = datetime.now() - timedelta(days=config.DATA_RETENTION_DAYS)
+    return await _purge(f"orders older than {config.DATA_RETENTION_DAYS} days",
+                        Order,
+                        (Order.created_at < cutoff_date) & DataRetentionRepository.order_deletable(),
+                        DataRetentionRepository.delete_orders,
+                        archive,
+                        [(Order, Order.id), (Invoice, Invoice.order_id),
+                         (PaymentTransaction, PaymentTransaction.order_id)])
 
-        count_stmt = select(PaymentTransaction).where(PaymentTransaction.received_at < cutoff_date)
-        result = await session.execute(count_stmt)
-        count = len(result.scalars().all())
 
-        if count == 0:
-            logging.info(f"[Data Retention] No payment transactions older than {config.DATA_RETENTION_DAYS} days")
-            return
+async def cleanup_old_invoices_orphaned(archive: RetentionArchive | None = None) -> int:
+    """
+    Safety cleanup: Delete orphaned invoices without orders.
+    Should not happen (orders are deleted with their invoices), but provides extra safety.
+    """
+    return await _purge("orphaned invoices",
+                        Invoice,
+                        ~select(Order.id).where(Order.id == Invoice.order_id).exists(),
+                        DataRetentionRepository.delete_invoices,
+                        archive,
+                        [(Invoice, Invoice.id), (PaymentTransaction, PaymentTransaction.invoice_id)])
 
-        delete_stmt = delete(PaymentTransaction).where(PaymentTransaction.received_at < cutoff_date)
-        await session.execute(delete_stmt)
-        await session_commit(session)
 
-        logging.info(f"[Data Retention] ✅ Deleted {count} payment transactions older than {config.DATA_RETENTION_DAYS} days")
+async def cleanup_old_payment_transactions(archive: RetentionArchive | None = None) -> int:
+    """
+    Deletes payment transactions older than DATA_RETENTION_DAYS.
+    Should be handled by the order cleanup, but provides explicit cleanup.
+    """
+    cutoff_date = datetime.now() - timedelta(days=config.DATA_RETENTION_DAYS)
+    return await _purge(f"payment transactions older than {config.DATA_RETENTION_DAYS} days",
+                        PaymentTransaction,
+                        PaymentTransaction.received_at < cutoff_date,
+                        lambda ids, session: DataRetentionRepository.delete_ids(PaymentTransaction, ids, session),
+                        archive)
 
 
-async def cleanup_old_referral_usages():
+async def cleanup_old_referral_usages(archive: RetentionArchive | None = None) -> int:
     """
     Deletes referral usage records older than REFERRAL_DATA_RETENTION_DAYS.
     Kept longer than orders for abuse pattern detection.
     """
-    async with get_db_session() as session:
-        cutoff_date = datetime.now() - timedelta(days=config.REFERRAL_DATA_RETENTION_DAYS)
-
-        count_stmt = select(ReferralUsage).where(ReferralUsage.created_at < cutoff_date)
-        result = await session.execute(count_stmt)
-        count = len(result.scalars().all())
-
-        if count == 0:
-            logging.info(f"[Data Retention] No referral usages older than {config.REFERRAL_DATA_RETENTION_DAYS} days")
-            return
-
-        delete_stmt = delete(ReferralUsage).where(ReferralUsage.created_at < cutoff_date)
-        await session.execute(delete_stmt)
-        await session_commit(session)
-
-        logging.info(f"[Data Retention] ✅ Deleted {count} referral usages older than {config.REFERRAL_DATA_RETENTION_DAYS} days")
+    cutoff_date = datetime.now() - timedelta(days=config.REFERRAL_DATA_RETENTION_DAYS)
+    return await _purge(f"referral usages older than {config.REFERRAL_DATA_RETENTION_DAYS} days",
+                        ReferralUsage,
+                        ReferralUsage.created_at < cutoff_date,
+                        lambda ids, session: DataRetentionRepository.delete_ids(ReferralUsage, ids, session),
+                        archive)
 
 
-async def cleanup_expired_referral_discounts():
+async def cleanup_expired_referral_discounts(archive: RetentionArchive | None = None) -> int:
     """
     Deletes referral discounts that have expired.
     Expiry is 90 days from creation (as per T&Cs).
     """
-    async with get_db_session() as session:
-        now = datetime.now()
-
-        # Delete expired discounts
-        count_stmt = select(ReferralDiscount).where(ReferralDiscount.expires_at < now)
-        result = await session.execute(count_stmt)
-        count = len(result.scalars().all())
+    return await _purge("expired referral discounts",
+                        ReferralDiscount,
+                        ReferralDiscount.expires_at < datetime.now(),
+                        lambda ids, session: DataRetentionRepository.delete_ids(ReferralDiscount, ids, session),
+                        archive)
 
-        if count == 0:
-            logging.info(f"[Data Retention] No expired referral discounts")
-            return
 
-        delete_stmt = delete(ReferralDiscount).where(ReferralDiscount.expires_at < now)
-        await session.execute(delete_stmt)
-        await session_commit(session)
-
-        logging.info(f"[Data Retention] ✅ Deleted {count} expired referral discounts")
+async def vacuum_free_pages() -> int:
+    """
+    Returns the pages freed by the cleanup to the file system, DATA_RETENTION_VACUUM_PAGES
+    at a time. Returns the number of released pages.
+    """
+    async with get_db_session() as session:
+        if await DataRetentionRepository.get_auto_vacuum(session) != AUTO_VACUUM_INCREMENTAL:
+            logging.info("[Data Retention] auto_vacuum is not INCREMENTAL - the database file won't shrink "
+                         "(see migrations/enable_incremental_vacuum.sql)")
+            return 0
+        free_pages = await DataRetentionRepository.get_free_pages(session)
+
+    released = 0
+    while free_pages > 0:
+        async with get_db_session() as session:
+            left = await DataRetentionRepository.incremental_vacuum(config.DATA_RETENTION_VACUUM_PAGES, session)
+        if left >= free_pages:
+            break
+        released += free_pages - left
+        free_pages = left
+        await asyncio.sleep(config.DATA_RETENTION_CHUNK_PAUSE_SECONDS)
+
+    if released > 0:
+        logging.info(f"[Data Retention] ✅ Released {released} free database pages")
+    return released
 
 
 async def run_data_retention_cleanup():
     """
     Main cleanup routine - runs all cleanup tasks.
-    Should be called daily via scheduler.
+    Scheduled daily by jobs/registry.py.
     """
     logging.info("=" * 80)
     logging.info("[Data Retention] Starting daily cleanup job")
@@ -153,35 +225,27 @@ async def run_data_retention_cleanup():
     logging.info(f"[Data Retention] Referral retention: {config.REFERRAL_DATA_RETENTION_DAYS} days")
     logging.info("=" * 80)
 
+    archive = RetentionArchive(config.DATA_RETENTION_ARCHIVE_DIR) if config.DATA_RETENTION_ARCHIVE_DIR else None
     try:
         # Run all cleanup tasks
-        await cleanup_old_orders()
-        await cleanup_old_invoices_orphaned()
-        await cleanup_old_payment_transactions()
-        await cleanup_old_referral_usages()
-        await cleanup_expired_referral_discounts()
+        await cleanup_old_orders(archive)
+        await cleanup_old_invoices_orphaned(archive)
+        await cleanup_old_payment_transactions(archive)
+        await cleanup_old_referral_usages(archive)
+        await cleanup_expired_referral_discounts(archive)
+        if archive is not None and archive.rows > 0:
+            logging.info(f"[Data Retention] Archived {archive.rows} rows to {archive.path}")
+
+        await vacuum_free_pages()
 
         logging.info("[Data Retention] ✅ Daily cleanup completed successfully")
 
     except Exception as e:
-        logging.error(f"[Data Retention] ❌ Error during cleanup: {e}", exc_info=True)
-
-    logging.info("=" * 80 + "\n")
-
-
-async def start_data_retention_cleanup_job():
-    """
-    Background job that runs cleanup every 24 hours.
-    Call this function at application startup.
-    """
-    while True:
-        try:
-            await run_data_retention_cleanup()
-        except Exception as e:
-            logging.error(f"[Data Retention] Unexpected error in cleanup job: {e}", exc_info=True)
-
-        # Wait 24 hours before next cleanup
-        await asyncio.sleep(86400)  # 24 hours = 86400 seconds
+        # Re-raised so the scheduler counts the failed run (and logs the traceback)
+        logging.error(f"[Data Retention] ❌ Error during cleanup: {e}")
+        raise
+    finally:
+        logging.info("=" * 80 + "\n")
 
 
 if __name__ == "__main__":
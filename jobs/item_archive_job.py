@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import config
+from db import get_db_session, session_commit
+from repositories.item_archive import ItemArchiveRepository
+
+
+class ItemArchiveJob:
+    """
+    Background job that moves sold and delivered items from items to items_archive.
+
+    Items are moved in batches of ITEM_ARCHIVE_BATCH_SIZE, one short transaction per batch,
+    so the SQLite write lock is never held for long. The live items table then only holds
+    sellable and reserved stock. Scheduled in jobs/registry.py.
+    """
+
+    @staticmethod
+    async def archive_sold_items(
+        archive_after_days: int | None = None,
+        batch_size: int | None = None
+    ) -> int:
+        """
+        Moves all archivable items in batches.
+
+        Args:
+            archive_after_days: Minimum age of the purchase (default: ITEM_ARCHIVE_AFTER_DAYS)
+            batch_size: Items per transaction (default: ITEM_ARCHIVE_BATCH_SIZE)
+
+        Returns:
+            Number of archived items
+        """
+        archive_after_days = archive_after_days if archive_after_days is not None else config.ITEM_ARCHIVE_AFTER_DAYS
+        batch_size = batch_size or config.ITEM_ARCHIVE_BATCH_SIZE
+        cutoff = datetime.now() - timedelta(days=archive_after_days)
+
+        archived = 0
+        # Keyset position: items that were skipped (e.g. awaiting shipment) aren't read again
+        last_id = 0
+        while True:
+            async with get_db_session() as session:
+                item_ids = await ItemArchiveRepository.get_archivable_ids(cutoff, batch_size, session, last_id)
+                if not item_ids:
+                    break
+                archived += await ItemArchiveRepository.move_to_archive(item_ids, session)
+                await session_commit(session)
+
+            last_id = item_ids[-1]
+            if len(item_ids) < batch_size:
+                break
+            # Let webhooks and handlers get the write lock between batches
+            await asyncio.sleep(0)
+
+        if archived > 0:
+            logging.info(f"📦 Archived {archived} sold items older than {archive_after_days} days")
+        return archived
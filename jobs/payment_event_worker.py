@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+
+from pydantic import ValidationError
+
+from db import get_db_session, session_commit
+from models.payment import ProcessingPaymentDTO
+from models.payment_event import PaymentEventDTO
+from repositories.payment_event import PaymentEventRepository
+
+
+class PaymentEventWorker:
+    """
+    Background worker that processes queued KryptoExpress webhook events (payment_events).
+
+    - At most `concurrency` events are processed at the same time
+    - A failed event is retried with exponential backoff (with jitter)
+    - After `max_attempts` failures, or if the stored body can't be parsed, the event
+      is moved to payment_events_dead_letter, where admins can replay it
+    """
+
+    # Set by the webhook endpoint when it queues an event, so the worker doesn't wait for the next poll
+    _wakeup = asyncio.Event()
+
+    def __init__(self,
+                 concurrency: int = 4,
+                 max_attempts: int = 8,
+                 retry_base_seconds: float = 5,
+                 retry_max_seconds: float = 600,
+                 poll_interval_seconds: int = 5):
+        """
+        Args:
+            concurrency: Maximum number of events processed in parallel
+            max_attempts: Attempts before an event is dead-lettered
+            retry_base_seconds: Delay after the first failure, doubled per attempt
+            retry_max_seconds: Upper bound for the retry delay
+            poll_interval_seconds: How often to look for due retries (default: 5s)
+        """
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._task = None
+        self._running = False
+        self._in_flight: dict[int, asyncio.Task] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of events being processed right now."""
+        return len(self._in_flight)
+
+    @staticmethod
+    def notify():
+        """Wakes the worker up (called after an event was queued)."""
+        PaymentEventWorker._wakeup.set()
+
+    async def start(self):
+        """Starts the background worker."""
+        if self._running:
+            logging.warning("PaymentEventWorker is already running")
+            return
+
+        self._running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logging.info(f"PaymentEventWorker started (concurrency: {self.concurrency}, max attempts: {self.max_attempts})")
+
+    async def stop(self):
+        """Stops the worker and waits for events in flight (unfinished events stay queued)."""
+        if not self._running:
+            return
+
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.wait_idle()
+        logging.info("PaymentEventWorker stopped")
+
+    async def wait_idle(self):
+        """Waits until all events in flight are finished."""
+        while self._in_flight:
+            await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+
+    async def _run_loop(self):
+        """Main loop: dispatch due events, then sleep until woken up or the next poll."""
+        while self._running:
+            PaymentEventWorker._wakeup.clear()
+            try:
+                await self.dispatch_due_events()
+            except Exception as e:
+                logging.error(f"Error in PaymentEventWorker: {e}", exc_info=True)
+
+            try:
+                await asyncio.wait_for(PaymentEventWorker._wakeup.wait(), timeout=self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def dispatch_due_events(self):
+        """Starts processing of due events, up to the free concurrency slots."""
+        free_slots = self.concurrency - len(self._in_flight)
+        if free_slots <= 0:
+            return
+
+        async with get_db_session() as session:
+            events = await PaymentEventRepository.get_due(datetime.now(), free_slots, set(self._in_flight), session)
+
+        for event in events:
+            task = asyncio.create_task(self._process_event(event))
+            self._in_flight[event.id] = task
+            task.add_done_callback(lambda _, event_id=event.id: self._on_event_done(event_id))
+
+    def _on_event_done(self, event_id: int):
+        self._in_flight.pop(event_id, None)
+        # A slot became free - pick up the next due event right away
+        PaymentEventWorker.notify()
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+        # Jitter: retries of events that failed together (e.g. Telegram outage) spread out
+        return random.uniform(delay / 2, delay)
+
+    async def _process_event(self, event: PaymentEventDTO):
+        from processing.processing import process_payment_event
+
+        attempts = event.attempts + 1
+        try:
+            payment_dto = ProcessingPaymentDTO.model_validate_json(event.body)
+        except ValidationError as e:
+            # Retrying can't fix a body that doesn't parse
+            logging.error(f"Payment event {event.id} has an invalid body, moving to dead letter: {e}")
+            async with get_db_session() as session:
+                await PaymentEventRepository.move_to_dead_letter(event, attempts, str(e), session)
+                await session_commit(session)
+            return
+
+        try:
+            await process_payment_event(payment_dto)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            async with get_db_session() as session:
+                if attempts >= self.max_attempts:
+                    logging.error(f"❌ Payment event {event.id} (Payment ID: {event.payment_processing_id}) "
+                                  f"failed {attempts} times, moving to dead letter: {error}", exc_info=True)
+                    await PaymentEventRepository.move_to_dead_letter(event, attempts, error, session)
+                else:
+                    delay = self._retry_delay(attempts)
+                    logging.warning(f"⚠️ Payment event {event.id} (Payment ID: {event.payment_processing_id}) "
+                                    f"failed (attempt {attempts}/{self.max_attempts}), retry in {delay:.0f}s: {error}")
+                    await PaymentEventRepository.schedule_retry(
+                        event.id, attempts, datetime.now() + timedelta(seconds=delay), error, session
+                    )
+                await session_commit(session)
+            return
+
+        async with get_db_session() as session:
+            await PaymentEventRepository.delete(event.id, session)
+            await session_commit(session)
+
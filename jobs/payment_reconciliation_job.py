@@ -0,0 +1,31 @@
+import logging
+
+import config
+from db import get_db_session, session_commit
+from jobs.payment_event_worker import PaymentEventWorker
+from services.payment_reconciliation import PaymentReconciliationReportDTO, PaymentReconciliationService
+
+
+class PaymentReconciliationJob:
+    """
+    Background job that recovers payments whose KryptoExpress webhook was lost.
+
+    Periodically compares the provider's payment listing with open invoices and queues
+    the missing payment events (see PaymentReconciliationService). Scheduled in jobs/registry.py.
+    """
+
+    @staticmethod
+    async def run_once() -> PaymentReconciliationReportDTO | None:
+        """Reconciles once. Returns None in mock mode (no KryptoExpress API key)."""
+        if not config.KRYPTO_EXPRESS_API_KEY or config.KRYPTO_EXPRESS_API_KEY.startswith("${"):
+            return None
+
+        async with get_db_session() as session:
+            report = await PaymentReconciliationService.reconcile(session)
+            await session_commit(session)
+
+        if report.missed > 0:
+            PaymentEventWorker.notify()
+            logging.warning(f"🔎 Payment reconciliation queued {report.missed} missed payment events "
+                            f"({report.invoices} open invoices, {report.pages} pages)")
+        return report
@@ -0,0 +1,21 @@
+import logging
+
+from services.price_oracle import PriceOracle
+
+
+class PriceRefreshJob:
+    """
+    Background job that keeps the PriceOracle cache warm (scheduled in jobs/registry.py).
+
+    Runs more often than PRICE_ORACLE_TTL_SECONDS, so price reads in handlers
+    are served from memory instead of waiting for CoinGecko/Kraken.
+    """
+
+    @staticmethod
+    async def run_once():
+        """Refreshes all prices."""
+        try:
+            await PriceOracle.refresh()
+        except Exception as e:
+            # Already logged by PriceOracle; cached prices stay valid until they exceed the staleness bound
+            logging.debug(f"PriceRefreshJob: refresh failed: {e}")
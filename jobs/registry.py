@@ -0,0 +1,51 @@
+import config
+from jobs.data_retention_cleanup_job import run_data_retention_cleanup
+from jobs.item_archive_job import ItemArchiveJob
+from jobs.payment_reconciliation_job import PaymentReconciliationJob
+from jobs.payment_timeout_job import PaymentTimeoutJob
+from jobs.price_refresh_job import PriceRefreshJob
+from jobs.scheduler import CronSchedule, IntervalSchedule, Scheduler
+from jobs.wallet_snapshot_job import WalletSnapshotJob
+
+
+def create_scheduler(redis=None) -> Scheduler:
+    """
+    All periodic background jobs of the bot. PaymentEventWorker is not one of them - it
+    is woken up by the webhook and runs on every instance (see jobs/payment_event_worker.py).
+
+    Args:
+        redis: Shared Redis for leader election (None: single instance, always runs the jobs)
+    """
+    scheduler = Scheduler(redis)
+
+    # Cancels expired orders and releases their reserved stock
+    scheduler.add_job("payment_timeout", PaymentTimeoutJob.run_once,
+                      IntervalSchedule(config.PAYMENT_CHECK_INTERVAL_SECONDS),
+                      timeout_seconds=300, jitter_seconds=5, run_on_start=True)
+
+    # Queues payments whose webhook was lost
+    scheduler.add_job("payment_reconciliation", PaymentReconciliationJob.run_once,
+                      IntervalSchedule(config.PAYMENT_RECONCILIATION_INTERVAL_SECONDS),
+                      timeout_seconds=600, jitter_seconds=30, run_on_start=True)
+
+    # Keeps the exchange rates of the PriceOracle warm
+    scheduler.add_job("price_refresh", PriceRefreshJob.run_once,
+                      IntervalSchedule(config.PRICE_ORACLE_REFRESH_INTERVAL_SECONDS),
+                      timeout_seconds=60, jitter_seconds=5, run_on_start=True)
+
+    # Moves old sold items to items_archive
+    scheduler.add_job("item_archive", ItemArchiveJob.archive_sold_items,
+                      IntervalSchedule(3600),
+                      timeout_seconds=1800, jitter_seconds=300, run_on_start=True)
+
+    # Checks wallet balances against the ledger
+    scheduler.add_job("wallet_snapshot", WalletSnapshotJob.run_once,
+                      IntervalSchedule(config.WALLET_SNAPSHOT_INTERVAL_SECONDS),
+                      timeout_seconds=1800, jitter_seconds=300, run_on_start=True)
+
+    # Deletes data past its retention period
+    scheduler.add_job("data_retention", run_data_retention_cleanup,
+                      CronSchedule(config.DATA_RETENTION_CRON),
+                      timeout_seconds=3 * 3600, jitter_seconds=300)
+
+    return scheduler
@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from redis.exceptions import LockError, RedisError
+
+import config
+from utils.metrics import JOB_DURATION, JOB_RUNS
+
+
+class IntervalSchedule:
+    """Runs every `seconds` seconds, counted from the end of the previous run."""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError(f"Interval must be positive, got {seconds}")
+        self.seconds = seconds
+
+    def next_run(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds)
+
+    def __str__(self) -> str:
+        return f"every {self.seconds}s"
+
+
+class CronSchedule:
+    """
+    Standard 5-field cron expression (minute hour day-of-month month day-of-week), local time.
+
+    Fields accept `*`, numbers, ranges (`1-5`), steps (`*/15`, `0-30/10`) and lists of those
+    (`0,30`). Day of week: 0 or 7 = Sunday. As in cron, if both day fields are restricted a
+    day matching either of them runs.
+    """
+
+    FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got '{expression}'")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            CronSchedule._parse_field(field, low, high)
+            for field, (low, high) in zip(fields, CronSchedule.FIELD_RANGES)
+        )
+        self.weekdays = {weekday % 7 for weekday in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> set[int]:
+        values = set()
+        for part in field.split(","):
+            value_range, _, step = part.partition("/")
+            if value_range == "*":
+                start, end = low, high
+            elif "-" in value_range:
+                start, end = (int(value) for value in value_range.split("-", 1))
+            else:
+                start = int(value_range)
+                end = high if step else start
+            step = int(step) if step else 1
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError(f"Invalid cron field '{field}' (allowed: {low}-{high})")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_matches = moment.day in self.days
+        # datetime: Monday = 0, cron: Sunday = 0
+        weekday_matches = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_matches and weekday_matches
+        return day_matches or weekday_matches
+
+    def next_run(self, after: datetime) -> datetime:
+        """First matching minute after `after`. Skips whole months/days/hours that can't match."""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Feb 29 on a given weekday can be decades away; impossible dates (Feb 31) never match
+        give_up = moment + timedelta(days=366 * 28)
+        while moment < give_up:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+    def __str__(self) -> str:
+        return f"cron '{self.expression}'"
+
+
+class JobStats:
+    """Run counters and durations (seconds) of one scheduled job."""
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_run_at: datetime | None = None
+        self.next_run_at: datetime | None = None
+
+    def record(self, duration: float):
+        self.runs += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+
+
+class ScheduledJob:
+    def __init__(self, name: str, func: Callable[[], Awaitable], schedule: IntervalSchedule | CronSchedule,
+                 timeout_seconds: float | None, jitter_seconds: float, run_on_start: bool):
+        self.name = name
+        self.func = func
+        self.schedule = schedule
+        self.timeout_seconds = timeout_seconds
+        self.jitter_seconds = jitter_seconds
+        self.run_on_start = run_on_start
+        self.stats = JobStats()
+        self.running = False
+
+
+class Scheduler:
+    """
+    Runs the periodic background jobs (see jobs/registry.py) on interval or cron schedules.
+
+    - Every job runs in its own task; a run never overlaps the previous run of the same job
+    - A random delay of up to `jitter_seconds` is added before each run, so several
+      instances (and several jobs on the same schedule) don't hit the database at once
+    - Runs exceeding `timeout_seconds` are cancelled; failures are logged, the schedule goes on
+    - With Redis, instances elect a leader (lock `scheduler:leader`, renewed every third of
+      SCHEDULER_LEADER_TTL_SECONDS) and only the leader runs jobs; every run additionally
+      holds `scheduler:job:<name>`, so a run outlasting a leader change isn't started twice.
+      Without Redis this instance is always the leader.
+    """
+
+    LEADER_KEY = "scheduler:leader"
+
+    def __init__(self, redis=None):
+        self._redis = redis
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._leader_lock = None
+        self._running = False
+
+    @property
+    def is_leader(self) -> bool:
+        return self._redis is None or self._leader_lock is not None
+
+    def add_job(self, name: str, func: Callable[[], Awaitable], schedule: IntervalSchedule | CronSchedule,
+                timeout_seconds: float | None = None, jitter_seconds: float = 0, run_on_start: bool = False):
+        """
+        Args:
+            name: Unique job name (log messages, stats, Redis lock key)
+            func: Coroutine function without arguments
+            schedule: IntervalSchedule or CronSchedule
+            timeout_seconds: Runs taking longer are cancelled (None: no timeout)
+            jitter_seconds: Upper bound of the random delay added before each run
+            run_on_start: Run once right after start() instead of waiting for the first slot
+        """
+        if name in self._jobs:
+            raise ValueError(f"Job {name} is already scheduled")
+        self._jobs[name] = ScheduledJob(name, func, schedule, timeout_seconds, jitter_seconds, run_on_start)
+
+    def get_stats(self) -> dict[str, JobStats]:
+        return {name: job.stats for name, job in self._jobs.items()}
+
+    async def start(self):
+        """Starts the scheduler. With Redis the first leader election happens before any job runs."""
+        if self._running:
+            logging.warning("Scheduler is already running")
+            return
+
+        self._running = True
+        if self._redis is not None:
+            await self._elect()
+            self._tasks.append(asyncio.create_task(self._leader_loop()))
+        for job in self._jobs.values():
+            self._tasks.append(asyncio.create_task(self._job_loop(job)))
+        logging.info(f"Scheduler started ({len(self._jobs)} jobs, leader: {self.is_leader})")
+
+    async def stop(self):
+        """Stops the scheduler; runs in progress are cancelled."""
+        if not self._running:
+            return
+
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._leader_lock is not None:
+            try:
+                await self._leader_lock.release()
+            except (LockError, RedisError):
+                pass
+            self._leader_lock = None
+        logging.info("Scheduler stopped")
+
+    async def _elect(self):
+        """Takes the leader lock if it's free, or renews it if this instance holds it."""
+        try:
+            if self._leader_lock is None:
+                lock = self._redis.lock(Scheduler.LEADER_KEY, timeout=config.SCHEDULER_LEADER_TTL_SECONDS)
+                if await lock.acquire(blocking=False):
+                    self._leader_lock = lock
+                    logging.info("Scheduler: this instance is now the leader")
+            else:
+                await self._leader_lock.reacquire()
+        except (LockError, RedisError) as e:
+            if self._leader_lock is not None:
+                logging.warning(f"Scheduler: lost leadership: {e}")
+            self._leader_lock = None
+
+    async def _leader_loop(self):
+        while self._running:
+            await asyncio.sleep(config.SCHEDULER_LEADER_TTL_SECONDS / 3)
+            await self._elect()
+
+    async def _job_loop(self, job: ScheduledJob):
+        next_run = datetime.now() if job.run_on_start else job.schedule.next_run(datetime.now())
+        while self._running:
+            job.stats.next_run_at = next_run
+            delay = (next_run - datetime.now()).total_seconds() + random.uniform(0, job.jitter_seconds)
+            await asyncio.sleep(max(delay, 0))
+            if self.is_leader:
+                await self.run_job(job.name)
+            next_run = job.schedule.next_run(datetime.now())
+
+    async def run_job(self, name: str) -> bool:
+        """
+        Runs a job now, unless a run of it is in progress here or on another instance.
+
+        Returns:
+            False if the run was skipped
+        """
+        job = self._jobs[name]
+        if job.running:
+            job.stats.skipped += 1
+            JOB_RUNS.inc(name, "skipped")
+            logging.warning(f"Scheduler: {name} skipped, previous run still in progress")
+            return False
+
+        job.running = True
+        try:
+            job_lock = None
+            if self._redis is not None:
+                # Expires on its own if this instance dies mid-run
+                job_lock = self._redis.lock(f"scheduler:job:{name}",
+                                            timeout=job.timeout_seconds or config.SCHEDULER_LEADER_TTL_SECONDS)
+                try:
+                    acquired = await job_lock.acquire(blocking=False)
+                except RedisError as e:
+                    logging.warning(f"Scheduler: {name} skipped, Redis unavailable: {e}")
+                    acquired = False
+                if not acquired:
+                    job.stats.skipped += 1
+                    JOB_RUNS.inc(name, "skipped")
+                    return False
+            try:
+                await self._execute(job)
+            finally:
+                if job_lock is not None:
+                    try:
+                        await job_lock.release()
+                    except (LockError, RedisError):
+                        logging.warning(f"Scheduler: lock of {name} expired before release")
+            return True
+        finally:
+            job.running = False
+
+    @staticmethod
+    async def _execute(job: ScheduledJob):
+        job.stats.last_run_at = datetime.now()
+        started = time.perf_counter()
+        result = "ok"
+        try:
+            await asyncio.wait_for(job.func(), timeout=job.timeout_seconds)
+        except asyncio.TimeoutError:
+            job.stats.timeouts += 1
+            result = "timeout"
+            logging.error(f"Scheduler: {job.name} cancelled after {job.timeout_seconds}s timeout")
+        except Exception as e:
+            job.stats.failures += 1
+            result = "failed"
+            logging.error(f"Scheduler: {job.name} failed: {e}", exc_info=True)
+        finally:
+            duration = time.perf_counter() - started
+            job.stats.record(duration)
+            JOB_DURATION.observe(duration, job.name)
+            JOB_RUNS.inc(job.name, result)
@@ -0,0 +1,34 @@
+import logging
+
+from db import get_db_session, session_commit
+from repositories.wallet import WalletRepository
+
+
+class WalletSnapshotJob:
+    """
+    Background job that snapshots wallet balances and checks them against the ledger.
+
+    Each run stores the balance of every wallet that changed since its last snapshot,
+    then reports users whose balance differs from (previous snapshot + ledger entries).
+    Scheduled in jobs/registry.py.
+    """
+
+    @staticmethod
+    async def run_once() -> int:
+        """
+        Checks the wallets against the ledger, then takes the snapshot.
+
+        Returns:
+            Number of wallets whose balance doesn't match the ledger
+        """
+        async with get_db_session() as session:
+            # Checked first: a snapshot taken of a drifted balance would hide the drift from later runs
+            drift = await WalletRepository.find_drift(session)
+            for entry in drift:
+                logging.error(f"🚨 Wallet drift: user {entry.user_id} has balance {entry.balance_cents} cents, "
+                              f"ledger says {entry.expected_cents} cents")
+            snapshots = await WalletRepository.create_snapshot(session)
+            await session_commit(session)
+
+        logging.info(f"💼 Wallet snapshot: {snapshots} wallets changed, {len(drift)} drifted")
+        return len(drift)
@@ -1,16 +1,78 @@
+import logging
+import time
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
-from db import get_db_session
+
+import config
+from db import get_db_session, engine
+from utils.metrics import (UPDATE_DURATION, UPDATE_ERRORS, UPDATE_DB_STATEMENTS, UPDATE_DB_DURATION,
+                           UPDATE_OVER_QUERY_BUDGET, UPDATE_REPEATED_STATEMENTS)
+from utils.query_counter import QueryCounter, MAX_SHAPE_LENGTH
+
+
+def query_budget(limit: int):
+    """
+    Decorator for handlers that legitimately run more statements than QUERY_BUDGET_PER_UPDATE.
+
+    :param limit: Statements per update before the update is logged as over budget
+    """
+
+    def decorator(func):
+        setattr(func, 'query_budget', limit)
+        return func
+
+    return decorator
 
 
 class DBSessionMiddleware(BaseMiddleware):
+    """
+    Opens the database session of the update and records its metrics: handling time per
+    router (handler module), handler and menu level (callback_data.level), and the number
+    and duration of the database statements it executed.
+
+    Updates over their query budget (QUERY_BUDGET_PER_UPDATE or @query_budget) and
+    statements repeated QUERY_REPEAT_THRESHOLD times within one update (a query per row:
+    N+1) are logged with the offending statements.
+    """
+
+    def __init__(self):
+        QueryCounter.instrument(engine)
+
     async def __call__(
             self,
             handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
             event: TelegramObject,
             data: Dict[str, Any]
     ) -> Awaitable[Any]:
-        async with get_db_session() as session:
-            data["session"] = session
-            return await handler(event, data)
+        callback = data["handler"].callback
+        router, handler_name = callback.__module__, callback.__name__
+        started = time.perf_counter()
+        with QueryCounter.track() as queries:
+            try:
+                async with get_db_session() as session:
+                    data["session"] = session
+                    return await handler(event, data)
+            except Exception:
+                UPDATE_ERRORS.inc(router, handler_name)
+                raise
+            finally:
+                level = getattr(data.get("callback_data"), "level", "")
+                UPDATE_DURATION.observe(time.perf_counter() - started, router, handler_name, level)
+                UPDATE_DB_STATEMENTS.observe(queries.statements, router, handler_name)
+                UPDATE_DB_DURATION.observe(queries.seconds, router, handler_name)
+                DBSessionMiddleware._check_queries(queries, router, handler_name, level,
+                                                   getattr(callback, "query_budget", config.QUERY_BUDGET_PER_UPDATE))
+
+    @staticmethod
+    def _check_queries(queries: QueryCounter, router: str, handler_name: str, level, budget: int):
+        repeated = queries.repeated(config.QUERY_REPEAT_THRESHOLD)
+        if repeated:
+            UPDATE_REPEATED_STATEMENTS.inc(router, handler_name)
+            for shape, count in repeated:
+                logging.warning(f"🔁 {router}.{handler_name} (level {level}): statement executed {count}x "
+                                f"in one update (N+1?): {shape[:MAX_SHAPE_LENGTH]}")
+        if queries.statements > budget:
+            UPDATE_OVER_QUERY_BUDGET.inc(router, handler_name)
+            logging.warning(f"🐢 {router}.{handler_name} (level {level}) exceeded its query budget of {budget}: "
+                            f"{queries.report(config.QUERY_REPEAT_THRESHOLD)}")
@@ -5,6 +5,8 @@ from aiogram.types import Message, CallbackQuery
 import redis.asyncio.client
 import time
 
+from utils.metrics import THROTTLED_EVENTS
+
 
 def rate_limit(limit: int, key=None):
     """
@@ -62,6 +64,7 @@ class ThrottlingMiddleware(BaseMiddleware):
         try:
             await self.throttle_manager.throttle(key, rate=limit, user_id=event.from_user.id)
         except Throttled as t:
+            THROTTLED_EVENTS.inc(key)
             # Execute action
             await self.event_throttled(event, t)
 
@@ -0,0 +1,64 @@
+-- Migration: Add daily statistics rollups
+-- Date: 2025-11-12
+-- Description: The admin statistics read daily rollups (sales, revenue, items sold, new users,
+--              deposits per network) instead of loading every buy and deposit of the window.
+--              New rows are counted by the bot when they are created; this migration backfills
+--              the existing history.
+--
+-- Run BEFORE starting the new bot version (create_db_and_tables() recreates the
+-- whole schema if a table is missing).
+
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS daily_statistics (
+    day DATE NOT NULL PRIMARY KEY,
+    sales_count INTEGER NOT NULL,
+    revenue FLOAT NOT NULL,
+    items_sold INTEGER NOT NULL,
+    new_users INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS daily_deposit_statistics (
+    day DATE NOT NULL,
+    network VARCHAR(17) NOT NULL,
+    deposits_count INTEGER NOT NULL,
+    amount FLOAT NOT NULL,
+    PRIMARY KEY (day, network)
+);
+
+-- Current-day deposit statistics
+CREATE INDEX IF NOT EXISTS idx_deposits_deposit_datetime ON deposits (deposit_datetime);
+
+-- Backfill: refunded buys don't count (as before)
+INSERT OR REPLACE INTO daily_statistics (day, sales_count, revenue, items_sold, new_users)
+SELECT day, SUM(sales_count), SUM(revenue), SUM(items_sold), SUM(new_users)
+FROM (
+    SELECT date(buy_datetime) AS day, COUNT(*) AS sales_count, SUM(total_price) AS revenue,
+           SUM(quantity) AS items_sold, 0 AS new_users
+    FROM buys
+    WHERE is_refunded = 0 AND buy_datetime IS NOT NULL
+    GROUP BY date(buy_datetime)
+    UNION ALL
+    SELECT date(registered_at), 0, 0.0, 0, COUNT(*)
+    FROM users
+    WHERE registered_at IS NOT NULL
+    GROUP BY date(registered_at)
+)
+GROUP BY day;
+
+-- Amounts in coins (Cryptocurrency.get_divider)
+INSERT OR REPLACE INTO daily_deposit_statistics (day, network, deposits_count, amount)
+SELECT date(deposit_datetime), network, COUNT(*),
+       SUM(amount / CASE network
+                        WHEN 'BTC' THEN 1e8
+                        WHEN 'LTC' THEN 1e8
+                        WHEN 'SOL' THEN 1e9
+                        WHEN 'ETH' THEN 1e18
+                        WHEN 'BNB' THEN 1e18
+                        ELSE 1e6
+                    END)
+FROM deposits
+WHERE deposit_datetime IS NOT NULL
+GROUP BY date(deposit_datetime), network;
+
+COMMIT;
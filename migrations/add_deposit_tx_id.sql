@@ -0,0 +1,18 @@
+-- Migration: Add tx_id / vout to deposits
+-- Date: 2025-11-08
+-- Description: Deposits found by the blockchain scanner (CryptoApiManager.scan_deposits) store their
+--              on-chain transaction id and output index. Before each scan the known
+--              (network, tx_id, vout) of the scanned users are loaded once, so a transfer is
+--              never credited twice.
+--
+-- Existing columns are kept; webhook deposits leave tx_id / vout NULL.
+-- Run BEFORE starting the new bot version (the new columns are read by the scanner).
+
+BEGIN TRANSACTION;
+
+ALTER TABLE deposits ADD COLUMN tx_id VARCHAR;
+ALTER TABLE deposits ADD COLUMN vout INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_deposits_user_tx ON deposits(user_id, tx_id);
+
+COMMIT;
@@ -0,0 +1,65 @@
+-- Migration: Add composite and partial indexes for hot query paths
+-- Date: 2025-11-03
+-- Description: Secondary indexes for the filters used by ItemRepository, OrderRepository,
+--              InvoiceRepository, BuyRepository and UserRepository.
+--              Verified by tests/performance/unit/test_query_plans.py (EXPLAIN QUERY PLAN).
+--
+-- Safe to run multiple times (IF NOT EXISTS). New databases get these indexes
+-- automatically from the model definitions.
+
+-- items: catalog lookups by (category, subcategory) incl. sold/reserved state
+CREATE INDEX IF NOT EXISTS idx_items_category_subcategory_sold_order
+    ON items(category_id, subcategory_id, is_sold, order_id);
+
+-- items: sellable stock only (reservation, availability, stock listing)
+CREATE INDEX IF NOT EXISTS idx_items_unsold_subcategory
+    ON items(subcategory_id, order_id) WHERE is_sold = 0;
+
+-- items: items of an order (reservation, delivery, cancellation)
+CREATE INDEX IF NOT EXISTS idx_items_order_id
+    ON items(order_id) WHERE order_id IS NOT NULL;
+
+-- items: new-items announcement
+CREATE INDEX IF NOT EXISTS idx_items_is_new
+    ON items(is_new) WHERE is_new = 1;
+
+-- orders: payment timeout job (status IN (...) AND expires_at < now)
+CREATE INDEX IF NOT EXISTS idx_orders_status_expires_at
+    ON orders(status, expires_at);
+
+-- orders: pending order / order history per user
+CREATE INDEX IF NOT EXISTS idx_orders_user_id_status
+    ON orders(user_id, status);
+
+-- invoices: webhook lookup and invoices per order
+CREATE INDEX IF NOT EXISTS idx_invoices_payment_processing_id
+    ON invoices(payment_processing_id);
+CREATE INDEX IF NOT EXISTS idx_invoices_order_id
+    ON invoices(order_id);
+
+-- buys: purchase history per user, newest first
+CREATE INDEX IF NOT EXISTS idx_buys_buyer_id_buy_datetime
+    ON buys(buyer_id, buy_datetime);
+
+-- buys: statistics and refund listings (non-refunded only)
+CREATE INDEX IF NOT EXISTS idx_buys_not_refunded_buy_datetime
+    ON buys(buy_datetime) WHERE is_refunded = 0;
+
+-- buyItem: items of a buy / buy of an item
+CREATE INDEX IF NOT EXISTS idx_buyItem_buy_id
+    ON buyItem(buy_id);
+CREATE INDEX IF NOT EXISTS idx_buyItem_item_id
+    ON buyItem(item_id);
+
+-- users: new-user statistics and banned-user list
+CREATE INDEX IF NOT EXISTS idx_users_registered_at
+    ON users(registered_at);
+CREATE INDEX IF NOT EXISTS idx_users_blocked_at
+    ON users(blocked_at) WHERE is_blocked = 1;
+
+-- Refresh planner statistics
+ANALYZE;
+
+-- Verify
+-- SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%';
+-- EXPLAIN QUERY PLAN SELECT * FROM orders WHERE status IN ('PENDING_PAYMENT') AND expires_at < datetime('now');
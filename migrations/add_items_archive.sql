@@ -0,0 +1,108 @@
+-- Migration: Add items_archive table for sold items
+-- Date: 2025-11-04
+-- Description: Sold and delivered items are moved from items to items_archive by
+--              jobs/item_archive_job.py (ITEM_ARCHIVE_AFTER_DAYS, ITEM_ARCHIVE_BATCH_SIZE).
+--              buyItem.item_id loses its foreign key to items: it points to items.id
+--              or, once archived, to items_archive.id (archived rows keep their id).
+--              Previously ON DELETE CASCADE would have wiped purchase history on archive.
+--              items is rebuilt with AUTOINCREMENT: without it SQLite hands out the id of
+--              an archived (deleted) row again once the rows above it are gone, and
+--              buyItem.item_id / item_payloads.item_id would point to two items.
+--
+-- Run BEFORE starting the new bot version (create_db_and_tables() recreates the
+-- whole schema if a table is missing).
+
+PRAGMA foreign_keys = OFF;
+
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS items_archive (
+    id INTEGER NOT NULL PRIMARY KEY,
+    category_id INTEGER NOT NULL,
+    subcategory_id INTEGER NOT NULL,
+    private_data VARCHAR NOT NULL,
+    price FLOAT NOT NULL,
+    description VARCHAR NOT NULL,
+    is_physical BOOLEAN NOT NULL DEFAULT 0,
+    shipping_cost FLOAT NOT NULL DEFAULT 0.0,
+    allows_packstation BOOLEAN NOT NULL DEFAULT 0,
+    order_id INTEGER,
+    reserved_at DATETIME,
+    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_items_archive_order_id ON items_archive(order_id);
+
+-- Rebuild items with AUTOINCREMENT (SQLite cannot alter the primary key)
+CREATE TABLE items_new (
+    id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    category_id INTEGER NOT NULL,
+    subcategory_id INTEGER NOT NULL,
+    private_data VARCHAR NOT NULL,
+    price FLOAT NOT NULL,
+    is_sold BOOLEAN NOT NULL,
+    is_new BOOLEAN NOT NULL,
+    description VARCHAR NOT NULL,
+    is_physical BOOLEAN NOT NULL DEFAULT 0,
+    shipping_cost FLOAT NOT NULL DEFAULT 0.0,
+    allows_packstation BOOLEAN NOT NULL DEFAULT 0,
+    order_id INTEGER,
+    reserved_at DATETIME,
+    CONSTRAINT check_price_positive CHECK (price > 0),
+    CONSTRAINT check_shipping_cost_non_negative CHECK (shipping_cost >= 0),
+    UNIQUE (id),
+    FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE CASCADE,
+    FOREIGN KEY (subcategory_id) REFERENCES subcategories(id) ON DELETE CASCADE,
+    FOREIGN KEY (order_id) REFERENCES orders(id)
+);
+
+INSERT INTO items_new (id, category_id, subcategory_id, private_data, price, is_sold, is_new, description,
+                       is_physical, shipping_cost, allows_packstation, order_id, reserved_at)
+SELECT id, category_id, subcategory_id, private_data, price, is_sold, is_new, description,
+       is_physical, shipping_cost, allows_packstation, order_id, reserved_at
+FROM items;
+
+DROP TABLE items;
+ALTER TABLE items_new RENAME TO items;
+
+CREATE INDEX IF NOT EXISTS idx_items_category_subcategory_sold_order
+    ON items(category_id, subcategory_id, is_sold, order_id);
+CREATE INDEX IF NOT EXISTS idx_items_unsold_subcategory
+    ON items(subcategory_id, order_id) WHERE is_sold = 0;
+CREATE INDEX IF NOT EXISTS idx_items_order_id
+    ON items(order_id) WHERE order_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_items_is_new
+    ON items(is_new) WHERE is_new = 1;
+
+-- Next item id: above every id ever handed out, live or archived
+DELETE FROM sqlite_sequence WHERE name = 'items';
+INSERT INTO sqlite_sequence (name, seq)
+SELECT 'items', max(coalesce((SELECT max(id) FROM items), 0),
+                    coalesce((SELECT max(id) FROM items_archive), 0));
+
+-- Rebuild buyItem without the foreign key on item_id (SQLite cannot drop constraints)
+CREATE TABLE buyItem_new (
+    id INTEGER NOT NULL PRIMARY KEY,
+    buy_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    UNIQUE (id),
+    FOREIGN KEY (buy_id) REFERENCES buys(id) ON DELETE CASCADE
+);
+
+INSERT INTO buyItem_new (id, buy_id, item_id)
+SELECT id, buy_id, item_id FROM buyItem;
+
+DROP TABLE buyItem;
+ALTER TABLE buyItem_new RENAME TO buyItem;
+
+CREATE INDEX IF NOT EXISTS idx_buyItem_buy_id ON buyItem(buy_id);
+CREATE INDEX IF NOT EXISTS idx_buyItem_item_id ON buyItem(item_id);
+
+COMMIT;
+
+PRAGMA foreign_keys = ON;
+
+-- Verify
+-- SELECT sql FROM sqlite_master WHERE name IN ('items', 'items_archive', 'buyItem');
+-- SELECT seq FROM sqlite_sequence WHERE name = 'items';
+-- SELECT COUNT(*) FROM buyItem;
@@ -0,0 +1,37 @@
+-- Migration: Add payment_events queue and payment_events_dead_letter
+-- Date: 2025-11-07
+-- Description: The KryptoExpress webhook only verifies the signature, stores the raw event in
+--              payment_events and acknowledges. jobs/payment_event_worker.py processes the queue
+--              (PAYMENT_EVENT_WORKER_CONCURRENCY in parallel, exponential backoff retries).
+--              Events failing PAYMENT_EVENT_MAX_ATTEMPTS times move to payment_events_dead_letter
+--              and can be replayed from the admin menu.
+--
+-- Requires add_processed_payment_events.sql.
+-- Run BEFORE starting the new bot version (create_db_and_tables() recreates the
+-- whole schema if a table is missing).
+
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS payment_events (
+    id INTEGER NOT NULL PRIMARY KEY,
+    payment_processing_id INTEGER,
+    body TEXT NOT NULL,
+    received_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_payment_events_next_attempt_at ON payment_events (next_attempt_at);
+
+CREATE TABLE IF NOT EXISTS payment_events_dead_letter (
+    id INTEGER NOT NULL PRIMARY KEY,
+    payment_processing_id INTEGER,
+    body TEXT NOT NULL,
+    received_at DATETIME NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    failed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMIT;
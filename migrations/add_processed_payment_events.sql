@@ -0,0 +1,17 @@
+-- Migration: Add processed_payment_events table (webhook idempotency store)
+-- Date: 2025-11-06
+-- Description: Every processed KryptoExpress webhook event is recorded by its key
+--              (payment id, isPaid, tx hash) in the same transaction as the handler's changes.
+--              Retried or duplicated deliveries are detected with one index lookup and skipped.
+--
+-- Run BEFORE starting the new bot version (create_db_and_tables() recreates the
+-- whole schema if a table is missing).
+
+CREATE TABLE IF NOT EXISTS processed_payment_events (
+    id INTEGER NOT NULL PRIMARY KEY,
+    payment_processing_id INTEGER NOT NULL,
+    is_paid BOOLEAN NOT NULL,
+    tx_hash VARCHAR NOT NULL DEFAULT '',
+    processed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_processed_payment_events_key UNIQUE (payment_processing_id, is_paid, tx_hash)
+);
@@ -0,0 +1,17 @@
+-- Migration: Add reference_sequences
+-- Date: 2025-11-09
+-- Description: Invoice numbers and top-up references are generated from a yearly counter
+--              (utils/reference_code.py: keyed Feistel permutation of the counter value) instead of
+--              random codes that were checked against invoices / payments one SELECT per attempt.
+--
+-- Run BEFORE starting the new bot version (create_db_and_tables() recreates the
+-- whole schema if a table is missing).
+
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS reference_sequences (
+    name VARCHAR NOT NULL PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+COMMIT;
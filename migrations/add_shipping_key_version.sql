@@ -0,0 +1,14 @@
+-- Migration: Add shipping_addresses.key_version
+-- Date: 2025-11-11
+-- Description: Shipping addresses record which key derivation encrypted them
+--              (1 = PBKDF2 per order, 2 = HKDF subkey of a per-process master key).
+--              Existing rows are version 1 and stay readable; new rows are version 2.
+--              Optional afterwards: python migrations/reencrypt_shipping_addresses.py
+--
+-- Run BEFORE starting the new bot version.
+
+BEGIN TRANSACTION;
+
+ALTER TABLE shipping_addresses ADD COLUMN key_version INTEGER NOT NULL DEFAULT 1;
+
+COMMIT;
@@ -0,0 +1,30 @@
+-- Migration: Add daily items-sold-per-subcategory rollup
+-- Date: 2025-11-13
+-- Description: The admin statistics charts read the items sold per subcategory from a daily
+--              rollup. New buys are counted by the bot; this migration backfills the history.
+--
+-- Run BEFORE starting the new bot version (create_db_and_tables() recreates the
+-- whole schema if a table is missing).
+
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS daily_subcategory_statistics (
+    day DATE NOT NULL,
+    subcategory_id INTEGER NOT NULL,
+    items_sold INTEGER NOT NULL,
+    PRIMARY KEY (day, subcategory_id)
+);
+
+-- Sold items may already be archived (items_archive keeps the same id); refunded buys don't count
+INSERT OR REPLACE INTO daily_subcategory_statistics (day, subcategory_id, items_sold)
+SELECT date(b.buy_datetime), COALESCE(i.subcategory_id, a.subcategory_id), COUNT(*)
+FROM buyItem bi
+JOIN buys b ON b.id = bi.buy_id
+LEFT JOIN items i ON i.id = bi.item_id
+LEFT JOIN items_archive a ON a.id = bi.item_id
+WHERE b.is_refunded = 0
+  AND b.buy_datetime IS NOT NULL
+  AND COALESCE(i.subcategory_id, a.subcategory_id) IS NOT NULL
+GROUP BY date(b.buy_datetime), COALESCE(i.subcategory_id, a.subcategory_id);
+
+COMMIT;
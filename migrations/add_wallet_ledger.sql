@@ -0,0 +1,46 @@
+-- Migration: Add wallet_ledger, wallet_snapshots and users.balance_cents
+-- Date: 2025-11-10
+-- Description: Wallet balances are kept in integer cents (users.balance_cents) and changed with one
+--              atomic UPDATE per ledger entry instead of read-modify-write of the float top_up_amount.
+--              top_up_amount stays as a mirror of balance_cents for existing readers.
+--
+-- Run BEFORE starting the new bot version (create_db_and_tables() recreates the
+-- whole schema if a table is missing).
+
+BEGIN TRANSACTION;
+
+ALTER TABLE users ADD COLUMN balance_cents INTEGER NOT NULL DEFAULT 0 CHECK (balance_cents >= 0);
+
+-- Current balances, rounded to cents
+UPDATE users
+SET balance_cents = CAST(ROUND(top_up_amount * 100) AS INTEGER),
+    top_up_amount = ROUND(top_up_amount, 2);
+
+CREATE TABLE IF NOT EXISTS wallet_ledger (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    amount_cents INTEGER NOT NULL,
+    entry_type VARCHAR(19) NOT NULL,
+    reference VARCHAR,
+    created_at DATETIME NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_ledger_user_id ON wallet_ledger (user_id, id);
+
+CREATE TABLE IF NOT EXISTS wallet_snapshots (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    balance_cents INTEGER NOT NULL,
+    last_entry_id INTEGER NOT NULL,
+    taken_at DATETIME NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_snapshots_user_id ON wallet_snapshots (user_id, last_entry_id);
+
+-- Existing balances become the first ledger entry, so ledger and balances agree from the start
+INSERT INTO wallet_ledger (user_id, amount_cents, entry_type, reference, created_at)
+SELECT id, balance_cents, 'OPENING_BALANCE', 'migration:add_wallet_ledger', CURRENT_TIMESTAMP
+FROM users
+WHERE balance_cents > 0;
+
+COMMIT;
@@ -0,0 +1,12 @@
+-- Migration: Enable incremental auto-vacuum
+-- Date: 2025-11-14
+-- Description: Lets the data retention cleanup return the pages of deleted rows to the
+--              file system (PRAGMA incremental_vacuum), so the database file shrinks.
+--              auto_vacuum can only be changed for an existing database by a full VACUUM,
+--              which rewrites the whole file - run it while the bot is stopped.
+--              New databases are created with auto_vacuum=INCREMENTAL by the bot.
+--
+-- VACUUM can't run inside a transaction.
+
+PRAGMA auto_vacuum = INCREMENTAL;
+VACUUM;
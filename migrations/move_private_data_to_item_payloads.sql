@@ -0,0 +1,38 @@
+-- Migration: Move item private data into item_payloads
+-- Date: 2025-11-05
+-- Description: items.private_data and items_archive.private_data move to the new
+--              item_payloads table (keyed by item id, no foreign key). Catalog and
+--              stock queries no longer read the deliverable content; it is only
+--              loaded at delivery time (OrderService.complete_order_payment,
+--              BuyService.get_purchase).
+--              Migrated rows are stored uncompressed (is_compressed = 0); new items
+--              are zlib-compressed when ITEM_PAYLOAD_COMPRESSION=true and it saves space.
+--
+-- Requires SQLite >= 3.35 (ALTER TABLE ... DROP COLUMN) and add_items_archive.sql.
+-- Run BEFORE starting the new bot version.
+
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS item_payloads (
+    item_id INTEGER NOT NULL PRIMARY KEY,
+    data BLOB NOT NULL,
+    is_compressed BOOLEAN NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO item_payloads (item_id, data, is_compressed)
+SELECT id, CAST(private_data AS BLOB), 0 FROM items;
+
+INSERT OR IGNORE INTO item_payloads (item_id, data, is_compressed)
+SELECT id, CAST(private_data AS BLOB), 0 FROM items_archive;
+
+ALTER TABLE items DROP COLUMN private_data;
+ALTER TABLE items_archive DROP COLUMN private_data;
+
+COMMIT;
+
+-- Reclaim the freed pages
+VACUUM;
+
+-- Verify
+-- SELECT COUNT(*) FROM item_payloads;
+-- SELECT (SELECT COUNT(*) FROM items) + (SELECT COUNT(*) FROM items_archive);
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+One-time migration: Re-encrypt shipping addresses with the current key version
+
+Addresses encrypted before add_shipping_key_version.sql (key version 1, PBKDF2 per order)
+stay readable, but every read costs a full PBKDF2 derivation. This script re-encrypts them
+with the current key version (HKDF subkey of the master key), in batches.
+
+Requires migrations/add_shipping_key_version.sql and the bot's .env (ENCRYPTION_SECRET, DB_NAME).
+
+Usage:
+    python migrations/reencrypt_shipping_addresses.py
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Prevent ngrok from starting (.env is still loaded)
+os.environ['RUNTIME_ENVIRONMENT'] = 'TEST'
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import models.payment  # noqa: E402,F401 - Order relationships
+from db import get_db_session, session_commit  # noqa: E402
+from services.shipping import ShippingService  # noqa: E402
+
+BATCH_SIZE = 100
+
+
+async def reencrypt_shipping_addresses():
+    total = 0
+    while True:
+        async with get_db_session() as session:
+            count = await ShippingService.reencrypt_legacy_addresses(BATCH_SIZE, session)
+            await session_commit(session)
+        total += count
+        if count > 0:
+            print(f"🔐 Re-encrypted {total} addresses...")
+        if count < BATCH_SIZE:
+            break
+
+    print(f"\n✅ {total} shipping addresses re-encrypted" if total else
+          "\n✅ All shipping addresses already use the current key version")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Shipping Address Re-encryption")
+    print("=" * 60)
+    print()
+
+    try:
+        asyncio.run(reencrypt_shipping_addresses())
+        print("\n✅ Migration completed successfully!")
+    except Exception as e:
+        print(f"\n❌ Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
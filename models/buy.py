@@ -1,8 +1,8 @@
 from datetime import datetime
 
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, Float, DateTime, Boolean, ForeignKey, func, CheckConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Float, DateTime, Boolean, ForeignKey, func, CheckConstraint, Index, text
+from sqlalchemy.orm import relationship, backref
 
 from models.base import Base
 
@@ -12,7 +12,7 @@ class Buy(Base):
 
     id = Column(Integer, primary_key=True, unique=True)
     buyer_id = Column(Integer, ForeignKey('users.id'), nullable=True)
-    buyer = relationship('User', backref='buys')
+    buyer = relationship('User', backref=backref('buys', lazy='raise'), lazy='raise')
     quantity = Column(Integer, nullable=False)
     total_price = Column(Float, nullable=False)
     buy_datetime = Column(DateTime, default=func.now())
@@ -21,6 +21,10 @@ class Buy(Base):
     __table_args__ = (
         CheckConstraint('quantity > 0', name='check_quantity_positive'),
         CheckConstraint('total_price > 0', name='check_total_price_positive'),
+        # Purchase history per user, newest first
+        Index('idx_buys_buyer_id_buy_datetime', 'buyer_id', 'buy_datetime'),
+        # Statistics and refund listings only consider non-refunded buys
+        Index('idx_buys_not_refunded_buy_datetime', 'buy_datetime', sqlite_where=text('is_refunded = 0')),
     )
 
 
@@ -40,3 +44,16 @@ class RefundDTO(BaseModel):
     total_price: float | None = None
     quantity: int | None = None
     buy_id: int | None = None
+
+
+class PurchaseHistoryEntryDTO(BaseModel):
+    buy_id: int
+    buy_datetime: datetime | None = None
+    quantity: int
+    subcategory_name: str | None = None
+
+
+class PurchaseHistoryPageDTO(BaseModel):
+    entries: list[PurchaseHistoryEntryDTO]  # newest first
+    has_newer: bool
+    has_older: bool
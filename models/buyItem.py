@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship, backref
 
 from models.base import Base
@@ -10,9 +10,14 @@ class BuyItem(Base):
 
     id = Column(Integer, primary_key=True, unique=True, nullable=False)
     buy_id = Column(Integer, ForeignKey("buys.id", ondelete="CASCADE"), nullable=False)
-    buy = relationship("Buy", backref=backref("buys", cascade="all"), passive_deletes="all")
-    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
-    item = relationship("Item", backref=backref("items", cascade="all"), passive_deletes="all")
+    buy = relationship("Buy", backref=backref("buys", cascade="all", lazy="raise"), passive_deletes="all", lazy="raise")
+    # Points to items.id or, once archived, to items_archive.id (same id) - therefore no foreign key
+    item_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('idx_buyItem_buy_id', 'buy_id'),
+        Index('idx_buyItem_item_id', 'item_id'),
+    )
 
 
 class BuyItemDTO(BaseModel):
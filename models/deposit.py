@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from pydantic import BaseModel
-from sqlalchemy import Integer, Column, ForeignKey, BigInteger, DateTime, func, CheckConstraint, Enum
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import Integer, Column, ForeignKey, BigInteger, DateTime, func, CheckConstraint, Enum, String, \
+    Index
 
 from enums.cryptocurrency import Cryptocurrency
 from models.base import Base
@@ -14,9 +15,15 @@ class Deposit(Base):
     network = Column(Enum(Cryptocurrency), nullable=False)
     amount = Column(BigInteger, nullable=False)
     deposit_datetime = Column(DateTime, default=func.now())
+    # On-chain transaction (deposits found by the blockchain scanner); vout = output/instruction index
+    tx_id = Column(String, nullable=True)
+    vout = Column(Integer, nullable=True)
 
     __table_args__ = (
         CheckConstraint('amount > 0', name='check_amount_positive'),
+        Index('idx_deposits_user_tx', 'user_id', 'tx_id'),
+        # Current-day deposit statistics (StatisticsRepository.get_summary)
+        Index('idx_deposits_deposit_datetime', 'deposit_datetime'),
     )
 
 
@@ -26,3 +33,14 @@ class DepositDTO(BaseModel):
     network: Cryptocurrency | None = None
     amount: int | None = None
     deposit_datetime: datetime | None = None
+    tx_id: str | None = None
+    vout: int | None = None
+
+
+class DepositScanTarget(BaseModel):
+    """One deposit address of a user, polled by CryptoApiManager.scan_deposits"""
+    model_config = ConfigDict(frozen=True)
+
+    user_id: int
+    cryptocurrency: Cryptocurrency
+    address: str
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 
 from enums.cryptocurrency import Cryptocurrency
@@ -34,6 +34,12 @@ class Invoice(Base):
     order = relationship('Order', back_populates='invoices')  # Changed from 'invoice' to 'invoices' to match Order model
     payment_transactions = relationship('PaymentTransaction', back_populates='invoice', cascade='all, delete-orphan')
 
+    __table_args__ = (
+        Index('idx_invoices_order_id', 'order_id'),
+        # Webhook lookup (KryptoExpress payment id)
+        Index('idx_invoices_payment_processing_id', 'payment_processing_id'),
+    )
+
 
 class InvoiceDTO(BaseModel):
     id: int | None = None
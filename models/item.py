@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, CheckConstraint, Index, text
 from sqlalchemy.orm import relationship, backref
 
 from models.base import Base
@@ -13,12 +13,13 @@ class Item(Base):
 
     id = Column(Integer, primary_key=True, unique=True)
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
-    category = relationship("Category", backref=backref("categories", cascade="all"), passive_deletes="all",
-                            lazy="joined")
+    # lazy="raise": repositories map to flat ItemDTOs, related rows are loaded explicitly per query
+    # (e.g. .options(joinedload(Item.subcategory))) when a caller really needs them
+    category = relationship("Category", backref=backref("categories", cascade="all", lazy="raise"),
+                            passive_deletes="all", lazy="raise")
     subcategory_id = Column(Integer, ForeignKey("subcategories.id", ondelete="CASCADE"), nullable=False)
-    subcategory = relationship("Subcategory", backref=backref("subcategories", cascade="all"), passive_deletes="all",
-                               lazy="joined")
-    private_data = Column(String, nullable=False, unique=False)
+    subcategory = relationship("Subcategory", backref=backref("subcategories", cascade="all", lazy="raise"),
+                               passive_deletes="all", lazy="raise")
     price = Column(Float, nullable=False)
     is_sold = Column(Boolean, nullable=False, default=False)
     is_new = Column(Boolean, nullable=False, default=True)
@@ -36,9 +37,20 @@ class Item(Base):
     __table_args__ = (
         CheckConstraint('price > 0', name='check_price_positive'),
         CheckConstraint('shipping_cost >= 0', name='check_shipping_cost_non_negative'),
+        # Catalog lookups: price, quantity, single item, purchase and restock by (category, subcategory)
+        Index('idx_items_category_subcategory_sold_order', 'category_id', 'subcategory_id', 'is_sold', 'order_id'),
+        # Sellable stock only: reservation, availability and stock listings never look at sold rows
+        Index('idx_items_unsold_subcategory', 'subcategory_id', 'order_id', sqlite_where=text('is_sold = 0')),
+        Index('idx_items_order_id', 'order_id', sqlite_where=text('order_id IS NOT NULL')),
+        Index('idx_items_is_new', 'is_new', sqlite_where=text('is_new = 1')),
+        # Ids are never handed out twice: archived items (items_archive) and their payloads
+        # (item_payloads) keep their id, buyItem.item_id resolves against both tables
+        {'sqlite_autoincrement': True},
     )
 
 
+# private_data lives in item_payloads and is only filled in at delivery time
+# (ItemPayloadRepository.fill_private_data)
 class ItemDTO(BaseModel):
     id: int | None = None
     category_id: int | None = None
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Index, func
+
+from models.base import Base
+
+
+# Sold and delivered items, moved out of the items table by jobs/item_archive_job.py.
+# Rows keep their original items.id, so buyItem.item_id resolves against either table.
+class ItemArchive(Base):
+    __tablename__ = 'items_archive'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    # No foreign keys: archived rows must not block category/order deletion (data retention)
+    category_id = Column(Integer, nullable=False)
+    subcategory_id = Column(Integer, nullable=False)
+    price = Column(Float, nullable=False)
+    description = Column(String, nullable=False)
+    is_physical = Column(Boolean, nullable=False, default=False)
+    shipping_cost = Column(Float, nullable=False, default=0.0)
+    allows_packstation = Column(Boolean, nullable=False, default=False)
+    order_id = Column(Integer, nullable=True)
+    reserved_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=func.now())
+
+    # Archived items are always sold and never new (read by ItemDTO.model_validate(from_attributes=True))
+    is_sold = True
+    is_new = False
+
+    __table_args__ = (
+        Index('idx_items_archive_order_id', 'order_id'),
+    )
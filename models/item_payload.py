@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Boolean, LargeBinary
+
+from models.base import Base
+
+
+# Deliverable content of an item (credentials, keys, codes), kept out of the items table
+# so catalog and stock queries never read it. Only loaded at delivery time.
+class ItemPayload(Base):
+    __tablename__ = 'item_payloads'
+
+    # items.id or items_archive.id (same id) - no foreign key, payloads outlive archiving
+    item_id = Column(Integer, primary_key=True, autoincrement=False)
+    data = Column(LargeBinary, nullable=False)  # UTF-8, zlib-compressed if is_compressed
+    is_compressed = Column(Boolean, nullable=False, default=False)
@@ -1,8 +1,8 @@
 from datetime import datetime
 
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, func, CheckConstraint, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, func, CheckConstraint, Index, Enum as SQLEnum
+from sqlalchemy.orm import relationship, backref
 
 from enums.currency import Currency
 from enums.order_status import OrderStatus
@@ -34,13 +34,17 @@ class Order(Base):
 
     # Relations
     user = relationship('User', backref='orders')
-    items = relationship('Item', backref='order')
+    items = relationship('Item', backref=backref('order', lazy='raise'), lazy='raise')  # load with selectinload(Order.items)
     invoices = relationship('Invoice', back_populates='order', cascade='all, delete-orphan')  # Changed to plural, removed uselist=False to allow multiple invoices (partial payments)
     payment_transactions = relationship('PaymentTransaction', back_populates='order', cascade='all, delete-orphan')
     shipping_address = relationship('ShippingAddress', back_populates='order', uselist=False, cascade='all, delete-orphan')
 
     __table_args__ = (
         CheckConstraint('total_price > 0', name='check_order_total_price_positive'),
+        # Payment timeout job: status IN (...) AND expires_at < now
+        Index('idx_orders_status_expires_at', 'status', 'expires_at'),
+        # Pending order / order history per user
+        Index('idx_orders_user_id_status', 'user_id', 'status'),
     )
 
 
@@ -59,4 +63,16 @@ class OrderDTO(BaseModel):
     total_paid_crypto: float | None = None
     retry_count: int | None = None
     original_expires_at: datetime | None = None
-    wallet_used: float | None = None
\ No newline at end of file
+    wallet_used: float | None = None
+
+
+class ShippingQueueEntryDTO(BaseModel):
+    """One row of the admin shipping queue: order, its first invoice number and the buyer."""
+    order_id: int
+    user_id: int
+    created_at: datetime | None = None
+    paid_at: datetime | None = None
+    total_price: float
+    invoice_number: str | None = None
+    telegram_id: int
+    telegram_username: str | None = None
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, Text, DateTime, Index, func
+
+from models.base import Base
+
+
+# Queue of received KryptoExpress webhook events. The endpoint stores the raw body and acks,
+# jobs/payment_event_worker.py processes and deletes the row (or schedules a retry).
+class PaymentEvent(Base):
+    __tablename__ = 'payment_events'
+
+    id = Column(Integer, primary_key=True, unique=True)
+    payment_processing_id = Column(Integer, nullable=True)  # For logs and the admin view
+    body = Column(Text, nullable=False)  # Raw webhook body (HMAC already verified)
+    received_at = Column(DateTime, nullable=False, default=func.now())
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=func.now())
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # Worker: due events in order
+        Index('idx_payment_events_next_attempt_at', 'next_attempt_at'),
+    )
+
+
+# Events that failed PAYMENT_EVENT_MAX_ATTEMPTS times (or can never be processed).
+# Admins can move them back to payment_events (Admin Menu -> Failed Payment Events).
+class DeadLetterPaymentEvent(Base):
+    __tablename__ = 'payment_events_dead_letter'
+
+    id = Column(Integer, primary_key=True, unique=True)
+    payment_processing_id = Column(Integer, nullable=True)
+    body = Column(Text, nullable=False)
+    received_at = Column(DateTime, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text, nullable=True)
+    failed_at = Column(DateTime, nullable=False, default=func.now())
+
+
+class PaymentEventDTO(BaseModel):
+    id: int | None = None
+    payment_processing_id: int | None = None
+    body: str | None = None
+    received_at: datetime | None = None
+    attempts: int | None = None
+    next_attempt_at: datetime | None = None
+    last_error: str | None = None
+
+
+class DeadLetterPaymentEventDTO(BaseModel):
+    id: int | None = None
+    payment_processing_id: int | None = None
+    body: str | None = None
+    received_at: datetime | None = None
+    attempts: int | None = None
+    last_error: str | None = None
+    failed_at: datetime | None = None
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, UniqueConstraint, func
+
+from models.base import Base
+
+
+# Idempotency store for KryptoExpress webhook deliveries. A row is written in the same
+# transaction as the handler's changes, so an event is either fully processed and recorded,
+# or neither (and a retry processes it again).
+class ProcessedPaymentEvent(Base):
+    __tablename__ = 'processed_payment_events'
+
+    id = Column(Integer, primary_key=True, unique=True)
+    payment_processing_id = Column(Integer, nullable=False)
+    is_paid = Column(Boolean, nullable=False)
+    tx_hash = Column(String, nullable=False, default='')  # '' if the event carries no hash
+    processed_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        # Event key; also the index for the duplicate lookup
+        UniqueConstraint('payment_processing_id', 'is_paid', 'tx_hash', name='uq_processed_payment_events_key'),
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String
+
+from models.base import Base
+
+
+# Counters for human-readable references (invoice numbers, top-up references).
+# One row per (kind, year); the next value is taken with a single upsert in the caller's
+# transaction, so a rolled-back invoice also gives its number back.
+class ReferenceSequence(Base):
+    __tablename__ = 'reference_sequences'
+
+    name = Column(String, primary_key=True)  # e.g. "invoice:2025"
+    value = Column(Integer, nullable=False, default=0)
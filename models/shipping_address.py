@@ -7,7 +7,7 @@ from models.base import Base
 class ShippingAddress(Base):
     """
     Stores encrypted shipping addresses for orders with physical items.
-    Address is encrypted with AES-256-GCM using order-specific secret.
+    Address is encrypted with AES-256-GCM using an order-specific key (see key_version).
     """
     __tablename__ = 'shipping_addresses'
 
@@ -18,6 +18,8 @@ class ShippingAddress(Base):
     encrypted_address = Column(LargeBinary, nullable=False)  # AES-256-GCM encrypted
     nonce = Column(LargeBinary, nullable=False)  # GCM nonce (12 bytes)
     tag = Column(LargeBinary, nullable=False)  # GCM authentication tag (16 bytes)
+    # Key derivation of the ciphertext (services/shipping.py): 1 = PBKDF2 per order, 2 = HKDF subkey
+    key_version = Column(Integer, nullable=False, default=1)
 
     # Relation
     order = relationship('Order', back_populates='shipping_address')
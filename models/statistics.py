@@ -0,0 +1,59 @@
+from datetime import date
+
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, Float, Date, Enum
+
+from enums.cryptocurrency import Cryptocurrency
+from models.base import Base
+
+
+# Daily rollups for the admin statistics, maintained by StatisticsRepository in the same
+# transaction as the buy / deposit / user they count (a refund subtracts its buy again).
+class DailyStatistics(Base):
+    __tablename__ = 'daily_statistics'
+
+    day = Column(Date, primary_key=True)
+    sales_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    items_sold = Column(Integer, nullable=False, default=0)
+    new_users = Column(Integer, nullable=False, default=0)
+
+
+class DailyDepositStatistics(Base):
+    __tablename__ = 'daily_deposit_statistics'
+
+    day = Column(Date, primary_key=True)
+    network = Column(Enum(Cryptocurrency), primary_key=True)
+    deposits_count = Column(Integer, nullable=False, default=0)
+    amount = Column(Float, nullable=False, default=0.0)  # In coins (Deposit.amount / 10^divider)
+
+
+class DailySubcategoryStatistics(Base):
+    __tablename__ = 'daily_subcategory_statistics'
+
+    day = Column(Date, primary_key=True)
+    subcategory_id = Column(Integer, primary_key=True)
+    items_sold = Column(Integer, nullable=False, default=0)
+
+
+class StatisticsSummaryDTO(BaseModel):
+    since: date
+    sales_count: int = 0
+    revenue: float = 0.0
+    items_sold: int = 0
+    new_users: int = 0
+    deposits_count: int = 0
+    deposit_amounts: dict[Cryptocurrency, float] = {}
+
+
+class DailyStatisticsDTO(BaseModel):
+    day: date
+    sales_count: int = 0
+    revenue: float = 0.0
+    items_sold: int = 0
+    new_users: int = 0
+
+
+class SubcategorySalesDTO(BaseModel):
+    subcategory_name: str
+    items_sold: int
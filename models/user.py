@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, DateTime, String, Boolean, Float, func, CheckConstraint
+from sqlalchemy import Column, Integer, DateTime, String, Boolean, Float, func, CheckConstraint, Index, text
 
 from models.base import Base
 
@@ -21,7 +21,9 @@ class User(Base):
     blocked_at = Column(DateTime, nullable=True)
     blocked_reason = Column(String, nullable=True)
 
-    # Wallet-System (Fiat-based for MVP)
+    # Wallet-System: balance_cents is authoritative and only changed by WalletRepository
+    # (atomic UPDATE plus wallet_ledger entry); top_up_amount mirrors it in EUR for reads
+    balance_cents = Column(Integer, nullable=False, default=0)
     top_up_amount = Column(Float, nullable=False, default=0.0)
 
     # Referral-System (preparation for future feature)
@@ -37,9 +39,12 @@ class User(Base):
     __table_args__ = (
         CheckConstraint('strike_count >= 0', name='check_strike_count_positive'),
         CheckConstraint('top_up_amount >= 0', name='check_wallet_balance_positive'),
+        CheckConstraint('balance_cents >= 0', name='check_wallet_balance_cents_positive'),
         CheckConstraint('successful_orders_count >= 0', name='check_orders_count_positive'),
         CheckConstraint('max_referrals >= 0', name='check_max_referrals_positive'),
         CheckConstraint('successful_referrals_count >= 0', name='check_referrals_count_positive'),
+        Index('idx_users_registered_at', 'registered_at'),
+        Index('idx_users_blocked_at', 'blocked_at', sqlite_where=text('is_blocked = 1')),
     )
 
 
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index, func
+
+from enums.wallet_entry_type import WalletEntryType
+from models.base import Base
+
+
+# Append-only record of every wallet change (users.balance_cents is the running total).
+# Rows are never updated or deleted.
+class WalletLedgerEntry(Base):
+    __tablename__ = 'wallet_ledger'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    amount_cents = Column(Integer, nullable=False)  # Signed: credit > 0, debit < 0
+    entry_type = Column(Enum(WalletEntryType), nullable=False)
+    reference = Column(String, nullable=True)  # e.g. invoice number, order id
+    created_at = Column(DateTime, nullable=False, default=func.now())
+
+    __table_args__ = (
+        Index('idx_wallet_ledger_user_id', 'user_id', 'id'),
+    )
+
+
+# Balances at a point in the ledger (last_entry_id). Balance drift is detected by
+# comparing snapshot + later ledger entries with users.balance_cents.
+class WalletSnapshot(Base):
+    __tablename__ = 'wallet_snapshots'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    balance_cents = Column(Integer, nullable=False)
+    last_entry_id = Column(Integer, nullable=False)
+    taken_at = Column(DateTime, nullable=False, default=func.now())
+
+    __table_args__ = (
+        Index('idx_wallet_snapshots_user_id', 'user_id', 'last_entry_id'),
+    )
+
+
+class WalletLedgerEntryDTO(BaseModel):
+    id: int | None = None
+    user_id: int | None = None
+    amount_cents: int | None = None
+    entry_type: WalletEntryType | None = None
+    reference: str | None = None
+    created_at: datetime | None = None
+
+
+class WalletDriftDTO(BaseModel):
+    user_id: int
+    expected_cents: int
+    balance_cents: int
@@ -16,8 +16,18 @@ from aiogram.webhook.aiohttp_server import (
     TokenBasedRequestHandler,
     setup_application,
 )
+from redis.asyncio import Redis
+from crypto_api.http_client import HttpClient
 from db import create_db_and_tables
+from jobs.payment_event_worker import PaymentEventWorker
+from jobs.registry import create_scheduler
+from middleware.bot_api_metrics import BotApiMetricsMiddleware
+from services.shipping import ShippingService
+from services.statistics_chart import StatisticsChartService
 from utils.custom_filters import AdminIdFilter
+from utils.loop_monitor import LoopMonitor
+from utils.order_lock import OrderLock
+from utils.reference_code import ReferenceCode
 
 main_router_multibot = Router()
 
@@ -31,6 +41,20 @@ OTHER_BOTS_PATH = "/webhook/bot/{bot_token}"
 
 OTHER_BOTS_URL = f"{BASE_URL}{OTHER_BOTS_PATH}"
 
+# Job scheduler; Redis (if configured) elects one instance to run the jobs
+redis = Redis(host=config.REDIS_HOST, password=config.REDIS_PASSWORD) if config.REDIS_HOST else None
+scheduler = create_scheduler(redis)
+# Payment webhook / timeout job order locks span processes via Redis (process-local without Redis)
+OrderLock.configure(redis)
+
+# Processes the payment events queued by the reconciliation job (and by bot.py webhooks)
+payment_event_worker = PaymentEventWorker(
+    concurrency=config.PAYMENT_EVENT_WORKER_CONCURRENCY,
+    max_attempts=config.PAYMENT_EVENT_MAX_ATTEMPTS,
+    retry_base_seconds=config.PAYMENT_EVENT_RETRY_BASE_SECONDS,
+    retry_max_seconds=config.PAYMENT_EVENT_RETRY_MAX_SECONDS
+)
+
 
 def is_bot_token(value: str) -> bool | Dict[str, Any]:
     try:
@@ -53,8 +77,21 @@ async def command_add_bot(message: Message, command: CommandObject, bot: Bot) ->
 
 
 async def on_startup(dispatcher: Dispatcher, bot: Bot):
+    # Invoice numbers / top-up references can't be issued without their key
+    ReferenceCode.require_secret()
+    # Opt-in: report code blocking the event loop (/stalls admin command)
+    if config.LOOP_MONITOR_ENABLED:
+        await LoopMonitor.start(config.LOOP_MONITOR_INTERVAL_SECONDS, config.LOOP_STALL_THRESHOLD_SECONDS)
     await bot.set_webhook(f"{BASE_URL}{MAIN_BOT_PATH}")
     await create_db_and_tables()
+    # Derive the shipping address master key before the first request needs it
+    await ShippingService.warm_up()
+    # Start the chart worker processes while the bot process is still small
+    await StatisticsChartService.warm_up()
+    # Start payment event worker (also picks up events queued before a restart)
+    await payment_event_worker.start()
+    # Start job scheduler
+    await scheduler.start()
     for admin in config.ADMIN_ID_LIST:
         try:
             await bot.send_message(admin, 'Bot is working')
@@ -62,9 +99,27 @@ async def on_startup(dispatcher: Dispatcher, bot: Bot):
             logging.warning(e)
 
 
+async def on_shutdown():
+    # Stop job scheduler (cancels runs in progress, releases the leader lock)
+    await scheduler.stop()
+
+    # Stop payment event worker (waits for events in flight)
+    await payment_event_worker.stop()
+
+    # Close pooled crypto API connections
+    await HttpClient.close()
+
+    # Stop the event loop monitor
+    await LoopMonitor.stop()
+
+    # Stop the chart worker processes
+    StatisticsChartService.shutdown()
+
+
 def main(main_router):
     logging.basicConfig(level=logging.INFO, stream=sys.stdout)
     session = AiohttpSession()
+    session.middleware(BotApiMetricsMiddleware())
     bot_settings = {"session": session, "parse_mode": ParseMode.HTML}
     bot = Bot(token=MAIN_BOT_TOKEN, **bot_settings)
     storage = MemoryStorage()
@@ -72,6 +127,7 @@ def main(main_router):
     main_dispatcher = Dispatcher(storage=storage)
     main_dispatcher.include_router(main_router_multibot)
     main_dispatcher.startup.register(on_startup)
+    main_dispatcher.shutdown.register(on_shutdown)
 
     multibot_dispatcher = Dispatcher(storage=storage)
     multibot_dispatcher.include_router(main_router)
@@ -16,10 +16,12 @@ from datetime import datetime, timedelta
 import config
 from db import session_commit
 from enums.order_status import OrderStatus
+from enums.wallet_entry_type import WalletEntryType
 from models.payment_transaction import PaymentTransactionDTO
 from repositories.order import OrderRepository
 from repositories.payment_transaction import PaymentTransactionRepository
 from repositories.user import UserRepository
+from repositories.wallet import WalletRepository
 from services.cart import format_crypto_amount
 from services.order import OrderService
 from services.payment_validator import PaymentValidator
@@ -177,8 +179,8 @@ async def _handle_significant_overpayment(payment_dto, invoice, order, session):
 
     # Credit wallet
     user = await UserRepository.get_by_id(order.user_id, session)
-    user.top_up_amount += excess_fiat
-    await UserRepository.update(user, session)
+    user.top_up_amount = await WalletRepository.credit(user.id, excess_fiat, WalletEntryType.OVERPAYMENT, session,
+                                                       reference=invoice.invoice_number)
 
     # Complete order
     await OrderService.complete_order_payment(order.id, session)
@@ -349,8 +351,8 @@ async def _handle_second_underpayment(payment_dto, invoice, order, session):
 
     # Credit wallet (after penalty)
     user = await UserRepository.get_by_id(order.user_id, session)
-    user.top_up_amount += net_amount
-    await UserRepository.update(user, session)
+    user.top_up_amount = await WalletRepository.credit(user.id, net_amount, WalletEntryType.UNDERPAYMENT_CREDIT,
+                                                       session, reference=invoice.invoice_number)
 
     # Cancel order and release stock (don't refund wallet - already credited above with penalty)
     from enums.order_cancel_reason import OrderCancelReason
@@ -417,8 +419,8 @@ async def _handle_late_payment(payment_dto, invoice, order, session):
 
     # Credit wallet (after penalty)
     user = await UserRepository.get_by_id(order.user_id, session)
-    user.top_up_amount += net_amount
-    await UserRepository.update(user, session)
+    user.top_up_amount = await WalletRepository.credit(user.id, net_amount, WalletEntryType.LATE_PAYMENT_CREDIT,
+                                                       session, reference=invoice.invoice_number)
 
     # Cancel order if not already cancelled (don't refund wallet - already credited above with penalty)
     if order.status not in [OrderStatus.TIMEOUT, OrderStatus.CANCELLED_BY_USER, OrderStatus.CANCELLED_BY_ADMIN]:
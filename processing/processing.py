@@ -7,15 +7,21 @@ from fastapi import APIRouter, Request, HTTPException
 
 import config
 from db import get_db_session, session_commit
+from enums.wallet_entry_type import WalletEntryType
+from jobs.payment_event_worker import PaymentEventWorker
 from models.deposit import DepositDTO
 from models.payment import ProcessingPaymentDTO
 from repositories.deposit import DepositRepository
 from repositories.invoice import InvoiceRepository
 from repositories.payment import PaymentRepository
+from repositories.payment_event import PaymentEventRepository
+from repositories.processed_payment_event import ProcessedPaymentEventRepository
 from repositories.user import UserRepository
+from repositories.wallet import WalletRepository
 from services.cart import format_crypto_amount
 from services.notification import NotificationService
 from services.order import OrderService
+from utils.order_lock import OrderLock
 
 processing_router = APIRouter(prefix=f"{config.WEBHOOK_PATH}cryptoprocessing")
 
@@ -34,7 +40,8 @@ def __security_check(x_signature_header: str | None, payload: bytes):
 async def fetch_crypto_event(payment_dto: ProcessingPaymentDTO, request: Request):
     """
     Webhook endpoint for KryptoExpress payment notifications.
-    Handles both DEPOSIT (balance top-ups) and PAYMENT (order payments).
+    Verifies the signature, queues the event (payment_events) and acknowledges.
+    Both DEPOSIT (balance top-ups) and PAYMENT (order payments) are processed by process_payment_event.
     """
     import logging
     request_body = await request.body()
@@ -58,22 +65,62 @@ async def fetch_crypto_event(payment_dto: ProcessingPaymentDTO, request: Request
 
     logging.info("✅ Webhook security check passed")
 
+    # Persist and acknowledge. Processing (DB updates, KryptoExpress calls for partial-payment
+    # invoices, Telegram notifications) happens in PaymentEventWorker, so slow downstream calls
+    # can't make the provider time out and retry.
     async with get_db_session() as session:
+        event_id = await PaymentEventRepository.create(request_body.decode("utf-8"), payment_dto.id, session)
+        await session_commit(session)
+    PaymentEventWorker.notify()
+
+    logging.info(f"📥 Webhook event queued (event {event_id})")
+    logging.info("=" * 80 + "\n")
+    return "200"
+
+
+async def process_payment_event(payment_dto: ProcessingPaymentDTO):
+    """
+    Processes one queued webhook event (called by PaymentEventWorker).
+    Exceptions propagate so that the worker retries the event.
+    """
+    import logging
+
+    event_key = (payment_dto.id, payment_dto.isPaid, payment_dto.hash)
+
+    async with get_db_session() as session:
+        # Retried / duplicated delivery of an event that was already processed
+        if await ProcessedPaymentEventRepository.exists(*event_key, session):
+            logging.info("♻️ Duplicate webhook delivery - event already processed, skipping")
+            return
+
         # Check if this is an order PAYMENT (invoice-based) or DEPOSIT (balance top-up)
         invoice = await InvoiceRepository.get_by_payment_processing_id(payment_dto.id, session)
-
         if invoice:
-            logging.info(f"📋 Payment type: ORDER PAYMENT (Invoice {invoice.invoice_number})")
-            # This is an order PAYMENT (invoice-based)
-            await _handle_order_payment(payment_dto, invoice, session)
+            lock_key = OrderLock.order_key(invoice.order_id)
         else:
-            logging.info(f"💳 Payment type: DEPOSIT (Balance Top-up)")
-            # This is a DEPOSIT (balance top-up) - existing logic
-            await _handle_deposit_payment(payment_dto, session)
+            lock_key = OrderLock.deposit_key(payment_dto.id)
 
-        logging.info("✅ Webhook processing completed successfully")
-        logging.info("=" * 80 + "\n")
-        return "200"
+        # Serializes with concurrent deliveries and PaymentTimeoutJob for the same order
+        async with OrderLock.acquire(lock_key):
+            # Registered in the handler's transaction: committed together with its changes,
+            # rolled back with them if the handler fails (so a retry processes the event again)
+            if not await ProcessedPaymentEventRepository.register(*event_key, session):
+                logging.info("♻️ Duplicate webhook delivery - processed concurrently, skipping")
+                return
+
+            if invoice:
+                logging.info(f"📋 Payment type: ORDER PAYMENT (Invoice {invoice.invoice_number})")
+                # This is an order PAYMENT (invoice-based)
+                await _handle_order_payment(payment_dto, invoice, session)
+            else:
+                logging.info(f"💳 Payment type: DEPOSIT (Balance Top-up)")
+                # This is a DEPOSIT (balance top-up) - existing logic
+                await _handle_deposit_payment(payment_dto, session)
+
+            # Handlers commit their own changes; this covers branches that only record the event
+            await session_commit(session)
+
+        logging.info(f"✅ Payment event processed (Payment ID: {payment_dto.id})")
 
 
 async def _handle_deposit_payment(payment_dto: ProcessingPaymentDTO, session):
@@ -101,7 +148,8 @@ async def _handle_deposit_payment(payment_dto: ProcessingPaymentDTO, session):
             logging.info(f"🔓 User {user.telegram_id} has been UNBANNED (strikes remain: {user.strike_count})")
             unban_triggered = True
 
-        user.top_up_amount += payment_dto.fiatAmount
+        user.top_up_amount = await WalletRepository.credit(user.id, payment_dto.fiatAmount, WalletEntryType.TOP_UP,
+                                                           session, reference=deposit_record.topup_reference)
         await UserRepository.update(user, session)
         deposit_record.is_paid = True
         await PaymentRepository.update(deposit_record, session)
@@ -173,8 +221,8 @@ async def _handle_order_payment(payment_dto: ProcessingPaymentDTO, invoice, sess
         # Credit entire payment to wallet
         from repositories.user import UserRepository
         user = await UserRepository.get_by_id(order.user_id, session)
-        user.top_up_amount += paid_fiat
-        await UserRepository.update(user, session)
+        user.top_up_amount = await WalletRepository.credit(user.id, paid_fiat, WalletEntryType.DOUBLE_PAYMENT, session,
+                                                           reference=invoice.invoice_number)
         await session_commit(session)
 
         logging.info(f"💳 DOUBLE PAYMENT: Credited {paid_fiat} {payment_dto.fiatCurrency} to user {user.id} wallet")
@@ -1,36 +1,80 @@
 import datetime
 import math
 
-from sqlalchemy import select, func, update
+from sqlalchemy import select, func, update, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 
 import config
 from callbacks import StatisticsTimeDelta
 from db import session_execute, session_flush
-from models.buy import Buy, BuyDTO, RefundDTO
+from models.buy import Buy, BuyDTO, RefundDTO, PurchaseHistoryEntryDTO, PurchaseHistoryPageDTO
 from models.buyItem import BuyItem
 from models.item import Item
+from models.item_archive import ItemArchive
 from models.subcategory import Subcategory
 from models.user import User
+from repositories.statistics import StatisticsRepository
 
 
 class BuyRepository:
     @staticmethod
-    async def get_by_buyer_id(user_id: int, page: int, session: Session | AsyncSession) -> list[BuyDTO]:
-        stmt = (select(Buy)
-                .where(Buy.buyer_id == user_id)
-                .order_by(Buy.buy_datetime.desc())
-                .limit(config.PAGE_ENTRIES)
-                .offset(page * config.PAGE_ENTRIES))
-        buys = await session_execute(stmt, session)
-        return [BuyDTO.model_validate(buy, from_attributes=True) for buy in buys.scalars().all()]
+    async def get_purchase_history(buyer_id: int, cursor: int,
+                                   session: Session | AsyncSession) -> PurchaseHistoryPageDTO:
+        """
+        One page (PAGE_ENTRIES) of a buyer's purchases, newest first, with the subcategory of the
+        first bought item - in one query.
+
+        Keyset paging on (buy_datetime, id) instead of OFFSET, so every page costs the same
+        however long the history is. `cursor`: 0 = newest page, +buy_id = the purchases older
+        than that buy (next page), -buy_id = the purchases newer than that buy (previous page).
+        """
+        first_buy_item = aliased(BuyItem)
+        first_buy_item_id = (select(func.min(first_buy_item.id))
+                             .where(first_buy_item.buy_id == Buy.id)
+                             .scalar_subquery())
+        stmt = (select(Buy.id.label("buy_id"),
+                       Buy.buy_datetime,
+                       Buy.quantity,
+                       Subcategory.name.label("subcategory_name"))
+                .select_from(Buy)
+                .join(BuyItem, BuyItem.id == first_buy_item_id)
+                .outerjoin(Item, Item.id == BuyItem.item_id)
+                .outerjoin(ItemArchive, ItemArchive.id == BuyItem.item_id)
+                .outerjoin(Subcategory,
+                           Subcategory.id == func.coalesce(Item.subcategory_id, ItemArchive.subcategory_id))
+                .where(Buy.buyer_id == buyer_id)
+                .limit(config.PAGE_ENTRIES + 1))
+
+        key = tuple_(Buy.buy_datetime, Buy.id)
+        if cursor != 0:
+            cursor_buy = aliased(Buy)
+            cursor_key = tuple_(select(cursor_buy.buy_datetime).where(cursor_buy.id == abs(cursor)).scalar_subquery(),
+                                abs(cursor))
+            stmt = stmt.where(key < cursor_key if cursor > 0 else key > cursor_key)
+        if cursor >= 0:
+            stmt = stmt.order_by(Buy.buy_datetime.desc(), Buy.id.desc())
+        else:
+            stmt = stmt.order_by(Buy.buy_datetime.asc(), Buy.id.asc())
+
+        result = await session_execute(stmt, session)
+        entries = [PurchaseHistoryEntryDTO.model_validate(row, from_attributes=True)
+                   for row in result.mappings().all()]
+        # The extra (PAGE_ENTRIES + 1)th row only tells whether there is another page in that direction
+        has_more = len(entries) > config.PAGE_ENTRIES
+        entries = entries[:config.PAGE_ENTRIES]
+        if cursor >= 0:
+            return PurchaseHistoryPageDTO(entries=entries, has_newer=cursor > 0, has_older=has_more)
+        return PurchaseHistoryPageDTO(entries=entries[::-1], has_newer=has_more, has_older=True)
 
     @staticmethod
     async def create(buy_dto: BuyDTO, session: Session | AsyncSession) -> int:
         buy = Buy(**buy_dto.model_dump())
+        # Set here (not by the column default) - the statistics rollup is keyed by its day
+        buy.buy_datetime = buy.buy_datetime or datetime.datetime.now()
         session.add(buy)
         await session_flush(session)
+        await StatisticsRepository.add_sales(buy.buy_datetime.date(), 1, buy.total_price, buy.quantity, session)
         return buy.id
 
     @staticmethod
@@ -54,8 +98,9 @@ class BuyRepository:
                        Subcategory.name.label("subcategory_name"))
                 .join(BuyItem, BuyItem.buy_id == Buy.id)
                 .join(User, User.id == Buy.buyer_id)
-                .join(Item, Item.id == BuyItem.item_id)
-                .join(Subcategory, Subcategory.id == Item.subcategory_id)
+                .outerjoin(Item, Item.id == BuyItem.item_id)
+                .outerjoin(ItemArchive, ItemArchive.id == BuyItem.item_id)
+                .join(Subcategory, Subcategory.id == func.coalesce(Item.subcategory_id, ItemArchive.subcategory_id))
                 .where(Buy.is_refunded == False)
                 .distinct()
                 .limit(config.PAGE_ENTRIES)
@@ -75,9 +120,10 @@ class BuyRepository:
                        Subcategory.name.label("subcategory_name"))
                 .join(BuyItem, BuyItem.buy_id == Buy.id)
                 .join(User, User.id == Buy.buyer_id)
-                .join(Item, Item.id == BuyItem.item_id)
-                .join(Subcategory, Subcategory.id == Item.subcategory_id)
-                .where(Buy.is_refunded == False, Buy.id == buy_id)
+                .outerjoin(Item, Item.id == BuyItem.item_id)
+                .outerjoin(ItemArchive, ItemArchive.id == BuyItem.item_id)
+                .join(Subcategory, Subcategory.id == func.coalesce(Item.subcategory_id, ItemArchive.subcategory_id))
+                .where(Buy.id == buy_id)
                 .limit(1))
         refund_data = await session_execute(stmt, session)
         return RefundDTO.model_validate(refund_data.mappings().one(), from_attributes=True)
@@ -88,6 +134,18 @@ class BuyRepository:
         buy = await session_execute(stmt, session)
         return BuyDTO.model_validate(buy.scalar_one(), from_attributes=True)
 
+    @staticmethod
+    async def mark_refunded(buy_id: int, session: Session | AsyncSession) -> bool:
+        """
+        Flags the buy as refunded in the current transaction.
+
+        Returns False if it already is (double click, a second admin) - the refund must not
+        be booked twice.
+        """
+        stmt = update(Buy).where(Buy.id == buy_id, Buy.is_refunded == False).values(is_refunded=True)
+        result = await session_execute(stmt, session)
+        return result.rowcount == 1
+
     @staticmethod
     async def update(buy_dto: BuyDTO, session: Session | AsyncSession):
         buy_dto_dict = buy_dto.model_dump()
@@ -105,13 +163,3 @@ class BuyRepository:
         stmt = select(Buy).where(Buy.buy_datetime >= time_interval, Buy.is_refunded == False)
         buys = await session_execute(stmt, session)
         return [BuyDTO.model_validate(buy, from_attributes=True) for buy in buys.scalars().all()]
-
-    @staticmethod
-    async def get_max_page_purchase_history(buyer_id: int, session: Session | AsyncSession) -> int:
-        stmt = select(func.count(Buy.id)).where(Buy.buyer_id == buyer_id)
-        not_refunded_buys = await session_execute(stmt, session)
-        not_refunded_buys = not_refunded_buys.scalar_one()
-        if not_refunded_buys % config.PAGE_ENTRIES == 0:
-            return not_refunded_buys / config.PAGE_ENTRIES - 1
-        else:
-            return math.trunc(not_refunded_buys / config.PAGE_ENTRIES)
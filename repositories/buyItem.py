@@ -2,8 +2,9 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from db import session_execute
+from db import session_execute, session_flush
 from models.buyItem import BuyItem, BuyItemDTO
+from repositories.statistics import StatisticsRepository
 
 
 class BuyItemRepository:
@@ -29,3 +30,6 @@ class BuyItemRepository:
     async def create_many(buy_item_dto_list: list[BuyItemDTO], session: Session | AsyncSession):
         for buy_item_dto in buy_item_dto_list:
             session.add(BuyItem(**buy_item_dto.model_dump()))
+        await session_flush(session)
+        for buy_id in {buy_item_dto.buy_id for buy_item_dto in buy_item_dto_list}:
+            await StatisticsRepository.add_subcategory_sales(buy_id, 1, session)
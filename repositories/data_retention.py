@@ -0,0 +1,105 @@
+from sqlalchemy import select, delete, update, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import session_execute
+from models.invoice import Invoice
+from models.item import Item
+from models.item_archive import ItemArchive
+from models.order import Order
+from models.payment_transaction import PaymentTransaction
+from models.referral_discount import ReferralDiscount
+from models.referral_usage import ReferralUsage
+from models.shipping_address import ShippingAddress
+from models.user_strike import UserStrike
+
+
+class DataRetentionRepository:
+    """
+    Primitives of the data retention cleanup: COUNT, primary-key chunks and chunk deletes.
+
+    `model` is any mapped class with an integer `id` primary key, `condition` a WHERE clause
+    on it. Chunks are taken in id order (keyset: id > after_id), so every chunk is one short
+    index range and every delete one short write transaction.
+    """
+
+    @staticmethod
+    async def count(model, condition, session: Session | AsyncSession) -> int:
+        stmt = select(func.count(model.id)).where(condition)
+        return (await session_execute(stmt, session)).scalar_one()
+
+    @staticmethod
+    async def get_ids(model, condition, after_id: int, limit: int, session: Session | AsyncSession) -> list[int]:
+        stmt = (select(model.id)
+                .where(condition, model.id > after_id)
+                .order_by(model.id)
+                .limit(limit))
+        return list((await session_execute(stmt, session)).scalars().all())
+
+    @staticmethod
+    async def get_rows(model, column, ids: list[int], session: Session | AsyncSession) -> list[dict]:
+        """Plain column -> value rows of `model` whose `column` is in `ids` (for the archive)."""
+        stmt = select(model.__table__).where(column.in_(ids)).order_by(model.id)
+        return [dict(row) for row in (await session_execute(stmt, session)).mappings()]
+
+    @staticmethod
+    async def delete_ids(model, ids: list[int], session: Session | AsyncSession) -> int:
+        result = await session_execute(delete(model).where(model.id.in_(ids)), session)
+        return result.rowcount
+
+    @staticmethod
+    async def delete_invoices(invoice_ids: list[int], session: Session | AsyncSession) -> int:
+        """Deletes invoices together with their payment transactions."""
+        await session_execute(delete(PaymentTransaction).where(PaymentTransaction.invoice_id.in_(invoice_ids)),
+                              session)
+        return await DataRetentionRepository.delete_ids(Invoice, invoice_ids, session)
+
+    @staticmethod
+    async def delete_orders(order_ids: list[int], session: Session | AsyncSession) -> int:
+        """
+        Deletes orders with their invoices, payment transactions and shipping address.
+
+        The foreign keys have no ON DELETE actions (the cascades are ORM-only), so the dependent
+        rows are removed - or, for rows that outlive the order (sold items, archived or not, strikes,
+        discounts), unlinked - explicitly, in the same transaction.
+        """
+        await session_execute(delete(PaymentTransaction).where(PaymentTransaction.order_id.in_(order_ids)), session)
+        await session_execute(delete(Invoice).where(Invoice.order_id.in_(order_ids)), session)
+        await session_execute(delete(ShippingAddress).where(ShippingAddress.order_id.in_(order_ids)), session)
+        for model in (Item, ItemArchive, UserStrike, ReferralDiscount):
+            await session_execute(update(model)
+                                  .where(model.order_id.in_(order_ids))
+                                  .values(order_id=None)
+                                  .execution_options(synchronize_session=False), session)
+        return await DataRetentionRepository.delete_ids(Order, order_ids, session)
+
+    @staticmethod
+    def order_deletable():
+        """Orders still referenced by a referral usage (kept longer) are kept until the usage expires."""
+        return ~select(ReferralUsage.id).where(ReferralUsage.order_id == Order.id).exists()
+
+    @staticmethod
+    async def get_auto_vacuum(session: Session | AsyncSession) -> int:
+        """0 = NONE, 1 = FULL, 2 = INCREMENTAL."""
+        return (await session_execute(text("PRAGMA auto_vacuum"), session)).scalar_one()
+
+    @staticmethod
+    async def get_free_pages(session: Session | AsyncSession) -> int:
+        return (await session_execute(text("PRAGMA freelist_count"), session)).scalar_one()
+
+    @staticmethod
+    async def incremental_vacuum(pages: int, session: Session | AsyncSession) -> int:
+        """
+        Returns up to `pages` free pages to the file system. Returns the free pages left.
+
+        The pragma frees one page per step and the sqlite3 driver steps a statement without
+        result columns only once, so it is run as a script (stepped to completion). Scripts
+        commit first - call it on a session without pending changes.
+        """
+        sql = f"PRAGMA incremental_vacuum({int(pages)})"
+        if isinstance(session, AsyncSession):
+            connection = await (await session.connection()).get_raw_connection()
+            await connection.driver_connection.executescript(sql)
+        else:
+            session.connection().connection.driver_connection.executescript(sql)
+        return await DataRetentionRepository.get_free_pages(session)
@@ -9,6 +9,7 @@ from db import session_execute, session_flush
 from enums.cryptocurrency import Cryptocurrency
 from models.deposit import Deposit, DepositDTO
 from models.user import UserDTO
+from repositories.statistics import StatisticsRepository
 
 
 class DepositRepository:
@@ -29,11 +30,38 @@ class DepositRepository:
 
     @staticmethod
     async def create(deposit: DepositDTO, session: Session | AsyncSession) -> int:
+        deposit = DepositRepository._with_datetime(deposit)
         dep = Deposit(**deposit.model_dump())
         session.add(dep)
         await session_flush(session)
+        await StatisticsRepository.add_deposits([deposit], session)
         return dep.id
 
+    @staticmethod
+    async def create_many(deposits: list[DepositDTO], session: Session | AsyncSession):
+        if not deposits:
+            return
+        deposits = [DepositRepository._with_datetime(deposit) for deposit in deposits]
+        session.add_all([Deposit(**deposit.model_dump(exclude_none=True)) for deposit in deposits])
+        await session_flush(session)
+        await StatisticsRepository.add_deposits(deposits, session)
+
+    @staticmethod
+    def _with_datetime(deposit: DepositDTO) -> DepositDTO:
+        # Set here (not by the column default) - the statistics rollup is keyed by its day
+        if deposit.deposit_datetime is not None:
+            return deposit
+        return deposit.model_copy(update={"deposit_datetime": datetime.datetime.now()})
+
+    @staticmethod
+    async def get_known_transactions(user_ids: set[int],
+                                     session: Session | AsyncSession) -> set[tuple[Cryptocurrency, str, int | None]]:
+        """(network, tx_id, vout) of all scanned deposits of the given users"""
+        stmt = (select(Deposit.network, Deposit.tx_id, Deposit.vout)
+                .where(Deposit.user_id.in_(user_ids), Deposit.tx_id.is_not(None)))
+        result = await session_execute(stmt, session)
+        return {(row.network, row.tx_id, row.vout) for row in result}
+
     @staticmethod
     async def get_by_user_id(user_id: int, session: Session | AsyncSession):
         stmt = (select(Deposit)
@@ -1,9 +1,15 @@
+from datetime import datetime
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from db import session_execute, session_flush
+from enums.order_status import OrderStatus
 from models.invoice import Invoice, InvoiceDTO
+from models.order import Order
+from repositories.reference_sequence import ReferenceSequenceRepository
+from utils.reference_code import ReferenceCode
 
 
 class InvoiceRepository:
@@ -53,33 +59,37 @@ class InvoiceRepository:
     @staticmethod
     async def get_next_invoice_number(session: Session | AsyncSession) -> str:
         """
-        Generiert eindeutige Invoice-Nummer im Format: YYYY-XXXXX
-        Beispiel: 2025-AX7D8
+        Generiert eindeutige Invoice-Nummer im Format: YYYY-XXXXXX
+        Beispiel: 2025-AX7D8K
 
-        5-stelliger alphanumerischer Code (Großbuchstaben + Zahlen ohne 0/O/1/I zur Vermeidung von Verwechslungen)
+        Der Code ist die Feistel-Permutation des nächsten Werts der Jahres-Sequenz (ReferenceCode).
+        Zufällige Codes von vor der Sequenz (oder von einem anderen Schlüssel) können mit einem
+        permutierten Wert zusammenfallen - dann wird der nächste Sequenzwert genommen
         """
-        import random
-        import string
-        from datetime import datetime
-
         year = datetime.now().year
-
-        # Alphanumerische Zeichen ohne verwirrende: 0, O, 1, I, l
-        chars = '23456789ABCDEFGHJKLMNPQRSTUVWXYZ'
-
-        # Versuche max 10x einen eindeutigen Code zu generieren
-        for _ in range(10):
-            # Generiere 5-stelligen Code
-            code = ''.join(random.choices(chars, k=6))
-            invoice_number = f"{year}-{code}"
-
-            # Prüfe ob schon existiert
-            stmt = select(Invoice.invoice_number).where(Invoice.invoice_number == invoice_number)
+        for _ in range(ReferenceCode.MAX_ATTEMPTS):
+            value = await ReferenceSequenceRepository.next_value(f"invoice:{year}", session)
+            invoice_number = f"{year}-{ReferenceCode.encode(value, 'invoice')}"
+            stmt = select(Invoice.id).where(Invoice.invoice_number == invoice_number)
             result = await session_execute(stmt, session)
-            existing = result.scalar_one_or_none()
-
-            if not existing:
+            if result.scalar_one_or_none() is None:
                 return invoice_number
 
-        # Fallback: sollte nie passieren (33^6 = ~1,3 Milliarden Möglichkeiten)
-        raise RuntimeError("Could not generate unique invoice number after 10 attempts")
\ No newline at end of file
+        raise RuntimeError(f"Could not generate unique invoice number after {ReferenceCode.MAX_ATTEMPTS} attempts")
+
+    @staticmethod
+    async def get_reconcilable(statuses: list[OrderStatus], expires_after: datetime,
+                               session: Session | AsyncSession) -> dict[int, tuple[InvoiceDTO, datetime]]:
+        """
+        Invoices with a KryptoExpress payment whose order is in one of `statuses` and expires
+        after `expires_after`, keyed by payment_processing_id, with the order deadline.
+        One query (uses idx_orders_status_expires_at).
+        """
+        stmt = (select(Invoice, Order.expires_at)
+                .join(Order, Order.id == Invoice.order_id)
+                .where(Order.status.in_(statuses),
+                       Order.expires_at > expires_after,
+                       Invoice.payment_processing_id.is_not(None)))
+        result = await session_execute(stmt, session)
+        return {invoice.payment_processing_id: (InvoiceDTO.model_validate(invoice, from_attributes=True), expires_at)
+                for invoice, expires_at in result.all()}
@@ -4,9 +4,12 @@ from sqlalchemy import select, func, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from db import session_execute
+from db import session_execute, session_flush
 from models.buyItem import BuyItem
 from models.item import Item, ItemDTO
+from repositories.item_archive import ItemArchiveRepository
+from repositories.item_payload import ItemPayloadRepository
+from utils.dto_mapping import dto_columns, rows_to_dtos
 
 
 class ItemRepository:
@@ -58,7 +61,11 @@ class ItemRepository:
     async def get_by_id(item_id: int, session: Session | AsyncSession) -> ItemDTO:
         stmt = select(Item).where(Item.id == item_id)
         item = await session_execute(stmt, session)
-        return ItemDTO.model_validate(item.scalar(), from_attributes=True)
+        item = item.scalar()
+        if item is None:
+            # Sold items are moved to items_archive after ITEM_ARCHIVE_AFTER_DAYS
+            return await ItemArchiveRepository.get_by_id(item_id, session)
+        return ItemDTO.model_validate(item, from_attributes=True)
 
     @staticmethod
     async def get_purchased_items(category_id: int, subcategory_id: int, quantity: int, session: Session | AsyncSession) -> list[ItemDTO]:
@@ -73,7 +80,7 @@ class ItemRepository:
     @staticmethod
     async def update(item_dto_list: list[ItemDTO], session: Session | AsyncSession):
         for item in item_dto_list:
-            stmt = update(Item).where(Item.id == item.id).values(**item.model_dump())
+            stmt = update(Item).where(Item.id == item.id).values(**item.model_dump(exclude={"private_data"}))
             await session_execute(stmt, session)
 
     @staticmethod
@@ -84,27 +91,39 @@ class ItemRepository:
             .where(BuyItem.buy_id == buy_id)
         )
         result = await session_execute(stmt, session)
-        return [ItemDTO.model_validate(item, from_attributes=True) for item in result.scalars().all()]
+        items = [ItemDTO.model_validate(item, from_attributes=True) for item in result.scalars().all()]
+        # Older purchases live (partly or fully) in items_archive
+        items += await ItemArchiveRepository.get_by_buy_id(buy_id, session)
+        return items
 
     @staticmethod
     async def set_not_new(session: Session | AsyncSession):
-        stmt = update(Item).values(is_new=False)
+        stmt = update(Item).where(Item.is_new == True).values(is_new=False)
         await session_execute(stmt, session)
 
     @staticmethod
     async def delete_unsold_by_category_id(entity_id: int, session: Session | AsyncSession):
-        stmt = delete(Item).where(Item.category_id == entity_id, Item.is_sold == False)
+        condition = (Item.category_id == entity_id, Item.is_sold == False)
+        await ItemPayloadRepository.delete_by_item_ids(select(Item.id).where(*condition), session)
+        stmt = delete(Item).where(*condition)
         await session_execute(stmt, session)
 
     @staticmethod
     async def delete_unsold_by_subcategory_id(entity_id: int, session: Session | AsyncSession):
-        stmt = delete(Item).where(Item.subcategory_id == entity_id, Item.is_sold == False)
+        condition = (Item.subcategory_id == entity_id, Item.is_sold == False)
+        await ItemPayloadRepository.delete_by_item_ids(select(Item.id).where(*condition), session)
+        stmt = delete(Item).where(*condition)
         await session_execute(stmt, session)
 
     @staticmethod
     async def add_many(items: list[ItemDTO], session: Session | AsyncSession):
-        items = [Item(**item.model_dump()) for item in items]
-        session.add_all(items)
+        new_items = [Item(**item.model_dump(exclude={"private_data"})) for item in items]
+        session.add_all(new_items)
+        # Item ids are needed for the payload rows
+        await session_flush(session)
+        await ItemPayloadRepository.create_many(
+            {new_item.id: item.private_data for new_item, item in zip(new_items, items)}, session
+        )
 
     @staticmethod
     async def get_new(session: Session | AsyncSession) -> list[ItemDTO]:
@@ -114,9 +133,9 @@ class ItemRepository:
 
     @staticmethod
     async def get_in_stock(session: Session | AsyncSession) -> list[ItemDTO]:
-        stmt = select(Item).where(Item.is_sold == False)
+        stmt = select(*dto_columns(Item, ItemDTO)).where(Item.is_sold == False)
         items = await session_execute(stmt, session)
-        return [ItemDTO.model_validate(item, from_attributes=True) for item in items.scalars().all()]
+        return rows_to_dtos(items.all(), ItemDTO)
 
     @staticmethod
     async def get_available_quantity_for_subcategory(
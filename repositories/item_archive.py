@@ -0,0 +1,78 @@
+from datetime import datetime
+
+from sqlalchemy import select, insert, delete, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import session_execute
+from enums.order_status import OrderStatus
+from models.buy import Buy
+from models.buyItem import BuyItem
+from models.item import Item, ItemDTO
+from models.item_archive import ItemArchive
+from models.order import Order
+
+ARCHIVED_COLUMNS = ["id", "category_id", "subcategory_id", "price", "description",
+                    "is_physical", "shipping_cost", "allows_packstation", "order_id", "reserved_at"]
+
+
+class ItemArchiveRepository:
+
+    @staticmethod
+    async def get_archivable_ids(cutoff: datetime, limit: int, session: Session | AsyncSession,
+                                 after_id: int = 0) -> list[int]:
+        """
+        Returns ids (above `after_id`, ascending) of sold items that can be moved to the archive.
+
+        An item is archivable when it is sold, was bought before `cutoff`, and its order
+        (if any) is finished (PAID or SHIPPED). Items of orders that still await shipment
+        stay live because the shipping screens read them via Order.items.
+        """
+        stmt = (
+            select(Item.id)
+            .join(BuyItem, BuyItem.item_id == Item.id)
+            .join(Buy, Buy.id == BuyItem.buy_id)
+            .outerjoin(Order, Order.id == Item.order_id)
+            .where(Item.is_sold == True)
+            .where(Buy.buy_datetime < cutoff)
+            .where(or_(Item.order_id == None, Order.status.in_([OrderStatus.PAID, OrderStatus.SHIPPED])))
+            .where(Item.id > after_id)
+            .order_by(Item.id)
+            .limit(limit)
+        )
+        result = await session_execute(stmt, session)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def move_to_archive(item_ids: list[int], session: Session | AsyncSession) -> int:
+        """Copies the items into items_archive and deletes them from items (same transaction)."""
+        if not item_ids:
+            return 0
+        columns = [getattr(Item, column) for column in ARCHIVED_COLUMNS]
+        insert_stmt = insert(ItemArchive).from_select(
+            ARCHIVED_COLUMNS,
+            select(*columns).where(Item.id.in_(item_ids))
+        )
+        await session_execute(insert_stmt, session)
+        delete_stmt = delete(Item).where(Item.id.in_(item_ids))
+        result = await session_execute(delete_stmt, session)
+        return result.rowcount
+
+    @staticmethod
+    async def get_by_id(item_id: int, session: Session | AsyncSession) -> ItemDTO | None:
+        stmt = select(ItemArchive).where(ItemArchive.id == item_id)
+        item = await session_execute(stmt, session)
+        item = item.scalar()
+        if item is None:
+            return None
+        return ItemDTO.model_validate(item, from_attributes=True)
+
+    @staticmethod
+    async def get_by_buy_id(buy_id: int, session: Session | AsyncSession) -> list[ItemDTO]:
+        stmt = (
+            select(ItemArchive)
+            .join(BuyItem, BuyItem.item_id == ItemArchive.id)
+            .where(BuyItem.buy_id == buy_id)
+        )
+        result = await session_execute(stmt, session)
+        return [ItemDTO.model_validate(item, from_attributes=True) for item in result.scalars().all()]
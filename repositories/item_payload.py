@@ -0,0 +1,55 @@
+import zlib
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import config
+from db import session_execute
+from models.item import ItemDTO
+from models.item_payload import ItemPayload
+
+
+class ItemPayloadRepository:
+
+    @staticmethod
+    def _encode(private_data: str) -> tuple[bytes, bool]:
+        raw = private_data.encode("utf-8")
+        if config.ITEM_PAYLOAD_COMPRESSION:
+            compressed = zlib.compress(raw)
+            if len(compressed) < len(raw):
+                return compressed, True
+        return raw, False
+
+    @staticmethod
+    def _decode(payload: ItemPayload) -> str:
+        data = zlib.decompress(payload.data) if payload.is_compressed else payload.data
+        return data.decode("utf-8")
+
+    @staticmethod
+    async def create_many(private_data_by_item_id: dict[int, str], session: Session | AsyncSession):
+        for item_id, private_data in private_data_by_item_id.items():
+            data, is_compressed = ItemPayloadRepository._encode(private_data)
+            session.add(ItemPayload(item_id=item_id, data=data, is_compressed=is_compressed))
+
+    @staticmethod
+    async def get_by_item_ids(item_ids: list[int], session: Session | AsyncSession) -> dict[int, str]:
+        if not item_ids:
+            return {}
+        stmt = select(ItemPayload).where(ItemPayload.item_id.in_(item_ids))
+        result = await session_execute(stmt, session)
+        return {payload.item_id: ItemPayloadRepository._decode(payload) for payload in result.scalars().all()}
+
+    @staticmethod
+    async def fill_private_data(items: list[ItemDTO], session: Session | AsyncSession) -> list[ItemDTO]:
+        """Loads the payloads of the given items in one query and sets ItemDTO.private_data (delivery only)."""
+        private_data = await ItemPayloadRepository.get_by_item_ids([item.id for item in items], session)
+        for item in items:
+            item.private_data = private_data.get(item.id)
+        return items
+
+    @staticmethod
+    async def delete_by_item_ids(item_ids, session: Session | AsyncSession):
+        """Deletes payloads of deleted items. item_ids may be a list or a select of ids."""
+        stmt = delete(ItemPayload).where(ItemPayload.item_id.in_(item_ids))
+        await session_execute(stmt, session)
@@ -1,12 +1,17 @@
+import math
 from datetime import datetime
 
 from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, selectinload
 
+import config
 from db import session_execute, session_flush
 from enums.order_status import OrderStatus
-from models.order import Order, OrderDTO
+from models.invoice import Invoice
+from models.order import Order, OrderDTO, ShippingQueueEntryDTO
+from models.user import User
+from utils.dto_mapping import dto_columns, rows_to_dtos
 
 
 class OrderRepository:
@@ -98,7 +103,7 @@ class OrderRepository:
     async def get_expired_orders(session: Session | AsyncSession) -> list[OrderDTO]:
         """Gets all expired orders (for timeout job)"""
         stmt = (
-            select(Order)
+            select(*dto_columns(Order, OrderDTO))
             .where(Order.status.in_([
                 OrderStatus.PENDING_PAYMENT,
                 OrderStatus.PENDING_PAYMENT_AND_ADDRESS,
@@ -107,7 +112,7 @@ class OrderRepository:
             .where(Order.expires_at < datetime.now())
         )
         result = await session_execute(stmt, session)
-        return [OrderDTO.model_validate(order, from_attributes=True) for order in result.scalars().all()]
+        return rows_to_dtos(result.all(), OrderDTO)
 
     @staticmethod
     async def get_by_user_id(user_id: int, session: Session | AsyncSession) -> list[OrderDTO]:
@@ -145,6 +150,70 @@ class OrderRepository:
         result = await session_execute(stmt, session)
         return result.scalars().all()
 
+    @staticmethod
+    def _shipping_queue_select():
+        # First invoice (as InvoiceRepository.get_by_order_id) and buyer in the same statement
+        first_invoice_number = (select(Invoice.invoice_number)
+                                .where(Invoice.order_id == Order.id)
+                                .order_by(Invoice.id)
+                                .limit(1)
+                                .scalar_subquery())
+        return (select(Order.id.label("order_id"), Order.user_id, Order.created_at, Order.paid_at,
+                       Order.total_price, first_invoice_number.label("invoice_number"),
+                       User.telegram_id, User.telegram_username)
+                .join(User, User.id == Order.user_id))
+
+    @staticmethod
+    async def get_shipping_queue(page: int, session: Session | AsyncSession) -> list[ShippingQueueEntryDTO]:
+        """One page of orders awaiting shipment (newest payment first), in one query"""
+        stmt = (
+            OrderRepository._shipping_queue_select()
+            .where(Order.status == OrderStatus.PAID_AWAITING_SHIPMENT)
+            .order_by(Order.paid_at.desc(), Order.id.desc())
+            .limit(config.PAGE_ENTRIES)
+            .offset(config.PAGE_ENTRIES * page)
+        )
+        result = await session_execute(stmt, session)
+        return rows_to_dtos(result.all(), ShippingQueueEntryDTO)
+
+    @staticmethod
+    async def get_shipping_queue_length(session: Session | AsyncSession) -> int:
+        stmt = select(func.count(Order.id)).where(Order.status == OrderStatus.PAID_AWAITING_SHIPMENT)
+        return (await session_execute(stmt, session)).scalar_one()
+
+    @staticmethod
+    async def get_max_page_shipping_queue(session: Session | AsyncSession) -> int:
+        orders = await OrderRepository.get_shipping_queue_length(session)
+        return max(math.ceil(orders / config.PAGE_ENTRIES) - 1, 0)
+
+    @staticmethod
+    async def get_shipping_queue_entries(order_ids: list[int],
+                                         session: Session | AsyncSession) -> list[ShippingQueueEntryDTO]:
+        """Queue rows of the given orders (any status), e.g. for the notifications after mark_shipped"""
+        if not order_ids:
+            return []
+        stmt = OrderRepository._shipping_queue_select().where(Order.id.in_(order_ids))
+        result = await session_execute(stmt, session)
+        return rows_to_dtos(result.all(), ShippingQueueEntryDTO)
+
+    @staticmethod
+    async def mark_shipped(order_ids: list[int], session: Session | AsyncSession) -> list[int]:
+        """
+        Sets SHIPPED (and shipped_at) on every given order that is still awaiting shipment, in one UPDATE.
+        Returns the IDs that were changed - orders shipped or cancelled in the meantime are skipped.
+        """
+        if not order_ids:
+            return []
+        stmt = (
+            update(Order)
+            .where(Order.id.in_(order_ids), Order.status == OrderStatus.PAID_AWAITING_SHIPMENT)
+            .values(status=OrderStatus.SHIPPED, shipped_at=datetime.now())
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session_execute(stmt, session)
+        return list(result.scalars().all())
+
     @staticmethod
     async def get_by_id_with_items(order_id: int, session: Session | AsyncSession) -> Order:
         """Gets order with all items (for display)"""
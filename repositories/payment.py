@@ -7,6 +7,8 @@ from sqlalchemy.orm import Session
 from db import session_execute
 from models.payment import Payment, DepositRecordDTO
 from models.user import User, UserDTO
+from repositories.reference_sequence import ReferenceSequenceRepository
+from utils.reference_code import ReferenceCode
 
 
 class PaymentRepository:
@@ -24,33 +26,20 @@ class PaymentRepository:
         Generates unique top-up reference in format: TOPUP-YYYY-XXXXXX
         Example: TOPUP-2025-AX7D8K
 
-        6-character alphanumeric code (uppercase + digits, excluding confusing characters: 0, O, 1, I, l)
+        The code is the Feistel permutation of the next value of the yearly sequence (ReferenceCode).
+        Random codes from before the sequence (or from another key) can coincide with a permuted
+        value - then the next sequence value is taken
         """
-        import random
-        import string
-        from datetime import datetime
-
-        year = datetime.now().year
-
-        # Alphanumeric characters without confusing ones: 0, O, 1, I, l
-        chars = '23456789ABCDEFGHJKLMNPQRSTUVWXYZ'
-
-        # Try max 10 times to generate unique code
-        for _ in range(10):
-            # Generate 6-character code
-            code = ''.join(random.choices(chars, k=6))
-            topup_ref = f"TOPUP-{year}-{code}"
-
-            # Check if already exists
-            stmt = select(Payment).where(Payment.topup_reference == topup_ref)
+        year = datetime.datetime.now().year
+        for _ in range(ReferenceCode.MAX_ATTEMPTS):
+            value = await ReferenceSequenceRepository.next_value(f"topup:{year}", session)
+            topup_ref = f"TOPUP-{year}-{ReferenceCode.encode(value, 'topup')}"
+            stmt = select(Payment.id).where(Payment.topup_reference == topup_ref)
             result = await session_execute(stmt, session)
-            if not result.scalar_one_or_none():
+            if result.scalar_one_or_none() is None:
                 return topup_ref
 
-        # Fallback: use timestamp if collision occurs
-        import time
-        timestamp_code = f"{int(time.time()) % 1000000:06d}"
-        return f"TOPUP-{year}-{timestamp_code}"
+        raise RuntimeError(f"Could not generate unique top-up reference after {ReferenceCode.MAX_ATTEMPTS} attempts")
 
     @staticmethod
     async def create(payment_id: int, user_id: int, message_id: int, session: AsyncSession | Session):
@@ -0,0 +1,124 @@
+from datetime import datetime
+
+from sqlalchemy import select, update, delete, func, insert, literal, DateTime, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import session_execute, session_flush
+from models.payment_event import PaymentEvent, PaymentEventDTO, DeadLetterPaymentEvent, DeadLetterPaymentEventDTO
+
+
+class PaymentEventRepository:
+
+    @staticmethod
+    async def create(body: str, payment_processing_id: int | None, session: Session | AsyncSession) -> int:
+        event = PaymentEvent(body=body, payment_processing_id=payment_processing_id,
+                             attempts=0, next_attempt_at=datetime.now())
+        session.add(event)
+        await session_flush(session)
+        return event.id
+
+    @staticmethod
+    async def create_many(events: list[tuple[str, int | None]], session: Session | AsyncSession):
+        """Queues several (body, payment_processing_id) events."""
+        if not events:
+            return
+        now = datetime.now()
+        session.add_all([PaymentEvent(body=body, payment_processing_id=payment_processing_id,
+                                      attempts=0, received_at=now, next_attempt_at=now)
+                         for body, payment_processing_id in events])
+        await session_flush(session)
+
+    @staticmethod
+    async def get_queued_payment_ids(payment_processing_ids: set[int],
+                                     session: Session | AsyncSession) -> set[int]:
+        """Payments of the given ids that have an event waiting in the queue."""
+        if not payment_processing_ids:
+            return set()
+        stmt = (select(PaymentEvent.payment_processing_id)
+                .where(PaymentEvent.payment_processing_id.in_(payment_processing_ids))
+                .distinct())
+        result = await session_execute(stmt, session)
+        return set(result.scalars().all())
+
+    @staticmethod
+    async def get_due(now: datetime, limit: int, exclude_ids: set[int],
+                      session: Session | AsyncSession) -> list[PaymentEventDTO]:
+        """Events whose next attempt is due, oldest first. `exclude_ids`: events currently in flight."""
+        stmt = (
+            select(PaymentEvent)
+            .where(PaymentEvent.next_attempt_at <= now)
+            .order_by(PaymentEvent.next_attempt_at)
+            .limit(limit)
+        )
+        if exclude_ids:
+            stmt = stmt.where(PaymentEvent.id.not_in(exclude_ids))
+        result = await session_execute(stmt, session)
+        return [PaymentEventDTO.model_validate(event, from_attributes=True) for event in result.scalars().all()]
+
+    @staticmethod
+    async def delete(event_id: int, session: Session | AsyncSession):
+        await session_execute(delete(PaymentEvent).where(PaymentEvent.id == event_id), session)
+
+    @staticmethod
+    async def schedule_retry(event_id: int, attempts: int, next_attempt_at: datetime, error: str,
+                             session: Session | AsyncSession):
+        stmt = update(PaymentEvent).where(PaymentEvent.id == event_id).values(
+            attempts=attempts,
+            next_attempt_at=next_attempt_at,
+            last_error=error
+        )
+        await session_execute(stmt, session)
+
+    @staticmethod
+    async def move_to_dead_letter(event: PaymentEventDTO, attempts: int, error: str,
+                                  session: Session | AsyncSession):
+        session.add(DeadLetterPaymentEvent(
+            payment_processing_id=event.payment_processing_id,
+            body=event.body,
+            received_at=event.received_at,
+            attempts=attempts,
+            last_error=error,
+            failed_at=datetime.now()
+        ))
+        await PaymentEventRepository.delete(event.id, session)
+        await session_flush(session)
+
+    @staticmethod
+    async def get_dead_letters(limit: int, session: Session | AsyncSession) -> list[DeadLetterPaymentEventDTO]:
+        stmt = select(DeadLetterPaymentEvent).order_by(DeadLetterPaymentEvent.id.desc()).limit(limit)
+        result = await session_execute(stmt, session)
+        return [DeadLetterPaymentEventDTO.model_validate(event, from_attributes=True)
+                for event in result.scalars().all()]
+
+    @staticmethod
+    async def get_queue_length(session: Session | AsyncSession) -> int:
+        """Queued events, due now or waiting for a retry."""
+        result = await session_execute(select(func.count(PaymentEvent.id)), session)
+        return result.scalar()
+
+    @staticmethod
+    async def get_dead_letter_count(session: Session | AsyncSession) -> int:
+        result = await session_execute(select(func.count(DeadLetterPaymentEvent.id)), session)
+        return result.scalar()
+
+    @staticmethod
+    async def replay_dead_letters(dead_letter_id: int | None, session: Session | AsyncSession) -> int:
+        """
+        Moves dead-lettered events back to the queue with a fresh retry budget.
+        `dead_letter_id=None` replays all of them. Returns the number of replayed events.
+        """
+        dead_letter_filter = [] if dead_letter_id is None else [DeadLetterPaymentEvent.id == dead_letter_id]
+        insert_stmt = insert(PaymentEvent).from_select(
+            ["payment_processing_id", "body", "received_at", "attempts", "next_attempt_at", "last_error"],
+            select(DeadLetterPaymentEvent.payment_processing_id,
+                   DeadLetterPaymentEvent.body,
+                   DeadLetterPaymentEvent.received_at,
+                   literal(0, Integer),
+                   literal(datetime.now(), DateTime),
+                   DeadLetterPaymentEvent.last_error)
+            .where(*dead_letter_filter)
+        )
+        await session_execute(insert_stmt, session)
+        result = await session_execute(delete(DeadLetterPaymentEvent).where(*dead_letter_filter), session)
+        return result.rowcount
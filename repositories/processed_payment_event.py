@@ -0,0 +1,59 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import session_execute
+from models.processed_payment_event import ProcessedPaymentEvent
+
+
+class ProcessedPaymentEventRepository:
+
+    @staticmethod
+    def _key(payment_processing_id: int, is_paid: bool | None, tx_hash: str | None) -> dict:
+        return {
+            "payment_processing_id": payment_processing_id,
+            "is_paid": bool(is_paid),
+            "tx_hash": tx_hash or '',
+        }
+
+    @staticmethod
+    async def exists(payment_processing_id: int, is_paid: bool | None, tx_hash: str | None,
+                     session: Session | AsyncSession) -> bool:
+        key = ProcessedPaymentEventRepository._key(payment_processing_id, is_paid, tx_hash)
+        stmt = select(ProcessedPaymentEvent.id).where(
+            ProcessedPaymentEvent.payment_processing_id == key["payment_processing_id"],
+            ProcessedPaymentEvent.is_paid == key["is_paid"],
+            ProcessedPaymentEvent.tx_hash == key["tx_hash"],
+        ).limit(1)
+        result = await session_execute(stmt, session)
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def register(payment_processing_id: int, is_paid: bool | None, tx_hash: str | None,
+                       session: Session | AsyncSession) -> bool:
+        """
+        Records the event in the current transaction.
+
+        Returns False if the event is already recorded (duplicate delivery).
+        """
+        key = ProcessedPaymentEventRepository._key(payment_processing_id, is_paid, tx_hash)
+        stmt = insert(ProcessedPaymentEvent).values(**key).on_conflict_do_nothing(
+            index_elements=['payment_processing_id', 'is_paid', 'tx_hash']
+        )
+        result = await session_execute(stmt, session)
+        return result.rowcount == 1
+
+    @staticmethod
+    async def get_processed_keys(payment_processing_ids: set[int],
+                                 session: Session | AsyncSession) -> set[tuple[int, bool, str]]:
+        """(payment_processing_id, is_paid, tx_hash) of all processed events of the given payments."""
+        if not payment_processing_ids:
+            return set()
+        stmt = select(ProcessedPaymentEvent.payment_processing_id,
+                      ProcessedPaymentEvent.is_paid,
+                      ProcessedPaymentEvent.tx_hash).where(
+            ProcessedPaymentEvent.payment_processing_id.in_(payment_processing_ids)
+        )
+        result = await session_execute(stmt, session)
+        return {tuple(row) for row in result.all()}
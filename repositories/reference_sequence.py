@@ -0,0 +1,20 @@
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import session_execute
+from models.reference_sequence import ReferenceSequence
+
+
+class ReferenceSequenceRepository:
+
+    @staticmethod
+    async def next_value(name: str, session: Session | AsyncSession) -> int:
+        """Increments the sequence (created on first use, starting at 1) and returns the new value."""
+        stmt = (insert(ReferenceSequence)
+                .values(name=name, value=1)
+                .on_conflict_do_update(index_elements=[ReferenceSequence.name],
+                                       set_={"value": ReferenceSequence.value + 1})
+                .returning(ReferenceSequence.value))
+        result = await session_execute(stmt, session)
+        return result.scalar_one()
@@ -0,0 +1,200 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import select, func, literal, Integer
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from callbacks import StatisticsTimeDelta
+from db import session_execute
+from enums.cryptocurrency import Cryptocurrency
+from models.buy import Buy
+from models.buyItem import BuyItem
+from models.deposit import Deposit, DepositDTO
+from models.item import Item
+from models.item_archive import ItemArchive
+from models.statistics import DailyStatistics, DailyDepositStatistics, DailySubcategoryStatistics, \
+    StatisticsSummaryDTO, DailyStatisticsDTO, SubcategorySalesDTO
+from models.subcategory import Subcategory
+from models.user import User
+
+
+class StatisticsRepository:
+    """
+    Admin statistics from daily rollups.
+
+    The add_* methods are called by the repositories that create the counted rows, in the same
+    transaction. Reads take the closed days of the window from the rollup tables (one row per
+    day, one per day and network / subcategory) and aggregate only the current day from the raw
+    tables, over their datetime indexes - a 30-day summary costs the same however many buys there are.
+    """
+
+    @staticmethod
+    def window_start(statistics_timedelta: StatisticsTimeDelta) -> date:
+        """First day of the window: today and the (timedelta - 1) days before it."""
+        return date.today() - timedelta(days=statistics_timedelta.value - 1)
+
+    @staticmethod
+    def _today_start() -> datetime:
+        return datetime.combine(date.today(), time.min)
+
+    @staticmethod
+    async def _add(model, key: dict, values: dict, session: Session | AsyncSession):
+        stmt = insert(model).values(**key, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: getattr(model, name) + stmt.excluded[name] for name in values}
+        )
+        await session_execute(stmt, session)
+
+    @staticmethod
+    async def add_sales(day: date, sales_count: int, revenue: float, items_sold: int,
+                        session: Session | AsyncSession):
+        """Adds to the sales of `day` (negative values for a refund)."""
+        await StatisticsRepository._add(DailyStatistics, {"day": day},
+                                        {"sales_count": sales_count, "revenue": revenue, "items_sold": items_sold},
+                                        session)
+
+    @staticmethod
+    async def add_subcategory_sales(buy_id: int, sign: int, session: Session | AsyncSession):
+        """
+        Adds the items of a buy (its buyItem rows must be flushed) to the items sold per subcategory
+        on the day of the buy - `sign` -1 subtracts them again (refund).
+        """
+        subcategory_id = func.coalesce(Item.subcategory_id, ItemArchive.subcategory_id)
+        select_stmt = (select(func.date(Buy.buy_datetime),
+                              subcategory_id,
+                              func.count(BuyItem.id) * literal(sign, Integer))
+                       .select_from(BuyItem)
+                       .join(Buy, Buy.id == BuyItem.buy_id)
+                       .outerjoin(Item, Item.id == BuyItem.item_id)
+                       .outerjoin(ItemArchive, ItemArchive.id == BuyItem.item_id)
+                       .where(BuyItem.buy_id == buy_id, subcategory_id.is_not(None))
+                       .group_by(subcategory_id))
+        stmt = insert(DailySubcategoryStatistics).from_select(["day", "subcategory_id", "items_sold"], select_stmt)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "subcategory_id"],
+            set_={"items_sold": DailySubcategoryStatistics.items_sold + stmt.excluded.items_sold}
+        )
+        await session_execute(stmt, session)
+
+    @staticmethod
+    async def add_new_users(day: date, new_users: int, session: Session | AsyncSession):
+        await StatisticsRepository._add(DailyStatistics, {"day": day}, {"new_users": new_users}, session)
+
+    @staticmethod
+    async def add_deposits(deposits: list[DepositDTO], session: Session | AsyncSession):
+        """Adds deposits (deposit_datetime set) with one upsert per (day, network)."""
+        totals = defaultdict(lambda: [0, 0.0])
+        for deposit in deposits:
+            total = totals[(deposit.deposit_datetime.date(), deposit.network)]
+            total[0] += 1
+            total[1] += deposit.amount / pow(10, deposit.network.get_divider())
+        for (day, network), (deposits_count, amount) in totals.items():
+            await StatisticsRepository._add(DailyDepositStatistics, {"day": day, "network": network},
+                                            {"deposits_count": deposits_count, "amount": amount}, session)
+
+    @staticmethod
+    async def _get_today_sales(session: Session | AsyncSession) -> tuple[int, float, int, int]:
+        """(sales_count, revenue, items_sold, new_users) of the current day, from the raw tables."""
+        today_start = StatisticsRepository._today_start()
+        today_sales = (select(func.count(Buy.id),
+                              func.coalesce(func.sum(Buy.total_price), 0.0),
+                              func.coalesce(func.sum(Buy.quantity), 0))
+                       .where(Buy.buy_datetime >= today_start, Buy.is_refunded == False))
+        sales_count, revenue, items_sold = (await session_execute(today_sales, session)).one()
+        today_users = select(func.count(User.id)).where(User.registered_at >= today_start)
+        new_users = (await session_execute(today_users, session)).scalar_one()
+        return sales_count, revenue, items_sold, new_users
+
+    @staticmethod
+    async def get_deposits(statistics_timedelta: StatisticsTimeDelta,
+                           session: Session | AsyncSession) -> tuple[int, dict[Cryptocurrency, float]]:
+        """Number of deposits and deposited amount (in coins) per network."""
+        since = StatisticsRepository.window_start(statistics_timedelta)
+        today = date.today()
+        total_count = 0
+        amounts: dict[Cryptocurrency, float] = defaultdict(float)
+
+        closed_deposits = (select(DailyDepositStatistics.network,
+                                  func.sum(DailyDepositStatistics.deposits_count),
+                                  func.sum(DailyDepositStatistics.amount))
+                           .where(DailyDepositStatistics.day >= since, DailyDepositStatistics.day < today)
+                           .group_by(DailyDepositStatistics.network))
+        for network, deposits_count, amount in await session_execute(closed_deposits, session):
+            total_count += deposits_count
+            amounts[network] += amount
+
+        today_deposits = (select(Deposit.network, func.count(Deposit.id), func.sum(Deposit.amount))
+                          .where(Deposit.deposit_datetime >= StatisticsRepository._today_start())
+                          .group_by(Deposit.network))
+        for network, deposits_count, amount in await session_execute(today_deposits, session):
+            total_count += deposits_count
+            amounts[network] += amount / pow(10, network.get_divider())
+        return total_count, dict(amounts)
+
+    @staticmethod
+    async def get_summary(statistics_timedelta: StatisticsTimeDelta,
+                          session: Session | AsyncSession) -> StatisticsSummaryDTO:
+        since = StatisticsRepository.window_start(statistics_timedelta)
+        closed_days = (select(func.coalesce(func.sum(DailyStatistics.sales_count), 0),
+                              func.coalesce(func.sum(DailyStatistics.revenue), 0.0),
+                              func.coalesce(func.sum(DailyStatistics.items_sold), 0),
+                              func.coalesce(func.sum(DailyStatistics.new_users), 0))
+                       .where(DailyStatistics.day >= since, DailyStatistics.day < date.today()))
+        closed = (await session_execute(closed_days, session)).one()
+        today = await StatisticsRepository._get_today_sales(session)
+        deposits_count, deposit_amounts = await StatisticsRepository.get_deposits(statistics_timedelta, session)
+
+        sales_count, revenue, items_sold, new_users = (closed[i] + today[i] for i in range(4))
+        return StatisticsSummaryDTO(since=since, sales_count=sales_count, revenue=revenue, items_sold=items_sold,
+                                    new_users=new_users, deposits_count=deposits_count,
+                                    deposit_amounts=deposit_amounts)
+
+    @staticmethod
+    async def get_daily(statistics_timedelta: StatisticsTimeDelta,
+                        session: Session | AsyncSession) -> list[DailyStatisticsDTO]:
+        """One entry per day of the window, oldest first (days without activity are zero)."""
+        since = StatisticsRepository.window_start(statistics_timedelta)
+        today = date.today()
+        days = {since + timedelta(days=offset): DailyStatisticsDTO(day=since + timedelta(days=offset))
+                for offset in range(statistics_timedelta.value)}
+
+        stmt = (select(DailyStatistics)
+                .where(DailyStatistics.day >= since, DailyStatistics.day < today))
+        for rollup in (await session_execute(stmt, session)).scalars():
+            days[rollup.day] = DailyStatisticsDTO.model_validate(rollup, from_attributes=True)
+        sales_count, revenue, items_sold, new_users = await StatisticsRepository._get_today_sales(session)
+        days[today] = DailyStatisticsDTO(day=today, sales_count=sales_count, revenue=revenue,
+                                         items_sold=items_sold, new_users=new_users)
+        return list(days.values())
+
+    @staticmethod
+    async def get_subcategory_sales(statistics_timedelta: StatisticsTimeDelta,
+                                    session: Session | AsyncSession) -> list[SubcategorySalesDTO]:
+        """Items sold per subcategory in the window, best-selling first."""
+        since = StatisticsRepository.window_start(statistics_timedelta)
+        items_sold: dict[str, int] = defaultdict(int)
+
+        closed_days = (select(Subcategory.name, func.sum(DailySubcategoryStatistics.items_sold))
+                       .join(Subcategory, Subcategory.id == DailySubcategoryStatistics.subcategory_id)
+                       .where(DailySubcategoryStatistics.day >= since, DailySubcategoryStatistics.day < date.today())
+                       .group_by(Subcategory.id))
+        for name, count in await session_execute(closed_days, session):
+            items_sold[name] += count
+
+        today = (select(Subcategory.name, func.count(BuyItem.id))
+                 .select_from(Buy)
+                 .join(BuyItem, BuyItem.buy_id == Buy.id)
+                 .outerjoin(Item, Item.id == BuyItem.item_id)
+                 .outerjoin(ItemArchive, ItemArchive.id == BuyItem.item_id)
+                 .join(Subcategory, Subcategory.id == func.coalesce(Item.subcategory_id, ItemArchive.subcategory_id))
+                 .where(Buy.buy_datetime >= StatisticsRepository._today_start(), Buy.is_refunded == False)
+                 .group_by(Subcategory.id))
+        for name, count in await session_execute(today, session):
+            items_sold[name] += count
+
+        return sorted((SubcategorySalesDTO(subcategory_name=name, items_sold=count)
+                       for name, count in items_sold.items() if count > 0),
+                      key=lambda entry: entry.items_sold, reverse=True)
@@ -10,6 +10,8 @@ from callbacks import StatisticsTimeDelta
 from db import session_execute, session_flush
 
 from models.user import UserDTO, User
+from repositories.statistics import StatisticsRepository
+from utils.dto_mapping import dto_columns, rows_to_dtos
 
 
 class UserRepository:
@@ -35,7 +37,9 @@ class UserRepository:
 
     @staticmethod
     async def update(user_dto: UserDTO, session: Session | AsyncSession) -> None:
-        user_dto_dict = user_dto.model_dump()
+        # The wallet balance is only changed through WalletRepository (atomic, ledgered);
+        # writing back a previously loaded value would undo concurrent changes
+        user_dto_dict = user_dto.model_dump(exclude={"top_up_amount"})
         none_keys = [k for k, v in user_dto_dict.items() if v is None]
         for k in none_keys:
             user_dto_dict.pop(k)
@@ -51,15 +55,18 @@ class UserRepository:
     @staticmethod
     async def create(user_dto: UserDTO, session: Session | AsyncSession) -> int:
         user = User(**user_dto.model_dump())
+        # Set here (not by the column default) - the statistics rollup is keyed by its day
+        user.registered_at = user.registered_at or datetime.datetime.now()
         session.add(user)
         await session_flush(session)
+        await StatisticsRepository.add_new_users(user.registered_at.date(), 1, session)
         return user.id
 
     @staticmethod
     async def get_active(session: Session | AsyncSession) -> list[UserDTO]:
-        stmt = select(User).where(User.can_receive_messages == True)
+        stmt = select(*dto_columns(User, UserDTO)).where(User.can_receive_messages == True)
         users = await session_execute(stmt, session)
-        return [UserDTO.model_validate(user, from_attributes=True) for user in users.scalars().all()]
+        return rows_to_dtos(users.all(), UserDTO)
 
     @staticmethod
     async def get_all_count(session: Session | AsyncSession) -> int:
@@ -96,25 +103,19 @@ class UserRepository:
             return UserDTO.model_validate(user, from_attributes=True)
 
     @staticmethod
-    async def get_by_timedelta(timedelta: StatisticsTimeDelta, page: int, session: Session | AsyncSession) -> tuple[list[UserDTO], int]:
-        current_time = datetime.datetime.now()
-        timedelta = datetime.timedelta(days=timedelta.value)
-        time_interval = current_time - timedelta
+    async def get_by_timedelta(timedelta: StatisticsTimeDelta, page: int, session: Session | AsyncSession) -> list[UserDTO]:
+        # Same window as the new_users count of StatisticsRepository.get_summary
+        time_interval = datetime.datetime.combine(StatisticsRepository.window_start(timedelta), datetime.time.min)
         users_stmt = (select(User)
                       .where(User.registered_at >= time_interval, User.telegram_username != None)
                       .limit(config.PAGE_ENTRIES)
                       .offset(config.PAGE_ENTRIES * page))
-        users_count_stmt = select(func.count(User.id)).where(User.registered_at >= time_interval)
         users = await session_execute(users_stmt, session)
-        users = [UserDTO.model_validate(user, from_attributes=True) for user in users.scalars().all()]
-        users_count = await session_execute(users_count_stmt, session)
-        return users, users_count.scalar_one()
+        return [UserDTO.model_validate(user, from_attributes=True) for user in users.scalars().all()]
 
     @staticmethod
     async def get_max_page_by_timedelta(timedelta: StatisticsTimeDelta, session: Session | AsyncSession) -> int:
-        current_time = datetime.datetime.now()
-        timedelta = datetime.timedelta(days=timedelta.value)
-        time_interval = current_time - timedelta
+        time_interval = datetime.datetime.combine(StatisticsRepository.window_start(timedelta), datetime.time.min)
         stmt = select(func.count(User.id)).where(User.registered_at >= time_interval,
                                                  User.telegram_username != None)
         users = await session_execute(stmt, session)
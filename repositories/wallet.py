@@ -0,0 +1,170 @@
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import select, update, insert, func, literal, true, Integer, String, DateTime, Enum
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from db import session_execute
+from enums.wallet_entry_type import WalletEntryType
+from models.user import User
+from models.wallet import WalletLedgerEntry, WalletSnapshot, WalletLedgerEntryDTO, WalletDriftDTO
+
+
+class InsufficientWalletBalance(ValueError):
+    pass
+
+
+class WalletRepository:
+    """
+    Wallet balances in integer cents.
+
+    Every change is one ledger insert plus one `UPDATE users SET balance_cents = balance_cents + ?`
+    in the caller's transaction - the user row is never loaded and written back, so concurrent
+    changes can't overwrite each other. Amounts are rounded to cents (half up) once, at the API.
+    """
+
+    @staticmethod
+    def to_cents(amount: float | Decimal) -> int:
+        return int((Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+    @staticmethod
+    async def _apply(user_id: int, amount_expr, condition, entry_type: WalletEntryType, reference: str | None,
+                     session: Session | AsyncSession) -> tuple[int, float] | None:
+        """
+        Appends the ledger entry (amount computed from the current balance, if `condition` holds)
+        and moves the balance by the same amount. Returns (applied cents, new balance) or None.
+        """
+        ledger_stmt = insert(WalletLedgerEntry).from_select(
+            ["user_id", "amount_cents", "entry_type", "reference", "created_at"],
+            select(User.id,
+                   amount_expr,
+                   literal(entry_type, Enum(WalletEntryType)),
+                   literal(reference, String),
+                   literal(datetime.now(), DateTime))
+            .where(User.id == user_id, condition)
+        ).returning(WalletLedgerEntry.amount_cents)
+        applied_cents = (await session_execute(ledger_stmt, session)).scalar_one_or_none()
+        if applied_cents is None:
+            return None
+
+        balance_stmt = (update(User)
+                        .where(User.id == user_id)
+                        .values(balance_cents=User.balance_cents + applied_cents,
+                                top_up_amount=(User.balance_cents + applied_cents) / 100.0)
+                        .returning(User.balance_cents, User.top_up_amount)
+                        .execution_options(synchronize_session=False))
+        balance = (await session_execute(balance_stmt, session)).one()
+        WalletRepository._sync_loaded_user(user_id, balance, session)
+        return applied_cents, balance.balance_cents / 100
+
+    @staticmethod
+    def _sync_loaded_user(user_id: int, balance, session: Session | AsyncSession):
+        # A User already loaded in this session would otherwise keep (and later return) the old balance
+        sync_session = session.sync_session if isinstance(session, AsyncSession) else session
+        user = sync_session.identity_map.get(Session.identity_key(User, user_id))
+        if user is not None:
+            set_committed_value(user, "balance_cents", balance.balance_cents)
+            set_committed_value(user, "top_up_amount", balance.top_up_amount)
+
+    @staticmethod
+    async def credit(user_id: int, amount: float | Decimal, entry_type: WalletEntryType,
+                     session: Session | AsyncSession, reference: str | None = None) -> float:
+        """Adds `amount` (EUR) to the wallet. Returns the new balance."""
+        cents = WalletRepository.to_cents(amount)
+        if cents < 0:
+            raise ValueError(f"Credit amount must not be negative: {amount}")
+        _, balance = await WalletRepository._apply(user_id, literal(cents, Integer), true(), entry_type, reference,
+                                                   session)
+        return balance
+
+    @staticmethod
+    async def debit(user_id: int, amount: float | Decimal, entry_type: WalletEntryType,
+                    session: Session | AsyncSession, reference: str | None = None) -> float:
+        """Subtracts `amount` (EUR). Raises InsufficientWalletBalance if the balance is lower. Returns the new balance."""
+        cents = WalletRepository.to_cents(amount)
+        result = await WalletRepository._apply(user_id, literal(-cents, Integer), User.balance_cents >= cents,
+                                               entry_type, reference, session)
+        if result is None:
+            raise InsufficientWalletBalance(f"Wallet balance of user {user_id} is lower than {amount}")
+        return result[1]
+
+    @staticmethod
+    async def debit_up_to(user_id: int, amount: float | Decimal, entry_type: WalletEntryType,
+                          session: Session | AsyncSession, reference: str | None = None) -> float:
+        """Subtracts `amount` (EUR), at most the whole balance. Returns the amount actually debited."""
+        cents = WalletRepository.to_cents(amount)
+        if cents <= 0:
+            return 0.0
+        applied = func.min(User.balance_cents, cents)
+        result = await WalletRepository._apply(user_id, -applied, User.balance_cents > 0,
+                                               entry_type, reference, session)
+        return -result[0] / 100 if result else 0.0
+
+    @staticmethod
+    async def get_balance(user_id: int, session: Session | AsyncSession) -> float:
+        result = await session_execute(select(User.balance_cents).where(User.id == user_id), session)
+        return result.scalar_one() / 100
+
+    @staticmethod
+    async def get_entries(user_id: int, limit: int, session: Session | AsyncSession) -> list[WalletLedgerEntryDTO]:
+        stmt = (select(WalletLedgerEntry)
+                .where(WalletLedgerEntry.user_id == user_id)
+                .order_by(WalletLedgerEntry.id.desc())
+                .limit(limit))
+        result = await session_execute(stmt, session)
+        return [WalletLedgerEntryDTO.model_validate(entry, from_attributes=True) for entry in result.scalars().all()]
+
+    @staticmethod
+    def _latest_snapshots():
+        latest = (select(WalletSnapshot.user_id, func.max(WalletSnapshot.id).label("id"))
+                  .group_by(WalletSnapshot.user_id)
+                  .subquery())
+        return (select(WalletSnapshot)
+                .join(latest, WalletSnapshot.id == latest.c.id)
+                .subquery())
+
+    @staticmethod
+    async def create_snapshot(session: Session | AsyncSession) -> int:
+        """
+        Records the balance of every user whose wallet changed since their last snapshot,
+        at the current end of the ledger. Returns the number of snapshot rows.
+        """
+        last_entry_id = select(func.coalesce(func.max(WalletLedgerEntry.id), 0)).scalar_subquery()
+        snapshot_entry_id = (select(func.coalesce(func.max(WalletSnapshot.last_entry_id), 0))
+                             .where(WalletSnapshot.user_id == User.id)
+                             .scalar_subquery())
+        has_entries = (select(WalletLedgerEntry.id)
+                       .where(WalletLedgerEntry.user_id == User.id, WalletLedgerEntry.id > snapshot_entry_id)
+                       .exists())
+        stmt = insert(WalletSnapshot).from_select(
+            ["user_id", "balance_cents", "last_entry_id", "taken_at"],
+            select(User.id, User.balance_cents, last_entry_id, literal(datetime.now(), DateTime))
+            .where(has_entries)
+        )
+        result = await session_execute(stmt, session)
+        return result.rowcount
+
+    @staticmethod
+    async def find_drift(session: Session | AsyncSession) -> list[WalletDriftDTO]:
+        """
+        Users whose balance differs from (latest snapshot + ledger entries after it).
+        Only the entries after the snapshot are summed, so the check stays cheap as the ledger grows.
+        """
+        snapshot = WalletRepository._latest_snapshots()
+        since_snapshot = (select(WalletLedgerEntry.user_id,
+                                 func.sum(WalletLedgerEntry.amount_cents).label("amount_cents"))
+                          .outerjoin(snapshot, snapshot.c.user_id == WalletLedgerEntry.user_id)
+                          .where(WalletLedgerEntry.id > func.coalesce(snapshot.c.last_entry_id, 0))
+                          .group_by(WalletLedgerEntry.user_id)
+                          .subquery())
+        expected = (func.coalesce(snapshot.c.balance_cents, 0)
+                    + func.coalesce(since_snapshot.c.amount_cents, 0))
+        stmt = (select(User.id, expected.label("expected_cents"), User.balance_cents)
+                .outerjoin(snapshot, snapshot.c.user_id == User.id)
+                .outerjoin(since_snapshot, since_snapshot.c.user_id == User.id)
+                .where(expected != User.balance_cents))
+        result = await session_execute(stmt, session)
+        return [WalletDriftDTO(user_id=row.id, expected_cents=row.expected_cents, balance_cents=row.balance_cents)
+                for row in result]
@@ -3,6 +3,7 @@ import datetime
 import logging
 import re
 
+from aiogram import types
 from aiogram.exceptions import TelegramForbiddenError
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
@@ -10,23 +11,25 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-import config
 from callbacks import AdminAnnouncementCallback, AnnouncementType, AdminInventoryManagementCallback, EntityType, \
     AddType, UserManagementCallback, UserManagementOperation, StatisticsCallback, StatisticsEntity, StatisticsTimeDelta, \
-    WalletCallback
+    StatisticsChart, WalletCallback
 from crypto_api.CryptoApiWrapper import CryptoApiWrapper
 from db import session_commit
 from enums.bot_entity import BotEntity
 from enums.cryptocurrency import Cryptocurrency
+from enums.wallet_entry_type import WalletEntryType
 from handlers.admin.constants import AdminConstants, AdminInventoryManagementStates, UserManagementStates, WalletStates
 from handlers.common.common import add_pagination_buttons
 from models.withdrawal import WithdrawalDTO
 from repositories.buy import BuyRepository
 from repositories.category import CategoryRepository
-from repositories.deposit import DepositRepository
 from repositories.item import ItemRepository
+from repositories.statistics import StatisticsRepository
 from repositories.subcategory import SubcategoryRepository
 from repositories.user import UserRepository
+from repositories.wallet import WalletRepository, InsufficientWalletBalance
+from services.price_oracle import PriceOracle
 from utils.localizator import Localizator
 
 
@@ -366,8 +369,7 @@ class AdminService:
         if user is None:
             return Localizator.get_text(BotEntity.ADMIN, "credit_management_user_not_found")
         elif operation == UserManagementOperation.ADD_BALANCE:
-            user.top_up_amount = round(user.top_up_amount + float(message.text), 2)
-            await UserRepository.update(user, session)
+            await WalletRepository.credit(user.id, float(message.text), WalletEntryType.ADMIN_ADJUSTMENT, session)
             await session_commit(session)
             return Localizator.get_text(BotEntity.ADMIN, "credit_management_added_success").format(
                 amount=message.text,
@@ -377,21 +379,15 @@ class AdminService:
             # REDUCE_BALANCE: Subtract from wallet
             amount_to_reduce = float(message.text)
 
-            # Round amounts for comparison (avoid floating-point errors)
-            current_balance = round(user.top_up_amount, 2)
-            amount_to_reduce = round(amount_to_reduce, 2)
-
-            # Check if user has enough balance
-            if current_balance < amount_to_reduce:
+            # Subtract (fails if the balance is lower)
+            try:
+                await WalletRepository.debit(user.id, amount_to_reduce, WalletEntryType.ADMIN_ADJUSTMENT, session)
+            except InsufficientWalletBalance:
                 return Localizator.get_text(BotEntity.ADMIN, "credit_management_insufficient_balance").format(
-                    current_balance=current_balance,
-                    amount=amount_to_reduce,
+                    current_balance=await WalletRepository.get_balance(user.id, session),
+                    amount=round(amount_to_reduce, 2),
                     telegram_id=user.telegram_id,
                     currency_text=Localizator.get_currency_text())
-
-            # Subtract and round to 2 decimals
-            user.top_up_amount = round(max(0.0, user.top_up_amount - amount_to_reduce), 2)
-            await UserRepository.update(user, session)
             await session_commit(session)
             return Localizator.get_text(BotEntity.ADMIN, "credit_management_reduced_success").format(
                 amount=message.text,
@@ -488,14 +484,23 @@ class AdminService:
         kb_builder.row(unpacked_cb.get_back_button(0))
         return Localizator.get_text(BotEntity.ADMIN, "statistics_timedelta"), kb_builder
 
+    @staticmethod
+    def _add_chart_buttons(kb_builder: InlineKeyboardBuilder, unpacked_cb: StatisticsCallback,
+                           charts: list[StatisticsChart]):
+        kb_builder.row(*[types.InlineKeyboardButton(
+            text=Localizator.get_text(BotEntity.ADMIN, f"{chart.name.lower()}_chart"),
+            callback_data=StatisticsCallback.create(4, unpacked_cb.statistics_entity, unpacked_cb.timedelta,
+                                                    chart=chart).pack()
+        ) for chart in charts])
+
     @staticmethod
     async def get_statistics(callback: CallbackQuery, session: AsyncSession | Session):
         unpacked_cb = StatisticsCallback.unpack(callback.data)
         kb_builder = InlineKeyboardBuilder()
         match unpacked_cb.statistics_entity:
             case StatisticsEntity.USERS:
-                users, users_count = await UserRepository.get_by_timedelta(unpacked_cb.timedelta, unpacked_cb.page,
-                                                                           session)
+                summary = await StatisticsRepository.get_summary(unpacked_cb.timedelta, session)
+                users = await UserRepository.get_by_timedelta(unpacked_cb.timedelta, unpacked_cb.page, session)
                 [kb_builder.button(text=user.telegram_username, url=f't.me/{user.telegram_username}') for user in
                  users
                  if user.telegram_username]
@@ -505,57 +510,33 @@ class AdminService:
                     unpacked_cb,
                     UserRepository.get_max_page_by_timedelta(unpacked_cb.timedelta, session),
                     None)
+                AdminService._add_chart_buttons(kb_builder, unpacked_cb, [StatisticsChart.NEW_USERS])
                 kb_builder.row(AdminConstants.back_to_main_button, unpacked_cb.get_back_button())
                 return Localizator.get_text(BotEntity.ADMIN, "new_users_msg").format(
-                    users_count=users_count,
+                    users_count=summary.new_users,
                     timedelta=unpacked_cb.timedelta.value
                 ), kb_builder
             case StatisticsEntity.BUYS:
-                buys = await BuyRepository.get_by_timedelta(unpacked_cb.timedelta, session)
-                total_profit = 0.0
-                items_sold = 0
-                for buy in buys:
-                    total_profit += buy.total_price
-                    items_sold += buy.quantity
+                summary = await StatisticsRepository.get_summary(unpacked_cb.timedelta, session)
+                AdminService._add_chart_buttons(kb_builder, unpacked_cb,
+                                                [StatisticsChart.REVENUE, StatisticsChart.SUBCATEGORY_ITEMS])
                 kb_builder.row(AdminConstants.back_to_main_button, unpacked_cb.get_back_button())
                 return Localizator.get_text(BotEntity.ADMIN, "sales_statistics").format(
                     timedelta=unpacked_cb.timedelta,
-                    total_profit=total_profit, items_sold=items_sold,
-                    buys_count=len(buys), currency_sym=Localizator.get_currency_symbol()), kb_builder
+                    total_profit=summary.revenue, items_sold=summary.items_sold,
+                    buys_count=summary.sales_count, currency_sym=Localizator.get_currency_symbol()), kb_builder
             case StatisticsEntity.DEPOSITS:
-                deposits = await DepositRepository.get_by_timedelta(unpacked_cb.timedelta, session)
-                fiat_amount = 0.0
-                btc_amount = 0.0
-                ltc_amount = 0.0
-                sol_amount = 0.0
-                eth_amount = 0.0
-                bnb_amount = 0.0
-                for deposit in deposits:
-                    match deposit.network:
-                        case "BTC":
-                            btc_amount += deposit.amount / pow(10, deposit.network.get_divider())
-                        case "LTC":
-                            ltc_amount += deposit.amount / pow(10, deposit.network.get_divider())
-                        case "SOL":
-                            sol_amount += deposit.amount / pow(10, deposit.network.get_divider())
-                        case "ETH":
-                            eth_amount += deposit.amount / pow(10, deposit.network.get_divider())
-                        case "BNB":
-                            bnb_amount += deposit.amount / pow(10, deposit.network.get_divider())
-                prices = await CryptoApiWrapper.get_crypto_prices()
-                btc_price = prices[Cryptocurrency.BTC.get_coingecko_name()][config.CURRENCY.value.lower()]
-                ltc_price = prices[Cryptocurrency.LTC.get_coingecko_name()][config.CURRENCY.value.lower()]
-                sol_price = prices[Cryptocurrency.SOL.get_coingecko_name()][config.CURRENCY.value.lower()]
-                eth_price = prices[Cryptocurrency.ETH.get_coingecko_name()][config.CURRENCY.value.lower()]
-                bnb_price = prices[Cryptocurrency.BNB.get_coingecko_name()][config.CURRENCY.value.lower()]
-                fiat_amount += ((btc_amount * btc_price) + (ltc_amount * ltc_price) + (sol_amount * sol_price)
-                                + (eth_amount * eth_price) + (bnb_amount * bnb_price))
+                summary = await StatisticsRepository.get_summary(unpacked_cb.timedelta, session)
+                amounts = summary.deposit_amounts
+                prices = await PriceOracle.get_prices(list(amounts)) if amounts else {}
+                fiat_amount = sum(amount * prices[network] for network, amount in amounts.items())
+                AdminService._add_chart_buttons(kb_builder, unpacked_cb, [StatisticsChart.DEPOSITS])
                 kb_builder.row(AdminConstants.back_to_main_button, unpacked_cb.get_back_button())
                 return Localizator.get_text(BotEntity.ADMIN, "deposits_statistics_msg").format(
-                    timedelta=unpacked_cb.timedelta, deposits_count=len(deposits),
-                    btc_amount=btc_amount, ltc_amount=ltc_amount,
-                    sol_amount=sol_amount, eth_amount=eth_amount,
-                    bnb_amount=bnb_amount,
+                    timedelta=unpacked_cb.timedelta, deposits_count=summary.deposits_count,
+                    btc_amount=amounts.get(Cryptocurrency.BTC, 0.0), ltc_amount=amounts.get(Cryptocurrency.LTC, 0.0),
+                    sol_amount=amounts.get(Cryptocurrency.SOL, 0.0), eth_amount=amounts.get(Cryptocurrency.ETH, 0.0),
+                    bnb_amount=amounts.get(Cryptocurrency.BNB, 0.0),
                     fiat_amount=fiat_amount, currency_text=Localizator.get_currency_text()), kb_builder
 
     @staticmethod
@@ -607,8 +588,7 @@ class AdminService:
         state_data = await state.get_data()
         await state.update_data(to_address=to_address)
         cryptocurrency = Cryptocurrency(state_data['cryptocurrency'])
-        prices = await CryptoApiWrapper.get_crypto_prices()
-        price = prices[cryptocurrency.get_coingecko_name()][config.CURRENCY.value.lower()]
+        price = await PriceOracle.get_price(cryptocurrency)
 
         withdraw_dto = await CryptoApiWrapper.withdrawal(
             cryptocurrency,
@@ -6,10 +6,14 @@ from sqlalchemy.orm import Session
 from callbacks import MyProfileCallback
 from db import session_commit
 from enums.bot_entity import BotEntity
+from enums.wallet_entry_type import WalletEntryType
 from models.buy import BuyDTO
 from repositories.buy import BuyRepository
 from repositories.item import ItemRepository
+from repositories.item_payload import ItemPayloadRepository
+from repositories.statistics import StatisticsRepository
 from repositories.user import UserRepository
+from repositories.wallet import WalletRepository
 from services.message import MessageService
 from services.notification import NotificationService
 from utils.localizator import Localizator
@@ -19,14 +23,18 @@ class BuyService:
 
     @staticmethod
     async def refund(buy_dto: BuyDTO, session: AsyncSession | Session) -> str:
+        if not await BuyRepository.mark_refunded(buy_dto.id, session):
+            return Localizator.get_text(BotEntity.ADMIN, "already_refunded")
         refund_data = await BuyRepository.get_refund_data_single(buy_dto.id, session)
         buy = await BuyRepository.get_by_id(buy_dto.id, session)
-        buy.is_refunded = True
-        await BuyRepository.update(buy, session)
+        # A refunded buy no longer counts in the sales statistics of its day
+        await StatisticsRepository.add_sales(buy.buy_datetime.date(), -1, -buy.total_price, -buy.quantity, session)
+        await StatisticsRepository.add_subcategory_sales(buy.id, -1, session)
         user = await UserRepository.get_by_tgid(refund_data.telegram_id, session)
-        # Refund: Add money back to wallet (rounded to 2 decimals)
-        user.top_up_amount = round(user.top_up_amount + refund_data.total_price, 2)
-        await UserRepository.update(user, session)
+        # Refund: Add money back to wallet
+        user.top_up_amount = await WalletRepository.credit(user.id, refund_data.total_price,
+                                                           WalletEntryType.PURCHASE_REFUND, session,
+                                                           reference=f"buy:{buy_dto.id}")
         await session_commit(session)
         await NotificationService.refund(refund_data)
         if refund_data.telegram_username:
@@ -127,7 +135,8 @@ class BuyService:
                 total=order.total_price
             )
         else:
-            # Fallback to old message format if no order found
+            # Fallback to old message format if no order found (shows private_data)
+            items = await ItemPayloadRepository.fill_private_data(items, session)
             msg = MessageService.create_message_with_bought_items(items)
 
         kb_builder = InlineKeyboardBuilder()
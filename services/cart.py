@@ -9,6 +9,7 @@ from db import session_commit
 from enums.bot_entity import BotEntity
 from enums.cryptocurrency import Cryptocurrency
 from enums.order_status import OrderStatus
+from enums.wallet_entry_type import WalletEntryType
 from handlers.common.common import add_pagination_buttons
 from models.buy import BuyDTO
 from models.buyItem import BuyItemDTO
@@ -23,6 +24,7 @@ from repositories.item import ItemRepository
 from repositories.order import OrderRepository
 from repositories.subcategory import SubcategoryRepository
 from repositories.user import UserRepository
+from repositories.wallet import WalletRepository, InsufficientWalletBalance
 from services.message import MessageService
 from services.notification import NotificationService
 from services.order import OrderService
@@ -520,6 +522,13 @@ class CartService:
         is_enough_money = round(user.top_up_amount, 2) >= round(cart_total, 2)
         kb_builder = InlineKeyboardBuilder()
         if unpacked_cb.confirmation and len(out_of_stock) == 0 and is_enough_money:
+            # Deduct from wallet first (atomic; a concurrent purchase may have used the balance meanwhile)
+            try:
+                user.top_up_amount = await WalletRepository.debit(user.id, cart_total, WalletEntryType.ORDER_PAYMENT,
+                                                                  session)
+            except InsufficientWalletBalance:
+                kb_builder.row(unpacked_cb.get_back_button(0))
+                return Localizator.get_text(BotEntity.USER, "insufficient_funds"), kb_builder
             sold_items = []
             msg = ""
             for cart_item in cart_items:
@@ -537,9 +546,6 @@ class CartService:
                 await CartItemRepository.remove_from_cart(cart_item.id, session)
                 sold_items.append(cart_item)
                 msg += MessageService.create_message_with_bought_items(purchased_items)
-            # Deduct from wallet (rounded to 2 decimals)
-            user.top_up_amount = round(user.top_up_amount - cart_total, 2)
-            await UserRepository.update(user, session)
             await session_commit(session)
             await NotificationService.new_buy(sold_items, user, session)
             return msg, kb_builder
@@ -0,0 +1,31 @@
+from crypto_api.http_client import HttpClient
+from db import get_db_session
+from jobs.payment_event_worker import PaymentEventWorker
+from jobs.scheduler import Scheduler
+from repositories.order import OrderRepository
+from repositories.payment_event import PaymentEventRepository
+from utils.metrics import (MetricsRegistry, CRYPTO_API_ERRORS, CRYPTO_API_RETRIES, QUEUE_DEPTH,
+                           SCHEDULER_LEADER)
+
+
+class MetricsService:
+    """
+    The /metrics page. Event metrics are recorded where they happen (middlewares, HttpClient,
+    Scheduler); the values below are state, read once per scrape.
+    """
+
+    @staticmethod
+    async def render(scheduler: Scheduler, payment_event_worker: PaymentEventWorker) -> str:
+        SCHEDULER_LEADER.set(int(scheduler.is_leader))
+
+        QUEUE_DEPTH.set(payment_event_worker.in_flight, "payment_events_in_flight")
+        async with get_db_session() as session:
+            QUEUE_DEPTH.set(await PaymentEventRepository.get_queue_length(session), "payment_events")
+            QUEUE_DEPTH.set(await PaymentEventRepository.get_dead_letter_count(session), "payment_events_dead_letter")
+            QUEUE_DEPTH.set(await OrderRepository.get_shipping_queue_length(session), "shipping")
+
+        for endpoint, metrics in HttpClient.get_metrics().items():
+            CRYPTO_API_ERRORS.set_total(metrics.errors, endpoint)
+            CRYPTO_API_RETRIES.set_total(metrics.retries, endpoint)
+
+        return MetricsRegistry.render()
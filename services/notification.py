@@ -1,4 +1,6 @@
 import logging
+from datetime import datetime
+
 from aiogram import types, Bot
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
@@ -9,9 +11,11 @@ from sqlalchemy.orm import Session
 
 from config import ADMIN_ID_LIST, TOKEN
 from enums.bot_entity import BotEntity
+from middleware.bot_api_metrics import BotApiMetricsMiddleware
 from models.buy import RefundDTO
 from models.cartItem import CartItemDTO
 from models.item import ItemDTO
+from models.order import ShippingQueueEntryDTO
 from models.payment import ProcessingPaymentDTO, DepositRecordDTO
 from models.user import UserDTO
 from repositories.category import CategoryRepository
@@ -22,6 +26,12 @@ from utils.localizator import Localizator
 
 class NotificationService:
 
+    @staticmethod
+    def _create_bot() -> Bot:
+        bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+        bot.session.middleware(BotApiMetricsMiddleware())
+        return bot
+
     @staticmethod
     async def make_user_button(username: str | None) -> InlineKeyboardMarkup:
         user_button_builder = InlineKeyboardBuilder()
@@ -32,7 +42,7 @@ class NotificationService:
 
     @staticmethod
     async def send_to_admins(message: str | BufferedInputFile, reply_markup: types.InlineKeyboardMarkup | None):
-        bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+        bot = NotificationService._create_bot()
         for admin_id in ADMIN_ID_LIST:
             try:
                 if isinstance(message, str):
@@ -45,7 +55,7 @@ class NotificationService:
 
     @staticmethod
     async def send_to_user(message: str, telegram_id: int):
-        bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+        bot = NotificationService._create_bot()
         try:
             await bot.send_message(telegram_id, message)
         except Exception as e:
@@ -55,7 +65,7 @@ class NotificationService:
 
     @staticmethod
     async def edit_message(message: str, source_message_id: int, chat_id: int):
-        bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+        bot = NotificationService._create_bot()
         try:
             await bot.edit_message_text(text=message, chat_id=chat_id, message_id=source_message_id)
         except Exception as e:
@@ -157,7 +167,7 @@ class NotificationService:
             subcategory=refund_data.subcategory_name,
             currency_sym=Localizator.get_currency_symbol())
         try:
-            bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+            bot = NotificationService._create_bot()
             await bot.send_message(refund_data.telegram_id, text=user_notification)
             await bot.session.close()
         except Exception as _:
@@ -478,6 +488,28 @@ class NotificationService:
         )
         await NotificationService.send_to_user(msg, user.telegram_id)
 
+    @staticmethod
+    async def orders_shipped(entries: list[ShippingQueueEntryDTO]) -> int:
+        """
+        Shipping notifications for many orders over one bot session (bulk "mark as shipped").
+        Returns the number of delivered messages.
+        """
+        bot = NotificationService._create_bot()
+        sent = 0
+        try:
+            for entry in entries:
+                msg = Localizator.get_text(BotEntity.USER, "order_shipped_notification").format(
+                    invoice_number=entry.invoice_number or f"ORDER-{datetime.now().year}-{entry.order_id:06d}"
+                )
+                try:
+                    await bot.send_message(entry.telegram_id, msg)
+                    sent += 1
+                except Exception as e:
+                    logging.error(e)
+        finally:
+            await bot.session.close()
+        return sent
+
     @staticmethod
     async def order_awaiting_shipment(user_id: int, invoice_number: str, session: AsyncSession | Session):
         """
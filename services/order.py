@@ -13,6 +13,7 @@ from enums.bot_entity import BotEntity
 from enums.order_cancel_reason import OrderCancelReason
 from enums.order_status import OrderStatus
 from enums.strike_type import StrikeType
+from enums.wallet_entry_type import WalletEntryType
 from models.cart import CartDTO
 from models.cartItem import CartItemDTO
 from models.item import ItemDTO
@@ -21,6 +22,7 @@ from repositories.cartItem import CartItemRepository
 from repositories.item import ItemRepository
 from repositories.order import OrderRepository
 from repositories.user import UserRepository
+from repositories.wallet import WalletRepository
 from utils.localizator import Localizator
 
 
@@ -157,6 +159,7 @@ class OrderService:
         from models.buyItem import BuyItemDTO
         from repositories.buy import BuyRepository
         from repositories.buyItem import BuyItemRepository
+        from repositories.item_payload import ItemPayloadRepository
         from services.message import MessageService
         from services.notification import NotificationService
 
@@ -214,6 +217,8 @@ class OrderService:
         user = await UserRepository.get_by_id(order.user_id, session)
 
         # Create message with bought items (same format as old system)
+        # private_data is stored separately (item_payloads) and only loaded here, for delivery
+        items = await ItemPayloadRepository.fill_private_data(items, session)
         items_message = MessageService.create_message_with_bought_items(items)
 
         # Send items to user via DM (user receives their purchased items)
@@ -372,8 +377,9 @@ class OrderService:
                     penalty_percent
                 )
 
-                user.top_up_amount = round(user.top_up_amount + refund_amount, 2)
-                await UserRepository.update(user, session)
+                user.top_up_amount = await WalletRepository.credit(user.id, refund_amount,
+                                                                   WalletEntryType.ORDER_REFUND, session,
+                                                                   reference=f"order:{order_id}")
 
                 logging.info(f"💰 Refunded {refund_amount} EUR to user {user.id} wallet ({reason.value} cancellation, {penalty_percent}% penalty applied)")
 
@@ -393,8 +399,9 @@ class OrderService:
                 )
             else:
                 # Full refund for: ADMIN or USER within grace period (rounded to 2 decimals)
-                user.top_up_amount = round(user.top_up_amount + order.wallet_used, 2)
-                await UserRepository.update(user, session)
+                user.top_up_amount = await WalletRepository.credit(user.id, order.wallet_used,
+                                                                   WalletEntryType.ORDER_REFUND, session,
+                                                                   reference=f"order:{order_id}")
 
                 logging.info(f"💰 Refunded {order.wallet_used} EUR to user {user.id} wallet ({reason.value} cancellation, no penalty)")
 
@@ -416,9 +423,10 @@ class OrderService:
             base_amount = min(order.total_price, user.top_up_amount)
             penalty_amount, _ = PaymentValidator.calculate_penalty(base_amount, penalty_percent)
 
-            # Deduct reservation fee from wallet
-            user.top_up_amount = round(user.top_up_amount - penalty_amount, 2)
-            await UserRepository.update(user, session)
+            # Deduct reservation fee from wallet (at most the balance at the time of the update)
+            penalty_amount = await WalletRepository.debit_up_to(user.id, penalty_amount,
+                                                                WalletEntryType.RESERVATION_FEE, session,
+                                                                reference=f"order:{order_id}")
 
             logging.info(f"💸 Charged {penalty_amount} EUR reservation fee from user {user.id} wallet ({reason.value} cancellation, no wallet used but penalty applies)")
 
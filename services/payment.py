@@ -10,11 +10,13 @@ from enums.bot_entity import BotEntity
 from enums.cryptocurrency import Cryptocurrency
 from enums.order_status import OrderStatus
 from enums.payment import PaymentType
+from enums.wallet_entry_type import WalletEntryType
 from models.invoice import InvoiceDTO
 from models.payment import ProcessingPaymentDTO
 from repositories.order import OrderRepository
 from repositories.payment import PaymentRepository
 from repositories.user import UserRepository
+from repositories.wallet import WalletRepository
 from services.invoice import InvoiceService
 from utils.localizator import Localizator
 
@@ -112,11 +114,12 @@ class PaymentService:
 
         logging.info(f"💵 Wallet breakdown: Used={wallet_used:.2f} EUR | Remaining={remaining_amount:.2f} EUR")
 
-        # 4. Deduct wallet balance if any used
+        # 4. Deduct wallet balance if any used (atomic: at most the balance at the time of the update)
         if wallet_used > 0:
-            user.top_up_amount = round(user.top_up_amount - wallet_used, 2)
-            await UserRepository.update(user, session)
-            logging.info(f"✅ Deducted {wallet_used:.2f} EUR from wallet (new balance: {user.top_up_amount:.2f} EUR)")
+            wallet_used = await WalletRepository.debit_up_to(user.id, wallet_used, WalletEntryType.ORDER_PAYMENT,
+                                                             session, reference=f"order:{order_id}")
+            remaining_amount = round(order_total - wallet_used, 2)
+            logging.info(f"✅ Deducted {wallet_used:.2f} EUR from wallet")
 
         # 5. Update order with wallet usage
         order.wallet_used = wallet_used
@@ -0,0 +1,107 @@
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import config
+from crypto_api.CryptoApiWrapper import CryptoApiWrapper
+from enums.order_status import OrderStatus
+from models.payment import ProcessingPaymentDTO
+from repositories.invoice import InvoiceRepository
+from repositories.payment_event import PaymentEventRepository
+from repositories.processed_payment_event import ProcessedPaymentEventRepository
+from services.payment_validator import PaymentValidator
+
+
+class PaymentReconciliationReportDTO(BaseModel):
+    invoices: int = 0  # Open invoices that were looked up
+    pages: int = 0  # Provider listing pages fetched
+    paid: int = 0  # Of those invoices: paid according to the provider
+    missed: int = 0  # Paid, but never processed or queued - event queued now
+    results: dict[str, int] = {}  # Validation result of the missed payments
+
+
+class PaymentReconciliationService:
+    """
+    Compares KryptoExpress's payment listing with our open invoices.
+
+    A payment the provider reports as paid, whose webhook was never processed (or never arrived),
+    is queued as a payment event - the same event the webhook endpoint would have queued, so
+    PaymentEventWorker handles it exactly like a late webhook delivery.
+    """
+
+    # Orders a missed webhook can leave behind (TIMEOUT: the payment then is a late payment)
+    RECONCILED_STATUSES = [OrderStatus.PENDING_PAYMENT, OrderStatus.PENDING_PAYMENT_PARTIAL, OrderStatus.TIMEOUT]
+
+    @staticmethod
+    async def fetch_provider_payments(payment_ids: set[int], page_size: int,
+                                      max_pages: int) -> tuple[dict[int, ProcessingPaymentDTO], int]:
+        """
+        Pages through the provider listing until all `payment_ids` were seen, the listing ends
+        or `max_pages` were fetched. Returns (found payments by id, fetched pages).
+        """
+        found = {}
+        pages = 0
+        while pages < max_pages and len(found) < len(payment_ids):
+            payments = await CryptoApiWrapper.get_payments(pages, page_size)
+            pages += 1
+            found.update({payment.id: payment for payment in payments if payment.id in payment_ids})
+            if len(payments) < page_size:
+                break
+        return found, pages
+
+    @staticmethod
+    async def reconcile(session: AsyncSession | Session, page_size: int | None = None,
+                        max_pages: int | None = None) -> PaymentReconciliationReportDTO:
+        """
+        Queues payment events for paid invoices whose webhook is missing.
+        The caller commits (and notifies PaymentEventWorker).
+        """
+        page_size = page_size or config.PAYMENT_RECONCILIATION_PAGE_SIZE
+        max_pages = max_pages or config.PAYMENT_RECONCILIATION_MAX_PAGES
+        now = datetime.now()
+        expires_after = now - timedelta(hours=config.PAYMENT_RECONCILIATION_WINDOW_HOURS)
+
+        invoices = await InvoiceRepository.get_reconcilable(PaymentReconciliationService.RECONCILED_STATUSES,
+                                                            expires_after, session)
+        report = PaymentReconciliationReportDTO(invoices=len(invoices))
+        if not invoices:
+            return report
+
+        provider_payments, report.pages = await PaymentReconciliationService.fetch_provider_payments(
+            set(invoices), page_size, max_pages)
+        paid = [payment for payment in provider_payments.values() if payment.isPaid is True]
+        report.paid = len(paid)
+        if not paid:
+            return report
+
+        # Already processed or waiting in the queue (webhook arrived) - two lookups for the whole batch
+        paid_ids = {payment.id for payment in paid}
+        processed = await ProcessedPaymentEventRepository.get_processed_keys(paid_ids, session)
+        queued = await PaymentEventRepository.get_queued_payment_ids(paid_ids, session)
+        missed = [payment for payment in paid
+                  if (payment.id, True, payment.hash or '') not in processed and payment.id not in queued]
+        report.missed = len(missed)
+        if not missed:
+            return report
+
+        missed_invoices = [invoices[payment.id] for payment in missed]
+        results = PaymentValidator.validate_payments(
+            paid=[payment.cryptoAmount for payment in missed],
+            required=[invoice.payment_amount_crypto for invoice, _ in missed_invoices],
+            currency_paid=[payment.cryptoCurrency for payment in missed],
+            currency_required=[invoice.payment_crypto_currency for invoice, _ in missed_invoices],
+            deadlines=[expires_at for _, expires_at in missed_invoices],
+            now=now
+        )
+        report.results = dict(Counter(result.value for result in results))
+        for payment, (invoice, _), result in zip(missed, missed_invoices, results):
+            logging.warning(f"🔎 Missed webhook: invoice {invoice.invoice_number} (Payment ID: {payment.id}) "
+                            f"is paid at KryptoExpress ({result.value}) - queueing payment event")
+
+        await PaymentEventRepository.create_many(
+            [(payment.model_dump_json(exclude_none=True), payment.id) for payment in missed], session)
+        return report
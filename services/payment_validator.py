@@ -12,6 +12,7 @@ Implements the payment validation rules from Terms & Conditions:
 """
 
 from datetime import datetime
+from decimal import Decimal
 from typing import Tuple
 
 import config
@@ -73,35 +74,91 @@ class PaymentValidator:
             PaymentValidationResult.OVERPAYMENT
         """
 
+        return PaymentValidator._classify(
+            paid, required, currency_paid, currency_required, deadline,
+            PaymentValidator._tolerance_multiplier(tolerance_percent), datetime.now()
+        )
+
+    @staticmethod
+    def validate_payments(
+        paid: list[float],
+        required: list[float],
+        currency_paid: list[Cryptocurrency],
+        currency_required: list[Cryptocurrency],
+        deadlines: list[datetime],
+        tolerance_percent: float = None,
+        now: datetime = None
+    ) -> list[PaymentValidationResult]:
+        """
+        Batch version of validate_payment: element i of each list describes payment i.
+        Same rules as validate_payment; the deadline is checked against one `now` for the whole batch.
+
+        Args:
+            paid: Amounts actually paid (crypto)
+            required: Amounts that should be paid (crypto)
+            currency_paid: Cryptocurrencies used for payment
+            currency_required: Cryptocurrencies expected
+            deadlines: Order expiration deadlines
+            tolerance_percent: Overpayment tolerance % (default from config)
+            now: Reference time for the deadlines (default: datetime.now())
+
+        Returns:
+            One PaymentValidationResult per payment, in input order
+        """
+        if not len(paid) == len(required) == len(currency_paid) == len(currency_required) == len(deadlines):
+            raise ValueError("All payment columns must have the same length")
+
+        tolerance_multiplier = PaymentValidator._tolerance_multiplier(tolerance_percent)
+        now = now or datetime.now()
+        return [PaymentValidator._classify(*payment, tolerance_multiplier, now)
+                for payment in zip(paid, required, currency_paid, currency_required, deadlines)]
+
+    @staticmethod
+    def _tolerance_multiplier(tolerance_percent: float | None) -> Decimal:
         # Use config default if tolerance not specified
         if tolerance_percent is None:
             tolerance_percent = config.PAYMENT_TOLERANCE_OVERPAYMENT_PERCENT
+        return 1 + Decimal(str(tolerance_percent)) / 100
 
+    @staticmethod
+    def _classify(
+        paid: float,
+        required: float,
+        currency_paid: Cryptocurrency,
+        currency_required: Cryptocurrency,
+        deadline: datetime,
+        tolerance_multiplier: Decimal,
+        now: datetime
+    ) -> PaymentValidationResult:
+        """
+        The validation rules. Amounts are compared as Decimals of their string form (the amount as the
+        provider sent it), so the tolerance threshold is exact - required * 1.001 in float can land
+        just below the true threshold.
+        """
         # 1. Check currency mismatch
         if currency_paid != currency_required:
             return PaymentValidationResult.CURRENCY_MISMATCH
 
         # 2. Check if payment is late
-        if datetime.now() > deadline:
+        if now > deadline:
             return PaymentValidationResult.LATE_PAYMENT
 
+        paid_decimal = Decimal(str(paid))
+        required_decimal = Decimal(str(required))
+
         # 3. Check for underpayment (ZERO tolerance!)
-        if paid < required:
+        if paid_decimal < required_decimal:
             return PaymentValidationResult.UNDERPAYMENT
 
-        # 4. Calculate overpayment tolerance threshold
-        tolerance_multiplier = 1 + (tolerance_percent / 100)
-        tolerance_threshold = required * tolerance_multiplier
-
-        # 5. Check for exact match
-        if paid == required:
+        # 4. Check for exact match
+        if paid_decimal == required_decimal:
             return PaymentValidationResult.EXACT_MATCH
 
-        # 6. Check for minor overpayment (within tolerance)
-        if paid <= tolerance_threshold:
+        # 5. Check for minor overpayment (within tolerance)
+        if paid_decimal <= required_decimal * tolerance_multiplier:
             return PaymentValidationResult.MINOR_OVERPAYMENT
 
-        # 7. Significant overpayment (above tolerance)
+        # 6. Significant overpayment (above tolerance)
         return PaymentValidationResult.OVERPAYMENT
 
     @staticmethod
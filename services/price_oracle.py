@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+
+import config
+from crypto_api.CryptoApiWrapper import CryptoApiWrapper
+from enums.cryptocurrency import Cryptocurrency
+
+
+async def _fetch_coingecko(cryptocurrencies: list[Cryptocurrency]) -> dict[Cryptocurrency, float]:
+    # One request for all coins
+    prices = await CryptoApiWrapper.get_crypto_prices()
+    currency = config.CURRENCY.value.lower()
+    return {cryptocurrency: float(prices[cryptocurrency.get_coingecko_name()][currency])
+            for cryptocurrency in cryptocurrencies
+            if currency in prices.get(cryptocurrency.get_coingecko_name(), {})}
+
+
+async def _fetch_kraken(cryptocurrencies: list[Cryptocurrency]) -> dict[Cryptocurrency, float]:
+    # One ticker request per pair, in parallel over the pooled connection
+    results = await asyncio.gather(*(CryptoApiWrapper.get_kraken_price(cryptocurrency)
+                                     for cryptocurrency in cryptocurrencies), return_exceptions=True)
+    prices = {cryptocurrency: price for cryptocurrency, price in zip(cryptocurrencies, results)
+              if not isinstance(price, BaseException)}
+    if not prices and results:
+        raise results[0]
+    return prices
+
+
+class PriceOracle:
+    """
+    In-memory exchange rates (crypto -> config.CURRENCY) for all supported cryptocurrencies.
+
+    - Prices younger than PRICE_ORACLE_TTL_SECONDS are served from memory
+    - Older prices are still served (no waiting) while a refresh runs in the background,
+      up to PRICE_ORACLE_MAX_STALENESS_SECONDS; beyond that the caller waits for the refresh
+    - Concurrent refreshes collapse into one upstream fetch (single-flight)
+    - Coins the primary source (PRICE_ORACLE_SOURCE) can't deliver are taken from
+      PRICE_ORACLE_FALLBACK_SOURCE
+
+    PriceRefreshJob refreshes more often than the TTL, so reads normally never hit the network.
+    """
+
+    SOURCES = {
+        "coingecko": _fetch_coingecko,
+        "kraken": _fetch_kraken,
+    }
+
+    # cryptocurrency -> (price, time.monotonic() of the fetch)
+    _prices: dict[Cryptocurrency, tuple[float, float]] = {}
+    _refresh_task: asyncio.Task | None = None
+
+    @staticmethod
+    def tracked() -> list[Cryptocurrency]:
+        return [cryptocurrency for cryptocurrency in Cryptocurrency
+                if cryptocurrency != Cryptocurrency.PENDING_SELECTION]
+
+    @staticmethod
+    def reset():
+        PriceOracle._prices = {}
+        PriceOracle._refresh_task = None
+
+    @staticmethod
+    async def get_price(cryptocurrency: Cryptocurrency) -> float:
+        return (await PriceOracle.get_prices([cryptocurrency]))[cryptocurrency]
+
+    @staticmethod
+    async def get_prices(cryptocurrencies: list[Cryptocurrency] | None = None) -> dict[Cryptocurrency, float]:
+        """
+        Returns the prices of the given (default: all) cryptocurrencies.
+
+        Raises LookupError if no price within the staleness bound is available,
+        or the source error if the blocking refresh failed completely.
+        """
+        cryptocurrencies = cryptocurrencies or PriceOracle.tracked()
+        ages = [PriceOracle._age(cryptocurrency) for cryptocurrency in cryptocurrencies]
+        if max(ages) > config.PRICE_ORACLE_MAX_STALENESS_SECONDS:
+            await PriceOracle.refresh()
+        elif max(ages) > config.PRICE_ORACLE_TTL_SECONDS:
+            PriceOracle._start_refresh()
+
+        prices = {}
+        for cryptocurrency in cryptocurrencies:
+            if PriceOracle._age(cryptocurrency) > config.PRICE_ORACLE_MAX_STALENESS_SECONDS:
+                raise LookupError(f"No current {config.CURRENCY.value} price for {cryptocurrency.value}")
+            prices[cryptocurrency] = PriceOracle._prices[cryptocurrency][0]
+        return prices
+
+    @staticmethod
+    async def refresh():
+        """Fetches all prices; joins a refresh that is already running instead of starting another."""
+        await asyncio.shield(PriceOracle._start_refresh())
+
+    @staticmethod
+    def _age(cryptocurrency: Cryptocurrency) -> float:
+        entry = PriceOracle._prices.get(cryptocurrency)
+        return time.monotonic() - entry[1] if entry else float("inf")
+
+    @staticmethod
+    def _start_refresh() -> asyncio.Task:
+        task = PriceOracle._refresh_task
+        if task is None or task.done():
+            task = asyncio.create_task(PriceOracle._fetch_and_store())
+            task.add_done_callback(PriceOracle._on_refresh_done)
+            PriceOracle._refresh_task = task
+        return task
+
+    @staticmethod
+    def _on_refresh_done(task: asyncio.Task):
+        # Background refreshes have no awaiting caller - log their failure here
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning(f"Price refresh failed: {type(task.exception()).__name__}: {task.exception()}")
+
+    @staticmethod
+    async def _fetch_and_store():
+        cryptocurrencies = PriceOracle.tracked()
+        prices: dict[Cryptocurrency, float] = {}
+        errors = []
+        for source in filter(None, [config.PRICE_ORACLE_SOURCE, config.PRICE_ORACLE_FALLBACK_SOURCE]):
+            missing = [cryptocurrency for cryptocurrency in cryptocurrencies if cryptocurrency not in prices]
+            if not missing:
+                break
+            try:
+                prices.update(await PriceOracle.SOURCES[source](missing))
+            except Exception as e:
+                logging.warning(f"Price source {source} failed: {type(e).__name__}: {e}")
+                errors.append(e)
+
+        if not prices:
+            raise errors[-1] if errors else LookupError("No price source configured")
+
+        fetched_at = time.monotonic()
+        for cryptocurrency, price in prices.items():
+            PriceOracle._prices[cryptocurrency] = (price, fetched_at)
+        missing = [cryptocurrency.value for cryptocurrency in cryptocurrencies if cryptocurrency not in prices]
+        if missing:
+            logging.warning(f"No price source delivered {', '.join(missing)}")
@@ -0,0 +1,103 @@
+import asyncio
+import contextvars
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import config
+from callbacks import StatisticsChart, StatisticsTimeDelta
+from db import get_db_session
+from enums.bot_entity import BotEntity
+from repositories.statistics import StatisticsRepository
+from services.price_oracle import PriceOracle
+from utils.charts import render_bar_chart
+from utils.localizator import Localizator
+
+MAX_SUBCATEGORIES = 15
+MAX_LABEL_LENGTH = 24
+
+
+class StatisticsChartService:
+    """
+    PNG charts of the admin statistics, drawn from the daily rollups.
+
+    - Rendering (Pillow, CPU-bound) runs in a process pool, never on the event loop
+    - Charts are cached per (chart, window, day): repeated and concurrent views share one
+      query and one render; a failed chart is retried by the next view
+    - The shared render belongs to no viewer: it reads in its own session, and its statements
+      don't count towards the query budget of the update that started it
+    - Charts of earlier days are dropped once the day changes
+    """
+
+    _pool: ProcessPoolExecutor | None = None
+    _charts: dict[tuple[StatisticsChart, StatisticsTimeDelta, date], asyncio.Task] = {}
+
+    @staticmethod
+    def _get_pool() -> ProcessPoolExecutor:
+        if StatisticsChartService._pool is None:
+            StatisticsChartService._pool = ProcessPoolExecutor(max_workers=config.STATISTICS_CHART_WORKERS)
+        return StatisticsChartService._pool
+
+    @staticmethod
+    async def warm_up():
+        """Starts the worker processes at startup, while the bot process is still small."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(StatisticsChartService._get_pool(), render_bar_chart, "", [], [])
+
+    @staticmethod
+    def shutdown():
+        if StatisticsChartService._pool is not None:
+            StatisticsChartService._pool.shutdown(wait=False, cancel_futures=True)
+            StatisticsChartService._pool = None
+        StatisticsChartService._charts = {}
+
+    @staticmethod
+    async def get_chart(chart: StatisticsChart, statistics_timedelta: StatisticsTimeDelta) -> bytes:
+        """PNG bytes of the chart for the window ending today."""
+        today = date.today()
+        key = (chart, statistics_timedelta, today)
+        task = StatisticsChartService._charts.get(key)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            StatisticsChartService._charts = {cached_key: cached_task
+                                              for cached_key, cached_task in StatisticsChartService._charts.items()
+                                              if cached_key[2] == today}
+            # Empty context: the task must not inherit the QueryCounter of the viewer's update
+            task = asyncio.create_task(StatisticsChartService._create(chart, statistics_timedelta),
+                                       context=contextvars.Context())
+            StatisticsChartService._charts[key] = task
+        # A cancelled viewer must not cancel the render the other viewers wait for
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _create(chart: StatisticsChart, statistics_timedelta: StatisticsTimeDelta) -> bytes:
+        async with get_db_session() as session:
+            labels, values = await StatisticsChartService._get_series(chart, statistics_timedelta, session)
+        title = Localizator.get_text(BotEntity.ADMIN, f"{chart.name.lower()}_chart_title").format(
+            timedelta=statistics_timedelta.value,
+            currency_text=Localizator.get_currency_text(),
+            time=datetime.now().strftime("%H:%M"))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(StatisticsChartService._get_pool(), render_bar_chart, title, labels, values)
+
+    @staticmethod
+    async def _get_series(chart: StatisticsChart, statistics_timedelta: StatisticsTimeDelta,
+                          session: AsyncSession | Session) -> tuple[list[str], list[float]]:
+        match chart:
+            case StatisticsChart.REVENUE | StatisticsChart.NEW_USERS:
+                days = await StatisticsRepository.get_daily(statistics_timedelta, session)
+                labels = [day.day.strftime("%d.%m") for day in days]
+                if chart == StatisticsChart.REVENUE:
+                    return labels, [round(day.revenue, 2) for day in days]
+                return labels, [day.new_users for day in days]
+            case StatisticsChart.SUBCATEGORY_ITEMS:
+                sales = await StatisticsRepository.get_subcategory_sales(statistics_timedelta, session)
+                sales = sales[:MAX_SUBCATEGORIES]
+                return ([entry.subcategory_name[:MAX_LABEL_LENGTH] for entry in sales],
+                        [entry.items_sold for entry in sales])
+            case StatisticsChart.DEPOSITS:
+                _, amounts = await StatisticsRepository.get_deposits(statistics_timedelta, session)
+                prices = await PriceOracle.get_prices(list(amounts)) if amounts else {}
+                return ([network.value for network in amounts],
+                        [round(amount * prices[network], 2) for network, amount in amounts.items()])
@@ -8,13 +8,10 @@ from callbacks import MyProfileCallback
 from db import session_commit
 from enums.bot_entity import BotEntity
 from enums.cryptocurrency import Cryptocurrency
-from handlers.common.common import add_pagination_buttons
+from handlers.common.common import add_keyset_pagination_buttons
 from models.user import User, UserDTO
 from repositories.buy import BuyRepository
-from repositories.buyItem import BuyItemRepository
 from repositories.cart import CartRepository
-from repositories.item import ItemRepository
-from repositories.subcategory import SubcategoryRepository
 from repositories.user import UserRepository
 from utils.localizator import Localizator
 
@@ -93,25 +90,24 @@ class UserService:
             -> tuple[str, InlineKeyboardBuilder]:
         unpacked_cb = MyProfileCallback.unpack(callback.data)
         user = await UserRepository.get_by_tgid(callback.from_user.id, session)
-        buys = await BuyRepository.get_by_buyer_id(user.id, unpacked_cb.page, session)
+        # unpacked_cb.page is the keyset cursor of BuyRepository.get_purchase_history
+        history = await BuyRepository.get_purchase_history(user.id, unpacked_cb.page, session)
         kb_builder = InlineKeyboardBuilder()
-        for buy in buys:
-            buy_item = await BuyItemRepository.get_single_by_buy_id(buy.id, session)
-            item = await ItemRepository.get_by_id(buy_item.item_id, session)
-            subcategory = await SubcategoryRepository.get_by_id(item.subcategory_id, session)
-
+        for entry in history.entries:
             # Format date only for list view (keep it short)
-            date_str = buy.buy_datetime.strftime("%d.%m.%Y") if buy.buy_datetime else "N/A"
+            date_str = entry.buy_datetime.strftime("%d.%m.%Y") if entry.buy_datetime else "N/A"
 
-            kb_builder.button(text=f"{date_str} - {subcategory.name} (x{buy.quantity})",
+            kb_builder.button(text=f"{date_str} - {entry.subcategory_name} (x{entry.quantity})",
                 callback_data=MyProfileCallback.create(
                     unpacked_cb.level + 1,
-                    args_for_action=buy.id
+                    args_for_action=entry.buy_id,
+                    page=unpacked_cb.page
                 ))
         kb_builder.adjust(1)
-        kb_builder = await add_pagination_buttons(kb_builder, unpacked_cb,
-                                                  BuyRepository.get_max_page_purchase_history(user.id, session),
-                                                  unpacked_cb.get_back_button(0))
+        newer_page = -history.entries[0].buy_id if history.has_newer and history.entries else None
+        older_page = history.entries[-1].buy_id if history.has_older and history.entries else None
+        kb_builder = add_keyset_pagination_buttons(kb_builder, unpacked_cb, newer_page, older_page,
+                                                   unpacked_cb.get_back_button(0))
         if len(kb_builder.as_markup().inline_keyboard) > 1:
             return Localizator.get_text(BotEntity.USER, "purchases").format(
                 retention_days=config.DATA_RETENTION_DAYS
@@ -21,4 +21,72 @@ config_mock.PAYMENT_UNDERPAYMENT_PENALTY_PERCENT = 5.0
 config_mock.PAYMENT_LATE_PENALTY_PERCENT = 5.0
 config_mock.DATA_RETENTION_DAYS = 30
 config_mock.REFERRAL_DATA_RETENTION_DAYS = 365
+config_mock.DATA_RETENTION_CHUNK_SIZE = 500
+config_mock.DATA_RETENTION_CHUNK_PAUSE_SECONDS = 0
+config_mock.DATA_RETENTION_ARCHIVE_DIR = ""
+config_mock.DATA_RETENTION_VACUUM_PAGES = 1000
+# Plain (unencrypted) aiosqlite so repository tests can run against an in-memory database
+config_mock.DB_ENCRYPTION = False
+config_mock.DB_NAME = "test.db"
+config_mock.PAGE_ENTRIES = 8
+config_mock.ITEM_PAYLOAD_COMPRESSION = True
+config_mock.WEBHOOK_PATH = "/webhook/"  # processing_router prefix
+config_mock.HTTP_POOL_LIMIT = 100
+config_mock.HTTP_POOL_LIMIT_PER_HOST = 10
+config_mock.HTTP_DNS_CACHE_TTL_SECONDS = 300
+config_mock.HTTP_CONNECT_TIMEOUT_SECONDS = 5
+config_mock.HTTP_READ_TIMEOUT_SECONDS = 5
+config_mock.HTTP_TOTAL_TIMEOUT_SECONDS = 10
+config_mock.HTTP_MAX_RETRIES = 3
+config_mock.HTTP_RETRY_BASE_SECONDS = 0.01
+config_mock.HTTP_RETRY_MAX_SECONDS = 0.05
+config_mock.PRICE_ORACLE_SOURCE = "coingecko"
+config_mock.PRICE_ORACLE_FALLBACK_SOURCE = "kraken"
+config_mock.PRICE_ORACLE_TTL_SECONDS = 60
+config_mock.PRICE_ORACLE_MAX_STALENESS_SECONDS = 900
+config_mock.DEPOSIT_SCAN_CONCURRENCY = 8
+config_mock.DEPOSIT_SCAN_WINDOW_HOURS = 24
+config_mock.REFERENCE_CODE_SECRET = "test-secret"
+config_mock.PAYMENT_RECONCILIATION_PAGE_SIZE = 100
+config_mock.PAYMENT_RECONCILIATION_MAX_PAGES = 10
+config_mock.PAYMENT_RECONCILIATION_WINDOW_HOURS = 24
+config_mock.STATISTICS_CHART_WORKERS = 1
+config_mock.SCHEDULER_LEADER_TTL_SECONDS = 30
+config_mock.QUERY_BUDGET_PER_UPDATE = 25
+config_mock.QUERY_REPEAT_THRESHOLD = 5
+config_mock.LOOP_MONITOR_ENABLED = False
+config_mock.LOOP_MONITOR_INTERVAL_SECONDS = 0.1
+config_mock.LOOP_STALL_THRESHOLD_SECONDS = 0.25
+config_mock.PROFILER_MAX_SECONDS = 60
+config_mock.PAYMENT_CHECK_INTERVAL_SECONDS = 60
+config_mock.PAYMENT_RECONCILIATION_INTERVAL_SECONDS = 300
+config_mock.PRICE_ORACLE_REFRESH_INTERVAL_SECONDS = 45
+config_mock.WALLET_SNAPSHOT_INTERVAL_SECONDS = 86400
+config_mock.DATA_RETENTION_CRON = "30 3 * * *"
 sys.modules['config'] = config_mock
+
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import StaticPool
+
+
+@pytest_asyncio.fixture
+async def db_engine():
+    """In-memory SQLite engine with the full schema (tables and indexes) created from the models."""
+    import db  # noqa: F401 - registers all models on Base.metadata
+    from models.base import Base
+    from models.payment import Payment  # noqa: F401
+    from models.shipping_address import ShippingAddress  # noqa: F401
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db_session(db_engine):
+    session_maker = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as session:
+        yield session
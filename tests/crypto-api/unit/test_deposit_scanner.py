@@ -0,0 +1,138 @@
+"""
+Tests for the concurrent deposit scanner (CryptoApiManager.scan_deposits).
+
+Covers:
+- New transfers of all targets are stored in one scan, known ones are skipped
+- A transfer reported twice is only credited once
+- Explorer requests are bounded by the concurrency limit
+- A failing explorer doesn't abort the scan of other targets
+- The time window is computed per scan
+
+Run with:
+    pytest tests/crypto-api/unit/test_deposit_scanner.py -v
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from crypto_api.CryptoApiManager import CryptoApiManager
+from enums.cryptocurrency import Cryptocurrency
+from models.deposit import Deposit, DepositDTO, DepositScanTarget
+from models.user import User
+
+BTC = DepositScanTarget(user_id=1, cryptocurrency=Cryptocurrency.BTC, address="bc1-user1")
+LTC = DepositScanTarget(user_id=1, cryptocurrency=Cryptocurrency.LTC, address="ltc1-user1")
+USDT = DepositScanTarget(user_id=2, cryptocurrency=Cryptocurrency.USDT_TRC20, address="T-user2")
+
+
+def _transfer(target: DepositScanTarget, tx_id: str, amount: int, vout: int | None = 0) -> DepositDTO:
+    return DepositDTO(user_id=target.user_id, network=target.cryptocurrency, tx_id=tx_id, vout=vout, amount=amount)
+
+
+@pytest_asyncio.fixture
+async def users(db_session):
+    db_session.add_all([User(id=1, telegram_id=111, telegram_username="one"),
+                        User(id=2, telegram_id=222, telegram_username="two")])
+    await db_session.flush()
+
+
+async def _stored(db_session):
+    result = await db_session.execute(select(Deposit.user_id, Deposit.network, Deposit.tx_id, Deposit.amount)
+                                      .order_by(Deposit.id))
+    return [tuple(row) for row in result]
+
+
+class TestDepositScanner:
+
+    @pytest.mark.asyncio
+    async def test_new_transfers_are_stored_known_skipped(self, db_session, users):
+        db_session.add(Deposit(user_id=1, network=Cryptocurrency.BTC, tx_id="old", vout=0, amount=5))
+        await db_session.flush()
+        explorer = {
+            BTC: [_transfer(BTC, "old", 5), _transfer(BTC, "new", 50_000_000)],
+            LTC: [_transfer(LTC, "ltc-tx", 100_000_000)],
+            USDT: [_transfer(USDT, "trc-tx", 25_000_000, vout=None)],
+        }
+
+        async def fetch_deposits(target, min_timestamp):
+            return explorer[target]
+
+        with patch.object(CryptoApiManager, "fetch_deposits", side_effect=fetch_deposits):
+            amounts = await CryptoApiManager.scan_deposits([BTC, LTC, USDT], db_session)
+
+        assert amounts == {BTC: 0.5, LTC: 1.0, USDT: 25.0}
+        assert await _stored(db_session) == [
+            (1, Cryptocurrency.BTC, "old", 5),
+            (1, Cryptocurrency.BTC, "new", 50_000_000),
+            (1, Cryptocurrency.LTC, "ltc-tx", 100_000_000),
+            (2, Cryptocurrency.USDT_TRC20, "trc-tx", 25_000_000),
+        ]
+
+        # Second scan: everything is known
+        with patch.object(CryptoApiManager, "fetch_deposits", side_effect=fetch_deposits):
+            amounts = await CryptoApiManager.scan_deposits([BTC, LTC, USDT], db_session)
+
+        assert amounts == {BTC: 0.0, LTC: 0.0, USDT: 0.0}
+        assert len(await _stored(db_session)) == 4
+
+    @pytest.mark.asyncio
+    async def test_duplicate_within_scan_is_credited_once(self, db_session, users):
+        async def fetch_deposits(target, min_timestamp):
+            return [_transfer(BTC, "tx", 1_000), _transfer(BTC, "tx", 1_000), _transfer(BTC, "tx", 2_000, vout=1)]
+
+        with patch.object(CryptoApiManager, "fetch_deposits", side_effect=fetch_deposits):
+            await CryptoApiManager.scan_deposits([BTC], db_session)
+
+        assert [row[3] for row in await _stored(db_session)] == [1_000, 2_000]
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, db_session, users):
+        active = 0
+        max_active = 0
+        targets = [DepositScanTarget(user_id=1, cryptocurrency=Cryptocurrency.BTC, address=f"addr{i}")
+                   for i in range(10)]
+
+        async def fetch_deposits(target, min_timestamp):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return []
+
+        with patch.object(CryptoApiManager, "fetch_deposits", side_effect=fetch_deposits):
+            await CryptoApiManager.scan_deposits(targets, db_session, concurrency=3)
+
+        assert max_active == 3
+
+    @pytest.mark.asyncio
+    async def test_failing_explorer_does_not_abort_scan(self, db_session, users):
+        async def fetch_deposits(target, min_timestamp):
+            if target == LTC:
+                raise RuntimeError("blockcypher down")
+            return [_transfer(BTC, "tx", 1_000)]
+
+        with patch.object(CryptoApiManager, "fetch_deposits", side_effect=fetch_deposits):
+            amounts = await CryptoApiManager.scan_deposits([BTC, LTC], db_session)
+
+        assert amounts[LTC] == 0.0
+        assert len(await _stored(db_session)) == 1
+
+    @pytest.mark.asyncio
+    async def test_window_is_computed_per_scan(self, db_session, users):
+        windows = []
+
+        async def fetch_deposits(target, min_timestamp):
+            windows.append(min_timestamp)
+            return []
+
+        with patch.object(CryptoApiManager, "fetch_deposits", side_effect=fetch_deposits), \
+                patch.object(CryptoApiManager, "scan_window_start", side_effect=[1_000, 2_000]):
+            await CryptoApiManager.scan_deposits([BTC], db_session)
+            await CryptoApiManager.scan_deposits([BTC], db_session)
+
+        assert windows == [1_000, 2_000]
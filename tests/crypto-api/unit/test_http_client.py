@@ -0,0 +1,125 @@
+"""
+Tests for the shared crypto API HTTP client (crypto_api/http_client.py).
+
+Covers:
+- Connections are pooled and reused across requests
+- Idempotent requests are retried on 5xx, POST is not
+- Client errors (4xx) raise instead of returning None
+- Read timeouts are enforced
+- Metrics are grouped per endpoint
+
+Run with:
+    pytest tests/crypto-api/unit/test_http_client.py -v
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+import config
+from crypto_api.http_client import HttpClient
+
+
+@pytest_asyncio.fixture
+async def api():
+    """Local API server; yields (base url, hits per path, client peer ports)."""
+    hits: dict[str, int] = {}
+    peers: set[int] = set()
+    failures = {"/flaky": 2}
+
+    async def handler(request: web.Request):
+        path = request.path
+        hits[path] = hits.get(path, 0) + 1
+        peers.add(request.transport.get_extra_info("peername")[1])
+        if path == "/missing":
+            return web.json_response({"error": "not found"}, status=404)
+        if path == "/slow":
+            await asyncio.sleep(0.5)
+        if path in ("/flaky", "/down") and failures.get(path, 1) > 0:
+            failures[path] = failures.get(path, 1) - 1
+            return web.json_response({"error": "unavailable"}, status=503)
+        return web.json_response({"path": path, "method": request.method})
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    HttpClient.reset_metrics()
+    yield f"http://127.0.0.1:{port}", hits, peers
+
+    await HttpClient.close()
+    await runner.cleanup()
+
+
+class TestHttpClient:
+
+    @pytest.mark.asyncio
+    async def test_connections_are_reused(self, api):
+        base_url, hits, peers = api
+
+        for _ in range(5):
+            assert await HttpClient.request_json("GET", f"{base_url}/price") == {"path": "/price", "method": "GET"}
+
+        assert hits["/price"] == 5
+        assert len(peers) == 1
+
+    @pytest.mark.asyncio
+    async def test_get_is_retried_on_server_error(self, api):
+        base_url, hits, _ = api
+
+        assert await HttpClient.request_json("GET", f"{base_url}/flaky") == {"path": "/flaky", "method": "GET"}
+
+        assert hits["/flaky"] == 3
+        metrics = HttpClient.get_metrics()[HttpClient.endpoint_name("GET", f"{base_url}/flaky")]
+        assert (metrics.requests, metrics.errors, metrics.retries) == (3, 2, 2)
+        assert metrics.status_counts == {503: 2, 200: 1}
+
+    @pytest.mark.asyncio
+    async def test_post_is_not_retried(self, api):
+        base_url, hits, _ = api
+
+        with pytest.raises(aiohttp.ClientResponseError) as error:
+            await HttpClient.request_json("POST", f"{base_url}/down", data="{}")
+
+        assert error.value.status == 503
+        assert hits["/down"] == 1
+
+    @pytest.mark.asyncio
+    async def test_client_error_raises_without_retry(self, api):
+        base_url, hits, _ = api
+
+        with pytest.raises(aiohttp.ClientResponseError) as error:
+            await HttpClient.request_json("GET", f"{base_url}/missing")
+
+        assert error.value.status == 404
+        assert hits["/missing"] == 1
+
+    @pytest.mark.asyncio
+    async def test_read_timeout(self, api):
+        base_url, hits, _ = api
+
+        with patch.object(config, "HTTP_READ_TIMEOUT_SECONDS", 0.05), patch.object(config, "HTTP_MAX_RETRIES", 1):
+            await HttpClient.close()
+            with pytest.raises(asyncio.TimeoutError):
+                await HttpClient.request_json("GET", f"{base_url}/slow")
+
+        assert hits["/slow"] == 2
+
+    def test_endpoint_name_groups_addresses(self):
+        assert HttpClient.endpoint_name(
+            "GET", "https://mempool.space/api/address/bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq/utxo"
+        ) == "GET mempool.space/api/address/{id}/utxo"
+        assert HttpClient.endpoint_name(
+            "GET", "https://api.trongrid.io/v1/accounts/TXYZopYRdj2D9XRtbG411XZZ3kM5VkAeBf/transactions/trc20"
+        ) == "GET api.trongrid.io/v1/accounts/{id}/transactions/trc20"
+        assert HttpClient.endpoint_name(
+            "POST", "https://kryptoexpress.pro/api/payment/12345?x=1"
+        ) == "POST kryptoexpress.pro/api/payment/{id}"
@@ -0,0 +1,114 @@
+"""
+Tests for the cached price oracle (services/price_oracle.py).
+
+Covers:
+- Fresh prices are served from memory
+- Concurrent reads on a cold cache collapse into one upstream fetch
+- Expired prices are served while a background refresh runs
+- Prices beyond the staleness bound are not served
+- Coins (or outages) of the primary source are covered by the fallback source
+
+Run with:
+    pytest tests/crypto-api/unit/test_price_oracle.py -v
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+
+import config
+from enums.cryptocurrency import Cryptocurrency
+from services.price_oracle import PriceOracle
+
+ALL_PRICES = {cryptocurrency: float(index + 1) for index, cryptocurrency in enumerate(PriceOracle.tracked())}
+
+
+@pytest_asyncio.fixture
+async def sources():
+    """Primary and fallback source mocked, empty cache."""
+
+    async def slow_primary(cryptocurrencies):
+        await asyncio.sleep(0.01)
+        return {cryptocurrency: ALL_PRICES[cryptocurrency] for cryptocurrency in cryptocurrencies}
+
+    primary = AsyncMock(side_effect=slow_primary)
+    fallback = AsyncMock(return_value={})
+    PriceOracle.reset()
+    with patch.dict(PriceOracle.SOURCES, {"coingecko": primary, "kraken": fallback}):
+        yield primary, fallback
+    PriceOracle.reset()
+
+
+def _age_cache(seconds: float):
+    PriceOracle._prices = {cryptocurrency: (price, fetched_at - seconds)
+                           for cryptocurrency, (price, fetched_at) in PriceOracle._prices.items()}
+
+
+class TestPriceOracle:
+
+    @pytest.mark.asyncio
+    async def test_fresh_prices_are_served_from_memory(self, sources):
+        primary, _ = sources
+
+        assert await PriceOracle.get_price(Cryptocurrency.BTC) == ALL_PRICES[Cryptocurrency.BTC]
+        assert await PriceOracle.get_prices() == ALL_PRICES
+
+        assert primary.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reads_share_one_fetch(self, sources):
+        primary, _ = sources
+
+        results = await asyncio.gather(*(PriceOracle.get_price(Cryptocurrency.LTC) for _ in range(10)))
+
+        assert results == [ALL_PRICES[Cryptocurrency.LTC]] * 10
+        assert primary.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_prices_are_served_while_refreshing(self, sources):
+        primary, _ = sources
+        await PriceOracle.refresh()
+        _age_cache(config.PRICE_ORACLE_TTL_SECONDS + 1)
+        primary.side_effect = None
+        primary.return_value = {Cryptocurrency.BTC: 99.0}
+
+        # Served from cache without waiting for the upstream
+        assert await PriceOracle.get_price(Cryptocurrency.BTC) == ALL_PRICES[Cryptocurrency.BTC]
+        await PriceOracle._refresh_task
+
+        assert primary.await_count == 2
+        assert await PriceOracle.get_price(Cryptocurrency.BTC) == 99.0
+
+    @pytest.mark.asyncio
+    async def test_prices_beyond_staleness_bound_are_not_served(self, sources):
+        primary, fallback = sources
+        await PriceOracle.refresh()
+        _age_cache(config.PRICE_ORACLE_MAX_STALENESS_SECONDS + 1)
+        primary.side_effect = RuntimeError("CoinGecko down")
+        fallback.side_effect = RuntimeError("Kraken down")
+
+        with pytest.raises(RuntimeError):
+            await PriceOracle.get_price(Cryptocurrency.BTC)
+
+    @pytest.mark.asyncio
+    async def test_fallback_source_fills_gaps(self, sources):
+        primary, fallback = sources
+        primary.side_effect = None
+        primary.return_value = {Cryptocurrency.BTC: 1.0}
+        fallback.side_effect = lambda cryptocurrencies: {cryptocurrency: 2.0 for cryptocurrency in cryptocurrencies}
+
+        prices = await PriceOracle.get_prices()
+
+        assert prices[Cryptocurrency.BTC] == 1.0
+        assert prices[Cryptocurrency.SOL] == 2.0
+        assert Cryptocurrency.BTC not in fallback.await_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_primary_outage_uses_fallback(self, sources):
+        primary, fallback = sources
+        primary.side_effect = RuntimeError("CoinGecko down")
+        fallback.side_effect = lambda cryptocurrencies: {cryptocurrency: 3.0 for cryptocurrency in cryptocurrencies}
+
+        assert await PriceOracle.get_price(Cryptocurrency.ETH) == 3.0
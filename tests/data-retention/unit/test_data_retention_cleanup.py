@@ -4,216 +4,219 @@ Test for Data Retention Cleanup Job
 Tests the automatic deletion of old orders, invoices, payment transactions,
 referral usages, and expired referral discounts according to retention policies.
 
-Run with:
-    pytest tests/test_data_retention_cleanup.py -v
+Covers:
+- Retention periods (orders 30 days, referral usages 365 days, discounts by expires_at)
+- Dependent rows are deleted (invoices, payment transactions, shipping address) or unlinked
+- Deletes run in primary-key chunks of DATA_RETENTION_CHUNK_SIZE, yielding in between
+- Optional gzip NDJSON archive of the deleted rows
+- incremental_vacuum returns the freed pages
 
-Or manually:
-    python -m pytest tests/test_data_retention_cleanup.py -v
+Run with:
+    pytest tests/data-retention/unit/test_data_retention_cleanup.py -v
 """
 
-import asyncio
+import gzip
+import json
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-import pytest
+from unittest.mock import patch, AsyncMock
 
-# NOTE: Uncomment these imports once the models are available in your database
-# from db import get_db_session, session_commit
-# from models.order import Order, OrderDTO
-# from models.invoice import Invoice, InvoiceDTO
-# from models.payment_transaction import PaymentTransaction, PaymentTransactionDTO
-# from models.referral_usage import ReferralUsage, ReferralUsageDTO
-# from models.referral_discount import ReferralDiscount, ReferralDiscountDTO
-# from models.user import User, UserDTO
-# from enums.order_status import OrderStatus
-# from enums.currency import Currency
-# from enums.cryptocurrency import Cryptocurrency
-# from jobs.data_retention_cleanup_job import (
-#     cleanup_old_orders,
-#     cleanup_old_payment_transactions,
-#     cleanup_old_referral_usages,
-#     cleanup_expired_referral_discounts
-# )
-# import config
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select, func, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+import config
+import jobs.data_retention_cleanup_job as retention
+from enums.cryptocurrency import Cryptocurrency
+from enums.currency import Currency
+from enums.order_status import OrderStatus
+from models.category import Category
+from models.invoice import Invoice
+from models.item import Item
+from models.item_archive import ItemArchive
+from models.order import Order
+from models.payment_transaction import PaymentTransaction
+from models.referral_discount import ReferralDiscount
+from models.referral_usage import ReferralUsage
+from models.shipping_address import ShippingAddress
+from models.subcategory import Subcategory
+from models.user import User
+from models.user_strike import UserStrike
+
+
+def _days_ago(days: float) -> datetime:
+    return datetime.now() - timedelta(days=days)
+
+
+@pytest_asyncio.fixture
+async def retention_session(db_engine):
+    """Cleanup job wired to the in-memory database, one user."""
+    session_maker = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def test_session():
+        async with session_maker() as session:
+            yield session
+
+    with patch.object(retention, "get_db_session", test_session):
+        async with session_maker() as session:
+            session.add(User(id=1, telegram_id=111))
+            await session.commit()
+            yield session
+
+
+async def _create_order(session, order_id: int, age_days: float, with_payment: bool = False) -> int:
+    session.add(Order(id=order_id, user_id=1, status=OrderStatus.PAID, total_price=10.0, currency=Currency.EUR,
+                      created_at=_days_ago(age_days), expires_at=_days_ago(age_days)))
+    if with_payment:
+        await session.flush()
+        session.add(Invoice(id=order_id, order_id=order_id, invoice_number=f"2025-{order_id:06d}",
+                            fiat_amount=10.0, fiat_currency=Currency.EUR,
+                            payment_crypto_currency=Cryptocurrency.BTC))
+        await session.flush()
+        session.add(PaymentTransaction(order_id=order_id, invoice_id=order_id, crypto_amount=0.001,
+                                       crypto_currency=Cryptocurrency.BTC, fiat_amount=10.0,
+                                       fiat_currency=Currency.EUR, payment_address="bc1q",
+                                       payment_processing_id=order_id, received_at=_days_ago(age_days)))
+        session.add(ShippingAddress(order_id=order_id, encrypted_address=b"x", nonce=b"n", tag=b"t"))
+    await session.commit()
+    return order_id
+
+
+async def _count(session, model) -> int:
+    return (await session.execute(select(func.count()).select_from(model))).scalar_one()
 
 
 @pytest.mark.asyncio
 class TestDataRetentionCleanup:
-    """
-    Test suite for data retention cleanup job.
-
-    These tests verify that old data is properly deleted according to
-    the configured retention policies.
-    """
-
-    async def test_cleanup_old_orders_deletes_orders_older_than_30_days(self):
-        """
-        Test that orders older than DATA_RETENTION_DAYS are deleted.
-
-        Expected behavior:
-        - Orders created > 30 days ago should be deleted
-        - Orders created < 30 days ago should remain
-        - Cascade delete should remove associated invoices and payment transactions
-        """
-        # TODO: Implement when database is ready
-        #
-        # Steps:
-        # 1. Create test user
-        # 2. Create old order (35 days ago)
-        # 3. Create recent order (20 days ago)
-        # 4. Run cleanup_old_orders()
-        # 5. Verify old order is deleted
-        # 6. Verify recent order still exists
-        # 7. Verify associated invoices/payment_transactions are cascade deleted
-
-        pytest.skip("Database not ready - implement after Phase 1 completion")
-
-    async def test_cleanup_old_orders_cascade_deletes_invoices(self):
-        """
-        Test that deleting an order also deletes its invoice via cascade.
-
-        Expected behavior:
-        - When order is deleted, invoice should be automatically deleted
-        - This is handled by SQLAlchemy cascade='all, delete-orphan'
-        """
-        # TODO: Implement when database is ready
-        #
-        # Steps:
-        # 1. Create test user
-        # 2. Create old order with invoice
-        # 3. Run cleanup_old_orders()
-        # 4. Verify invoice is also deleted
-
-        pytest.skip("Database not ready - implement after Phase 1 completion")
-
-    async def test_cleanup_old_orders_cascade_deletes_payment_transactions(self):
-        """
-        Test that deleting an order also deletes its payment transactions.
-
-        Expected behavior:
-        - When order is deleted, all payment_transactions should be deleted
-        - Multiple payment transactions (underpayment scenario) should all be deleted
-        """
-        # TODO: Implement when database is ready
-        #
-        # Steps:
-        # 1. Create test user
-        # 2. Create old order with multiple payment transactions
-        # 3. Run cleanup_old_orders()
-        # 4. Verify all payment transactions are deleted
-
-        pytest.skip("Database not ready - implement after Phase 1 completion")
-
-    async def test_cleanup_respects_retention_period(self):
-        """
-        Test that cleanup respects exactly the configured retention period.
-
-        Expected behavior:
-        - Order created exactly 30 days ago should NOT be deleted (edge case)
-        - Order created 30 days + 1 second ago should be deleted
-        """
-        # TODO: Implement when database is ready
-        #
-        # Steps:
-        # 1. Create order exactly at cutoff date
-        # 2. Create order 1 second past cutoff
-        # 3. Run cleanup
-        # 4. Verify behavior at edge cases
-
-        pytest.skip("Database not ready - implement after Phase 1 completion")
-
-    async def test_cleanup_old_referral_usages_deletes_after_365_days(self):
-        """
-        Test that referral usages are deleted after 365 days (not 30).
-
-        Expected behavior:
-        - Referral usages have longer retention (365 days) for abuse detection
-        - Should not be deleted along with orders (30 days)
-        """
-        # TODO: Implement when database is ready
-        #
-        # Steps:
-        # 1. Create referral usage 40 days ago
-        # 2. Create referral usage 400 days ago
-        # 3. Run cleanup_old_referral_usages()
-        # 4. Verify 40-day record still exists
-        # 5. Verify 400-day record is deleted
-
-        pytest.skip("Database not ready - implement after Phase 1 completion")
-
-    async def test_cleanup_expired_referral_discounts(self):
-        """
-        Test that referral discounts are deleted after expiry date.
-
-        Expected behavior:
-        - Referral discounts expire after 90 days (as per T&Cs)
-        - Should be deleted based on expires_at field, not created_at
-        """
-        # TODO: Implement when database is ready
-        #
-        # Steps:
-        # 1. Create expired discount (expires_at in past)
-        # 2. Create valid discount (expires_at in future)
-        # 3. Run cleanup_expired_referral_discounts()
-        # 4. Verify expired is deleted
-        # 5. Verify valid still exists
-
-        pytest.skip("Database not ready - implement after Phase 1 completion")
-
-    async def test_cleanup_handles_empty_database_gracefully(self):
-        """
-        Test that cleanup job doesn't crash on empty database.
-
-        Expected behavior:
-        - Should log "No orders older than X days"
-        - Should complete without errors
-        """
-        # TODO: Implement when database is ready
-        #
-        # Steps:
-        # 1. Ensure clean database
-        # 2. Run all cleanup functions
-        # 3. Verify no errors raised
-
-        pytest.skip("Database not ready - implement after Phase 1 completion")
-
-    async def test_cleanup_logs_deletion_counts(self):
-        """
-        Test that cleanup job logs how many records were deleted.
-
-        Expected behavior:
-        - Should log: "[Data Retention] ✅ Deleted 5 orders older than 30 days"
-        - Should log count for each cleanup operation
-        """
-        # TODO: Implement when database is ready
-        #
-        # Steps:
-        # 1. Create 5 old orders
-        # 2. Capture log output
-        # 3. Run cleanup
-        # 4. Verify log contains correct count
-
-        pytest.skip("Database not ready - implement after Phase 1 completion")
-
-
-# Manual test runner
-if __name__ == "__main__":
-    """
-    Run tests manually without pytest.
-
-    Usage:
-        python tests/test_data_retention_cleanup.py
-    """
-    import sys
-
-    print("=" * 80)
-    print("Data Retention Cleanup Job - Manual Test")
-    print("=" * 80)
-    print()
-    print("⚠️  These tests are not yet implemented.")
-    print("    Implement them after Phase 1 database models are ready.")
-    print()
-    print("To run with pytest:")
-    print("    pytest tests/test_data_retention_cleanup.py -v")
-    print()
-    print("=" * 80)
-
-    sys.exit(0)
+
+    async def test_cleanup_old_orders_deletes_orders_older_than_30_days(self, retention_session):
+        await _create_order(retention_session, 1, 35)
+        await _create_order(retention_session, 2, 20)
+        # Retention boundary
+        await _create_order(retention_session, 3, config.DATA_RETENTION_DAYS - 0.01)
+
+        assert await retention.cleanup_old_orders() == 1
+
+        remaining = (await retention_session.execute(select(Order.id).order_by(Order.id))).scalars().all()
+        assert remaining == [2, 3]
+
+    async def test_cleanup_old_orders_deletes_dependent_rows(self, retention_session):
+        await _create_order(retention_session, 1, 35, with_payment=True)
+        await _create_order(retention_session, 2, 5, with_payment=True)
+        retention_session.add_all([Category(id=1, name="category"), Subcategory(id=1, name="subcategory")])
+        await retention_session.flush()
+        retention_session.add_all([Item(id=1, category_id=1, subcategory_id=1, price=10.0, description="sold",
+                                        is_sold=True, order_id=1),
+                                   ItemArchive(id=2, category_id=1, subcategory_id=1, price=10.0,
+                                               description="sold and archived", order_id=1),
+                                   UserStrike(user_id=1, order_id=1)])
+        await retention_session.commit()
+
+        assert await retention.cleanup_old_orders() == 1
+
+        assert await _count(retention_session, Invoice) == 1
+        assert await _count(retention_session, PaymentTransaction) == 1
+        assert await _count(retention_session, ShippingAddress) == 1
+        # Rows that outlive the order are unlinked, not deleted
+        assert (await retention_session.execute(select(Item.order_id))).scalar_one() is None
+        assert (await retention_session.execute(select(ItemArchive.order_id))).scalar_one() is None
+        assert (await retention_session.execute(select(UserStrike.order_id))).scalar_one() is None
+
+    async def test_orders_referenced_by_referral_usages_are_kept(self, retention_session):
+        await _create_order(retention_session, 1, 35)
+        await _create_order(retention_session, 2, 35)
+        retention_session.add(ReferralUsage(referral_code="U_A3F9K", referrer_user_hash="a" * 64,
+                                            referred_user_hash="b" * 64, order_id=1, discount_amount=1.0,
+                                            created_at=_days_ago(35)))
+        await retention_session.commit()
+
+        assert await retention.cleanup_old_orders() == 1
+
+        assert (await retention_session.execute(select(Order.id))).scalars().all() == [1]
+
+    async def test_cleanup_deletes_in_chunks(self, retention_session):
+        for order_id in range(1, 11):
+            await _create_order(retention_session, order_id, 40)
+        deletes = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("DELETE FROM orders"):
+                deletes.append(parameters)
+
+        sync_engine = retention_session.bind.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            with patch.object(config, "DATA_RETENTION_CHUNK_SIZE", 4), \
+                    patch.object(retention.asyncio, "sleep", new_callable=AsyncMock) as sleep:
+                assert await retention.cleanup_old_orders() == 10
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+        assert [len(parameters) for parameters in deletes] == [4, 4, 2]
+        assert sleep.await_count == 2
+        assert await _count(retention_session, Order) == 0
+
+    async def test_cleanup_old_referral_usages_deletes_after_365_days(self, retention_session):
+        await _create_order(retention_session, 1, 5)
+        retention_session.add_all([
+            ReferralUsage(id=usage_id, referral_code="U_A3F9K", referrer_user_hash="a" * 64,
+                          referred_user_hash=str(usage_id) * 64, order_id=1, discount_amount=1.0,
+                          created_at=_days_ago(age))
+            for usage_id, age in ((1, 40), (2, 400))
+        ])
+        await retention_session.commit()
+
+        assert await retention.cleanup_old_referral_usages() == 1
+
+        assert (await retention_session.execute(select(ReferralUsage.id))).scalars().all() == [1]
+
+    async def test_cleanup_expired_referral_discounts(self, retention_session):
+        retention_session.add_all([
+            ReferralDiscount(id=1, user_id=1, reason="expired", expires_at=_days_ago(1)),
+            ReferralDiscount(id=2, user_id=1, reason="valid", expires_at=_days_ago(-1)),
+        ])
+        await retention_session.commit()
+
+        assert await retention.cleanup_expired_referral_discounts() == 1
+
+        assert (await retention_session.execute(select(ReferralDiscount.id))).scalars().all() == [2]
+
+    async def test_cleanup_handles_empty_database_gracefully(self, retention_session):
+        assert await retention.cleanup_old_orders() == 0
+        assert await retention.cleanup_old_invoices_orphaned() == 0
+        assert await retention.cleanup_old_payment_transactions() == 0
+        assert await retention.cleanup_old_referral_usages() == 0
+        assert await retention.cleanup_expired_referral_discounts() == 0
+
+    async def test_deleted_rows_are_archived(self, retention_session, tmp_path):
+        await _create_order(retention_session, 1, 35, with_payment=True)
+        await _create_order(retention_session, 2, 5)
+        archive = retention.RetentionArchive(str(tmp_path))
+
+        with patch.object(config, "DATA_RETENTION_CHUNK_SIZE", 1):
+            await retention.cleanup_old_orders(archive)
+
+        with gzip.open(archive.path, "rt") as f:
+            lines = [json.loads(line) for line in f]
+        assert [line["table"] for line in lines] == ["orders", "invoices", "payment_transactions"]
+        assert lines[0]["row"]["id"] == 1
+        assert lines[0]["row"]["status"] == OrderStatus.PAID.value
+        assert lines[2]["row"]["crypto_currency"] == Cryptocurrency.BTC.value
+        assert archive.rows == 3
+
+    async def test_vacuum_releases_free_pages(self, retention_session):
+        for order_id in range(1, 201):
+            retention_session.add(Order(id=order_id, user_id=1, total_price=10.0, currency=Currency.EUR,
+                                        created_at=_days_ago(40), expires_at=_days_ago(40)))
+            retention_session.add(Invoice(order_id=order_id, invoice_number="x" * 2000 + str(order_id),
+                                          fiat_amount=10.0, fiat_currency=Currency.EUR))
+        await retention_session.commit()
+        await retention.cleanup_old_orders()
+
+        with patch.object(config, "DATA_RETENTION_VACUUM_PAGES", 10):
+            released = await retention.vacuum_free_pages()
+
+        assert released > 10
+        assert (await retention_session.execute(text("PRAGMA freelist_count"))).scalar_one() == 0
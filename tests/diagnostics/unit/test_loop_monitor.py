@@ -0,0 +1,115 @@
+"""
+Tests for the event loop stall detector (utils/loop_monitor.py) and the /stalls admin command.
+
+Covers:
+- Synchronous code blocking the loop is captured with its stack and location
+- Awaiting code (asyncio.sleep) is no stall
+- Loop lag and stalls are recorded in /metrics
+- /stalls lists the top offenders and attaches their stacks
+
+Run with:
+    pytest tests/diagnostics/unit/test_loop_monitor.py -v
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+
+from handlers.admin.diagnostics import loop_stalls
+from utils.localizator import Localizator
+from utils.loop_monitor import LoopMonitor
+from utils.metrics import LOOP_LAG, LOOP_STALLS
+
+
+@pytest_asyncio.fixture
+async def monitor():
+    LoopMonitor.reset()
+    LOOP_LAG.clear()
+    LOOP_STALLS.clear()
+    await LoopMonitor.start(interval_seconds=0.02, threshold_seconds=0.1)
+    yield
+    await LoopMonitor.stop()
+    LoopMonitor.reset()
+
+
+def derive_key():
+    # Stands in for PBKDF2 / synchronous file or database I/O on the loop
+    time.sleep(0.4)
+
+
+async def settle():
+    # Lets the heartbeat run after the stall, so the stall's lag is recorded
+    await asyncio.sleep(0.1)
+
+
+@pytest.mark.asyncio
+class TestLoopMonitor:
+
+    async def test_blocking_call_is_captured(self, monitor):
+        await settle()
+        derive_key()
+        await settle()
+
+        offenders = LoopMonitor.get_top_offenders()
+        assert len(offenders) == 1
+        report = offenders[0]
+        assert report.location.startswith("tests/diagnostics/unit/test_loop_monitor.py:")
+        assert report.location.endswith("in derive_key")
+        assert report.count == 1
+        assert 0.2 < report.total_seconds == report.max_seconds
+        assert "in test_blocking_call_is_captured" in report.stack
+        assert LOOP_STALLS._values == {(report.location,): 1}
+        assert LOOP_LAG._values[()][-1] >= report.total_seconds  # lag sum
+
+    async def test_awaiting_is_no_stall(self, monitor):
+        await asyncio.sleep(0.4)
+
+        assert LoopMonitor.get_top_offenders() == []
+        assert LOOP_STALLS._values == {}
+
+    async def test_offenders_sorted_by_blocked_time(self, monitor):
+        def render_chart():
+            time.sleep(0.15)
+
+        await settle()
+        for _ in range(2):
+            render_chart()
+            await settle()
+        derive_key()
+        await settle()
+
+        offenders = LoopMonitor.get_top_offenders()
+        assert [report.location.split(" in ")[1] for report in offenders] == ["derive_key", "render_chart"]
+        assert offenders[1].count == 2
+        assert LoopMonitor.get_top_offenders(limit=1) == offenders[:1]
+
+
+@pytest.mark.asyncio
+class TestStallsCommand:
+
+    async def test_monitor_disabled(self):
+        message = AsyncMock()
+        with patch.object(Localizator, "get_text", return_value="disabled"):
+            await loop_stalls(message)
+
+        message.answer.assert_awaited_once_with("disabled")
+        message.answer_document.assert_not_awaited()
+
+    async def test_top_offenders_with_stacks(self, monitor):
+        await settle()
+        derive_key()
+        await settle()
+
+        message = AsyncMock()
+        with patch.object(Localizator, "get_text", side_effect=lambda entity, key: "{location} " if key == "loop_stall_item"
+                          else "{threshold}: "):
+            await loop_stalls(message)
+
+        text = message.answer.await_args.args[0]
+        assert text.startswith("250: tests/diagnostics/unit/test_loop_monitor.py:")
+        document = message.answer_document.await_args.args[0]
+        assert document.filename == "loop_stalls.txt"
+        assert b"in derive_key" in document.data
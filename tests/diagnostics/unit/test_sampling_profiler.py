@@ -0,0 +1,108 @@
+"""
+Tests for the on-demand sampling profiler (utils/sampling_profiler.py) and the /profile admin command.
+
+Covers:
+- Collapsed stack format (thread;outer;...;inner count), per function
+- Code blocking the event loop and code in other threads is sampled
+- One profile at a time
+- /profile validates its duration and sends the profile as document
+
+Run with:
+    pytest tests/diagnostics/unit/test_sampling_profiler.py -v
+"""
+
+import asyncio
+import hashlib
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+import handlers.admin.diagnostics as diagnostics
+from utils.localizator import Localizator
+from utils.sampling_profiler import SamplingProfiler, ProfilerBusy
+
+THIS_FILE = "(tests/diagnostics/unit/test_sampling_profiler.py)"
+
+
+def derive_key():
+    # CPU-bound work on the event loop thread
+    deadline = time.perf_counter() + 0.2
+    while time.perf_counter() < deadline:
+        hashlib.sha256(b"secret").digest()
+
+
+def parse(collapsed: str) -> dict[str, int]:
+    stacks = {}
+    for line in collapsed.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        stacks[stack] = int(count)
+    return stacks
+
+
+@pytest.mark.asyncio
+class TestSamplingProfiler:
+
+    async def test_blocking_code_is_sampled(self):
+        profiling = asyncio.create_task(SamplingProfiler.profile(0.4))
+        await asyncio.sleep(0.05)
+        derive_key()
+        result = await profiling
+
+        stacks = parse(result.collapsed)
+        assert result.samples > 10
+        assert 0.4 <= result.seconds < 1
+        blocked = {stack: count for stack, count in stacks.items() if f"derive_key {THIS_FILE}" in stack}
+        assert blocked
+        assert all(stack.startswith("MainThread;") for stack in blocked)
+        assert f"test_blocking_code_is_sampled {THIS_FILE};derive_key {THIS_FILE}" in next(iter(blocked))
+        # Most frequent stack first
+        assert list(stacks.values()) == sorted(stacks.values(), reverse=True)
+
+    async def test_other_threads_are_sampled(self):
+        def export_archive():
+            time.sleep(0.3)
+
+        exporting = asyncio.create_task(asyncio.to_thread(export_archive))
+        result = await SamplingProfiler.profile(0.2)
+        await exporting
+
+        assert f"export_archive {THIS_FILE}" in result.collapsed
+
+    async def test_one_profile_at_a_time(self):
+        profiling = asyncio.create_task(SamplingProfiler.profile(0.2))
+        await asyncio.sleep(0)
+        with pytest.raises(ProfilerBusy):
+            await SamplingProfiler.profile(0.1)
+        await profiling
+
+
+@pytest.mark.asyncio
+class TestProfileCommand:
+
+    @pytest.mark.parametrize("args", ["0", "61", "ten"])
+    async def test_invalid_duration(self, args):
+        message = AsyncMock()
+        with patch.object(Localizator, "get_text", return_value="usage {max_seconds}"):
+            await diagnostics.profile(message, SimpleNamespace(args=args))
+
+        message.answer.assert_awaited_once_with("usage 60")
+        assert not diagnostics._profile_tasks
+
+    async def test_profile_is_sent_as_document(self):
+        message = AsyncMock()
+        with patch.object(Localizator, "get_text", return_value="{seconds}"), \
+                patch.object(diagnostics, "SamplingProfiler") as profiler:
+            profiler.profile = AsyncMock(return_value=SimpleNamespace(
+                seconds=1.02, samples=180, collapsed="MainThread;main (run.py) 180\n"))
+            await diagnostics.profile(message, SimpleNamespace(args="1"))
+            await asyncio.gather(*diagnostics._profile_tasks)
+
+        profiler.profile.assert_awaited_once_with(1)
+        message.answer.assert_awaited_once_with("1")
+        document = message.answer_document.await_args.args[0]
+        assert document.filename.startswith("profile_") and document.filename.endswith(".collapsed.txt")
+        assert document.data == b"MainThread;main (run.py) 180\n"
+        assert message.answer_document.await_args.kwargs["caption"] == "1.0"
+        assert not diagnostics._profile_tasks
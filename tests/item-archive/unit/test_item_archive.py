@@ -0,0 +1,174 @@
+"""
+Tests for moving sold items to items_archive.
+
+Covers:
+- Only sold, delivered items older than the threshold are archived
+- Items of orders awaiting shipment stay live
+- Item ids are never reused once their rows were archived (AUTOINCREMENT)
+- Purchase history and refund queries read the archive transparently
+
+Run with:
+    pytest tests/item-archive/unit/test_item_archive.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, func
+
+from enums.currency import Currency
+from enums.order_status import OrderStatus
+from models.buy import Buy
+from models.buyItem import BuyItem
+from models.category import Category
+from models.item import Item
+from models.item_archive import ItemArchive
+from models.order import Order
+from models.subcategory import Subcategory
+from models.user import User
+from repositories.buy import BuyRepository
+from repositories.item import ItemRepository
+from repositories.item_archive import ItemArchiveRepository
+
+
+@pytest_asyncio.fixture
+async def session_with_sales(db_session):
+    now = datetime.now()
+    old = now - timedelta(days=20)
+    db_session.add_all([
+        Category(id=1, name="Digital"),
+        Subcategory(id=1, name="Gift Cards"),
+        User(id=1, telegram_id=111, telegram_username="buyer"),
+    ])
+    await db_session.flush()
+    db_session.add_all([
+        Order(id=1, user_id=1, status=OrderStatus.PAID, total_price=20.0, currency=Currency.EUR,
+              expires_at=old, paid_at=old),
+        Order(id=2, user_id=1, status=OrderStatus.PAID_AWAITING_SHIPMENT, total_price=10.0, currency=Currency.EUR,
+              expires_at=old, paid_at=old),
+    ])
+    await db_session.flush()
+    db_session.add_all([
+        # Order 1: delivered 20 days ago -> archivable
+        Item(id=1, category_id=1, subcategory_id=1, price=10.0, is_sold=True,
+             description="Card", order_id=1),
+        Item(id=2, category_id=1, subcategory_id=1, price=10.0, is_sold=True,
+             description="Card", order_id=1),
+        # Order 2: awaiting shipment -> stays live
+        Item(id=3, category_id=1, subcategory_id=1, price=10.0, is_sold=True,
+             description="Card", order_id=2, is_physical=True),
+        # Legacy buy without order, bought yesterday -> too young
+        Item(id=4, category_id=1, subcategory_id=1, price=10.0, is_sold=True,
+             description="Card"),
+        # Stock
+        Item(id=5, category_id=1, subcategory_id=1, price=10.0, description="Card"),
+    ])
+    db_session.add_all([
+        Buy(id=1, buyer_id=1, quantity=2, total_price=20.0, buy_datetime=old),
+        Buy(id=2, buyer_id=1, quantity=1, total_price=10.0, buy_datetime=old),
+        Buy(id=3, buyer_id=1, quantity=1, total_price=10.0, buy_datetime=now - timedelta(days=1)),
+    ])
+    await db_session.flush()
+    db_session.add_all([
+        BuyItem(id=1, buy_id=1, item_id=1),
+        BuyItem(id=2, buy_id=1, item_id=2),
+        BuyItem(id=3, buy_id=2, item_id=3),
+        BuyItem(id=4, buy_id=3, item_id=4),
+    ])
+    await db_session.commit()
+    yield db_session
+
+
+async def _archive(session, days=7, batch_size=100) -> int:
+    cutoff = datetime.now() - timedelta(days=days)
+    archived = 0
+    last_id = 0
+    while True:
+        item_ids = await ItemArchiveRepository.get_archivable_ids(cutoff, batch_size, session, last_id)
+        if not item_ids:
+            return archived
+        archived += await ItemArchiveRepository.move_to_archive(item_ids, session)
+        await session.commit()
+        last_id = item_ids[-1]
+
+
+class TestArchiveSelection:
+
+    @pytest.mark.asyncio
+    async def test_archives_only_delivered_items_older_than_threshold(self, session_with_sales):
+        archived = await _archive(session_with_sales)
+
+        assert archived == 2
+        live_ids = (await session_with_sales.execute(select(Item.id).order_by(Item.id))).scalars().all()
+        archived_ids = (await session_with_sales.execute(select(ItemArchive.id))).scalars().all()
+        assert live_ids == [3, 4, 5]
+        assert sorted(archived_ids) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_archived_row_keeps_data(self, session_with_sales):
+        await _archive(session_with_sales)
+
+        archived = await session_with_sales.get(ItemArchive, 1)
+        assert archived.description == "Card"
+        assert archived.order_id == 1
+        assert archived.archived_at is not None
+
+    @pytest.mark.asyncio
+    async def test_batches_until_done(self, session_with_sales):
+        archived = await _archive(session_with_sales, batch_size=1)
+        assert archived == 2
+
+    @pytest.mark.asyncio
+    async def test_item_ids_are_not_reused_after_archive(self, session_with_sales):
+        await _archive(session_with_sales, days=0)
+        # Remove the remaining stock: without AUTOINCREMENT the next id would be max(items.id) + 1
+        await ItemRepository.delete_unsold_by_subcategory_id(1, session_with_sales)
+        await session_with_sales.commit()
+
+        new_item = Item(category_id=1, subcategory_id=1, price=10.0, description="Card")
+        session_with_sales.add(new_item)
+        await session_with_sales.commit()
+
+        archived_ids = (await session_with_sales.execute(select(ItemArchive.id))).scalars().all()
+        assert sorted(archived_ids) == [1, 2, 4]
+        assert new_item.id > 5
+        assert (await ItemRepository.get_by_id(4, session_with_sales)).description == "Card"
+
+    @pytest.mark.asyncio
+    async def test_buy_items_survive_archive(self, session_with_sales):
+        await _archive(session_with_sales)
+
+        count = (await session_with_sales.execute(select(func.count(BuyItem.id)))).scalar()
+        assert count == 4
+
+
+class TestTransparentReads:
+
+    @pytest.mark.asyncio
+    async def test_get_by_buy_id_reads_archive(self, session_with_sales):
+        await _archive(session_with_sales)
+
+        items = await ItemRepository.get_by_buy_id(1, session_with_sales)
+
+        assert [item.id for item in items] == [1, 2]
+        assert all(item.is_sold for item in items)
+
+    @pytest.mark.asyncio
+    async def test_get_by_id_falls_back_to_archive(self, session_with_sales):
+        await _archive(session_with_sales)
+
+        item = await ItemRepository.get_by_id(2, session_with_sales)
+
+        assert item.id == 2
+        assert item.subcategory_id == 1
+
+    @pytest.mark.asyncio
+    async def test_refund_data_reads_archive(self, session_with_sales):
+        await _archive(session_with_sales)
+
+        refund = await BuyRepository.get_refund_data_single(1, session_with_sales)
+        refunds = await BuyRepository.get_refund_data(0, session_with_sales)
+
+        assert refund.subcategory_name == "Gift Cards"
+        assert {r.buy_id for r in refunds} == {1, 2, 3}
@@ -0,0 +1,114 @@
+"""
+Tests for item private data stored in item_payloads.
+
+Covers:
+- add_many writes payloads, catalog/stock reads never carry private_data
+- Compression is only used when it saves space
+- fill_private_data loads payloads for delivery, also for archived items
+- Deleting unsold items removes their payloads
+- Items added after an archive run get new ids (no payload of an archived item is reused)
+
+Run with:
+    pytest tests/item-archive/unit/test_item_payloads.py -v
+"""
+
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, func
+
+from models.category import Category
+from models.item import ItemDTO
+from models.item_payload import ItemPayload
+from models.subcategory import Subcategory
+from repositories.item import ItemRepository
+from repositories.item_archive import ItemArchiveRepository
+from repositories.item_payload import ItemPayloadRepository
+
+LONG_PAYLOAD = "login: user@example.com\npassword: " + "x" * 500
+
+
+@pytest_asyncio.fixture
+async def session_with_items(db_session):
+    db_session.add_all([Category(id=1, name="Digital"), Subcategory(id=1, name="Accounts")])
+    await db_session.flush()
+    await ItemRepository.add_many([
+        ItemDTO(category_id=1, subcategory_id=1, price=10.0, description="Short", private_data="CODE-1"),
+        ItemDTO(category_id=1, subcategory_id=1, price=10.0, description="Long", private_data=LONG_PAYLOAD),
+    ], db_session)
+    await db_session.commit()
+    yield db_session
+
+
+class TestItemPayloads:
+
+    @pytest.mark.asyncio
+    async def test_stock_reads_do_not_load_private_data(self, session_with_items):
+        items = await ItemRepository.get_in_stock(session_with_items)
+
+        assert len(items) == 2
+        assert all(item.private_data is None for item in items)
+
+    @pytest.mark.asyncio
+    async def test_fill_private_data_roundtrip(self, session_with_items):
+        items = await ItemRepository.get_in_stock(session_with_items)
+
+        items = await ItemPayloadRepository.fill_private_data(items, session_with_items)
+
+        assert sorted(item.private_data for item in items) == sorted(["CODE-1", LONG_PAYLOAD])
+
+    @pytest.mark.asyncio
+    async def test_compresses_only_when_smaller(self, session_with_items):
+        payloads = (await session_with_items.execute(select(ItemPayload))).scalars().all()
+        by_size = sorted(payloads, key=lambda p: len(p.data))
+
+        assert by_size[0].is_compressed is False
+        assert by_size[1].is_compressed is True
+        assert len(by_size[1].data) < len(LONG_PAYLOAD)
+
+    @pytest.mark.asyncio
+    async def test_compression_can_be_disabled(self):
+        with patch("config.ITEM_PAYLOAD_COMPRESSION", False):
+            data, is_compressed = ItemPayloadRepository._encode(LONG_PAYLOAD)
+
+        assert is_compressed is False
+        assert data == LONG_PAYLOAD.encode("utf-8")
+
+    @pytest.mark.asyncio
+    async def test_payload_survives_archive(self, session_with_items):
+        await ItemArchiveRepository.move_to_archive([1], session_with_items)
+        await session_with_items.commit()
+
+        item = await ItemRepository.get_by_id(1, session_with_items)
+        [item] = await ItemPayloadRepository.fill_private_data([item], session_with_items)
+
+        assert item.private_data == "CODE-1"
+
+    @pytest.mark.asyncio
+    async def test_delete_unsold_removes_payloads(self, session_with_items):
+        await ItemRepository.delete_unsold_by_subcategory_id(1, session_with_items)
+        await session_with_items.commit()
+
+        count = (await session_with_items.execute(select(func.count(ItemPayload.item_id)))).scalar()
+        assert count == 0
+
+    @pytest.mark.asyncio
+    async def test_add_many_after_archive(self, session_with_items):
+        # Archive item 1 and delete item 2: without AUTOINCREMENT the next item would get id 1 again
+        await ItemArchiveRepository.move_to_archive([1], session_with_items)
+        await ItemRepository.delete_unsold_by_subcategory_id(1, session_with_items)
+        await session_with_items.commit()
+
+        await ItemRepository.add_many([
+            ItemDTO(category_id=1, subcategory_id=1, price=10.0, description="New", private_data="CODE-3"),
+        ], session_with_items)
+        await session_with_items.commit()
+
+        [new_item] = await ItemRepository.get_in_stock(session_with_items)
+        archived_item = await ItemRepository.get_by_id(1, session_with_items)
+        new_item, archived_item = await ItemPayloadRepository.fill_private_data([new_item, archived_item],
+                                                                               session_with_items)
+        assert new_item.id == 3
+        assert new_item.private_data == "CODE-3"
+        assert archived_item.private_data == "CODE-1"
@@ -0,0 +1,202 @@
+"""
+Tests for the Prometheus metrics (utils/metrics.py) and where they are recorded.
+
+Covers:
+- Text exposition format: cumulative histogram buckets, _sum/_count, label escaping
+- QueryCounter counts the statements of the current task only
+- DBSessionMiddleware records latency per router / handler / level and statements per update
+- Bot API calls are timed per method, failures counted by error type
+- Scheduler job runs and the queue depths on the /metrics page
+
+Run with:
+    pytest tests/metrics/unit/test_metrics.py -v
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from aiogram.methods import SendMessage
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+import middleware.database as database_middleware
+import services.metrics as metrics_service
+from enums.currency import Currency
+from enums.order_status import OrderStatus
+from jobs.payment_event_worker import PaymentEventWorker
+from jobs.scheduler import IntervalSchedule, Scheduler
+from middleware.bot_api_metrics import BotApiMetricsMiddleware
+from models.order import Order
+from models.payment_event import PaymentEvent
+from models.user import User
+from services.metrics import MetricsService
+from utils.metrics import (Counter, Gauge, Histogram, MetricsRegistry, UPDATE_DURATION, UPDATE_DB_STATEMENTS,
+                           UPDATE_ERRORS, TELEGRAM_API_DURATION, TELEGRAM_API_ERRORS, JOB_RUNS, JOB_DURATION)
+from utils.query_counter import QueryCounter
+
+
+@pytest.fixture
+def registry():
+    """Metrics created by a test are removed from the registry afterwards."""
+    metrics = list(MetricsRegistry._metrics)
+    yield
+    MetricsRegistry._metrics = metrics
+
+
+@pytest_asyncio.fixture
+async def session_factory(db_engine):
+    QueryCounter.instrument(db_engine)
+    session_maker = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def test_session():
+        async with session_maker() as session:
+            yield session
+
+    yield test_session
+
+
+class TestExpositionFormat:
+
+    def test_histogram(self, registry):
+        histogram = Histogram("test_seconds", "Test latency", ("handler",), buckets=(0.1, 1))
+        histogram.observe(0.05, "start")
+        histogram.observe(0.5, "start")
+        histogram.observe(5, "start")
+
+        assert histogram.render() == [
+            "# HELP test_seconds Test latency",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{handler="start",le="0.1"} 1',
+            'test_seconds_bucket{handler="start",le="1"} 2',
+            'test_seconds_bucket{handler="start",le="+Inf"} 3',
+            'test_seconds_sum{handler="start"} 5.55',
+            'test_seconds_count{handler="start"} 3',
+        ]
+
+    def test_counter_gauge_and_escaping(self, registry):
+        counter = Counter("test_total", "Test counter", ("key",))
+        gauge = Gauge("test_depth", "Test gauge")
+        counter.inc('say "hi"\n')
+        counter.inc('say "hi"\n', amount=2)
+        gauge.set(7)
+
+        rendered = MetricsRegistry.render()
+
+        assert 'test_total{key="say \\"hi\\"\\n"} 3\n' in rendered
+        assert "# TYPE test_depth gauge\ntest_depth 7\n" in rendered
+
+
+@pytest.mark.asyncio
+class TestQueryCounter:
+
+    async def test_counts_statements_of_the_current_task(self, session_factory):
+        started = asyncio.Event()
+
+        async def other_task():
+            # Started before the update: runs concurrently, but isn't part of it
+            await started.wait()
+            async with session_factory() as session:
+                for _ in range(5):
+                    await session.execute(text("SELECT 1"))
+
+        task = asyncio.create_task(other_task())
+        with QueryCounter.track() as queries:
+            started.set()
+            async with session_factory() as session:
+                await session.execute(text("SELECT 1"))
+                await session.execute(text("SELECT 2"))
+            await task
+
+        assert queries.statements == 2
+        assert queries.seconds > 0
+
+    async def test_failed_statement(self, session_factory):
+        with QueryCounter.track() as queries:
+            async with session_factory() as session:
+                with pytest.raises(Exception):
+                    await session.execute(text("SELECT * FROM missing_table"))
+                await session.execute(text("SELECT 1"))
+
+        assert queries.statements == 1
+
+
+@pytest.mark.asyncio
+class TestUpdateMetrics:
+
+    async def test_latency_and_statements_per_update(self, session_factory):
+        async def show_statistics(event, data):
+            await data["session"].execute(text("SELECT 1"))
+            await data["session"].execute(text("SELECT 2"))
+            return "handled"
+
+        UPDATE_DURATION.clear()
+        UPDATE_DB_STATEMENTS.clear()
+        data = {"handler": SimpleNamespace(callback=show_statistics), "callback_data": SimpleNamespace(level=2)}
+        with patch.object(database_middleware, "get_db_session", session_factory):
+            assert await database_middleware.DBSessionMiddleware()(show_statistics, None, data) == "handled"
+
+        labels = (__name__, "show_statistics")
+        assert UPDATE_DURATION._values[labels + (2,)][-2:] != [0, 0.0]
+        statements = UPDATE_DB_STATEMENTS._values[labels]
+        assert statements[-1] == 2  # sum
+
+    async def test_failed_update(self, session_factory):
+        async def start(event, data):
+            raise RuntimeError("boom")
+
+        UPDATE_ERRORS.clear()
+        UPDATE_DURATION.clear()
+        data = {"handler": SimpleNamespace(callback=start)}
+        with patch.object(database_middleware, "get_db_session", session_factory):
+            with pytest.raises(RuntimeError):
+                await database_middleware.DBSessionMiddleware()(start, None, data)
+
+        assert UPDATE_ERRORS._values == {(__name__, "start"): 1}
+        assert list(UPDATE_DURATION._values) == [(__name__, "start", "")]
+
+    async def test_bot_api_calls(self):
+        TELEGRAM_API_DURATION.clear()
+        TELEGRAM_API_ERRORS.clear()
+        middleware = BotApiMetricsMiddleware()
+        method = SendMessage(chat_id=1, text="hi")
+
+        await middleware(AsyncMock(return_value="ok"), None, method)
+        with pytest.raises(TimeoutError):
+            await middleware(AsyncMock(side_effect=TimeoutError()), None, method)
+
+        assert sum(TELEGRAM_API_DURATION._values[("SendMessage",)][:-1]) == 2
+        assert TELEGRAM_API_ERRORS._values == {("SendMessage", "TimeoutError"): 1}
+
+    async def test_scheduler_job_runs(self):
+        async def failing():
+            raise RuntimeError("boom")
+
+        JOB_RUNS.clear()
+        JOB_DURATION.clear()
+        scheduler = Scheduler()
+        scheduler.add_job("metrics_test", failing, IntervalSchedule(60))
+        await scheduler.run_job("metrics_test")
+
+        assert JOB_RUNS._values == {("metrics_test", "failed"): 1}
+        assert ("metrics_test",) in JOB_DURATION._values
+
+    async def test_metrics_page(self, session_factory, db_session):
+        db_session.add(User(id=1, telegram_id=111))
+        db_session.add_all([Order(user_id=1, status=OrderStatus.PAID_AWAITING_SHIPMENT, total_price=10.0,
+                                  currency=Currency.EUR, expires_at=datetime.now()) for _ in range(3)])
+        db_session.add(PaymentEvent(body="{}", attempts=0))
+        await db_session.commit()
+
+        with patch.object(metrics_service, "get_db_session", session_factory):
+            page = await MetricsService.render(Scheduler(), PaymentEventWorker())
+
+        assert 'queue_depth{queue="shipping"} 3\n' in page
+        assert 'queue_depth{queue="payment_events"} 1\n' in page
+        assert 'queue_depth{queue="payment_events_in_flight"} 0\n' in page
+        assert "scheduler_leader 1\n" in page
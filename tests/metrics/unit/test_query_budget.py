@@ -0,0 +1,121 @@
+"""
+Tests for the per-update query budget and N+1 detection (utils/query_counter.py, DBSessionMiddleware).
+
+Covers:
+- Statements are grouped by shape; IN lists of different lengths are one shape
+- A query per row (NewItemsManager.create_text_of_items_msg) is reported as repeated shape
+- QueryCounter.assert_budget fails flows over their statement or repeat budget
+- DBSessionMiddleware logs updates over QUERY_BUDGET_PER_UPDATE (or @query_budget) and N+1 statements
+
+Run with:
+    pytest tests/metrics/unit/test_query_budget.py -v
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+import middleware.database as database_middleware
+from models.category import Category
+from models.item import Item, ItemDTO
+from models.subcategory import Subcategory
+from utils.localizator import Localizator
+from utils.metrics import UPDATE_OVER_QUERY_BUDGET, UPDATE_REPEATED_STATEMENTS
+from utils.new_items_manager import NewItemsManager
+from utils.query_counter import QueryCounter, QueryBudgetExceeded
+
+
+@pytest_asyncio.fixture
+async def session_factory(db_engine):
+    """Instrumented engine with 6 subcategories of one category."""
+    QueryCounter.instrument(db_engine)
+    session_maker = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as session:
+        session.add(Category(id=1, name="category"))
+        session.add_all([Subcategory(id=subcategory_id, name=f"subcategory {subcategory_id}")
+                         for subcategory_id in range(1, 7)])
+        await session.commit()
+
+    @asynccontextmanager
+    async def test_session():
+        async with session_maker() as session:
+            yield session
+
+    yield test_session
+
+
+def _items() -> list[ItemDTO]:
+    return [ItemDTO(category_id=1, subcategory_id=subcategory_id, price=10.0) for subcategory_id in range(1, 7)]
+
+
+@pytest.mark.asyncio
+class TestQueryBudget:
+
+    async def test_in_lists_are_one_shape(self, session_factory):
+        with QueryCounter.track() as queries:
+            async with session_factory() as session:
+                for ids in ([1], [1, 2], [1, 2, 3], [1, 2, 3, 4]):
+                    await session.execute(select(Item.id).where(Item.id.in_(ids)))
+
+        # One id renders as "IN (?)", two or more as the same expanded shape
+        assert sorted(queries.shapes.values()) == [1, 3]
+
+    async def test_query_per_row_is_reported(self, session_factory):
+        with QueryCounter.track() as queries, patch.object(Localizator, "get_text", return_value=""), \
+                patch.object(Localizator, "get_currency_symbol", return_value="€"):
+            async with session_factory() as session:
+                await NewItemsManager.create_text_of_items_msg(_items(), True, session)
+
+        repeated = queries.repeated(5)
+        assert [count for _, count in repeated] == [6, 6]
+        assert any("FROM categories" in shape for shape, _ in repeated)
+        assert "6x SELECT" in queries.report()
+
+    async def test_assert_budget(self, session_factory):
+        async with session_factory() as session:
+            with QueryCounter.assert_budget(2) as queries:
+                await session.execute(text("SELECT 1"))
+                await session.execute(text("SELECT 2"))
+            assert queries.statements == 2
+
+            with pytest.raises(QueryBudgetExceeded, match="Query budget of 1 exceeded"):
+                with QueryCounter.assert_budget(1):
+                    await session.execute(text("SELECT 1"))
+                    await session.execute(text("SELECT 2"))
+
+            with pytest.raises(QueryBudgetExceeded, match="repeated more than 1 times"):
+                with QueryCounter.assert_budget(100, max_repeats=1):
+                    for _ in range(2):
+                        await session.execute(text("SELECT 1"))
+
+    async def test_middleware_logs_updates_over_budget(self, session_factory, caplog):
+        async def show_items(event, data):
+            for subcategory_id in range(1, 7):
+                await data["session"].execute(select(Subcategory).where(Subcategory.id == subcategory_id))
+
+        @database_middleware.query_budget(10)
+        async def show_items_budgeted(event, data):
+            await show_items(event, data)
+
+        UPDATE_OVER_QUERY_BUDGET.clear()
+        UPDATE_REPEATED_STATEMENTS.clear()
+        with patch.object(database_middleware, "get_db_session", session_factory), \
+                patch.object(database_middleware.config, "QUERY_BUDGET_PER_UPDATE", 3), \
+                caplog.at_level(logging.WARNING):
+            middleware = database_middleware.DBSessionMiddleware()
+            await middleware(show_items, None, {"handler": SimpleNamespace(callback=show_items)})
+            await middleware(show_items_budgeted, None, {"handler": SimpleNamespace(callback=show_items_budgeted)})
+
+        assert UPDATE_OVER_QUERY_BUDGET._values == {(__name__, "show_items"): 1}
+        assert UPDATE_REPEATED_STATEMENTS._values == {(__name__, "show_items"): 1,
+                                                      (__name__, "show_items_budgeted"): 1}
+        over_budget = [record.message for record in caplog.records if "query budget" in record.message]
+        assert len(over_budget) == 1
+        assert "show_items (level ) exceeded its query budget of 3: 6 statements" in over_budget[0]
+        assert "6x SELECT subcategories" in over_budget[0]
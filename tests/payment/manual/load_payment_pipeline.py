@@ -0,0 +1,231 @@
+"""
+===============================================================================
+Payment Pipeline Load Driver - orders, invoices and callbacks against the mock
+===============================================================================
+
+DESCRIPTION:
+    Drives the bot's payment pipeline end to end against mock_kryptoexpress.py:
+
+      1. Seeds --orders users, each with one digital item in the cart
+         (own database: data/<DB_NAME>, recreated on every run)
+      2. Checks out --concurrency carts at a time: OrderService reserves the
+         item and creates the order, InvoiceService creates the payment at the
+         mock provider (POST /api/payment)
+      3. Receives the mock's signed callbacks on the bot's webhook endpoint
+         (processing_router, served in-process on --port) and processes them
+         with PaymentEventWorker, as the bot does
+      4. Waits until every payment's callback is processed (or --timeout)
+
+    and reports
+      - checkout latency (order + invoice, p50/p95/p99/max) and checkouts/sec
+      - payment latency: invoice created -> callback processed (polled every
+        POLL_INTERVAL_SECONDS, so +- 50 ms)
+      - processed payments/sec, order status breakdown and the mock's
+        request / callback counters
+
+    Telegram notifications fail (no real TOKEN) and are logged, like in an
+    offline bot. No running bot required.
+
+USAGE:
+    From project root:
+        # Terminal 1: mock provider, calling back the driver's webhook
+        $ python tests/payment/manual/mock_kryptoexpress.py --port 8090 --secret mock-secret \\
+              --pay-delay 1 --callback-url http://127.0.0.1:5001/cryptoprocessing/event
+
+        # Terminal 2: 200 orders, 20 concurrent checkouts
+        $ python tests/payment/manual/load_payment_pipeline.py --orders 200 --concurrency 20
+
+    Run the mock with --latency-ms / --error-rate / --mix to see how provider
+    latency, API errors and under-/overpayments show in the numbers.
+===============================================================================
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+# Minimal TEST-mode configuration (no webhook, no ngrok), pointed at the mock provider
+os.environ.setdefault("RUNTIME_ENVIRONMENT", "TEST")
+os.environ.setdefault("ADMIN_ID_LIST", "0")
+os.environ.setdefault("PAGE_ENTRIES", "8")
+os.environ.setdefault("CURRENCY", "EUR")
+os.environ.setdefault("BOT_LANGUAGE", "en")
+os.environ.setdefault("DB_NAME", "load_payment_pipeline.db")
+os.environ.setdefault("TOKEN", "123456:load-payment-pipeline")
+os.environ.setdefault("KRYPTO_EXPRESS_API_URL", "http://127.0.0.1:8090/api")
+os.environ.setdefault("KRYPTO_EXPRESS_API_KEY", "mock-key")
+os.environ.setdefault("KRYPTO_EXPRESS_API_SECRET", "mock-secret")
+os.environ.setdefault("REFERENCE_CODE_SECRET", "load-payment-pipeline")
+
+import config  # noqa: E402
+
+# TEST mode has no webhook path; the driver serves the webhook endpoint itself
+config.WEBHOOK_PATH = "/"
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from crypto_api.CryptoApiWrapper import CryptoApiWrapper  # noqa: E402
+from crypto_api.http_client import HttpClient  # noqa: E402
+import db  # noqa: E402
+from db import get_db_session, session_commit, create_db_and_tables  # noqa: E402
+from enums.cryptocurrency import Cryptocurrency  # noqa: E402
+from jobs.payment_event_worker import PaymentEventWorker  # noqa: E402
+from models.cart import Cart, CartDTO  # noqa: E402
+from models.cartItem import CartItem  # noqa: E402
+from models.category import Category  # noqa: E402
+from models.item import Item  # noqa: E402
+from models.order import Order  # noqa: E402
+from models.processed_payment_event import ProcessedPaymentEvent  # noqa: E402
+from models.shipping_address import ShippingAddress  # noqa: E402,F401  (Order relationship)
+from models.subcategory import Subcategory  # noqa: E402
+from models.user import User  # noqa: E402
+from processing.processing import processing_router  # noqa: E402
+from repositories.cartItem import CartItemRepository  # noqa: E402
+from services.invoice import InvoiceService  # noqa: E402
+from services.order import OrderService  # noqa: E402
+from mock_kryptoexpress import percentile  # noqa: E402
+
+POLL_INTERVAL_SECONDS = 0.05
+ITEM_PRICE = 10.0
+
+
+async def seed(orders: int) -> list[int]:
+    """Fresh database with one cart (one item) per user; returns the user ids."""
+    db_file = os.path.join("data", config.DB_NAME)
+    if os.path.exists(db_file):
+        os.remove(db_file)
+    await create_db_and_tables()
+
+    async with get_db_session() as session:
+        category = Category(name="Load Test")
+        subcategory = Subcategory(name="Gift Card")
+        session.add_all([category, subcategory])
+        await session.flush()
+        users = [User(telegram_id=100_000 + number, telegram_username=f"load_{number}") for number in range(orders)]
+        session.add_all(users)
+        session.add_all(Item(category_id=category.id, subcategory_id=subcategory.id, price=ITEM_PRICE,
+                             description="Load test item") for _ in range(orders))
+        await session.flush()
+        carts = [Cart(user_id=user.id) for user in users]
+        session.add_all(carts)
+        await session.flush()
+        session.add_all(CartItem(cart_id=cart.id, category_id=category.id, subcategory_id=subcategory.id, quantity=1)
+                        for cart in carts)
+        await session_commit(session)
+        return [user.id for user in users]
+
+
+async def checkout(user_id: int, crypto: Cryptocurrency) -> tuple[int, float, float]:
+    """Order + invoice for the user's cart; returns (payment id, checkout seconds, invoice created at)."""
+    started = time.perf_counter()
+    async with get_db_session() as session:
+        cart_items = await CartItemRepository.get_all_by_user_id(user_id, session)
+        order, _, _ = await OrderService.orchestrate_order_creation(CartDTO(user_id=user_id, items=cart_items), session)
+        invoice = await InvoiceService.create_invoice_with_kryptoexpress(
+            order.id, order.total_price, config.CURRENCY, crypto, session
+        )
+        await session_commit(session)
+    created_at = time.perf_counter()
+    return invoice.payment_processing_id, created_at - started, created_at
+
+
+async def wait_for_callbacks(created_at: dict[int, float], timeout: float) -> dict[int, float]:
+    """Polls processed_payment_events; returns payment id -> seconds from invoice to processed callback."""
+    pending = set(created_at)
+    latencies = {}
+    deadline = time.perf_counter() + timeout
+    while pending and time.perf_counter() < deadline:
+        async with get_db_session() as session:
+            result = await session.execute(select(ProcessedPaymentEvent.payment_processing_id)
+                                           .where(ProcessedPaymentEvent.payment_processing_id.in_(pending)))
+            processed = set(result.scalars().all())
+        now = time.perf_counter()
+        for payment_id in processed:
+            latencies[payment_id] = now - created_at[payment_id]
+        pending -= processed
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+    return latencies
+
+
+def print_latencies(name: str, seconds: list[float]):
+    values = [percentile(seconds, percent) for percent in (50, 95, 99)] + [max(seconds, default=None)]
+    print(f"{name:<12} " + " ".join(f"{value * 1000:>9.0f}" if value is not None else f"{'-':>9}"
+                                     for value in values))
+
+
+async def main(orders: int, concurrency: int, port: int, timeout: float, crypto: Cryptocurrency):
+    db.engine.sync_engine.echo = False
+    user_ids = await seed(orders)
+
+    app = FastAPI()
+    app.include_router(processing_router)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    worker = PaymentEventWorker(
+        concurrency=config.PAYMENT_EVENT_WORKER_CONCURRENCY,
+        max_attempts=config.PAYMENT_EVENT_MAX_ATTEMPTS,
+        retry_base_seconds=config.PAYMENT_EVENT_RETRY_BASE_SECONDS,
+        retry_max_seconds=config.PAYMENT_EVENT_RETRY_MAX_SECONDS
+    )
+    await worker.start()
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited_checkout(user_id: int):
+        async with semaphore:
+            return await checkout(user_id, crypto)
+
+    print(f"{orders} orders, {concurrency} concurrent checkouts, webhook on 127.0.0.1:{port}\n")
+    started = time.perf_counter()
+    results = await asyncio.gather(*(limited_checkout(user_id) for user_id in user_ids), return_exceptions=True)
+    checkout_seconds = time.perf_counter() - started
+    failures = [result for result in results if isinstance(result, BaseException)]
+    succeeded = [result for result in results if not isinstance(result, BaseException)]
+    created_at = {payment_id: created for payment_id, _, created in succeeded}
+
+    latencies = await wait_for_callbacks(created_at, timeout)
+    total_seconds = time.perf_counter() - started
+    await worker.stop()
+    server.should_exit = True
+    await server_task
+
+    async with get_db_session() as session:
+        statuses = Counter((await session.execute(select(Order.status))).scalars().all())
+    mock_stats = await CryptoApiWrapper.fetch_api_request(
+        config.KRYPTO_EXPRESS_API_URL.rsplit("/api", 1)[0] + "/_mock/stats", method="GET")
+    await HttpClient.close()
+
+    print(f"Checkouts:  {len(succeeded)} ok, {len(failures)} failed, "
+          f"{len(succeeded) / checkout_seconds:.1f}/sec")
+    for failure in Counter(f"{type(failure).__name__}: {failure}" for failure in failures).most_common(3):
+        print(f"  {failure[1]}x {failure[0]}")
+    print(f"Payments:   {len(latencies)} processed, {len(created_at) - len(latencies)} without callback "
+          f"after {timeout:.0f}s, {len(latencies) / total_seconds:.1f}/sec")
+    print(f"\n{'ms':<12} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    print("-" * 52)
+    print_latencies("checkout", [seconds for _, seconds, _ in succeeded])
+    print_latencies("payment", list(latencies.values()))
+    print(f"\nOrder status: " + ", ".join(f"{status.value}={count}" for status, count in statuses.most_common()))
+    print(f"Mock: {mock_stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load the payment pipeline against the KryptoExpress mock")
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=5001, help="Port of the webhook endpoint (mock --callback-url)")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for outstanding callbacks")
+    parser.add_argument("--crypto", type=Cryptocurrency, default=Cryptocurrency.BTC)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(args.orders, args.concurrency, args.port, args.timeout, args.crypto))
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+===============================================================================
+KryptoExpress Mock Server - local stand-in for load and latency testing
+===============================================================================
+
+DESCRIPTION:
+    Serves the part of the KryptoExpress API the bot uses and pays the created
+    payments by itself, with HMAC-signed webhook callbacks - like the real
+    provider, but offline and with configurable behaviour:
+
+      - POST /api/payment                 create payment (invoice / top-up)
+      - GET  /api/payment?page=&size=     payment listing, newest first (reconciliation)
+      - GET  /api/payment/{id}            single payment
+      - GET  /api/wallet                  balances (paid payments are credited)
+      - POST /api/wallet/withdrawal       withdrawal (onlyCalculate or execute)
+
+    Each created payment gets a behaviour, drawn from --mix:
+      - exact:  the required amount is paid after --pay-delay seconds
+      - under:  --under-ratio of the amount is paid
+      - over:   --over-ratio of the amount is paid
+      - late:   the exact amount is paid after --late-delay seconds
+                (set it beyond ORDER_TIMEOUT_MINUTES to hit the late payment path)
+      - none:   never paid; an isPaid=false callback is sent on expiry
+
+    Every API request is delayed by --latency-ms (+- --latency-jitter-ms) and fails
+    with HTTP 503 with probability --error-rate. Callbacks are signed like KryptoExpress
+    (X-Signature: HMAC-SHA512 of the body without whitespace, keyed by --secret) and
+    retried up to --callback-retries times until the bot answers 2xx.
+
+    Not part of the API (no latency, no errors):
+      - GET  /_mock/stats                 request / callback counters and latencies
+      - POST /_mock/payment/{id}/pay      pay now: ?mode=exact|under|over|none
+
+USAGE:
+    From project root:
+        $ python tests/payment/manual/mock_kryptoexpress.py --port 8090 --secret mock-secret \\
+              --callback-url http://localhost:5001/webhook/cryptoprocessing/event
+
+        # Realistic provider: 150ms +- 50ms latency, 2% errors, mixed payment behaviour
+        $ python tests/payment/manual/mock_kryptoexpress.py --latency-ms 150 --latency-jitter-ms 50 \\
+              --error-rate 0.02 --mix exact=80,under=5,over=5,late=5,none=5
+
+    Bot .env (RUNTIME_ENVIRONMENT=TEST has no WEBHOOK_URL, hence --callback-url):
+        KRYPTO_EXPRESS_API_URL=http://127.0.0.1:8090/api
+        KRYPTO_EXPRESS_API_KEY=mock-key
+        KRYPTO_EXPRESS_API_SECRET=mock-secret
+
+    Only aiohttp is required (already a bot dependency); the bot itself is not imported.
+===============================================================================
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import re
+import time
+from dataclasses import dataclass, field
+
+from aiohttp import web, ClientSession, ClientTimeout, ClientError
+
+MODES = ("exact", "under", "over", "late", "none")
+
+# Fiat price per coin (EUR), as in InvoiceService._generate_mock_payment_response
+PRICES = {
+    "BTC": 50000.0,
+    "ETH": 3000.0,
+    "LTC": 100.0,
+    "SOL": 150.0,
+    "BNB": 400.0,
+    "USDT_TRC20": 1.0,
+    "USDT_ERC20": 1.0,
+    "USDC_ERC20": 1.0,
+}
+
+
+@dataclass
+class MockSettings:
+    api_key: str = "mock-key"
+    secret: str = "mock-secret"
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    mix: dict[str, float] = field(default_factory=lambda: {"exact": 1.0})
+    pay_delay: float = 2.0
+    late_delay: float = 60.0
+    under_ratio: float = 0.9
+    over_ratio: float = 1.1
+    expire_minutes: int = 30
+    callback_url: str | None = None
+    callback_retries: int = 5
+    seed: int | None = None
+
+
+def sign(body: bytes, secret: str) -> str:
+    """X-Signature of a callback body, computed like the bot verifies it (processing/processing.py)."""
+    return hmac.new(secret.encode("utf-8"), re.sub(rb'\s+', b'', body), hashlib.sha512).hexdigest()
+
+
+def percentile(values: list[float], percent: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class MockKryptoExpress:
+    """State of the mock provider: payments, wallet, counters and scheduled callbacks."""
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self.random = random.Random(settings.seed)
+        self.payments: dict[int, dict] = {}
+        self.behaviours: dict[int, str] = {}
+        self.wallet: dict[str, float] = {}
+        self.next_id = 100000
+        self.requests: dict[str, int] = {}
+        self.injected_errors = 0
+        self.callbacks_sent = 0
+        self.callbacks_failed = 0
+        self.callback_seconds: list[float] = []
+        self._tasks: set[asyncio.Task] = set()
+        self._client: ClientSession | None = None
+
+    # --- API -----------------------------------------------------------------
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.provider_middleware])
+        app.router.add_post("/api/payment", self.create_payment)
+        app.router.add_get("/api/payment", self.list_payments)
+        app.router.add_get("/api/payment/{payment_id}", self.get_payment)
+        app.router.add_get("/api/wallet", self.get_wallet)
+        app.router.add_post("/api/wallet/withdrawal", self.withdrawal)
+        app.router.add_get("/_mock/stats", self.get_stats)
+        app.router.add_post("/_mock/payment/{payment_id}/pay", self.pay_now)
+        app.on_cleanup.append(self.close)
+        return app
+
+    @web.middleware
+    async def provider_middleware(self, request: web.Request, handler):
+        if request.path.startswith("/_mock/"):
+            return await handler(request)
+
+        endpoint = f"{request.method} {request.match_info.route.resource.canonical}" \
+            if request.match_info.route.resource else f"{request.method} {request.path}"
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+        latency = self.settings.latency_ms + self.random.uniform(-1, 1) * self.settings.latency_jitter_ms
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+        if self.random.random() < self.settings.error_rate:
+            self.injected_errors += 1
+            return web.json_response({"error": "Service temporarily unavailable (injected)"}, status=503)
+        if request.headers.get("X-Api-Key") != self.settings.api_key:
+            return web.json_response({"error": "Invalid API key"}, status=401)
+        return await handler(request)
+
+    async def create_payment(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        crypto = body["cryptoCurrency"]
+        if crypto not in PRICES:
+            return web.json_response({"error": f"Unsupported cryptocurrency {crypto}"}, status=400)
+
+        self.next_id += 1
+        now_ms = int(time.time() * 1000)
+        payment = {
+            "id": self.next_id,
+            "paymentType": body.get("paymentType", "DEPOSIT"),
+            "fiatCurrency": body["fiatCurrency"],
+            "fiatAmount": body.get("fiatAmount"),
+            "cryptoAmount": round(body["fiatAmount"] / PRICES[crypto], 8) if body.get("fiatAmount") else None,
+            "cryptoCurrency": crypto,
+            "userId": body.get("userId"),
+            "address": f"mock{crypto.lower()}{self.next_id}{self.random.getrandbits(48):012x}",
+            "createDatetime": now_ms,
+            "expireDatetime": now_ms + self.settings.expire_minutes * 60 * 1000,
+            "isPaid": False,
+            "isWithdrawn": False,
+            "hash": None,
+        }
+        self.payments[payment["id"]] = payment
+
+        callback_url = self.settings.callback_url or body.get("callbackUrl")
+        mode = self.random.choices(list(self.settings.mix), weights=list(self.settings.mix.values()))[0]
+        self.behaviours[payment["id"]] = mode
+        delay = self.settings.late_delay if mode == "late" \
+            else self.settings.expire_minutes * 60 if mode == "none" \
+            else self.settings.pay_delay
+        if callback_url:
+            self._spawn(self._pay_later(payment["id"], mode, delay, callback_url))
+        return web.json_response(payment)
+
+    async def list_payments(self, request: web.Request) -> web.Response:
+        page = int(request.query.get("page", 0))
+        size = int(request.query.get("size", 100))
+        newest_first = sorted(self.payments.values(), key=lambda payment: payment["id"], reverse=True)
+        return web.json_response(newest_first[page * size:(page + 1) * size])
+
+    async def get_payment(self, request: web.Request) -> web.Response:
+        payment = self.payments.get(int(request.match_info["payment_id"]))
+        if payment is None:
+            return web.json_response({"error": "Payment not found"}, status=404)
+        return web.json_response(payment)
+
+    async def get_wallet(self, request: web.Request) -> web.Response:
+        return web.json_response({crypto: round(self.wallet.get(crypto, 0.0), 8) for crypto in PRICES})
+
+    async def withdrawal(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        crypto = body["cryptoCurrency"]
+        total = round(self.wallet.get(crypto, 0.0), 8)
+        if total <= 0:
+            return web.json_response({"error": f"No {crypto} balance"}, status=400)
+
+        blockchain_fee = round(total * 0.005, 8)
+        service_fee = round(total * 0.01, 8)
+        tx_ids = []
+        if not body.get("onlyCalculate"):
+            self.wallet[crypto] = 0.0
+            tx_ids = [f"{self.random.getrandbits(256):064x}"]
+        return web.json_response({**body,
+                                  "txIdList": tx_ids,
+                                  "totalWithdrawalAmount": total,
+                                  "blockchainFeeAmount": blockchain_fee,
+                                  "serviceFeeAmount": service_fee,
+                                  "receivingAmount": round(total - blockchain_fee - service_fee, 8)})
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    async def pay_now(self, request: web.Request) -> web.Response:
+        payment_id = int(request.match_info["payment_id"])
+        if payment_id not in self.payments:
+            return web.json_response({"error": "Payment not found"}, status=404)
+        mode = request.query.get("mode", "exact")
+        callback_url = request.query.get("callbackUrl") or self.settings.callback_url
+        await self._pay(payment_id, mode, callback_url)
+        return web.json_response(self.payments[payment_id])
+
+    # --- Payment behaviour and callbacks --------------------------------------
+
+    def stats(self) -> dict:
+        behaviours = {mode: list(self.behaviours.values()).count(mode) for mode in MODES}
+        return {
+            "payments": len(self.payments),
+            "paid": sum(1 for payment in self.payments.values() if payment["isPaid"]),
+            "behaviours": behaviours,
+            "requests": self.requests,
+            "injected_errors": self.injected_errors,
+            "callbacks_sent": self.callbacks_sent,
+            "callbacks_failed": self.callbacks_failed,
+            "callback_ms": {
+                "p50": self._ms(percentile(self.callback_seconds, 50)),
+                "p95": self._ms(percentile(self.callback_seconds, 95)),
+                "p99": self._ms(percentile(self.callback_seconds, 99)),
+                "max": self._ms(max(self.callback_seconds, default=None)),
+            },
+            "pending_callbacks": len(self._tasks),
+        }
+
+    @staticmethod
+    def _ms(seconds: float | None) -> float | None:
+        return round(seconds * 1000, 1) if seconds is not None else None
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _pay_later(self, payment_id: int, mode: str, delay: float, callback_url: str):
+        await asyncio.sleep(delay)
+        await self._pay(payment_id, mode, callback_url)
+
+    async def _pay(self, payment_id: int, mode: str, callback_url: str | None):
+        payment = self.payments[payment_id]
+        if mode != "none" and not payment["isPaid"]:
+            ratio = {"under": self.settings.under_ratio, "over": self.settings.over_ratio}.get(mode, 1.0)
+            payment["cryptoAmount"] = round(payment["cryptoAmount"] * ratio, 8)
+            payment["isPaid"] = True
+            payment["hash"] = f"{self.random.getrandbits(256):064x}"
+            self.wallet[payment["cryptoCurrency"]] = self.wallet.get(payment["cryptoCurrency"], 0.0) \
+                + payment["cryptoAmount"]
+        if callback_url:
+            await self.send_callback(payment, callback_url)
+
+    async def send_callback(self, payment: dict, callback_url: str) -> bool:
+        """POSTs the payment to the bot (signed), retrying with backoff until it answers 2xx."""
+        body = json.dumps(payment, separators=(",", ":")).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.settings.secret:
+            headers["X-Signature"] = sign(body, self.settings.secret)
+
+        if self._client is None or self._client.closed:
+            self._client = ClientSession(timeout=ClientTimeout(total=30))
+        for attempt in range(self.settings.callback_retries + 1):
+            started = time.monotonic()
+            try:
+                async with self._client.post(callback_url, data=body, headers=headers) as response:
+                    await response.read()
+                    if response.status < 300:
+                        self.callbacks_sent += 1
+                        self.callback_seconds.append(time.monotonic() - started)
+                        return True
+            except (ClientError, asyncio.TimeoutError):
+                pass
+            await asyncio.sleep(min(2 ** attempt, 60))
+        self.callbacks_failed += 1
+        return False
+
+    async def close(self, app: web.Application = None):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._client is not None:
+            await self._client.close()
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        mode, _, weight = part.partition("=")
+        if mode not in MODES:
+            raise argparse.ArgumentTypeError(f"Unknown payment behaviour '{mode}' (one of {', '.join(MODES)})")
+        mix[mode] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local KryptoExpress mock server",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--api-key", default="mock-key", help="Expected X-Api-Key (KRYPTO_EXPRESS_API_KEY)")
+    parser.add_argument("--secret", default="mock-secret",
+                        help="Callback HMAC key (KRYPTO_EXPRESS_API_SECRET); empty: unsigned callbacks")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean latency of every API request")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Uniform jitter around the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of API requests failing with 503")
+    parser.add_argument("--mix", type=parse_mix, default={"exact": 1.0},
+                        help="Payment behaviours with weights, e.g. exact=80,under=10,over=5,late=5")
+    parser.add_argument("--pay-delay", type=float, default=2.0, help="Seconds until a payment is paid")
+    parser.add_argument("--late-delay", type=float, default=60.0, help="Seconds until a 'late' payment is paid")
+    parser.add_argument("--under-ratio", type=float, default=0.9, help="Paid share of 'under' payments")
+    parser.add_argument("--over-ratio", type=float, default=1.1, help="Paid share of 'over' payments")
+    parser.add_argument("--expire-minutes", type=int, default=30, help="Payment expiry (provider side)")
+    parser.add_argument("--callback-url", default=None, help="Overrides the callbackUrl sent by the bot")
+    parser.add_argument("--callback-retries", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=None, help="Random seed (reproducible runs)")
+    args = parser.parse_args()
+
+    mock = MockKryptoExpress(MockSettings(
+        api_key=args.api_key,
+        secret=args.secret,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        mix=args.mix,
+        pay_delay=args.pay_delay,
+        late_delay=args.late_delay,
+        under_ratio=args.under_ratio,
+        over_ratio=args.over_ratio,
+        expire_minutes=args.expire_minutes,
+        callback_url=args.callback_url,
+        callback_retries=args.callback_retries,
+        seed=args.seed,
+    ))
+    print(f"KryptoExpress mock on http://{args.host}:{args.port}/api (stats: /_mock/stats)")
+    web.run_app(mock.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Tests for the local KryptoExpress mock server (tests/payment/manual/mock_kryptoexpress.py).
+
+Covers:
+- Payments are created, paid and reported with callbacks the bot's HMAC check accepts
+- Payment behaviours: exact, under, over, none (expiry callback)
+- Injected errors and the API key check
+- The bot's API client (payment listing, wallet, withdrawal) works against the mock
+
+Run with:
+    pytest tests/payment/unit/test_mock_kryptoexpress.py -v
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+import config
+from crypto_api.CryptoApiWrapper import CryptoApiWrapper
+from crypto_api.http_client import HttpClient
+from enums.cryptocurrency import Cryptocurrency
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'manual')))
+from mock_kryptoexpress import MockKryptoExpress, MockSettings  # noqa: E402
+
+
+async def _serve(app: web.Application) -> tuple[web.AppRunner, str]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+@pytest_asyncio.fixture
+async def bot_webhook():
+    """Stands in for the bot's webhook endpoint; verifies signatures with the bot's own check."""
+    from processing import processing
+    security_check = getattr(processing, "__security_check")
+    callbacks = []
+    received = asyncio.Event()
+
+    async def handler(request: web.Request):
+        body = await request.read()
+        with patch.object(config, "KRYPTO_EXPRESS_API_SECRET", "mock-secret"):
+            valid = security_check(request.headers.get("X-Signature"), body)
+        callbacks.append((await request.json(), valid))
+        received.set()
+        return web.Response(text="200")
+
+    app = web.Application()
+    app.router.add_post("/webhook/cryptoprocessing/event", handler)
+    runner, url = await _serve(app)
+    yield f"{url}/webhook/cryptoprocessing/event", callbacks, received
+    await runner.cleanup()
+
+
+@pytest_asyncio.fixture
+async def provider(bot_webhook):
+    """Mock provider with instant payments; yields (mock, api base url, callbacks, received event)."""
+    callback_url, callbacks, received = bot_webhook
+    mock = MockKryptoExpress(MockSettings(pay_delay=0, callback_url=callback_url, seed=1))
+    runner, url = await _serve(mock.create_app())
+    with patch.object(config, "KRYPTO_EXPRESS_API_URL", f"{url}/api"), \
+            patch.object(config, "KRYPTO_EXPRESS_API_KEY", "mock-key"):
+        yield mock, url, callbacks, received
+    await HttpClient.close()
+    await runner.cleanup()
+
+
+async def _create_payment(base_url: str, fiat_amount: float = 50.0, crypto: str = "BTC") -> dict:
+    async with aiohttp.ClientSession() as client:
+        async with client.post(f"{base_url}/api/payment", headers={"X-Api-Key": "mock-key"},
+                               json={"paymentType": "PAYMENT", "fiatCurrency": "EUR", "fiatAmount": fiat_amount,
+                                     "cryptoCurrency": crypto}) as response:
+            assert response.status == 200
+            return await response.json()
+
+
+async def _wait_for_callbacks(callbacks: list, count: int):
+    for _ in range(200):
+        if len(callbacks) >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Expected {count} callbacks, got {len(callbacks)}")
+
+
+class TestMockKryptoExpress:
+
+    @pytest.mark.asyncio
+    async def test_payment_is_paid_with_signed_callback(self, provider):
+        mock, base_url, callbacks, _ = provider
+
+        payment = await _create_payment(base_url)
+        await _wait_for_callbacks(callbacks, 1)
+
+        assert payment["cryptoAmount"] == 0.001
+        assert payment["isPaid"] is False
+        callback, signature_valid = callbacks[0]
+        assert signature_valid is True
+        assert (callback["id"], callback["isPaid"], callback["cryptoAmount"]) == (payment["id"], True, 0.001)
+        assert len(callback["hash"]) == 64
+        assert mock.stats()["callbacks_sent"] == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode, is_paid, crypto_amount", [
+        ("exact", True, 0.001),
+        ("under", True, 0.0009),
+        ("over", True, 0.0011),
+        ("none", False, 0.001),
+    ])
+    async def test_payment_behaviours(self, provider, mode, is_paid, crypto_amount):
+        mock, base_url, callbacks, _ = provider
+        mock.settings.mix = {mode: 1.0}
+        mock.settings.expire_minutes = 0  # "none" reports the expiry right away
+
+        await _create_payment(base_url)
+        await _wait_for_callbacks(callbacks, 1)
+
+        callback, _ = callbacks[0]
+        assert (callback["isPaid"], callback["cryptoAmount"]) == (is_paid, crypto_amount)
+
+    @pytest.mark.asyncio
+    async def test_injected_errors_and_api_key(self, provider):
+        mock, base_url, _, _ = provider
+
+        async with aiohttp.ClientSession() as client:
+            async with client.get(f"{base_url}/api/wallet", headers={"X-Api-Key": "wrong"}) as response:
+                assert response.status == 401
+            mock.settings.error_rate = 1.0
+            async with client.get(f"{base_url}/api/wallet", headers={"X-Api-Key": "mock-key"}) as response:
+                assert response.status == 503
+
+        assert mock.stats()["injected_errors"] == 1
+        assert mock.stats()["requests"]["GET /api/wallet"] == 2
+
+    @pytest.mark.asyncio
+    async def test_bot_client_against_mock(self, provider):
+        mock, base_url, callbacks, _ = provider
+        first = await _create_payment(base_url, fiat_amount=100.0, crypto="LTC")
+        second = await _create_payment(base_url, fiat_amount=50.0, crypto="LTC")
+        await _wait_for_callbacks(callbacks, 2)
+
+        listing = await CryptoApiWrapper.get_payments(0, 10)
+        assert [payment.id for payment in listing] == [second["id"], first["id"]]
+        assert all(payment.isPaid for payment in listing)
+
+        assert await CryptoApiWrapper.get_wallet_balance() == {"LTC": 1.5}
+
+        calculated = await CryptoApiWrapper.withdrawal(Cryptocurrency.LTC, "ltc1qtarget", only_calculate=True)
+        assert calculated.totalWithdrawalAmount == 1.5
+        assert calculated.receivingAmount == pytest.approx(1.5 - calculated.blockchainFeeAmount
+                                                           - calculated.serviceFeeAmount)
+        executed = await CryptoApiWrapper.withdrawal(Cryptocurrency.LTC, "ltc1qtarget", only_calculate=False)
+        assert len(executed.txIdList) == 1
+        assert await CryptoApiWrapper.get_wallet_balance() == {}
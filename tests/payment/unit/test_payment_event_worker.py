@@ -0,0 +1,201 @@
+"""
+Tests for the payment event queue (webhook → payment_events → PaymentEventWorker).
+
+Covers:
+- The webhook endpoint only queues the raw event and acks
+- Processed events are removed from the queue
+- Failures are retried with backoff, then dead-lettered
+- Unparseable bodies are dead-lettered immediately
+- Concurrency is bounded
+- Dead-lettered events can be replayed
+
+Run with:
+    pytest tests/payment/unit/test_payment_event_worker.py -v
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+import jobs.payment_event_worker as payment_event_worker
+from enums.cryptocurrency import Cryptocurrency
+from enums.currency import Currency
+from models.payment import ProcessingPaymentDTO
+from models.payment_event import PaymentEvent, DeadLetterPaymentEvent
+from repositories.payment_event import PaymentEventRepository
+
+
+def _body(payment_id: int) -> str:
+    return ProcessingPaymentDTO(id=payment_id, fiatCurrency=Currency.EUR, cryptoCurrency=Cryptocurrency.BTC,
+                                isPaid=True, callbackSecret=None).model_dump_json()
+
+
+@pytest_asyncio.fixture
+async def queue(db_engine):
+    """Worker and webhook wired to the in-memory database, event processing mocked."""
+    import processing.processing as processing
+
+    session_maker = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def test_session():
+        async with session_maker() as session:
+            yield session
+
+    process = AsyncMock()
+    with patch.object(processing, "get_db_session", test_session), \
+            patch.object(processing, "process_payment_event", process), \
+            patch.object(payment_event_worker, "get_db_session", test_session):
+        async with session_maker() as session:
+            yield session, process
+
+
+async def _enqueue(session, *payment_ids: int):
+    for payment_id in payment_ids:
+        await PaymentEventRepository.create(_body(payment_id), payment_id, session)
+    await session.commit()
+
+
+async def _run_until_empty(worker):
+    while True:
+        await worker.dispatch_due_events()
+        if not worker._in_flight:
+            return
+        await worker.wait_idle()
+
+
+async def _rows(session, model):
+    session.expire_all()
+    return (await session.execute(select(model).order_by(model.id))).scalars().all()
+
+
+class TestWebhookEndpoint:
+
+    @pytest.mark.asyncio
+    async def test_queues_event_without_processing(self, queue):
+        from processing.processing import fetch_crypto_event
+        session, process = queue
+        body = _body(42)
+        request = Mock()
+        request.body = AsyncMock(return_value=body.encode())
+        request.headers = {}
+
+        result = await fetch_crypto_event(ProcessingPaymentDTO.model_validate_json(body), request)
+
+        assert result == "200"
+        process.assert_not_awaited()
+        events = await _rows(session, PaymentEvent)
+        assert [(e.payment_processing_id, e.body, e.attempts) for e in events] == [(42, body, 0)]
+
+
+class TestPaymentEventWorker:
+
+    @pytest.mark.asyncio
+    async def test_processed_events_are_removed(self, queue):
+        session, process = queue
+        await _enqueue(session, 1, 2)
+
+        await _run_until_empty(payment_event_worker.PaymentEventWorker())
+
+        assert sorted(call.args[0].id for call in process.await_args_list) == [1, 2]
+        assert await _rows(session, PaymentEvent) == []
+
+    @pytest.mark.asyncio
+    async def test_failure_schedules_retry_with_backoff(self, queue):
+        session, process = queue
+        process.side_effect = RuntimeError("Telegram down")
+        await _enqueue(session, 1)
+        worker = payment_event_worker.PaymentEventWorker(retry_base_seconds=60)
+
+        await _run_until_empty(worker)
+
+        event = (await _rows(session, PaymentEvent))[0]
+        assert event.attempts == 1
+        assert event.last_error == "RuntimeError: Telegram down"
+        delay = (event.next_attempt_at - datetime.now()).total_seconds()
+        assert 25 < delay <= 60  # base delay with jitter (50-100%)
+
+    @pytest.mark.asyncio
+    async def test_backoff_is_exponential_and_capped(self):
+        worker = payment_event_worker.PaymentEventWorker(retry_base_seconds=5, retry_max_seconds=600)
+
+        assert 10 <= worker._retry_delay(3) <= 20
+        assert 300 <= worker._retry_delay(20) <= 600
+
+    @pytest.mark.asyncio
+    async def test_dead_letter_after_max_attempts(self, queue):
+        session, process = queue
+        process.side_effect = RuntimeError("still down")
+        await _enqueue(session, 1)
+        worker = payment_event_worker.PaymentEventWorker(max_attempts=3, retry_base_seconds=0)
+
+        await _run_until_empty(worker)
+
+        assert process.await_count == 3
+        assert await _rows(session, PaymentEvent) == []
+        dead_letters = await _rows(session, DeadLetterPaymentEvent)
+        assert [(d.payment_processing_id, d.attempts) for d in dead_letters] == [(1, 3)]
+
+    @pytest.mark.asyncio
+    async def test_invalid_body_is_dead_lettered_immediately(self, queue):
+        session, process = queue
+        await PaymentEventRepository.create('{"id": 1}', 1, session)
+        await session.commit()
+
+        await _run_until_empty(payment_event_worker.PaymentEventWorker())
+
+        process.assert_not_awaited()
+        assert len(await _rows(session, DeadLetterPaymentEvent)) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, queue):
+        session, process = queue
+        active = 0
+        max_active = 0
+
+        async def slow_process(payment_dto):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        process.side_effect = slow_process
+        await _enqueue(session, *range(1, 11))
+
+        await _run_until_empty(payment_event_worker.PaymentEventWorker(concurrency=3))
+
+        assert process.await_count == 10
+        assert max_active == 3
+
+
+class TestDeadLetterReplay:
+
+    @pytest.mark.asyncio
+    async def test_replay_single_and_all(self, queue):
+        session, process = queue
+        process.side_effect = RuntimeError("down")
+        await _enqueue(session, 1, 2, 3)
+        await _run_until_empty(payment_event_worker.PaymentEventWorker(max_attempts=1))
+        dead_letters = await _rows(session, DeadLetterPaymentEvent)
+
+        assert await PaymentEventRepository.replay_dead_letters(dead_letters[0].id, session) == 1
+        await session.commit()
+        assert await PaymentEventRepository.get_dead_letter_count(session) == 2
+
+        assert await PaymentEventRepository.replay_dead_letters(None, session) == 2
+        await session.commit()
+
+        events = await _rows(session, PaymentEvent)
+        assert sorted(e.payment_processing_id for e in events) == [1, 2, 3]
+        assert all(e.attempts == 0 for e in events)
+
+        process.side_effect = None
+        await _run_until_empty(payment_event_worker.PaymentEventWorker())
+        assert await _rows(session, PaymentEvent) == []
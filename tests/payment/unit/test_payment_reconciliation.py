@@ -0,0 +1,186 @@
+"""
+Tests for payment reconciliation (services/payment_reconciliation.py).
+
+Covers:
+- Batch and single validation share one rule implementation, with exact decimal comparison
+- Paid provider payments without a processed or queued event are queued as payment events
+- Processed, queued and unpaid payments are left alone
+- The listing is paged only until every open invoice was seen
+
+The provider is a local aiohttp server serving the KryptoExpress payment listing.
+
+Run with:
+    pytest tests/payment/unit/test_payment_reconciliation.py -v
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from sqlalchemy import select
+
+import config
+from crypto_api.http_client import HttpClient
+from enums.cryptocurrency import Cryptocurrency
+from enums.currency import Currency
+from enums.order_status import OrderStatus
+from enums.payment_validation import PaymentValidationResult
+from models.invoice import Invoice
+from models.order import Order
+from models.payment import ProcessingPaymentDTO
+from models.payment_event import PaymentEvent
+from models.user import User
+from repositories.payment_event import PaymentEventRepository
+from repositories.processed_payment_event import ProcessedPaymentEventRepository
+from services.payment_reconciliation import PaymentReconciliationService
+from services.payment_validator import PaymentValidator
+
+
+def _provider_payment(payment_id: int, crypto_amount: float, is_paid: bool = True) -> dict:
+    return {"id": payment_id, "paymentType": "PAYMENT", "fiatCurrency": "EUR", "fiatAmount": 50.0,
+            "cryptoAmount": crypto_amount, "cryptoCurrency": "BTC", "isPaid": is_paid,
+            "hash": f"0x{payment_id}" if is_paid else None}
+
+
+@pytest_asyncio.fixture
+async def provider():
+    """Local KryptoExpress listing (newest first); yields the list of requested pages."""
+    payments = [_provider_payment(payment_id, 0.001) for payment_id in range(1000, 1250)]
+    payments[5:5] = [_provider_payment(101, 0.001),  # exact
+                     _provider_payment(102, 0.0005),  # underpaid
+                     _provider_payment(103, 0.001),  # already processed
+                     _provider_payment(104, 0.001),  # webhook queued
+                     _provider_payment(105, 0.001, is_paid=False)]  # not paid yet
+    payments.append(_provider_payment(106, 0.002))  # overpaid, on the last page
+    requested_pages = []
+
+    async def list_payments(request: web.Request):
+        assert request.headers["X-Api-Key"] == "test-key"
+        page, size = int(request.query["page"]), int(request.query["size"])
+        requested_pages.append(page)
+        return web.json_response(payments[page * size:(page + 1) * size])
+
+    app = web.Application()
+    app.router.add_get("/api/payment", list_payments)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    with patch.object(config, "KRYPTO_EXPRESS_API_URL", f"http://127.0.0.1:{port}/api"), \
+            patch.object(config, "KRYPTO_EXPRESS_API_KEY", "test-key"):
+        yield requested_pages
+
+    await HttpClient.close()
+    await runner.cleanup()
+
+
+@pytest_asyncio.fixture
+async def invoices(db_session):
+    """Open invoices for payments 101-106, plus a completed order's invoice for payment 1000."""
+    db_session.add(User(id=1, telegram_id=111, telegram_username="buyer"))
+    await db_session.flush()
+    deadline = datetime.now() + timedelta(minutes=30)
+    for payment_id in range(101, 107):
+        db_session.add(Order(id=payment_id, user_id=1, status=OrderStatus.PENDING_PAYMENT, total_price=50.0,
+                             currency=Currency.EUR, expires_at=deadline))
+    db_session.add(Order(id=1000, user_id=1, status=OrderStatus.PAID, total_price=50.0,
+                         currency=Currency.EUR, expires_at=deadline))
+    await db_session.flush()
+    for order_id in list(range(101, 107)) + [1000]:
+        db_session.add(Invoice(order_id=order_id, invoice_number=f"2025-{order_id}", payment_processing_id=order_id,
+                               payment_amount_crypto=0.001, payment_crypto_currency=Cryptocurrency.BTC,
+                               fiat_amount=50.0, fiat_currency=Currency.EUR))
+    await ProcessedPaymentEventRepository.register(103, True, "0x103", db_session)
+    await PaymentEventRepository.create("{}", 104, db_session)
+    await db_session.flush()
+
+
+class TestValidatePayments:
+
+    def test_matches_single_validation(self):
+        deadline = datetime.now() + timedelta(minutes=30)
+        cases = [(0.001, 0.001, Cryptocurrency.BTC), (0.00099, 0.001, Cryptocurrency.BTC),
+                 (0.0010005, 0.001, Cryptocurrency.BTC), (0.0011, 0.001, Cryptocurrency.BTC),
+                 (0.001, 0.001, Cryptocurrency.LTC)]
+
+        results = PaymentValidator.validate_payments(
+            paid=[paid for paid, _, _ in cases],
+            required=[required for _, required, _ in cases],
+            currency_paid=[currency for _, _, currency in cases],
+            currency_required=[Cryptocurrency.BTC] * len(cases),
+            deadlines=[deadline] * len(cases)
+        )
+
+        assert results == [PaymentValidator.validate_payment(paid, required, currency, Cryptocurrency.BTC, deadline)
+                           for paid, required, currency in cases]
+
+    def test_tolerance_threshold_is_exact(self):
+        deadline = datetime.now() + timedelta(minutes=30)
+        # Exactly +0.1%: float math puts 0.35 * 1.001 below 0.35035
+        results = PaymentValidator.validate_payments([0.35035], [0.35], [Cryptocurrency.LTC],
+                                                     [Cryptocurrency.LTC], [deadline])
+        result = PaymentValidator.validate_payment(0.35035, 0.35, Cryptocurrency.LTC, Cryptocurrency.LTC, deadline)
+
+        assert results == [result] == [PaymentValidationResult.MINOR_OVERPAYMENT]
+
+    def test_late_payment_uses_batch_time(self):
+        deadline = datetime(2025, 1, 1, 12, 0)
+        results = PaymentValidator.validate_payments([0.001, 0.001], [0.001, 0.001],
+                                                     [Cryptocurrency.BTC] * 2, [Cryptocurrency.BTC] * 2,
+                                                     [deadline, deadline + timedelta(hours=1)],
+                                                     now=deadline + timedelta(minutes=1))
+
+        assert results == [PaymentValidationResult.LATE_PAYMENT, PaymentValidationResult.EXACT_MATCH]
+
+
+class TestPaymentReconciliation:
+
+    @pytest.mark.asyncio
+    async def test_missed_payments_are_queued(self, db_session, provider, invoices):
+        report = await PaymentReconciliationService.reconcile(db_session, page_size=100)
+
+        assert (report.invoices, report.paid, report.missed) == (6, 5, 3)
+        assert report.results == {"EXACT_MATCH": 1, "UNDERPAYMENT": 1, "OVERPAYMENT": 1}
+
+        events = (await db_session.execute(select(PaymentEvent).order_by(PaymentEvent.id))).scalars().all()
+        queued = {event.payment_processing_id: event for event in events}
+        assert sorted(queued) == [101, 102, 104, 106]
+        # Same body the worker parses for a webhook delivery
+        payment = ProcessingPaymentDTO.model_validate_json(queued[102].body)
+        assert (payment.isPaid, payment.cryptoAmount, payment.hash) == (True, 0.0005, "0x102")
+
+    @pytest.mark.asyncio
+    async def test_second_run_queues_nothing(self, db_session, provider, invoices):
+        await PaymentReconciliationService.reconcile(db_session, page_size=100)
+
+        report = await PaymentReconciliationService.reconcile(db_session, page_size=100)
+
+        assert report.missed == 0
+
+    @pytest.mark.asyncio
+    async def test_paging_stops_when_all_invoices_were_seen(self, db_session, provider, invoices):
+        await db_session.execute(Order.__table__.update().where(Order.id == 106)
+                                 .values(status=OrderStatus.PAID))
+
+        report = await PaymentReconciliationService.reconcile(db_session, page_size=10)
+
+        assert provider == [0]
+        assert (report.invoices, report.pages) == (5, 1)
+
+    @pytest.mark.asyncio
+    async def test_max_pages(self, db_session, provider, invoices):
+        report = await PaymentReconciliationService.reconcile(db_session, page_size=10, max_pages=3)
+
+        assert provider == [0, 1, 2]
+        assert report.missed == 2  # 106 is beyond the fetched pages
+
+    @pytest.mark.asyncio
+    async def test_no_open_invoices_no_provider_call(self, db_session, provider):
+        report = await PaymentReconciliationService.reconcile(db_session)
+
+        assert report.invoices == 0
+        assert provider == []
@@ -0,0 +1,101 @@
+"""
+Tests for invoice number / top-up reference generation (utils/reference_code.py).
+
+Covers:
+- The code permutation is a bijection (distinct values -> distinct codes) and invertible
+- Formats YYYY-XXXXXX and TOPUP-YYYY-XXXXXX are kept
+- The sequence counts per kind
+- Codes that already exist (legacy random codes, other key) are skipped
+- A rolled-back transaction gives its value back
+- REFERENCE_CODE_SECRET is required
+
+Run with:
+    pytest tests/payment/unit/test_reference_generation.py -v
+"""
+
+import re
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+import config
+from enums.currency import Currency
+from models.invoice import Invoice
+from models.order import Order
+from models.payment import Payment
+from models.user import User
+
+from repositories.invoice import InvoiceRepository
+from repositories.payment import PaymentRepository
+from repositories.reference_sequence import ReferenceSequenceRepository
+from utils.reference_code import ReferenceCode
+
+
+class TestReferenceCode:
+
+    def test_codes_are_distinct_and_invertible(self):
+        codes = [ReferenceCode.encode(value, "invoice") for value in range(1 << 16)]
+
+        assert len(set(codes)) == len(codes)
+        assert all(re.fullmatch(r"[23456789A-HJ-NP-Z]{6}", code) for code in codes)
+        assert [ReferenceCode.decode(code, "invoice") for code in codes[:1000]] == list(range(1000))
+
+    def test_full_range_is_covered(self):
+        assert ReferenceCode.decode(ReferenceCode.encode(ReferenceCode.CAPACITY - 1, "topup"), "topup") \
+               == ReferenceCode.CAPACITY - 1
+        with pytest.raises(OverflowError):
+            ReferenceCode.encode(ReferenceCode.CAPACITY, "topup")
+
+    def test_secret_is_required(self):
+        with patch.object(config, "REFERENCE_CODE_SECRET", ""):
+            with pytest.raises(RuntimeError, match="REFERENCE_CODE_SECRET"):
+                ReferenceCode.encode(1, "invoice")
+
+    def test_kinds_use_different_permutations(self):
+        assert [ReferenceCode.encode(value, "invoice") for value in range(1, 20)] != \
+               [ReferenceCode.encode(value, "topup") for value in range(1, 20)]
+
+
+class TestReferenceSequence:
+
+    @pytest.mark.asyncio
+    async def test_formats(self, db_session):
+        invoice_numbers = [await InvoiceRepository.get_next_invoice_number(db_session) for _ in range(3)]
+        topup_reference = await PaymentRepository.get_next_topup_reference(db_session)
+
+        year = datetime.now().year
+        assert all(re.fullmatch(rf"{year}-[23456789A-HJ-NP-Z]{{6}}", number) for number in invoice_numbers)
+        assert len(set(invoice_numbers)) == 3
+        assert re.fullmatch(rf"TOPUP-{year}-[23456789A-HJ-NP-Z]{{6}}", topup_reference)
+        assert [ReferenceCode.decode(number[-6:], "invoice") for number in invoice_numbers] == [1, 2, 3]
+        assert ReferenceCode.decode(topup_reference[-6:], "topup") == 1
+
+    @pytest.mark.asyncio
+    async def test_existing_codes_are_skipped(self, db_session):
+        # Random codes issued before the sequence, which happen to be the permutation of 1
+        year = datetime.now().year
+        db_session.add(User(id=1, telegram_id=111))
+        db_session.add(Order(id=1, user_id=1, total_price=10.0, currency=Currency.EUR,
+                             expires_at=datetime.now()))
+        await db_session.flush()
+        db_session.add(Invoice(order_id=1, invoice_number=f"{year}-{ReferenceCode.encode(1, 'invoice')}",
+                               fiat_amount=10.0, fiat_currency=Currency.EUR))
+        db_session.add(Payment(user_id=1, processing_payment_id=1, message_id=1,
+                               topup_reference=f"TOPUP-{year}-{ReferenceCode.encode(1, 'topup')}"))
+        await db_session.flush()
+
+        invoice_number = await InvoiceRepository.get_next_invoice_number(db_session)
+        topup_reference = await PaymentRepository.get_next_topup_reference(db_session)
+
+        assert ReferenceCode.decode(invoice_number[-6:], "invoice") == 2
+        assert ReferenceCode.decode(topup_reference[-6:], "topup") == 2
+
+    @pytest.mark.asyncio
+    async def test_rollback_returns_value(self, db_session):
+        assert await ReferenceSequenceRepository.next_value("invoice:2030", db_session) == 1
+        await db_session.commit()
+        assert await ReferenceSequenceRepository.next_value("invoice:2030", db_session) == 2
+        await db_session.rollback()
+
+        assert await ReferenceSequenceRepository.next_value("invoice:2030", db_session) == 2
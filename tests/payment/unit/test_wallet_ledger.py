@@ -0,0 +1,119 @@
+"""
+Tests for the wallet ledger (repositories/wallet.py).
+
+Covers:
+- Credits and debits move balance_cents and the top_up_amount mirror, one ledger entry each
+- Debits never take the balance below zero (debit fails, debit_up_to takes what is there)
+- A stale UserDTO written back with UserRepository.update doesn't undo a wallet change
+- Changes from interleaved handlers are all kept (no lost update)
+- Snapshots and drift detection against the ledger
+
+Run with:
+    pytest tests/payment/unit/test_wallet_ledger.py -v
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+
+from enums.wallet_entry_type import WalletEntryType
+from models.user import User
+from repositories.user import UserRepository
+from repositories.wallet import WalletRepository, InsufficientWalletBalance
+
+
+@pytest_asyncio.fixture
+async def user_id(db_session):
+    db_session.add(User(id=1, telegram_id=111, telegram_username="buyer"))
+    await db_session.flush()
+    return 1
+
+
+class TestWalletLedger:
+
+    @pytest.mark.asyncio
+    async def test_credit_and_debit(self, db_session, user_id):
+        assert await WalletRepository.credit(user_id, 10.1, WalletEntryType.TOP_UP, db_session,
+                                             reference="TOPUP-2025-AAAAAA") == 10.1
+        assert await WalletRepository.credit(user_id, 0.2, WalletEntryType.OVERPAYMENT, db_session) == 10.3
+        assert await WalletRepository.debit(user_id, 3.3, WalletEntryType.ORDER_PAYMENT, db_session) == 7.0
+
+        user = await UserRepository.get_by_id(user_id, db_session)
+        assert user.top_up_amount == 7.0
+        entries = await WalletRepository.get_entries(user_id, 10, db_session)
+        assert [(entry.amount_cents, entry.entry_type) for entry in entries] == [
+            (-330, WalletEntryType.ORDER_PAYMENT),
+            (20, WalletEntryType.OVERPAYMENT),
+            (1010, WalletEntryType.TOP_UP),
+        ]
+        assert entries[-1].reference == "TOPUP-2025-AAAAAA"
+
+    @pytest.mark.asyncio
+    async def test_debit_fails_on_insufficient_balance(self, db_session, user_id):
+        await WalletRepository.credit(user_id, 5, WalletEntryType.TOP_UP, db_session)
+
+        with pytest.raises(InsufficientWalletBalance):
+            await WalletRepository.debit(user_id, 5.01, WalletEntryType.ORDER_PAYMENT, db_session)
+
+        assert await WalletRepository.get_balance(user_id, db_session) == 5.0
+        assert len(await WalletRepository.get_entries(user_id, 10, db_session)) == 1
+
+    @pytest.mark.asyncio
+    async def test_debit_up_to_takes_at_most_the_balance(self, db_session, user_id):
+        await WalletRepository.credit(user_id, 4.5, WalletEntryType.TOP_UP, db_session)
+
+        assert await WalletRepository.debit_up_to(user_id, 10, WalletEntryType.ORDER_PAYMENT, db_session) == 4.5
+        assert await WalletRepository.debit_up_to(user_id, 10, WalletEntryType.ORDER_PAYMENT, db_session) == 0.0
+
+        assert await WalletRepository.get_balance(user_id, db_session) == 0.0
+        assert len(await WalletRepository.get_entries(user_id, 10, db_session)) == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_user_update_keeps_balance(self, db_session, user_id):
+        stale_user = await UserRepository.get_by_id(user_id, db_session)
+
+        await WalletRepository.credit(user_id, 25, WalletEntryType.TOP_UP, db_session)
+        stale_user.is_blocked = True
+        await UserRepository.update(stale_user, db_session)
+
+        user = await UserRepository.get_by_id(user_id, db_session)
+        assert user.is_blocked is True
+        assert user.top_up_amount == 25.0
+
+    @pytest.mark.asyncio
+    async def test_interleaved_changes_are_not_lost(self, db_session, user_id):
+        # Both handlers read the balance before either writes - the old read-modify-write lost one change
+        purchase_view = await UserRepository.get_by_id(user_id, db_session)
+        top_up_view = await UserRepository.get_by_id(user_id, db_session)
+
+        await WalletRepository.credit(user_id, 20, WalletEntryType.TOP_UP, db_session)
+        await WalletRepository.credit(user_id, 5, WalletEntryType.ADMIN_ADJUSTMENT, db_session)
+        await UserRepository.update(top_up_view, db_session)
+        await UserRepository.update(purchase_view, db_session)
+
+        assert await WalletRepository.get_balance(user_id, db_session) == 25.0
+
+    @pytest.mark.asyncio
+    async def test_amounts_are_rounded_to_cents(self, db_session, user_id):
+        for _ in range(10):
+            await WalletRepository.credit(user_id, 0.1, WalletEntryType.TOP_UP, db_session)
+
+        assert await WalletRepository.get_balance(user_id, db_session) == 1.0
+        assert WalletRepository.to_cents(2.675) == 268
+
+    @pytest.mark.asyncio
+    async def test_snapshot_and_drift(self, db_session, user_id):
+        await WalletRepository.credit(user_id, 10, WalletEntryType.TOP_UP, db_session)
+        assert await WalletRepository.find_drift(db_session) == []
+
+        assert await WalletRepository.create_snapshot(db_session) == 1
+        # Unchanged wallets are not snapshotted again
+        assert await WalletRepository.create_snapshot(db_session) == 0
+
+        await WalletRepository.debit(user_id, 4, WalletEntryType.ORDER_PAYMENT, db_session)
+        assert await WalletRepository.find_drift(db_session) == []
+
+        # Balance changed without a ledger entry
+        await db_session.execute(update(User).where(User.id == user_id).values(balance_cents=9999))
+        drift = await WalletRepository.find_drift(db_session)
+        assert [(entry.user_id, entry.expected_cents, entry.balance_cents) for entry in drift] == [(1, 600, 9999)]
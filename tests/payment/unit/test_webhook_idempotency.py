@@ -0,0 +1,157 @@
+"""
+Tests for webhook idempotency and per-order locking.
+
+Covers:
+- (payment id, isPaid, hash) is recorded once; duplicates are detected
+- The record is rolled back with a failed handler, so a retry processes the event
+- OrderLock serializes tasks on the same key, not on different keys
+- Concurrent duplicate deliveries run the handler exactly once
+
+Run with:
+    pytest tests/payment/unit/test_webhook_idempotency.py -v
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+from enums.cryptocurrency import Cryptocurrency
+from enums.currency import Currency
+from enums.payment import PaymentType
+from models.payment import ProcessingPaymentDTO
+from repositories.processed_payment_event import ProcessedPaymentEventRepository
+from utils.order_lock import OrderLock
+
+
+class TestProcessedPaymentEventRepository:
+
+    @pytest.mark.asyncio
+    async def test_register_once(self, db_session):
+        assert await ProcessedPaymentEventRepository.register(1, True, "0xabc", db_session) is True
+        assert await ProcessedPaymentEventRepository.register(1, True, "0xabc", db_session) is False
+        await db_session.commit()
+
+        assert await ProcessedPaymentEventRepository.exists(1, True, "0xabc", db_session) is True
+
+    @pytest.mark.asyncio
+    async def test_key_includes_is_paid_and_hash(self, db_session):
+        # Expired notification and the later payment are different events
+        assert await ProcessedPaymentEventRepository.register(1, False, None, db_session) is True
+        assert await ProcessedPaymentEventRepository.register(1, True, "0xabc", db_session) is True
+        # Second on-chain transaction for the same payment
+        assert await ProcessedPaymentEventRepository.register(1, True, "0xdef", db_session) is True
+        # Missing hash is stored as ''
+        assert await ProcessedPaymentEventRepository.register(1, False, "", db_session) is False
+
+    @pytest.mark.asyncio
+    async def test_rollback_forgets_event(self, db_session):
+        await ProcessedPaymentEventRepository.register(1, True, "0xabc", db_session)
+        await db_session.rollback()
+
+        assert await ProcessedPaymentEventRepository.exists(1, True, "0xabc", db_session) is False
+
+
+class TestOrderLock:
+
+    @pytest.mark.asyncio
+    async def test_same_key_is_serialized(self):
+        active = 0
+        max_active = 0
+
+        async def critical_section():
+            nonlocal active, max_active
+            async with OrderLock.acquire(OrderLock.order_key(1)):
+                active += 1
+                max_active = max(max_active, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(critical_section() for _ in range(5)))
+
+        assert max_active == 1
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_concurrently(self):
+        entered = asyncio.Event()
+
+        async def first():
+            async with OrderLock.acquire(OrderLock.order_key(1)):
+                await asyncio.wait_for(entered.wait(), timeout=1)
+
+        async def second():
+            async with OrderLock.acquire(OrderLock.order_key(2)):
+                entered.set()
+
+        await asyncio.gather(first(), second())
+
+    @pytest.mark.asyncio
+    async def test_local_locks_are_released(self):
+        async with OrderLock.acquire(OrderLock.deposit_key(42)):
+            assert OrderLock.deposit_key(42) in OrderLock._local_locks
+
+        assert OrderLock.deposit_key(42) not in OrderLock._local_locks
+
+
+@pytest_asyncio.fixture
+async def webhook(db_engine):
+    """process_payment_event wired to the in-memory database, with the deposit handler mocked."""
+    import processing.processing as processing
+
+    session_maker = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def test_session():
+        async with session_maker() as session:
+            yield session
+
+    async def slow_handler(payment_dto, session):
+        await asyncio.sleep(0.01)
+
+    handler = AsyncMock(side_effect=slow_handler)
+    with patch.object(processing, "get_db_session", test_session), \
+            patch.object(processing, "_handle_deposit_payment", handler):
+        yield processing.process_payment_event, handler
+
+
+def _delivery(payment_id: int = 7, is_paid: bool = True, tx_hash: str = "0xabc") -> ProcessingPaymentDTO:
+    return ProcessingPaymentDTO(
+        id=payment_id, paymentType=PaymentType.DEPOSIT, fiatCurrency=Currency.EUR, fiatAmount=10.0,
+        cryptoCurrency=Cryptocurrency.BTC, cryptoAmount=0.0001, isPaid=is_paid, hash=tx_hash,
+        callbackSecret=None
+    )
+
+
+class TestWebhookDeduplication:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_run_handler_once(self, webhook):
+        process_payment_event, handler = webhook
+
+        await asyncio.gather(*(process_payment_event(_delivery()) for _ in range(5)))
+
+        assert handler.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_after_processing_is_skipped(self, webhook):
+        process_payment_event, handler = webhook
+
+        await process_payment_event(_delivery())
+        await process_payment_event(_delivery())
+        await process_payment_event(_delivery(is_paid=False, tx_hash=None))
+
+        assert handler.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_handler_is_retried(self, webhook):
+        process_payment_event, handler = webhook
+        handler.side_effect = [RuntimeError("Telegram down"), None]
+
+        with pytest.raises(RuntimeError):
+            await process_payment_event(_delivery())
+        await process_payment_event(_delivery())
+
+        assert handler.await_count == 2
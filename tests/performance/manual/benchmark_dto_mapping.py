@@ -0,0 +1,145 @@
+"""
+===============================================================================
+DTO Mapping Benchmark - ORM + model_validate vs. Core rows + TypeAdapter
+===============================================================================
+
+DESCRIPTION:
+    Measures rows/sec (best of --repeat) and peak Python memory (tracemalloc) for large list reads:
+      - orm:  select(Model) + XxxDTO.model_validate(obj, from_attributes=True) per row
+              (the previous repository implementation)
+      - bulk: select(*dto_columns(Model, XxxDTO)) + rows_to_dtos()
+              (ItemRepository.get_in_stock, UserRepository.get_active,
+               OrderRepository.get_expired_orders)
+
+    Uses a temporary in-memory SQLite database, no bot or .env required.
+
+USAGE:
+    From project root:
+        $ python tests/performance/manual/benchmark_dto_mapping.py
+        $ python tests/performance/manual/benchmark_dto_mapping.py --rows 100000 --repeat 3
+===============================================================================
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+# Minimal TEST-mode configuration (no webhook, no ngrok)
+os.environ.setdefault("RUNTIME_ENVIRONMENT", "TEST")
+os.environ.setdefault("ADMIN_ID_LIST", "0")
+os.environ.setdefault("PAGE_ENTRIES", "8")
+os.environ.setdefault("CURRENCY", "EUR")
+os.environ.setdefault("DB_NAME", "benchmark.db")
+os.environ.setdefault("KRYPTO_EXPRESS_API_SECRET", "")
+
+from sqlalchemy import select, insert  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import db  # noqa: E402,F401 - registers all models
+import models.payment  # noqa: E402,F401
+import models.shipping_address  # noqa: E402,F401
+from enums.currency import Currency  # noqa: E402
+from enums.order_status import OrderStatus  # noqa: E402
+from models.base import Base  # noqa: E402
+from models.category import Category  # noqa: E402
+from models.item import Item, ItemDTO  # noqa: E402
+from models.order import Order, OrderDTO  # noqa: E402
+from models.subcategory import Subcategory  # noqa: E402
+from models.user import User, UserDTO  # noqa: E402
+from repositories.item import ItemRepository  # noqa: E402
+from repositories.order import OrderRepository  # noqa: E402
+from repositories.user import UserRepository  # noqa: E402
+
+
+async def seed(engine, rows: int):
+    now = datetime.now()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Category), [{"id": 1, "name": "Digital"}])
+        await conn.execute(insert(Subcategory), [{"id": 1, "name": "Gift Cards"}])
+        await conn.execute(insert(User), [
+            {"id": i, "telegram_id": 10_000 + i, "telegram_username": f"user{i}", "registered_at": now,
+             "can_receive_messages": True, "top_up_amount": 0.0}
+            for i in range(1, rows + 1)
+        ])
+        await conn.execute(insert(Item), [
+            {"id": i, "category_id": 1, "subcategory_id": 1, "price": 9.99, "description": f"Item {i}",
+             "is_sold": False, "is_new": True, "is_physical": False, "shipping_cost": 0.0,
+             "allows_packstation": False}
+            for i in range(1, rows + 1)
+        ])
+        await conn.execute(insert(Order), [
+            {"id": i, "user_id": i, "status": OrderStatus.PENDING_PAYMENT, "total_price": 9.99,
+             "currency": Currency.EUR, "created_at": now, "expires_at": now - timedelta(minutes=1),
+             "shipping_cost": 0.0, "total_paid_crypto": 0.0, "retry_count": 0, "wallet_used": 0.0}
+            for i in range(1, rows + 1)
+        ])
+
+
+def orm_reader(model, dto_class, *where):
+    async def read(session):
+        result = await session.execute(select(model).where(*where))
+        return [dto_class.model_validate(obj, from_attributes=True) for obj in result.scalars().all()]
+    return read
+
+
+async def measure_time(session_maker, read) -> tuple[int, float]:
+    gc.collect()
+    async with session_maker() as session:
+        started = time.perf_counter()
+        dtos = await read(session)
+        return len(dtos), time.perf_counter() - started
+
+
+async def measure_peak_memory(session_maker, read) -> float:
+    # Separate pass: tracemalloc slows allocation-heavy code down several times
+    gc.collect()
+    async with session_maker() as session:
+        tracemalloc.start()
+        await read(session)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+async def main(rows: int, repeat: int):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    print(f"Seeding {rows:,} users, items and orders ...")
+    await seed(engine, rows)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    cases = [
+        ("ItemRepository.get_in_stock",
+         orm_reader(Item, ItemDTO, Item.is_sold == False), ItemRepository.get_in_stock),
+        ("UserRepository.get_active",
+         orm_reader(User, UserDTO, User.can_receive_messages == True), UserRepository.get_active),
+        ("OrderRepository.get_expired_orders",
+         orm_reader(Order, OrderDTO, Order.expires_at < datetime.now()), OrderRepository.get_expired_orders),
+    ]
+
+    print(f"\n{'method':<38} {'path':<5} {'rows':>8} {'rows/sec':>12} {'peak MiB':>10}")
+    print("-" * 78)
+    for name, orm_read, bulk_read in cases:
+        for path, read in (("orm", orm_read), ("bulk", bulk_read)):
+            timings = [await measure_time(session_maker, read) for _ in range(repeat)]
+            count, elapsed = min(timings, key=lambda timing: timing[1])
+            peak = await measure_peak_memory(session_maker, read)
+            print(f"{name:<38} {path:<5} {count:>8,} {count / elapsed:>12,.0f} {peak:>10.1f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ORM vs. bulk DTO mapping")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
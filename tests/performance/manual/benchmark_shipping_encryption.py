@@ -0,0 +1,112 @@
+"""
+===============================================================================
+Shipping Address Encryption Benchmark - PBKDF2 per order vs. HKDF subkeys
+===============================================================================
+
+DESCRIPTION:
+    Measures encrypt+decrypt operations/sec of ShippingService for
+      - v1:   key version 1, PBKDF2 (100,000 iterations) per order and call
+      - v2:   key version 2, HKDF subkey of the cached master key
+    and the longest event-loop stall while --concurrency addresses are decrypted
+    concurrently, inline (decrypt_address) vs. in worker threads (decrypt_address_async).
+
+    No bot, .env or database required.
+
+USAGE:
+    From project root:
+        $ python tests/performance/manual/benchmark_shipping_encryption.py
+        $ python tests/performance/manual/benchmark_shipping_encryption.py --ops 200 --concurrency 50
+===============================================================================
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+# Minimal TEST-mode configuration (no webhook, no ngrok)
+os.environ.setdefault("RUNTIME_ENVIRONMENT", "TEST")
+os.environ.setdefault("ADMIN_ID_LIST", "0")
+os.environ.setdefault("PAGE_ENTRIES", "8")
+os.environ.setdefault("CURRENCY", "EUR")
+os.environ.setdefault("DB_NAME", "benchmark.db")
+os.environ.setdefault("KRYPTO_EXPRESS_API_SECRET", "")
+os.environ.setdefault("ENCRYPTION_SECRET", "benchmark-shipping-secret")
+
+import models.payment  # noqa: E402,F401
+from models.shipping_address import ShippingAddress  # noqa: E402
+from services.shipping import ShippingService, KEY_VERSION_PBKDF2, KEY_VERSION_HKDF  # noqa: E402
+
+ADDRESS = "Max Mustermann\nMusterstraße 1\n12345 Musterstadt\nDeutschland"
+
+
+def measure_ops(key_version: int, ops: int) -> float:
+    started = time.perf_counter()
+    for order_id in range(ops):
+        encrypted, nonce, tag = ShippingService.encrypt_address(ADDRESS, order_id, key_version)
+        ShippingService.decrypt_address(encrypted, nonce, tag, order_id, key_version)
+    return ops / (time.perf_counter() - started)
+
+
+async def measure_max_stall(decrypt, addresses: list[ShippingAddress]) -> float:
+    """Longest gap between ticks of a 1 ms heartbeat task while all addresses are decrypted."""
+    max_stall = 0.0
+    done = False
+
+    async def heartbeat():
+        nonlocal max_stall
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            max_stall = max(max_stall, now - last - 0.001)
+            last = now
+
+    task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.01)
+    await asyncio.gather(*(decrypt(address) for address in addresses))
+    done = True
+    await task
+    return max_stall * 1000
+
+
+async def decrypt_inline(address: ShippingAddress) -> str:
+    return ShippingService.decrypt_address(address.encrypted_address, address.nonce, address.tag,
+                                           address.order_id, address.key_version)
+
+
+async def main(ops: int, concurrency: int):
+    started = time.perf_counter()
+    await ShippingService.warm_up()
+    print(f"Master key derivation (once per process): {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+    print(f"{'key version':<16} {'ops/sec':>12}")
+    print("-" * 29)
+    for name, key_version in (("v1 (PBKDF2)", KEY_VERSION_PBKDF2), ("v2 (HKDF)", KEY_VERSION_HKDF)):
+        # PBKDF2 is ~1000x slower - keep its run short
+        count = max(ops // 100, 5) if key_version == KEY_VERSION_PBKDF2 else ops
+        print(f"{name:<16} {measure_ops(key_version, count):>12,.0f}")
+
+    print(f"\nMax event-loop stall, {concurrency} concurrent decryptions:")
+    print(f"{'key version':<16} {'inline ms':>10} {'thread ms':>10}")
+    print("-" * 38)
+    for name, key_version in (("v1 (PBKDF2)", KEY_VERSION_PBKDF2), ("v2 (HKDF)", KEY_VERSION_HKDF)):
+        addresses = []
+        for order_id in range(concurrency):
+            encrypted, nonce, tag = ShippingService.encrypt_address(ADDRESS, order_id, key_version)
+            addresses.append(ShippingAddress(order_id=order_id, encrypted_address=encrypted, nonce=nonce, tag=tag,
+                                             key_version=key_version))
+        inline = await measure_max_stall(decrypt_inline, addresses)
+        threaded = await measure_max_stall(ShippingService.decrypt_address_async, addresses)
+        print(f"{name:<16} {inline:>10.1f} {threaded:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark shipping address key derivation")
+    parser.add_argument("--ops", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.ops, args.concurrency))
@@ -0,0 +1,93 @@
+"""
+Tests for the bulk DTO mapping path (Core rows + cached TypeAdapter).
+
+The bulk list reads must return exactly what the per-row
+model_validate(ORM object, from_attributes=True) path returned.
+
+Run with:
+    pytest tests/performance/unit/test_bulk_dto_mapping.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from enums.currency import Currency
+from enums.order_status import OrderStatus
+from models.category import Category
+from models.item import Item, ItemDTO
+from models.order import Order, OrderDTO
+from models.subcategory import Subcategory
+from models.user import User, UserDTO
+from repositories.item import ItemRepository
+from repositories.order import OrderRepository
+from repositories.user import UserRepository
+from utils.dto_mapping import dto_columns, rows_to_dtos, _list_adapter
+
+
+@pytest_asyncio.fixture
+async def seeded_session(db_session):
+    now = datetime.now()
+    db_session.add_all([Category(id=1, name="Digital"), Subcategory(id=1, name="Gift Cards")])
+    db_session.add_all([User(id=i, telegram_id=100 + i, telegram_username=f"user{i}", registered_at=now,
+                             can_receive_messages=i % 4 != 0, top_up_amount=i * 1.5)
+                        for i in range(1, 21)])
+    await db_session.flush()
+    db_session.add_all([Order(id=i, user_id=i, status=OrderStatus.PENDING_PAYMENT, total_price=10.0 + i,
+                              currency=Currency.EUR, created_at=now, shipping_cost=1.5 * (i % 2),
+                              expires_at=now + timedelta(minutes=10 - i))
+                        for i in range(1, 21)])
+    db_session.add_all([Item(id=i, category_id=1, subcategory_id=1, price=2.5 * i, description=f"Item {i}",
+                             is_sold=i % 3 == 0, is_physical=i % 5 == 0, reserved_at=now if i % 2 else None)
+                        for i in range(1, 41)])
+    await db_session.commit()
+    db_session.expunge_all()
+    yield db_session
+
+
+async def _orm_path(session, model, dto_class, *where):
+    result = await session.execute(select(model).where(*where))
+    return [dto_class.model_validate(obj, from_attributes=True) for obj in result.scalars().all()]
+
+
+@pytest.mark.asyncio
+async def test_get_in_stock_matches_orm_path(seeded_session):
+    expected = await _orm_path(seeded_session, Item, ItemDTO, Item.is_sold == False)
+
+    actual = await ItemRepository.get_in_stock(seeded_session)
+
+    assert len(actual) == 27
+    assert sorted(actual, key=lambda i: i.id) == sorted(expected, key=lambda i: i.id)
+
+
+@pytest.mark.asyncio
+async def test_get_active_matches_orm_path(seeded_session):
+    expected = await _orm_path(seeded_session, User, UserDTO, User.can_receive_messages == True)
+
+    actual = await UserRepository.get_active(seeded_session)
+
+    assert len(actual) == 15
+    assert sorted(actual, key=lambda u: u.id) == sorted(expected, key=lambda u: u.id)
+
+
+@pytest.mark.asyncio
+async def test_get_expired_orders_matches_orm_path(seeded_session):
+    expected = await _orm_path(seeded_session, Order, OrderDTO, Order.expires_at < datetime.now())
+
+    actual = await OrderRepository.get_expired_orders(seeded_session)
+
+    # No ORDER BY in either query - compare independent of plan order
+    assert sorted(actual, key=lambda o: o.id) == sorted(expected, key=lambda o: o.id)
+    assert all(isinstance(order.status, OrderStatus) for order in actual)
+
+
+def test_columns_and_adapter_are_cached():
+    assert dto_columns(Item, ItemDTO) is dto_columns(Item, ItemDTO)
+    assert _list_adapter(ItemDTO) is _list_adapter(ItemDTO)
+    assert "private_data" not in {column.name for column in dto_columns(Item, ItemDTO)}
+
+
+def test_rows_to_dtos_empty():
+    assert rows_to_dtos([], UserDTO) == []
@@ -0,0 +1,134 @@
+"""
+Loader strategy tests: queries and JOINs per repository call.
+
+Item and Order relationships default to lazy="raise". Repository methods that
+map to flat DTOs must run exactly one query without joining categories or
+subcategories; methods that need related rows load them explicitly
+(selectinload) with a known number of queries. Accidental lazy loads raise.
+
+Run with:
+    pytest tests/performance/unit/test_loader_strategies.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+from sqlalchemy.exc import InvalidRequestError
+
+from enums.currency import Currency
+from enums.order_status import OrderStatus
+from models.buy import Buy
+from models.buyItem import BuyItem
+from models.category import Category
+from models.item import Item, ItemDTO
+from models.order import Order
+from models.subcategory import Subcategory
+from models.user import User
+from repositories.item import ItemRepository
+from repositories.order import OrderRepository
+
+
+@pytest_asyncio.fixture
+async def seeded_session(db_session):
+    now = datetime.now()
+    db_session.add_all([Category(id=1, name="Digital"), Subcategory(id=1, name="Gift Cards"),
+                        User(id=1, telegram_id=111, telegram_username="buyer")])
+    await db_session.flush()
+    db_session.add(Order(id=1, user_id=1, status=OrderStatus.PAID_AWAITING_SHIPMENT, total_price=30.0,
+                         currency=Currency.EUR, expires_at=now + timedelta(minutes=30), paid_at=now))
+    await db_session.flush()
+    db_session.add_all([Item(id=i, category_id=1, subcategory_id=1, price=10.0, description="Card",
+                             is_sold=i <= 3, order_id=1 if i <= 3 else None)
+                        for i in range(1, 11)])
+    db_session.add(Buy(id=1, buyer_id=1, quantity=3, total_price=30.0))
+    await db_session.flush()
+    db_session.add_all([BuyItem(id=i, buy_id=1, item_id=i) for i in range(1, 4)])
+    await db_session.commit()
+    db_session.expunge_all()
+    yield db_session
+
+
+class StatementRecorder:
+    def __init__(self, session):
+        self.engine = session.bind.sync_engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def selects(self) -> list[str]:
+        return [s for s in self.statements if s.lstrip().upper().startswith("SELECT")]
+
+    @property
+    def joins(self) -> int:
+        return sum(s.upper().count(" JOIN ") for s in self.selects)
+
+
+# name, coroutine factory, expected SELECT count, expected JOIN count
+ITEM_REPOSITORY_CALLS = [
+    ("get_single", lambda s: ItemRepository.get_single(1, 1, s), 1, 0),
+    ("get_by_id", lambda s: ItemRepository.get_by_id(5, s), 1, 0),
+    ("get_purchased_items", lambda s: ItemRepository.get_purchased_items(1, 1, 2, s), 1, 0),
+    ("get_in_stock", lambda s: ItemRepository.get_in_stock(s), 1, 0),
+    ("get_new", lambda s: ItemRepository.get_new(s), 1, 0),
+    ("get_by_order_id", lambda s: ItemRepository.get_by_order_id(1, s), 1, 0),
+    ("reserve_items_for_order", lambda s: ItemRepository.reserve_items_for_order(1, 2, 1, s), 1, 0),
+    ("get_available_qty", lambda s: ItemRepository.get_available_qty(ItemDTO(category_id=1, subcategory_id=1), s),
+     1, 0),
+    # Live items + items_archive, each joined with buyItem
+    ("get_by_buy_id", lambda s: ItemRepository.get_by_buy_id(1, s), 2, 2),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name,call,expected_queries,expected_joins", ITEM_REPOSITORY_CALLS,
+                         ids=[c[0] for c in ITEM_REPOSITORY_CALLS])
+async def test_item_repository_queries_and_joins(seeded_session, name, call, expected_queries, expected_joins):
+    with StatementRecorder(seeded_session) as recorder:
+        await call(seeded_session)
+
+    assert len(recorder.selects) == expected_queries, recorder.selects
+    assert recorder.joins == expected_joins, recorder.selects
+    assert not any("categories" in s or "subcategories" in s for s in recorder.selects)
+
+
+@pytest.mark.asyncio
+async def test_order_with_items_uses_one_extra_query(seeded_session):
+    with StatementRecorder(seeded_session) as recorder:
+        order = await OrderRepository.get_by_id_with_items(1, seeded_session)
+        item_ids = sorted(item.id for item in order.items)
+
+    assert item_ids == [1, 2, 3]
+    # Order + selectinload(Order.items), no JOIN
+    assert len(recorder.selects) == 2
+    assert recorder.joins == 0
+
+
+@pytest.mark.asyncio
+async def test_orders_awaiting_shipment_batch_loads_items(seeded_session):
+    with StatementRecorder(seeded_session) as recorder:
+        orders = await OrderRepository.get_orders_awaiting_shipment(seeded_session)
+        total_items = sum(len(order.items) for order in orders)
+
+    assert total_items == 3
+    assert len(recorder.selects) == 2
+
+
+@pytest.mark.asyncio
+async def test_implicit_lazy_load_raises(seeded_session):
+    item = (await seeded_session.execute(select(Item).where(Item.id == 1))).scalar_one()
+
+    with pytest.raises(InvalidRequestError):
+        _ = item.subcategory
+    with pytest.raises(InvalidRequestError):
+        _ = item.order
@@ -0,0 +1,118 @@
+"""
+Tests for the keyset-paged purchase history (BuyRepository.get_purchase_history).
+
+Covers:
+- One statement per page, whatever the page
+- Walking forward (older) and back (newer) visits every purchase exactly once, in order
+- Subcategory names resolve for items in both items and items_archive
+- Purchases of other users and buys with equal timestamps
+
+Run with:
+    pytest tests/performance/unit/test_purchase_history.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+import config
+from models.buy import Buy
+from models.buyItem import BuyItem
+from models.category import Category
+from models.item import Item
+from models.item_archive import ItemArchive
+from models.subcategory import Subcategory
+from models.user import User
+from repositories.buy import BuyRepository
+
+BUYS = 20
+
+
+@pytest_asyncio.fixture
+async def history_session(db_session):
+    """User 1 has 20 buys (id 20 newest; 4 and 5, split by a page boundary, share a timestamp)."""
+    now = datetime.now()
+    db_session.add_all([Category(id=1, name="category"),
+                        Subcategory(id=1, name="Live"), Subcategory(id=2, name="Archived"),
+                        User(id=1, telegram_id=111), User(id=2, telegram_id=222)])
+    await db_session.flush()
+    for buy_id in range(1, BUYS + 2):
+        buyer_id = 1 if buy_id <= BUYS else 2
+        buy_datetime = now - timedelta(hours=BUYS - (5 if buy_id == 4 else buy_id))
+        db_session.add(Buy(id=buy_id, buyer_id=buyer_id, quantity=buy_id, total_price=10.0,
+                           buy_datetime=buy_datetime))
+        # Two items per buy - the history shows the first one; odd buys' items are archived
+        for item_id in (buy_id * 2 - 1, buy_id * 2):
+            if buy_id % 2:
+                db_session.add(ItemArchive(id=item_id, category_id=1, subcategory_id=2, price=10.0,
+                                           description="archived"))
+            else:
+                db_session.add(Item(id=item_id, category_id=1, subcategory_id=1, price=10.0, description="live",
+                                    is_sold=True))
+    await db_session.flush()
+    db_session.add_all([BuyItem(buy_id=buy_id, item_id=item_id)
+                        for buy_id in range(1, BUYS + 2) for item_id in (buy_id * 2 - 1, buy_id * 2)])
+    await db_session.commit()
+    yield db_session
+
+
+def _buy_ids(page) -> list[int]:
+    return [entry.buy_id for entry in page.entries]
+
+
+class TestPurchaseHistory:
+
+    @pytest.mark.asyncio
+    async def test_one_statement_per_page(self, history_session):
+        statements = []
+        sync_engine = history_session.bind.sync_engine
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            await BuyRepository.get_purchase_history(1, 0, history_session)
+            await BuyRepository.get_purchase_history(1, 13, history_session)
+            await BuyRepository.get_purchase_history(1, -5, history_session)
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+        assert len(statements) == 3
+
+    @pytest.mark.asyncio
+    async def test_walk_older_and_back(self, history_session):
+        newest_first = list(range(BUYS, 0, -1))
+
+        first = await BuyRepository.get_purchase_history(1, 0, history_session)
+        second = await BuyRepository.get_purchase_history(1, first.entries[-1].buy_id, history_session)
+        third = await BuyRepository.get_purchase_history(1, second.entries[-1].buy_id, history_session)
+
+        assert _buy_ids(first) + _buy_ids(second) + _buy_ids(third) == newest_first
+        assert (first.has_newer, first.has_older) == (False, True)
+        assert (second.has_newer, second.has_older) == (True, True)
+        assert (third.has_newer, third.has_older) == (True, False)
+        assert len(third.entries) == BUYS - 2 * config.PAGE_ENTRIES
+
+        back = await BuyRepository.get_purchase_history(1, -third.entries[0].buy_id, history_session)
+        assert _buy_ids(back) == _buy_ids(second)
+        assert (back.has_newer, back.has_older) == (True, True)
+        top = await BuyRepository.get_purchase_history(1, -back.entries[0].buy_id, history_session)
+        assert _buy_ids(top) == _buy_ids(first)
+        assert (top.has_newer, top.has_older) == (False, True)
+
+    @pytest.mark.asyncio
+    async def test_entries_resolve_live_and_archived_items(self, history_session):
+        page = await BuyRepository.get_purchase_history(1, 0, history_session)
+
+        assert {entry.buy_id: (entry.subcategory_name, entry.quantity) for entry in page.entries[:2]} == \
+               {20: ("Live", 20), 19: ("Archived", 19)}
+
+    @pytest.mark.asyncio
+    async def test_only_own_purchases(self, history_session):
+        page = await BuyRepository.get_purchase_history(2, 0, history_session)
+
+        assert _buy_ids(page) == [BUYS + 1]
+        assert (page.has_newer, page.has_older) == (False, False)
@@ -0,0 +1,244 @@
+"""
+Query plan regression tests.
+
+Every repository query against the hot tables is executed against a seeded
+in-memory database, captured at the cursor level and re-run through
+EXPLAIN QUERY PLAN. A plain "SCAN <table>" step (no index used) fails the test,
+so a new query or a dropped index shows up here instead of in production.
+
+Run with:
+    pytest tests/performance/unit/test_query_plans.py -v
+"""
+
+import re
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+from callbacks import StatisticsTimeDelta
+from enums.currency import Currency
+from enums.order_status import OrderStatus
+from models.buy import Buy
+from models.buyItem import BuyItem
+from models.category import Category
+from models.invoice import Invoice
+from models.item import Item, ItemDTO
+from models.order import Order
+from models.subcategory import Subcategory
+from models.user import User
+from repositories.buy import BuyRepository
+from repositories.buyItem import BuyItemRepository
+from repositories.invoice import InvoiceRepository
+from repositories.item import ItemRepository
+from repositories.item_archive import ItemArchiveRepository
+from repositories.item_payload import ItemPayloadRepository
+from repositories.order import OrderRepository
+from repositories.payment_event import PaymentEventRepository
+from repositories.processed_payment_event import ProcessedPaymentEventRepository
+from repositories.statistics import StatisticsRepository
+from repositories.user import UserRepository
+
+HOT_TABLES = {"items", "items_archive", "item_payloads", "orders", "invoices", "buys", "buyItem", "users",
+              "processed_payment_events", "payment_events", "deposits"}
+
+# "SCAN items" / "SCAN items AS i" without "USING [COVERING] INDEX" is a full table scan
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+# Queries that read the whole table by design (broadcast, admin totals).
+# Keep this list short - everything else must hit an index.
+FULL_SCAN_ALLOWED = {
+    "UserRepository.get_active",
+    "UserRepository.get_all_count",
+    # Admin refund listing pages over every non-refunded buy; without ANALYZE statistics
+    # SQLite drives the join from buyItem, which is equivalent work for this query.
+    "BuyRepository.get_refund_data",
+}
+
+
+@pytest_asyncio.fixture
+async def seeded_session(db_session):
+    now = datetime.now()
+    categories = [Category(id=i, name=f"category-{i}") for i in range(1, 4)]
+    subcategories = [Subcategory(id=i, name=f"subcategory-{i}") for i in range(1, 7)]
+    users = [User(id=i, telegram_id=1000 + i, telegram_username=f"user{i}",
+                  registered_at=now - timedelta(days=i), is_blocked=(i % 10 == 0),
+                  blocked_at=now if i % 10 == 0 else None)
+             for i in range(1, 51)]
+    db_session.add_all(categories + subcategories + users)
+    await db_session.flush()
+
+    orders = []
+    invoices = []
+    for i in range(1, 41):
+        status = [OrderStatus.PENDING_PAYMENT, OrderStatus.PAID,
+                  OrderStatus.PAID_AWAITING_SHIPMENT, OrderStatus.TIMEOUT][i % 4]
+        orders.append(Order(id=i, user_id=(i % 50) + 1, status=status, total_price=10.0 + i,
+                            currency=Currency.EUR, created_at=now, expires_at=now + timedelta(minutes=i - 20),
+                            paid_at=now if status != OrderStatus.PENDING_PAYMENT else None))
+        invoices.append(Invoice(id=i, order_id=i, invoice_number=f"2025-{i:06d}", payment_processing_id=5000 + i,
+                                fiat_amount=10.0 + i, fiat_currency=Currency.EUR))
+    db_session.add_all(orders + invoices)
+    await db_session.flush()
+
+    items = []
+    for i in range(1, 301):
+        is_sold = i % 3 == 0
+        items.append(Item(id=i, category_id=(i % 3) + 1, subcategory_id=(i % 6) + 1,
+                          price=5.0 + (i % 6), is_sold=is_sold, is_new=(i % 5 == 0),
+                          description="seeded", order_id=(i % 40) + 1 if is_sold or i % 7 == 0 else None))
+    db_session.add_all(items)
+    await db_session.flush()
+
+    buys = [Buy(id=i, buyer_id=(i % 50) + 1, quantity=1, total_price=5.0 + i,
+                buy_datetime=now - timedelta(days=i % 30), is_refunded=(i % 9 == 0))
+            for i in range(1, 101)]
+    db_session.add_all(buys)
+    await db_session.flush()
+    db_session.add_all([BuyItem(id=i, buy_id=i, item_id=i * 3) for i in range(1, 101)])
+    await db_session.commit()
+    yield db_session
+
+
+def _repository_calls():
+    """(name, coroutine factory) for every repository read/write path on the hot tables."""
+    item_dto = ItemDTO(category_id=2, subcategory_id=3)
+    return [
+        ("ItemRepository.get_price", lambda s: ItemRepository.get_price(item_dto, s)),
+        ("ItemRepository.get_available_qty", lambda s: ItemRepository.get_available_qty(item_dto, s)),
+        ("ItemRepository.get_single", lambda s: ItemRepository.get_single(2, 3, s)),
+        ("ItemRepository.get_by_id", lambda s: ItemRepository.get_by_id(5, s)),
+        ("ItemRepository.get_purchased_items", lambda s: ItemRepository.get_purchased_items(2, 3, 2, s)),
+        ("ItemRepository.get_by_buy_id", lambda s: ItemRepository.get_by_buy_id(3, s)),
+        ("ItemRepository.set_not_new", lambda s: ItemRepository.set_not_new(s)),
+        ("ItemRepository.get_new", lambda s: ItemRepository.get_new(s)),
+        ("ItemRepository.get_in_stock", lambda s: ItemRepository.get_in_stock(s)),
+        ("ItemRepository.get_available_quantity_for_subcategory",
+         lambda s: ItemRepository.get_available_quantity_for_subcategory(3, s)),
+        ("ItemRepository.reserve_items_for_order", lambda s: ItemRepository.reserve_items_for_order(3, 2, 1, s)),
+        ("ItemRepository.get_by_order_id", lambda s: ItemRepository.get_by_order_id(4, s)),
+        ("ItemRepository.get_sold_items_by_subcategory",
+         lambda s: ItemRepository.get_sold_items_by_subcategory(3, 1, 8.0, 2, s)),
+        ("ItemRepository.delete_unsold_by_subcategory_id",
+         lambda s: ItemRepository.delete_unsold_by_subcategory_id(6, s)),
+        ("ItemRepository.delete_unsold_by_category_id", lambda s: ItemRepository.delete_unsold_by_category_id(3, s)),
+        ("ItemArchiveRepository.get_archivable_ids",
+         lambda s: ItemArchiveRepository.get_archivable_ids(datetime.now(), 50, s)),
+        ("ItemArchiveRepository.move_to_archive", lambda s: ItemArchiveRepository.move_to_archive([3, 6, 9], s)),
+        ("ItemArchiveRepository.get_by_id", lambda s: ItemArchiveRepository.get_by_id(3, s)),
+        ("ItemArchiveRepository.get_by_buy_id", lambda s: ItemArchiveRepository.get_by_buy_id(1, s)),
+        ("ItemPayloadRepository.get_by_item_ids", lambda s: ItemPayloadRepository.get_by_item_ids([1, 2, 3], s)),
+        ("OrderRepository.get_by_id", lambda s: OrderRepository.get_by_id(1, s)),
+        ("OrderRepository.get_by_id_with_items", lambda s: OrderRepository.get_by_id_with_items(1, s)),
+        ("OrderRepository.get_pending_order_by_user", lambda s: OrderRepository.get_pending_order_by_user(5, s)),
+        ("OrderRepository.update_status", lambda s: OrderRepository.update_status(3, OrderStatus.SHIPPED, s)),
+        ("OrderRepository.get_expired_orders", lambda s: OrderRepository.get_expired_orders(s)),
+        ("OrderRepository.get_by_user_id", lambda s: OrderRepository.get_by_user_id(3, s)),
+        ("OrderRepository.get_total_spent_by_currency",
+         lambda s: OrderRepository.get_total_spent_by_currency(3, s)),
+        ("OrderRepository.get_orders_awaiting_shipment", lambda s: OrderRepository.get_orders_awaiting_shipment(s)),
+        ("OrderRepository.get_shipping_queue", lambda s: OrderRepository.get_shipping_queue(0, s)),
+        ("OrderRepository.get_max_page_shipping_queue", lambda s: OrderRepository.get_max_page_shipping_queue(s)),
+        ("OrderRepository.get_shipping_queue_length", lambda s: OrderRepository.get_shipping_queue_length(s)),
+        ("OrderRepository.get_shipping_queue_entries",
+         lambda s: OrderRepository.get_shipping_queue_entries([2, 6, 10], s)),
+        ("OrderRepository.mark_shipped", lambda s: OrderRepository.mark_shipped([2, 6, 10], s)),
+        ("InvoiceRepository.get_by_order_id", lambda s: InvoiceRepository.get_by_order_id(2, s)),
+        ("InvoiceRepository.get_all_by_order_id", lambda s: InvoiceRepository.get_all_by_order_id(2, s)),
+        ("InvoiceRepository.get_by_payment_processing_id",
+         lambda s: InvoiceRepository.get_by_payment_processing_id(5002, s)),
+        ("ProcessedPaymentEventRepository.exists",
+         lambda s: ProcessedPaymentEventRepository.exists(5002, True, "0xabc", s)),
+        ("PaymentEventRepository.get_due",
+         lambda s: PaymentEventRepository.get_due(datetime.now(), 4, {1, 2}, s)),
+        ("PaymentEventRepository.get_queue_length", lambda s: PaymentEventRepository.get_queue_length(s)),
+        ("BuyRepository.get_max_refund_page", lambda s: BuyRepository.get_max_refund_page(s)),
+        ("BuyRepository.get_refund_data", lambda s: BuyRepository.get_refund_data(0, s)),
+        ("BuyRepository.get_refund_data_single", lambda s: BuyRepository.get_refund_data_single(1, s)),
+        ("BuyRepository.get_by_id", lambda s: BuyRepository.get_by_id(1, s)),
+        ("BuyRepository.mark_refunded", lambda s: BuyRepository.mark_refunded(1, s)),
+        ("BuyRepository.get_by_timedelta", lambda s: BuyRepository.get_by_timedelta(StatisticsTimeDelta.WEEK, s)),
+        ("BuyRepository.get_purchase_history", lambda s: BuyRepository.get_purchase_history(4, 0, s)),
+        ("BuyRepository.get_purchase_history (older)", lambda s: BuyRepository.get_purchase_history(4, 53, s)),
+        ("BuyRepository.get_purchase_history (newer)", lambda s: BuyRepository.get_purchase_history(4, -3, s)),
+        ("BuyItemRepository.get_single_by_buy_id", lambda s: BuyItemRepository.get_single_by_buy_id(2, s)),
+        ("BuyItemRepository.get_by_item_ids", lambda s: BuyItemRepository.get_by_item_ids([3, 6, 9], s)),
+        ("UserRepository.get_by_tgid", lambda s: UserRepository.get_by_tgid(1005, s)),
+        ("UserRepository.get_by_id", lambda s: UserRepository.get_by_id(5, s)),
+        ("UserRepository.get_active", lambda s: UserRepository.get_active(s)),
+        ("UserRepository.get_all_count", lambda s: UserRepository.get_all_count(s)),
+        ("UserRepository.get_banned_users", lambda s: UserRepository.get_banned_users(s)),
+        ("UserRepository.get_user_entity", lambda s: UserRepository.get_user_entity("user7", s)),
+        ("UserRepository.get_by_timedelta",
+         lambda s: UserRepository.get_by_timedelta(StatisticsTimeDelta.WEEK, 0, s)),
+        ("UserRepository.get_max_page_by_timedelta",
+         lambda s: UserRepository.get_max_page_by_timedelta(StatisticsTimeDelta.WEEK, s)),
+        ("StatisticsRepository.get_summary",
+         lambda s: StatisticsRepository.get_summary(StatisticsTimeDelta.MONTH, s)),
+        ("StatisticsRepository.get_daily", lambda s: StatisticsRepository.get_daily(StatisticsTimeDelta.MONTH, s)),
+        ("StatisticsRepository.get_subcategory_sales",
+         lambda s: StatisticsRepository.get_subcategory_sales(StatisticsTimeDelta.MONTH, s)),
+    ]
+
+
+async def _capture_statements(session, call) -> list[tuple[str, tuple]]:
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            # executemany (bulk UPDATE on flush) shares one plan - explain it with the first parameter set
+            captured.append((statement, parameters[0] if executemany else parameters))
+
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        await call(session)
+        await session.flush()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+        await session.rollback()
+    return captured
+
+
+async def _full_scans(session, statement: str, parameters) -> list[str]:
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    scans = []
+    for row in result.all():
+        match = FULL_SCAN.match(row[-1])
+        if match and match.group(1) in HOT_TABLES:
+            scans.append(row[-1])
+    await session.rollback()
+    return scans
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name,call", _repository_calls(), ids=[name for name, _ in _repository_calls()])
+async def test_repository_query_uses_indexes(seeded_session, name, call):
+    statements = await _capture_statements(seeded_session, call)
+    assert statements, f"{name} did not execute any query"
+
+    if name in FULL_SCAN_ALLOWED:
+        return
+
+    for statement, parameters in statements:
+        scans = await _full_scans(seeded_session, statement, parameters)
+        assert not scans, f"{name} performs a full table scan ({', '.join(scans)}):\n{statement}"
+
+
+@pytest.mark.asyncio
+async def test_partial_indexes_exist(seeded_session):
+    """The partial indexes are only usable if their WHERE matches what SQLAlchemy renders."""
+    connection = await seeded_session.connection()
+    result = await connection.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '%WHERE%'"
+    )
+    partial = {row[0] for row in result.all()}
+    assert {
+        "idx_items_unsold_subcategory",
+        "idx_items_order_id",
+        "idx_items_is_new",
+        "idx_buys_not_refunded_buy_datetime",
+        "idx_users_blocked_at",
+    } <= partial
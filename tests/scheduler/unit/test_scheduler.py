@@ -0,0 +1,242 @@
+"""
+Tests for the background job scheduler (jobs/scheduler.py).
+
+Covers:
+- Cron expressions: steps, ranges, lists, day-of-month / day-of-week semantics, invalid input
+- Runs are timed and counted; failures and timeouts don't stop the schedule
+- A job never overlaps its own previous run
+- With Redis only the elected leader runs jobs, and a job locked by another instance is skipped
+- All periodic jobs of the bot are registered
+
+Run with:
+    pytest tests/scheduler/unit/test_scheduler.py -v
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from redis.exceptions import LockNotOwnedError
+
+from jobs.registry import create_scheduler
+from jobs.scheduler import CronSchedule, IntervalSchedule, Scheduler
+
+
+class InMemoryRedis:
+    """The subset of redis.asyncio.Redis.lock() the scheduler uses, shared between Scheduler instances."""
+
+    def __init__(self):
+        self.owners: dict[str, object] = {}
+
+    def lock(self, name: str, timeout: float):
+        return InMemoryLock(self, name)
+
+
+class InMemoryLock:
+
+    def __init__(self, redis: InMemoryRedis, name: str):
+        self.redis = redis
+        self.name = name
+
+    async def acquire(self, blocking: bool = True) -> bool:
+        if self.name in self.redis.owners:
+            return False
+        self.redis.owners[self.name] = self
+        return True
+
+    async def reacquire(self):
+        if self.redis.owners.get(self.name) is not self:
+            raise LockNotOwnedError("not owned")
+
+    async def release(self):
+        if self.redis.owners.get(self.name) is not self:
+            raise LockNotOwnedError("not owned")
+        del self.redis.owners[self.name]
+
+
+class TestCronSchedule:
+
+    def test_step_minutes(self):
+        schedule = CronSchedule("*/15 * * * *")
+        assert schedule.next_run(datetime(2025, 11, 12, 10, 7, 30)) == datetime(2025, 11, 12, 10, 15)
+        assert schedule.next_run(datetime(2025, 11, 12, 10, 45)) == datetime(2025, 11, 12, 11, 0)
+
+    def test_daily_rolls_over_to_next_day(self):
+        schedule = CronSchedule("30 3 * * *")
+        assert schedule.next_run(datetime(2025, 11, 12, 3, 29)) == datetime(2025, 11, 12, 3, 30)
+        assert schedule.next_run(datetime(2025, 11, 12, 3, 30)) == datetime(2025, 11, 13, 3, 30)
+        assert schedule.next_run(datetime(2025, 12, 31, 4, 0)) == datetime(2026, 1, 1, 3, 30)
+
+    def test_ranges_and_lists(self):
+        schedule = CronSchedule("0,30 9-17/4 * * *")
+        assert schedule.minutes == {0, 30}
+        assert schedule.hours == {9, 13, 17}
+        assert schedule.next_run(datetime(2025, 11, 12, 13, 30)) == datetime(2025, 11, 12, 17, 0)
+
+    def test_weekday(self):
+        # 2025-11-12 is a Wednesday; 0 and 7 are both Sunday
+        assert CronSchedule("0 9 * * 1").next_run(datetime(2025, 11, 12)) == datetime(2025, 11, 17, 9, 0)
+        assert CronSchedule("0 9 * * 7").next_run(datetime(2025, 11, 12)) == datetime(2025, 11, 16, 9, 0)
+
+    def test_day_of_month_or_weekday(self):
+        # Both restricted: the 20th or any Sunday, whichever comes first
+        schedule = CronSchedule("0 0 20 * 0")
+        assert schedule.next_run(datetime(2025, 11, 12)) == datetime(2025, 11, 16)
+        assert schedule.next_run(datetime(2025, 11, 17)) == datetime(2025, 11, 20)
+
+    def test_leap_day(self):
+        assert CronSchedule("0 0 29 2 *").next_run(datetime(2025, 3, 1)) == datetime(2028, 2, 29)
+
+    @pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "5-1 * * * *", "*/0 * * * *",
+                                            "x * * * *"])
+    def test_invalid_expressions(self, expression):
+        with pytest.raises(ValueError):
+            CronSchedule(expression)
+
+    def test_never_matching_expression(self):
+        with pytest.raises(ValueError):
+            CronSchedule("0 0 31 2 *").next_run(datetime(2025, 1, 1))
+
+
+@pytest.mark.asyncio
+class TestScheduler:
+
+    async def test_run_records_duration(self):
+        async def job():
+            await asyncio.sleep(0.01)
+
+        scheduler = Scheduler()
+        scheduler.add_job("job", job, IntervalSchedule(60))
+
+        assert await scheduler.run_job("job")
+
+        stats = scheduler.get_stats()["job"]
+        assert stats.runs == 1
+        assert stats.failures == 0
+        assert 0.01 <= stats.last_duration == stats.max_duration == stats.total_duration
+
+    async def test_failures_and_timeouts_are_counted(self):
+        async def failing():
+            raise RuntimeError("boom")
+
+        async def hanging():
+            await asyncio.sleep(10)
+
+        scheduler = Scheduler()
+        scheduler.add_job("failing", failing, IntervalSchedule(60))
+        scheduler.add_job("hanging", hanging, IntervalSchedule(60), timeout_seconds=0.01)
+
+        await scheduler.run_job("failing")
+        await scheduler.run_job("hanging")
+
+        stats = scheduler.get_stats()
+        assert (stats["failing"].runs, stats["failing"].failures) == (1, 1)
+        assert (stats["hanging"].runs, stats["hanging"].timeouts) == (1, 1)
+        assert stats["hanging"].last_duration < 1
+
+    async def test_runs_do_not_overlap(self):
+        release = asyncio.Event()
+        calls = []
+
+        async def job():
+            calls.append(1)
+            await release.wait()
+
+        scheduler = Scheduler()
+        scheduler.add_job("job", job, IntervalSchedule(60))
+
+        first = asyncio.create_task(scheduler.run_job("job"))
+        await asyncio.sleep(0)
+        assert not await scheduler.run_job("job")
+        release.set()
+        assert await first
+
+        assert len(calls) == 1
+        assert scheduler.get_stats()["job"].skipped == 1
+
+    async def test_duplicate_job_names_are_rejected(self):
+        scheduler = Scheduler()
+        scheduler.add_job("job", asyncio.sleep, IntervalSchedule(60))
+        with pytest.raises(ValueError):
+            scheduler.add_job("job", asyncio.sleep, IntervalSchedule(60))
+
+    async def test_job_keeps_running_on_schedule(self):
+        calls = []
+
+        async def job():
+            calls.append(1)
+            raise RuntimeError("boom")
+
+        scheduler = Scheduler()
+        scheduler.add_job("job", job, IntervalSchedule(0.01), run_on_start=True)
+        await scheduler.start()
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+
+        assert len(calls) >= 3
+
+    async def test_only_the_leader_runs_jobs(self):
+        redis = InMemoryRedis()
+        calls = {"first": 0, "second": 0}
+
+        def make_job(instance):
+            async def job():
+                calls[instance] += 1
+            return job
+
+        first, second = Scheduler(redis), Scheduler(redis)
+        first.add_job("job", make_job("first"), IntervalSchedule(0.01), run_on_start=True)
+        second.add_job("job", make_job("second"), IntervalSchedule(0.01), run_on_start=True)
+        await first.start()
+        await second.start()
+        await asyncio.sleep(0.05)
+
+        assert first.is_leader and not second.is_leader
+        assert calls["first"] > 0 and calls["second"] == 0
+
+        # The leader lock is released on stop; the other instance takes over at its next election
+        await first.stop()
+        await second._elect()
+        assert second.is_leader
+        await asyncio.sleep(0.05)
+        await second.stop()
+
+        assert calls["second"] > 0
+        assert redis.owners == {}
+
+    async def test_job_locked_by_another_instance_is_skipped(self):
+        redis = InMemoryRedis()
+        calls = []
+
+        async def job():
+            calls.append(1)
+
+        scheduler = Scheduler(redis)
+        scheduler.add_job("job", job, IntervalSchedule(60))
+        other_instance = redis.lock("scheduler:job:job", timeout=60)
+        await other_instance.acquire()
+
+        assert not await scheduler.run_job("job")
+        await other_instance.release()
+        assert await scheduler.run_job("job")
+
+        assert len(calls) == 1
+        assert scheduler.get_stats()["job"].skipped == 1
+
+    async def test_lost_leadership(self):
+        redis = InMemoryRedis()
+        scheduler = Scheduler(redis)
+        await scheduler._elect()
+        assert scheduler.is_leader
+
+        # Lock expired and was taken by another instance
+        redis.owners[Scheduler.LEADER_KEY] = object()
+        await scheduler._elect()
+
+        assert not scheduler.is_leader
+
+    async def test_bot_jobs_are_registered(self):
+        scheduler = create_scheduler()
+
+        assert set(scheduler.get_stats()) == {"payment_timeout", "payment_reconciliation", "price_refresh",
+                                              "item_archive", "wallet_snapshot", "data_retention"}
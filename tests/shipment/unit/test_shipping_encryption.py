@@ -0,0 +1,116 @@
+"""
+Tests for shipping address encryption key versions (services/shipping.py).
+
+Covers:
+- Current key version (HKDF subkey of the master key) roundtrip
+- Legacy key version 1 (PBKDF2 per order) ciphertexts stay readable
+- Keys are order-specific
+- The master key is derived once per process
+- save/get through the database, re-encryption of legacy rows
+
+Run with:
+    pytest tests/shipment/unit/test_shipping_encryption.py -v
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+import config  # noqa: E402
+from cryptography.exceptions import InvalidTag  # noqa: E402
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from enums.currency import Currency  # noqa: E402
+from enums.order_status import OrderStatus  # noqa: E402
+from models.order import Order  # noqa: E402
+from models.shipping_address import ShippingAddress  # noqa: E402
+from models.user import User  # noqa: E402
+from services.shipping import ShippingService, KEY_VERSION_PBKDF2, CURRENT_KEY_VERSION  # noqa: E402
+
+ADDRESS = "Max Mustermann\nMusterstraße 1\n12345 Musterstadt"
+
+
+@pytest.fixture(autouse=True)
+def secret():
+    ShippingService._master_key = None
+    with patch.object(config, "SHIPPING_ADDRESS_SECRET", "test-shipping-secret"):
+        yield
+    ShippingService._master_key = None
+
+
+async def _create_orders(session, order_ids):
+    session.add(User(id=1, telegram_id=111, telegram_username="buyer"))
+    await session.flush()
+    for order_id in order_ids:
+        session.add(Order(id=order_id, user_id=1, status=OrderStatus.PAID, total_price=50.0,
+                          currency=Currency.EUR, expires_at=datetime.now() + timedelta(minutes=30)))
+    await session.flush()
+
+
+class TestShippingEncryption:
+
+    def test_current_version_roundtrip(self):
+        encrypted, nonce, tag = ShippingService.encrypt_address(ADDRESS, 42)
+
+        assert ShippingService.decrypt_address(encrypted, nonce, tag, 42) == ADDRESS
+
+    def test_legacy_version_stays_readable(self):
+        encrypted, nonce, tag = ShippingService.encrypt_address(ADDRESS, 42, KEY_VERSION_PBKDF2)
+
+        assert ShippingService.decrypt_address(encrypted, nonce, tag, 42, KEY_VERSION_PBKDF2) == ADDRESS
+        with pytest.raises(InvalidTag):
+            ShippingService.decrypt_address(encrypted, nonce, tag, 42, CURRENT_KEY_VERSION)
+
+    def test_keys_are_order_specific(self):
+        encrypted, nonce, tag = ShippingService.encrypt_address(ADDRESS, 42)
+
+        assert ShippingService._derive_order_key(42, CURRENT_KEY_VERSION) != \
+               ShippingService._derive_order_key(43, CURRENT_KEY_VERSION)
+        with pytest.raises(InvalidTag):
+            ShippingService.decrypt_address(encrypted, nonce, tag, 43)
+
+    def test_unknown_key_version_is_rejected(self):
+        with pytest.raises(ValueError):
+            ShippingService._derive_order_key(42, 99)
+
+    def test_master_key_is_derived_once(self):
+        with patch("services.shipping.PBKDF2HMAC", wraps=PBKDF2HMAC) as pbkdf2:
+            for order_id in range(20):
+                ShippingService.encrypt_address(ADDRESS, order_id)
+
+        assert pbkdf2.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_save_and_get(self, db_session):
+        await _create_orders(db_session, [7])
+        await ShippingService.save_shipping_address(7, ADDRESS, db_session)
+
+        stored = (await db_session.execute(select(ShippingAddress))).scalar_one()
+        assert stored.key_version == CURRENT_KEY_VERSION
+        assert ADDRESS.encode() not in stored.encrypted_address
+        assert await ShippingService.get_shipping_address(7, db_session) == ADDRESS
+        assert await ShippingService.get_shipping_address(8, db_session) is None
+
+    @pytest.mark.asyncio
+    async def test_reencrypt_legacy_addresses(self, db_session):
+        await _create_orders(db_session, [1, 2, 3])
+        for order_id in (1, 2, 3):
+            encrypted, nonce, tag = ShippingService.encrypt_address(f"{ADDRESS} {order_id}", order_id,
+                                                                    KEY_VERSION_PBKDF2)
+            db_session.add(ShippingAddress(order_id=order_id, encrypted_address=encrypted, nonce=nonce, tag=tag,
+                                           key_version=KEY_VERSION_PBKDF2))
+        await db_session.commit()
+
+        assert await ShippingService.reencrypt_legacy_addresses(2, db_session) == 2
+        assert await ShippingService.reencrypt_legacy_addresses(2, db_session) == 1
+        assert await ShippingService.reencrypt_legacy_addresses(2, db_session) == 0
+        await db_session.commit()
+
+        versions = (await db_session.execute(select(ShippingAddress.key_version))).scalars().all()
+        assert versions == [CURRENT_KEY_VERSION] * 3
+        for order_id in (1, 2, 3):
+            assert await ShippingService.get_shipping_address(order_id, db_session) == f"{ADDRESS} {order_id}"
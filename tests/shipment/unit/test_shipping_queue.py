@@ -0,0 +1,105 @@
+"""
+Tests for the paginated admin shipping queue and the bulk "mark as shipped" action
+(OrderRepository.get_shipping_queue / mark_shipped).
+
+Covers:
+- A queue page (order, first invoice number, buyer) is read in one statement
+- Pagination over the orders awaiting shipment
+- Bulk mark_shipped only changes orders that are still awaiting shipment
+
+Run with:
+    pytest tests/shipment/unit/test_shipping_queue.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+
+import config
+from enums.currency import Currency
+from enums.order_status import OrderStatus
+from models.invoice import Invoice
+from models.order import Order
+from models.user import User
+from repositories.order import OrderRepository
+
+
+@pytest_asyncio.fixture
+async def queue_session(db_session):
+    """20 orders awaiting shipment (id 1 newest payment), 2 already shipped; orders 1-19 have two invoices."""
+    now = datetime.now()
+    db_session.add_all([User(id=1, telegram_id=111, telegram_username="buyer"),
+                        User(id=2, telegram_id=222, telegram_username=None)])
+    await db_session.flush()
+    for order_id in range(1, 23):
+        status = OrderStatus.PAID_AWAITING_SHIPMENT if order_id <= 20 else OrderStatus.SHIPPED
+        db_session.add(Order(id=order_id, user_id=order_id % 2 + 1, status=status, total_price=10.0 + order_id,
+                             currency=Currency.EUR, created_at=now, expires_at=now,
+                             paid_at=now - timedelta(minutes=order_id)))
+    await db_session.flush()
+    for order_id in range(1, 20):
+        db_session.add_all([
+            Invoice(order_id=order_id, invoice_number=f"2025-{order_id:06d}", fiat_amount=10.0,
+                    fiat_currency=Currency.EUR),
+            Invoice(order_id=order_id, invoice_number=f"2025-{order_id:06d}-2", fiat_amount=1.0,
+                    fiat_currency=Currency.EUR, is_partial_payment=2),
+        ])
+    await db_session.commit()
+    yield db_session
+
+
+class TestShippingQueue:
+
+    @pytest.mark.asyncio
+    async def test_page_is_one_query(self, queue_session):
+        statements = []
+        sync_engine = queue_session.bind.sync_engine
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            entries = await OrderRepository.get_shipping_queue(0, queue_session)
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+        assert len(statements) == 1
+        assert [entry.order_id for entry in entries] == list(range(1, config.PAGE_ENTRIES + 1))
+        assert entries[0].invoice_number == "2025-000001"
+        assert (entries[0].telegram_id, entries[0].telegram_username) == (222, None)
+        assert (entries[1].telegram_id, entries[1].telegram_username) == (111, "buyer")
+
+    @pytest.mark.asyncio
+    async def test_pagination(self, queue_session):
+        last_page = await OrderRepository.get_max_page_shipping_queue(queue_session)
+        pages = [await OrderRepository.get_shipping_queue(page, queue_session) for page in range(last_page + 1)]
+
+        assert last_page == 2  # 20 orders, 8 per page
+        assert [entry.order_id for page in pages for entry in page] == list(range(1, 21))
+        # Order without invoice
+        assert pages[-1][-1].invoice_number is None
+
+    @pytest.mark.asyncio
+    async def test_empty_queue_has_one_page(self, db_session):
+        assert await OrderRepository.get_max_page_shipping_queue(db_session) == 0
+        assert await OrderRepository.get_shipping_queue(0, db_session) == []
+
+    @pytest.mark.asyncio
+    async def test_mark_shipped_skips_orders_not_awaiting_shipment(self, queue_session):
+        shipped_ids = await OrderRepository.mark_shipped([1, 2, 21, 99], queue_session)
+        await queue_session.commit()
+
+        assert sorted(shipped_ids) == [1, 2]
+        rows = (await queue_session.execute(
+            select(Order.id, Order.status, Order.shipped_at).where(Order.id.in_([1, 2, 3]))
+        )).all()
+        assert {row.id: row.status for row in rows} == {1: OrderStatus.SHIPPED, 2: OrderStatus.SHIPPED,
+                                                        3: OrderStatus.PAID_AWAITING_SHIPMENT}
+        assert all(row.shipped_at for row in rows if row.id != 3)
+        assert await OrderRepository.mark_shipped([1, 2], queue_session) == []
+
+        entries = await OrderRepository.get_shipping_queue_entries(shipped_ids, queue_session)
+        assert {entry.order_id: entry.telegram_id for entry in entries} == {1: 222, 2: 111}
@@ -0,0 +1,216 @@
+"""
+Tests for the daily statistics rollups (repositories/statistics.py).
+
+Covers:
+- Buys, deposits and new users created through the repositories are counted in the rollups
+- Items sold per subcategory, for live and archived items
+- Refunds subtract their buy again, a second refund of the same buy changes nothing
+- Closed days are read from the rollups, the current day from the raw tables
+- Window boundaries (today plus timedelta - 1 days)
+- A summary is a fixed number of statements, independent of the volume
+
+Run with:
+    pytest tests/statistics/unit/test_daily_statistics.py -v
+"""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+
+from callbacks import StatisticsTimeDelta
+from enums.cryptocurrency import Cryptocurrency
+from models.buy import Buy, BuyDTO
+from models.buyItem import BuyItemDTO
+from models.category import Category
+from models.deposit import DepositDTO
+from models.item import Item
+from models.item_archive import ItemArchive
+from models.statistics import DailyStatistics
+from models.subcategory import Subcategory
+from models.user import UserDTO
+from repositories.buy import BuyRepository
+from repositories.buyItem import BuyItemRepository
+from repositories.deposit import DepositRepository
+from repositories.statistics import StatisticsRepository
+from repositories.user import UserRepository
+from repositories.wallet import WalletRepository
+from services.buy import BuyService
+from services.notification import NotificationService
+from utils.localizator import Localizator
+
+
+def _days_ago(days: int) -> datetime:
+    return datetime.now() - timedelta(days=days)
+
+
+@pytest_asyncio.fixture
+async def user_id(db_session):
+    user_id = await UserRepository.create(UserDTO(telegram_id=111, telegram_username="buyer",
+                                                  registered_at=_days_ago(3)), db_session)
+    await db_session.commit()
+    return user_id
+
+
+class TestDailyStatistics:
+
+    @pytest.mark.asyncio
+    async def test_buys_are_counted_per_day(self, db_session, user_id):
+        await BuyRepository.create(BuyDTO(buyer_id=user_id, quantity=2, total_price=20.0,
+                                          buy_datetime=_days_ago(1)), db_session)
+        await BuyRepository.create(BuyDTO(buyer_id=user_id, quantity=1, total_price=5.5,
+                                          buy_datetime=_days_ago(1)), db_session)
+        await BuyRepository.create(BuyDTO(buyer_id=user_id, quantity=3, total_price=30.0), db_session)
+        await db_session.commit()
+
+        rollup = (await db_session.execute(
+            select(DailyStatistics).where(DailyStatistics.day == _days_ago(1).date())
+        )).scalar_one()
+        assert (rollup.sales_count, rollup.revenue, rollup.items_sold) == (2, 25.5, 3)
+
+        summary = await StatisticsRepository.get_summary(StatisticsTimeDelta.WEEK, db_session)
+        assert (summary.sales_count, summary.revenue, summary.items_sold) == (3, 55.5, 6)
+        assert summary.new_users == 1
+
+    @pytest.mark.asyncio
+    async def test_refund_subtracts_the_buy(self, db_session, user_id):
+        buy_id = await BuyRepository.create(BuyDTO(buyer_id=user_id, quantity=2, total_price=20.0,
+                                                   buy_datetime=_days_ago(2)), db_session)
+        await StatisticsRepository.add_sales(_days_ago(2).date(), -1, -20.0, -2, db_session)
+        buy = await BuyRepository.get_by_id(buy_id, db_session)
+        buy.is_refunded = True
+        await BuyRepository.update(buy, db_session)
+        await db_session.commit()
+
+        summary = await StatisticsRepository.get_summary(StatisticsTimeDelta.WEEK, db_session)
+        assert (summary.sales_count, summary.revenue, summary.items_sold) == (0, 0.0, 0)
+
+    @pytest.mark.asyncio
+    async def test_second_refund_is_rejected(self, db_session, user_id):
+        db_session.add_all([Category(id=1, name="category"), Subcategory(id=1, name="Gift Cards")])
+        await db_session.flush()
+        db_session.add(Item(id=1, category_id=1, subcategory_id=1, price=20.0, description="card", is_sold=True))
+        buy_id = await BuyRepository.create(BuyDTO(buyer_id=user_id, quantity=1, total_price=20.0,
+                                                   buy_datetime=_days_ago(2)), db_session)
+        await BuyItemRepository.create_many([BuyItemDTO(buy_id=buy_id, item_id=1)], db_session)
+        await db_session.commit()
+
+        with patch.object(Localizator, "get_text", side_effect=lambda entity, key: key), \
+                patch.object(Localizator, "get_currency_symbol", return_value="€"), \
+                patch.object(NotificationService, "refund", new_callable=AsyncMock) as notify:
+            assert await BuyService.refund(BuyDTO(id=buy_id), db_session) == "successfully_refunded_with_username"
+            assert await BuyService.refund(BuyDTO(id=buy_id), db_session) == "already_refunded"
+
+        notify.assert_awaited_once()
+        assert await WalletRepository.get_balance(user_id, db_session) == 20.0
+        summary = await StatisticsRepository.get_summary(StatisticsTimeDelta.WEEK, db_session)
+        assert (summary.sales_count, summary.revenue, summary.items_sold) == (0, 0.0, 0)
+        sales = await StatisticsRepository.get_subcategory_sales(StatisticsTimeDelta.WEEK, db_session)
+        assert sales == []
+
+    @pytest.mark.asyncio
+    async def test_items_sold_per_subcategory(self, db_session, user_id):
+        db_session.add_all([Category(id=1, name="category"),
+                            Subcategory(id=1, name="Live"), Subcategory(id=2, name="Archived")])
+        await db_session.flush()
+        db_session.add_all([Item(id=item_id, category_id=1, subcategory_id=1, price=1.0, description="live",
+                                 is_sold=True) for item_id in (1, 2, 3)]
+                           + [ItemArchive(id=4, category_id=1, subcategory_id=2, price=1.0, description="archived")])
+        for buy_datetime, item_ids in ((_days_ago(2), [1, 4]), (_days_ago(1), [2]), (datetime.now(), [3])):
+            buy_id = await BuyRepository.create(BuyDTO(buyer_id=user_id, quantity=len(item_ids), total_price=1.0,
+                                                       buy_datetime=buy_datetime), db_session)
+            await BuyItemRepository.create_many([BuyItemDTO(buy_id=buy_id, item_id=item_id)
+                                                 for item_id in item_ids], db_session)
+        await db_session.commit()
+
+        sales = await StatisticsRepository.get_subcategory_sales(StatisticsTimeDelta.WEEK, db_session)
+        assert [(entry.subcategory_name, entry.items_sold) for entry in sales] == [("Live", 3), ("Archived", 1)]
+
+        # Refund of the first buy
+        await StatisticsRepository.add_subcategory_sales(1, -1, db_session)
+        await db_session.commit()
+
+        sales = await StatisticsRepository.get_subcategory_sales(StatisticsTimeDelta.WEEK, db_session)
+        assert [(entry.subcategory_name, entry.items_sold) for entry in sales] == [("Live", 2)]
+
+    @pytest.mark.asyncio
+    async def test_daily_series_covers_every_day_of_the_window(self, db_session, user_id):
+        await BuyRepository.create(BuyDTO(buyer_id=user_id, quantity=1, total_price=4.0,
+                                          buy_datetime=_days_ago(2)), db_session)
+        await BuyRepository.create(BuyDTO(buyer_id=user_id, quantity=1, total_price=6.0), db_session)
+        await db_session.commit()
+
+        days = await StatisticsRepository.get_daily(StatisticsTimeDelta.WEEK, db_session)
+
+        assert [day.day for day in days] == [date.today() - timedelta(days=offset) for offset in range(6, -1, -1)]
+        assert [day.revenue for day in days] == [0.0] * 4 + [4.0, 0.0, 6.0]
+        assert days[3].new_users == 1
+
+    @pytest.mark.asyncio
+    async def test_closed_days_come_from_rollups_today_from_raw_rows(self, db_session, user_id):
+        # Raw rows without rollup: only today's are visible
+        db_session.add_all([Buy(buyer_id=user_id, quantity=1, total_price=1.0, buy_datetime=_days_ago(1)),
+                            Buy(buyer_id=user_id, quantity=1, total_price=2.0, buy_datetime=datetime.now())])
+        # Rollup rows without raw rows: only closed days are visible
+        await StatisticsRepository.add_sales(date.today() - timedelta(days=1), 10, 100.0, 10, db_session)
+        await StatisticsRepository.add_sales(date.today(), 10, 100.0, 10, db_session)
+        await db_session.commit()
+
+        summary = await StatisticsRepository.get_summary(StatisticsTimeDelta.WEEK, db_session)
+
+        assert (summary.sales_count, summary.revenue) == (11, 102.0)
+
+    @pytest.mark.asyncio
+    async def test_window_boundaries(self, db_session, user_id):
+        for days in (0, 1, 6, 7, 29, 30):
+            await BuyRepository.create(BuyDTO(buyer_id=user_id, quantity=1, total_price=1.0,
+                                              buy_datetime=_days_ago(days)), db_session)
+        await db_session.commit()
+
+        counts = [(await StatisticsRepository.get_summary(statistics_timedelta, db_session)).sales_count
+                  for statistics_timedelta in StatisticsTimeDelta]
+
+        assert counts == [1, 3, 5]
+
+    @pytest.mark.asyncio
+    async def test_deposits_per_network(self, db_session, user_id):
+        await DepositRepository.create(DepositDTO(user_id=user_id, network=Cryptocurrency.BTC, amount=150_000_000,
+                                                  deposit_datetime=_days_ago(1)), db_session)
+        await DepositRepository.create_many([
+            DepositDTO(user_id=user_id, network=Cryptocurrency.BTC, amount=50_000_000, tx_id="a", vout=0),
+            DepositDTO(user_id=user_id, network=Cryptocurrency.USDT_TRC20, amount=25_000_000, tx_id="b"),
+        ], db_session)
+        await db_session.commit()
+
+        summary = await StatisticsRepository.get_summary(StatisticsTimeDelta.DAY, db_session)
+        assert summary.deposits_count == 2
+        assert summary.deposit_amounts == {Cryptocurrency.BTC: 0.5, Cryptocurrency.USDT_TRC20: 25.0}
+
+        summary = await StatisticsRepository.get_summary(StatisticsTimeDelta.WEEK, db_session)
+        assert summary.deposits_count == 3
+        assert summary.deposit_amounts[Cryptocurrency.BTC] == pytest.approx(2.0)
+
+    @pytest.mark.asyncio
+    async def test_summary_statement_count_is_fixed(self, db_session, user_id):
+        for days in range(30):
+            for _ in range(5):
+                await BuyRepository.create(BuyDTO(buyer_id=user_id, quantity=1, total_price=1.0,
+                                                  buy_datetime=_days_ago(days)), db_session)
+        await db_session.commit()
+
+        statements = []
+        sync_engine = db_session.bind.sync_engine
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            summary = await StatisticsRepository.get_summary(StatisticsTimeDelta.MONTH, db_session)
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+        assert summary.sales_count == 150
+        assert len(statements) == 5
@@ -0,0 +1,118 @@
+"""
+Tests for the admin statistics charts (services/statistics_chart.py, utils/charts.py).
+
+Covers:
+- Charts are valid PNGs, also for empty windows
+- Repeated and concurrent views share one query and one render
+- A failed chart is not cached
+- The shared render reads in its own session, outside the viewer's query budget,
+  and survives a cancelled viewer
+- Every chart type renders from the rollups
+
+Run with:
+    pytest tests/statistics/unit/test_statistics_charts.py -v
+"""
+
+import asyncio
+import io
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from PIL import Image
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+import services.statistics_chart as statistics_chart
+from callbacks import StatisticsChart, StatisticsTimeDelta
+from services.statistics_chart import StatisticsChartService
+from utils.charts import render_bar_chart
+from utils.localizator import Localizator
+from utils.query_counter import QueryCounter
+
+
+@pytest_asyncio.fixture
+async def chart_service(db_engine):
+    """Test database, chart titles without l10n files, worker processes stopped afterwards."""
+    QueryCounter.instrument(db_engine)
+    session_maker = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def test_session():
+        async with session_maker() as session:
+            yield session
+
+    with patch.object(statistics_chart, "get_db_session", test_session), \
+            patch.object(Localizator, "get_text", return_value="{timedelta} days, {time}"), \
+            patch.object(Localizator, "get_currency_text", return_value="EUR"):
+        yield StatisticsChartService
+    StatisticsChartService.shutdown()
+
+
+def _image(png: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(png))
+
+
+class TestStatisticsCharts:
+
+    def test_render_bar_chart(self):
+        png = render_bar_chart("Revenue", [f"{day:02d}.11" for day in range(1, 31)], [day * 1.5 for day in range(30)])
+        image = _image(png)
+
+        assert image.format == "PNG"
+        assert image.size == (1200, 600)
+
+    def test_render_empty_chart(self):
+        assert _image(render_bar_chart("Nothing yet", [], [])).format == "PNG"
+
+    @pytest.mark.asyncio
+    async def test_repeated_views_are_cached(self, chart_service):
+        original = StatisticsChartService._get_series
+        with patch.object(StatisticsChartService, "_get_series", side_effect=original) as get_series:
+            charts = await asyncio.gather(*(chart_service.get_chart(StatisticsChart.REVENUE, StatisticsTimeDelta.WEEK)
+                                            for _ in range(5)))
+            again = await chart_service.get_chart(StatisticsChart.REVENUE, StatisticsTimeDelta.WEEK)
+            other_window = await chart_service.get_chart(StatisticsChart.REVENUE, StatisticsTimeDelta.MONTH)
+
+        assert get_series.await_count == 2
+        assert len(set(charts)) == 1 and again == charts[0]
+        assert other_window != charts[0]
+
+    @pytest.mark.asyncio
+    async def test_failed_chart_is_retried(self, chart_service):
+        original = StatisticsChartService._get_series
+        calls = []
+
+        async def fail_once(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError("database is locked")
+            return await original(*args)
+
+        with patch.object(StatisticsChartService, "_get_series", side_effect=fail_once):
+            with pytest.raises(RuntimeError):
+                await chart_service.get_chart(StatisticsChart.NEW_USERS, StatisticsTimeDelta.DAY)
+            png = await chart_service.get_chart(StatisticsChart.NEW_USERS, StatisticsTimeDelta.DAY)
+
+        assert _image(png).format == "PNG"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chart", list(StatisticsChart))
+    async def test_every_chart_renders(self, chart_service, chart):
+        png = await chart_service.get_chart(chart, StatisticsTimeDelta.MONTH)
+
+        assert _image(png).size == (1200, 600)
+
+    @pytest.mark.asyncio
+    async def test_render_is_not_part_of_the_viewers_update(self, chart_service):
+        with QueryCounter.track() as queries:
+            first_viewer = asyncio.create_task(chart_service.get_chart(StatisticsChart.REVENUE,
+                                                                       StatisticsTimeDelta.WEEK))
+            await asyncio.sleep(0)
+        second_viewer = asyncio.create_task(chart_service.get_chart(StatisticsChart.REVENUE,
+                                                                    StatisticsTimeDelta.WEEK))
+        await asyncio.sleep(0)
+        first_viewer.cancel()
+
+        assert _image(await second_viewer).format == "PNG"
+        assert queries.statements == 0
@@ -0,0 +1,64 @@
+import io
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Plain module-level functions with picklable arguments: they run in the worker processes of
+# StatisticsChartService, so this module must stay free of bot / database imports.
+
+WIDTH, HEIGHT = 1200, 600
+MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 90, 30, 70, 110
+BACKGROUND = (255, 255, 255)
+AXIS = (90, 90, 90)
+GRID = (225, 225, 225)
+BAR = (52, 120, 200)
+TEXT = (30, 30, 30)
+GRID_LINES = 5
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return f"{int(value)}"
+    return f"{value:.2f}"
+
+
+def render_bar_chart(title: str, labels: list[str], values: list[float]) -> bytes:
+    """Bar chart as PNG bytes. Labels are drawn under the bars, rotated if they don't fit."""
+    image = Image.new("RGB", (WIDTH, HEIGHT), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    title_font = ImageFont.load_default(size=26)
+    font = ImageFont.load_default(size=15)
+
+    draw.text((WIDTH // 2, MARGIN_TOP // 2), title, fill=TEXT, font=title_font, anchor="mm")
+
+    plot_left, plot_right = MARGIN_LEFT, WIDTH - MARGIN_RIGHT
+    plot_top, plot_bottom = MARGIN_TOP, HEIGHT - MARGIN_BOTTOM
+    plot_height = plot_bottom - plot_top
+    max_value = max(values, default=0) or 1
+
+    for line in range(GRID_LINES + 1):
+        y = plot_bottom - plot_height * line / GRID_LINES
+        draw.line([(plot_left, y), (plot_right, y)], fill=GRID)
+        draw.text((plot_left - 8, y), _format_value(max_value * line / GRID_LINES), fill=TEXT, font=font,
+                  anchor="rm")
+    draw.line([(plot_left, plot_top), (plot_left, plot_bottom), (plot_right, plot_bottom)], fill=AXIS, width=2)
+
+    slot = (plot_right - plot_left) / max(len(values), 1)
+    bar_width = max(slot * 0.7, 1)
+    rotate_labels = any(draw.textlength(label, font=font) > slot for label in labels)
+    for index, (label, value) in enumerate(zip(labels, values)):
+        center = plot_left + slot * (index + 0.5)
+        top = plot_bottom - plot_height * max(value, 0) / max_value
+        draw.rectangle([(center - bar_width / 2, top), (center + bar_width / 2, plot_bottom)], fill=BAR)
+        if len(values) <= 31 and value:
+            draw.text((center, top - 4), _format_value(value), fill=TEXT, font=font, anchor="mb")
+        if rotate_labels:
+            label_image = Image.new("RGBA", (int(draw.textlength(label, font=font)) + 2, 20), (0, 0, 0, 0))
+            ImageDraw.Draw(label_image).text((0, 0), label, fill=TEXT, font=font)
+            label_image = label_image.rotate(60, expand=True)
+            image.paste(label_image, (int(center - label_image.width), plot_bottom + 6), label_image)
+        else:
+            draw.text((center, plot_bottom + 8), label, fill=TEXT, font=font, anchor="mt")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
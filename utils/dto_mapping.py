@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Sequence, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Column, Row
+
+DTO = TypeVar("DTO", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(dto_class: type[BaseModel]) -> TypeAdapter:
+    # Building a TypeAdapter compiles a validator - do it once per DTO class
+    return TypeAdapter(list[dto_class])
+
+
+@lru_cache(maxsize=None)
+def dto_columns(model, dto_class: type[BaseModel]) -> tuple[Column, ...]:
+    """
+    Table columns of `model` that have a field in `dto_class`.
+
+    Select these instead of the ORM entity for list reads: rows come back as plain
+    Core tuples, without identity map, instance state or relationship loading.
+    """
+    return tuple(column for column in model.__table__.columns if column.name in dto_class.model_fields)
+
+
+def rows_to_dtos(rows: Sequence[Row], dto_class: type[DTO]) -> list[DTO]:
+    """
+    Validates a whole result set in one pydantic-core call instead of model_validate per row.
+
+    Rows are handed over as dicts: from_attributes on a Row goes through its
+    attribute lookup per field and is several times slower than a dict.
+    """
+    return _list_adapter(dto_class).validate_python([row._asdict() for row in rows])
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+
+from utils.metrics import LOOP_LAG, LOOP_STALLS
+
+# Frames outside the bot's own code (stdlib, site-packages) are skipped when naming the offender
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class StallReport:
+    location: str
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    stack: str = ""
+
+
+class LoopMonitor:
+    """
+    Event loop stall detector (opt-in: LOOP_MONITOR_ENABLED).
+
+    A heartbeat task sleeps LOOP_MONITOR_INTERVAL_SECONDS at a time; how late it wakes up
+    is the loop lag. A watchdog thread checks the heartbeat: once it is overdue by more than
+    LOOP_STALL_THRESHOLD_SECONDS, something is running on the loop without awaiting, and the
+    watchdog captures the stack of the loop thread while it still blocks. Stalls are grouped
+    by the innermost frame of the bot's own code (e.g. services/shipping.py:42 in
+    _derive_key), the lag of the stall is added once the heartbeat runs again.
+    """
+
+    _interval = 0.1
+    _threshold = 0.25
+    _heartbeat_task: asyncio.Task | None = None
+    _watchdog: threading.Thread | None = None
+    _stopped = threading.Event()
+    _lock = threading.Lock()
+    _loop_thread_id: int | None = None
+    _next_beat = 0.0
+    # Location of the stall in progress (captured by the watchdog, closed by the heartbeat)
+    _stalled_at: str | None = None
+    _reports: dict[str, StallReport] = {}
+
+    @staticmethod
+    async def start(interval_seconds: float, threshold_seconds: float):
+        if LoopMonitor._heartbeat_task is not None:
+            return
+        LoopMonitor._interval = interval_seconds
+        LoopMonitor._threshold = threshold_seconds
+        LoopMonitor._loop_thread_id = threading.get_ident()
+        LoopMonitor._next_beat = time.perf_counter() + interval_seconds
+        LoopMonitor._stopped.clear()
+        LoopMonitor._heartbeat_task = asyncio.create_task(LoopMonitor._heartbeat())
+        LoopMonitor._watchdog = threading.Thread(target=LoopMonitor._watch, name="loop-monitor", daemon=True)
+        LoopMonitor._watchdog.start()
+        logging.info(f"🩺 Event loop monitor started (stall threshold {threshold_seconds * 1000:.0f} ms)")
+
+    @staticmethod
+    async def stop():
+        if LoopMonitor._heartbeat_task is None:
+            return
+        LoopMonitor._stopped.set()
+        LoopMonitor._heartbeat_task.cancel()
+        try:
+            await LoopMonitor._heartbeat_task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.to_thread(LoopMonitor._watchdog.join)
+        LoopMonitor._heartbeat_task = None
+        LoopMonitor._watchdog = None
+
+    @staticmethod
+    def is_running() -> bool:
+        return LoopMonitor._heartbeat_task is not None
+
+    @staticmethod
+    def get_top_offenders(limit: int = 10) -> list[StallReport]:
+        """Stall locations by total time the loop was blocked, worst first."""
+        with LoopMonitor._lock:
+            reports = list(LoopMonitor._reports.values())
+        return sorted(reports, key=lambda report: report.total_seconds, reverse=True)[:limit]
+
+    @staticmethod
+    def reset():
+        with LoopMonitor._lock:
+            LoopMonitor._reports = {}
+            LoopMonitor._stalled_at = None
+
+    @staticmethod
+    async def _heartbeat():
+        while True:
+            with LoopMonitor._lock:
+                LoopMonitor._next_beat = time.perf_counter() + LoopMonitor._interval
+            await asyncio.sleep(LoopMonitor._interval)
+            lag = max(time.perf_counter() - LoopMonitor._next_beat, 0.0)
+            LOOP_LAG.observe(lag)
+            with LoopMonitor._lock:
+                location, LoopMonitor._stalled_at = LoopMonitor._stalled_at, None
+                if location is not None:
+                    report = LoopMonitor._reports[location]
+                    report.total_seconds += lag
+                    report.max_seconds = max(report.max_seconds, lag)
+            if location is not None:
+                logging.warning(f"🐌 Event loop blocked for {lag * 1000:.0f} ms at {location}")
+
+    @staticmethod
+    def _watch():
+        # Polls often enough to catch the loop thread inside a stall just over the threshold
+        while not LoopMonitor._stopped.wait(LoopMonitor._threshold / 4):
+            with LoopMonitor._lock:
+                overdue = time.perf_counter() - LoopMonitor._next_beat
+                if overdue < LoopMonitor._threshold or LoopMonitor._stalled_at is not None:
+                    continue
+                frame = sys._current_frames().get(LoopMonitor._loop_thread_id)
+                if frame is None:
+                    continue
+                stack = traceback.extract_stack(frame)
+                location = LoopMonitor._locate(stack)
+                report = LoopMonitor._reports.setdefault(location, StallReport(location))
+                report.count += 1
+                report.stack = "".join(stack.format())
+                LoopMonitor._stalled_at = location
+            LOOP_STALLS.inc(location)
+
+    @staticmethod
+    def _locate(stack: traceback.StackSummary) -> str:
+        for frame in reversed(stack):
+            if frame.filename.startswith(_PROJECT_ROOT) and "site-packages" not in frame.filename:
+                return f"{os.path.relpath(frame.filename, _PROJECT_ROOT)}:{frame.lineno} in {frame.name}"
+        frame = stack[-1]
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
@@ -0,0 +1,157 @@
+import math
+from bisect import bisect_left
+
+# Prometheus text exposition format (version 0.0.4), without the prometheus_client dependency.
+# Recording is a dict lookup and an addition, so it can be called on the hot path
+# (every update, statement and Bot API call); formatting only happens on a scrape.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+JOB_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, 1800, 3600)
+STATEMENT_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, object] = {}
+        MetricsRegistry.register(self)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        for labels, value in sorted(self._values.items(), key=lambda item: tuple(map(str, item[0]))):
+            lines.extend(self._render_sample(labels, value))
+        return lines
+
+    def _render_sample(self, labels: tuple, value) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"]
+
+    def clear(self):
+        self._values = {}
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set_total(self, value: float, *labels):
+        """For collectors mirroring a count that is kept elsewhere (e.g. HttpClient metrics)."""
+        self._values[labels] = value
+
+
+class Gauge(Metric):
+    TYPE = "gauge"
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    """Per label set: observation count per bucket (cumulated on render), sum and count."""
+
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        series = self._values.get(labels)
+        if series is None:
+            # [bucket counts..., +Inf count, sum]
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _render_sample(self, labels: tuple, series: list) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), series):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+        label_text = _format_labels(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+        lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """All metrics of the process, rendered by the /metrics endpoint of bot.py (see MetricsService)."""
+
+    _metrics: list[Metric] = []
+
+    @staticmethod
+    def register(metric: Metric):
+        MetricsRegistry._metrics.append(metric)
+
+    @staticmethod
+    def render() -> str:
+        lines = []
+        for metric in MetricsRegistry._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+UPDATE_DURATION = Histogram("bot_update_duration_seconds", "Handling time of updates",
+                            ("router", "handler", "level"))
+UPDATE_ERRORS = Counter("bot_update_errors_total", "Updates whose handler raised", ("router", "handler"))
+UPDATE_DB_STATEMENTS = Histogram("bot_update_db_statements", "Database statements per update",
+                                 ("router", "handler"), STATEMENT_COUNT_BUCKETS)
+UPDATE_DB_DURATION = Histogram("bot_update_db_seconds", "Database time per update", ("router", "handler"))
+UPDATE_OVER_QUERY_BUDGET = Counter("bot_update_over_query_budget_total",
+                                   "Updates that executed more statements than their query budget",
+                                   ("router", "handler"))
+UPDATE_REPEATED_STATEMENTS = Counter("bot_update_repeated_statements_total",
+                                     "Updates that repeated one statement QUERY_REPEAT_THRESHOLD times (N+1)",
+                                     ("router", "handler"))
+THROTTLED_EVENTS = Counter("bot_throttled_events_total", "Events dropped by the throttling middleware", ("key",))
+
+DB_STATEMENTS = Counter("db_statements_total", "Database statements (updates, jobs and workers)")
+DB_STATEMENT_DURATION = Histogram("db_statement_duration_seconds", "Duration of database statements")
+
+TELEGRAM_API_DURATION = Histogram("telegram_api_duration_seconds", "Bot API call latency", ("method",))
+TELEGRAM_API_ERRORS = Counter("telegram_api_errors_total", "Failed Bot API calls", ("method", "error"))
+
+CRYPTO_API_DURATION = Histogram("crypto_api_duration_seconds",
+                                "Latency of KryptoExpress, price and explorer API calls (per attempt)",
+                                ("endpoint",))
+CRYPTO_API_ERRORS = Counter("crypto_api_errors_total", "Failed crypto API attempts", ("endpoint",))
+CRYPTO_API_RETRIES = Counter("crypto_api_retries_total", "Retried crypto API attempts", ("endpoint",))
+
+JOB_DURATION = Histogram("scheduler_job_duration_seconds", "Run time of scheduled jobs", ("job",), JOB_BUCKETS)
+JOB_RUNS = Counter("scheduler_job_runs_total", "Scheduled job runs by result (ok, failed, timeout, skipped)",
+                   ("job", "result"))
+SCHEDULER_LEADER = Gauge("scheduler_leader", "1 if this instance runs the scheduled jobs")
+
+QUEUE_DEPTH = Gauge("queue_depth", "Entries waiting in a queue", ("queue",))
+
+LOOP_LAG = Histogram("event_loop_lag_seconds", "Delay of the event loop monitor heartbeat", (), LOOP_LAG_BUCKETS)
+LOOP_STALLS = Counter("event_loop_stalls_total", "Event loop blocked longer than LOOP_STALL_THRESHOLD_SECONDS, "
+                                                 "by blocking code location", ("location",))
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from weakref import WeakValueDictionary
+
+from redis.exceptions import LockError
+
+import config
+
+
+class OrderLock:
+    """
+    Mutual exclusion for code that changes the payment state of one order or deposit.
+
+    The payment webhook and PaymentTimeoutJob both move orders out of PENDING_PAYMENT;
+    without a lock a retried webhook and the timeout job could run the same order through
+    two handlers at once. SQLite has no advisory locks, so:
+    - a process-local asyncio.Lock serializes tasks of this process
+    - a Redis lock (if configured via OrderLock.configure) serializes across processes
+    """
+
+    _local_locks: WeakValueDictionary = WeakValueDictionary()
+    _redis = None
+
+    @staticmethod
+    def configure(redis) -> None:
+        OrderLock._redis = redis
+
+    @staticmethod
+    def order_key(order_id: int) -> str:
+        return f"order:{order_id}"
+
+    @staticmethod
+    def deposit_key(payment_processing_id: int) -> str:
+        return f"deposit:{payment_processing_id}"
+
+    @staticmethod
+    @asynccontextmanager
+    async def acquire(key: str):
+        # Strong reference for the lifetime of the block; the entry disappears once no task holds it
+        local_lock = OrderLock._local_locks.get(key)
+        if local_lock is None:
+            local_lock = asyncio.Lock()
+            OrderLock._local_locks[key] = local_lock
+
+        async with local_lock:
+            if OrderLock._redis is None:
+                yield
+                return
+
+            redis_lock = OrderLock._redis.lock(
+                f"lock:{key}",
+                timeout=config.ORDER_LOCK_TIMEOUT_SECONDS,
+                blocking_timeout=config.ORDER_LOCK_TIMEOUT_SECONDS
+            )
+            if not await redis_lock.acquire():
+                raise TimeoutError(f"Could not acquire lock {key} within {config.ORDER_LOCK_TIMEOUT_SECONDS}s")
+            try:
+                yield
+            finally:
+                try:
+                    await redis_lock.release()
+                except LockError:
+                    # Expired while held (processing took longer than the timeout)
+                    logging.warning(f"Lock {key} expired before release")
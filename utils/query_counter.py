@@ -0,0 +1,112 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from sqlalchemy import event
+
+from utils.metrics import DB_STATEMENTS, DB_STATEMENT_DURATION
+
+# Expanded IN lists ("IN (?, ?, ?)") of different lengths are the same statement
+_IN_LIST = re.compile(r"\(\?(?:,\s*\?)+\)")
+MAX_SHAPE_LENGTH = 300
+
+
+@lru_cache(maxsize=2048)
+def _statement_shape(statement: str) -> str:
+    return " ".join(_IN_LIST.sub("(?...)", statement).split())
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """
+    Database statements and time of one unit of work (an update, see DBSessionMiddleware).
+
+    The engine hooks (QueryCounter.instrument) add every statement to the counter of the
+    current context - the task handling the update and the tasks it starts - and to the
+    process-wide metrics. Statements are also counted per shape (SQL with placeholders), so
+    a query issued once per row of an earlier result (N+1) shows up as one repeated shape.
+    """
+
+    _current: ContextVar["QueryCounter | None"] = ContextVar("query_counter", default=None)
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        self.shapes: dict[str, int] = {}
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statement shapes executed at least `threshold` times, most frequent first."""
+        return sorted(((shape, count) for shape, count in self.shapes.items() if count >= threshold),
+                      key=lambda entry: entry[1], reverse=True)
+
+    def report(self, repeat_threshold: int = 2) -> str:
+        lines = [f"{self.statements} statements, {self.seconds * 1000:.1f} ms"]
+        lines.extend(f"  {count}x {shape[:MAX_SHAPE_LENGTH]}" for shape, count in self.repeated(repeat_threshold))
+        return "\n".join(lines)
+
+    @staticmethod
+    def instrument(engine):
+        """Attaches the statement hooks to the engine (async engines: their sync_engine). Idempotent."""
+        engine = getattr(engine, "sync_engine", engine)
+        if not event.contains(engine, "before_cursor_execute", QueryCounter._before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", QueryCounter._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", QueryCounter._after_cursor_execute)
+            event.listen(engine, "handle_error", QueryCounter._handle_error)
+
+    @staticmethod
+    @contextmanager
+    def track():
+        """Counts the statements executed inside the block (by this task) in a new QueryCounter."""
+        counter = QueryCounter()
+        token = QueryCounter._current.set(counter)
+        try:
+            yield counter
+        finally:
+            QueryCounter._current.reset(token)
+
+    @staticmethod
+    @contextmanager
+    def assert_budget(max_statements: int, max_repeats: int | None = None):
+        """
+        For tests and benchmarks: raises QueryBudgetExceeded if the block executes more than
+        `max_statements` statements, or one statement shape more than `max_repeats` times.
+        The engine has to be instrumented (QueryCounter.instrument).
+
+        with QueryCounter.assert_budget(5, max_repeats=1):
+            await CartService.create_buttons(message, session)
+        """
+        with QueryCounter.track() as counter:
+            yield counter
+        if counter.statements > max_statements:
+            raise QueryBudgetExceeded(f"Query budget of {max_statements} exceeded: {counter.report()}")
+        if max_repeats is not None and counter.repeated(max_repeats + 1):
+            raise QueryBudgetExceeded(f"Statement repeated more than {max_repeats} times: "
+                                      f"{counter.report(max_repeats + 1)}")
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_started"].pop()
+        DB_STATEMENTS.inc()
+        DB_STATEMENT_DURATION.observe(seconds)
+        counter = QueryCounter._current.get()
+        if counter is not None:
+            counter.statements += 1
+            counter.seconds += seconds
+            shape = _statement_shape(statement)
+            counter.shapes[shape] = counter.shapes.get(shape, 0) + 1
+
+    @staticmethod
+    def _handle_error(exception_context):
+        # Failed statements don't reach after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
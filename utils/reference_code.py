@@ -0,0 +1,69 @@
+import hashlib
+
+import config
+
+
+class ReferenceCode:
+    """
+    Maps sequence numbers to 6-character codes for invoice numbers and top-up references.
+
+    The code is a keyed Feistel permutation of the number, written in a 32-character alphabet
+    without confusable characters (0/O, 1/I). A permutation is a bijection, so distinct numbers
+    always give distinct codes - no uniqueness check against the table is needed - while
+    consecutive numbers don't give guessable consecutive codes.
+    """
+
+    ALPHABET = '23456789ABCDEFGHJKLMNPQRSTUVWXYZ'
+    LENGTH = 6
+    HALF_BITS = 15  # 32^6 = 2^30 codes, permuted as two 15-bit halves
+    ROUNDS = 4
+    CAPACITY = 1 << (2 * HALF_BITS)
+    # Sequence values tried per reference before giving up (see InvoiceRepository.get_next_invoice_number)
+    MAX_ATTEMPTS = 10
+
+    @staticmethod
+    def require_secret():
+        """Raises if REFERENCE_CODE_SECRET is not set (called at startup and before each code)."""
+        if not config.REFERENCE_CODE_SECRET:
+            raise RuntimeError("REFERENCE_CODE_SECRET is not set (see .env.template)")
+
+    @staticmethod
+    def _key() -> bytes:
+        ReferenceCode.require_secret()
+        return hashlib.sha256(config.REFERENCE_CODE_SECRET.encode()).digest()
+
+    @staticmethod
+    def _round(key: bytes, half: int, round_index: int, tweak: str) -> int:
+        digest = hashlib.blake2b(f"{tweak}:{round_index}:{half}".encode(), key=key, digest_size=4).digest()
+        return int.from_bytes(digest, "big") & ((1 << ReferenceCode.HALF_BITS) - 1)
+
+    @staticmethod
+    def encode(value: int, tweak: str) -> str:
+        """`tweak` separates the code spaces of different reference kinds (e.g. "invoice", "topup")."""
+        if not 0 <= value < ReferenceCode.CAPACITY:
+            raise OverflowError(f"Reference sequence value {value} exceeds {ReferenceCode.CAPACITY - 1}")
+        key = ReferenceCode._key()
+        mask = (1 << ReferenceCode.HALF_BITS) - 1
+        left, right = value >> ReferenceCode.HALF_BITS, value & mask
+        for round_index in range(ReferenceCode.ROUNDS):
+            left, right = right, left ^ ReferenceCode._round(key, right, round_index, tweak)
+        permuted = (left << ReferenceCode.HALF_BITS) | right
+
+        code = []
+        for _ in range(ReferenceCode.LENGTH):
+            permuted, digit = divmod(permuted, len(ReferenceCode.ALPHABET))
+            code.append(ReferenceCode.ALPHABET[digit])
+        return ''.join(reversed(code))
+
+    @staticmethod
+    def decode(code: str, tweak: str) -> int:
+        """Inverse of encode (e.g. to find the sequence number of a reference)."""
+        permuted = 0
+        for char in code:
+            permuted = permuted * len(ReferenceCode.ALPHABET) + ReferenceCode.ALPHABET.index(char)
+        key = ReferenceCode._key()
+        mask = (1 << ReferenceCode.HALF_BITS) - 1
+        left, right = permuted >> ReferenceCode.HALF_BITS, permuted & mask
+        for round_index in reversed(range(ReferenceCode.ROUNDS)):
+            left, right = right ^ ReferenceCode._round(key, left, round_index, tweak), left
+        return (left << ReferenceCode.HALF_BITS) | right
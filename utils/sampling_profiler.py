@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+@dataclass
+class Profile:
+    seconds: float
+    samples: int
+    # Collapsed stacks ("thread;outer;...;inner count" per line), the input of flamegraph.pl and speedscope
+    collapsed: str
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for production: a thread records the stacks of all other threads
+    every SAMPLE_INTERVAL_SECONDS. Nothing is hooked into the profiled code, so the overhead
+    is the sampling thread alone, and only while a profile runs. A function on many samples
+    is where the time goes - whether it computes, blocks the loop or the loop idles in
+    select() waiting for updates.
+    """
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    async def profile(seconds: float) -> Profile:
+        """Samples for `seconds` (one profile at a time, raises ProfilerBusy otherwise)."""
+        if not SamplingProfiler._lock.acquire(blocking=False):
+            raise ProfilerBusy()
+        try:
+            return await asyncio.to_thread(SamplingProfiler._sample, seconds)
+        finally:
+            SamplingProfiler._lock.release()
+
+    @staticmethod
+    def _sample(seconds: float) -> Profile:
+        own_thread = threading.get_ident()
+        stacks: dict[str, int] = {}
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = SamplingProfiler._collapse(thread_names.get(thread_id, str(thread_id)), frame)
+                stacks[stack] = stacks.get(stack, 0) + 1
+            samples += 1
+            time.sleep(SAMPLE_INTERVAL_SECONDS)
+        collapsed = "".join(f"{stack} {count}\n" for stack, count in
+                            sorted(stacks.items(), key=lambda entry: entry[1], reverse=True))
+        return Profile(time.perf_counter() - started, samples, collapsed)
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        names = []
+        while frame is not None:
+            names.append(SamplingProfiler._frame_name(frame))
+            frame = frame.f_back
+        names.append(thread_name.replace(";", ":"))
+        return ";".join(reversed(names))
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        # Per function, not per line, so the samples of one function add up to one flame graph box
+        filename = frame.f_code.co_filename
+        if filename.startswith(_PROJECT_ROOT):
+            filename = os.path.relpath(filename, _PROJECT_ROOT)
+        else:
+            filename = os.path.basename(filename)
+        return f"{frame.f_code.co_name} ({filename})".replace(";", ":")